@@ -96,23 +96,17 @@ order_formatter = logging.Formatter('%(asctime)s - ORDER_OPS - %(message)s')
 order_handler.setFormatter(order_formatter)
 order_operations_logger.addHandler(order_handler)
 
-# Logger de auditoria com rotation (configurado em audit_service.py)
-audit_logger = logging.getLogger('sistema_combinado.audit')
-audit_logger.setLevel(logging.INFO)
-
-audit_handler = RotatingFileHandler(
-    'logs/audit.log',
-    maxBytes=20*1024*1024,  # 20MB (maior porque auditoria é crítica)
-    backupCount=20,  # Mantém mais backups para auditoria
-    encoding='utf-8'
-)
-audit_handler.setLevel(logging.INFO)
-audit_formatter = logging.Formatter('%(asctime)s - AUDIT - %(message)s')
-audit_handler.setFormatter(audit_formatter)
-audit_logger.addHandler(audit_handler)
+# Logger de auditoria: fila + thread de gravação com destino único (logs/audit.log com rotation)
+from services.audit_writer import AuditLogWriter
+audit_logger = AuditLogWriter.install(app.config)
 
 from models import db
 db.init_app(app)
+
+# Eventos de auditoria também gravados (em lote, pela mesma thread) na tabela indexada audit_events
+if app.config.get('AUDIT_EVENT_STORE_ENABLED', True):
+    from services.audit_store import AuditEventStore
+    AuditEventStore.attach(app)
 migrate = Migrate(app, db)
 
 # Configurar Flask-Login
@@ -125,8 +119,8 @@ login_manager.login_message_category = 'info'
 
 @login_manager.user_loader
 def load_user(user_id):
-    from models import User
-    return User.query.get(int(user_id))
+    from services.user_loader import UserLoader
+    return UserLoader.get(int(user_id))
 
 # Configurar proteção CSRF
 csrf = CSRFProtect(app)
@@ -140,6 +134,22 @@ limiter.init_app(app)
 def handle_rate_limit_error(e):
     return rate_limit_error_handler(e)
 
+# Configurar barramento de invalidação de cache entre workers
+from services.cache_invalidation_service import CacheInvalidationBus
+CacheInvalidationBus.init_app(app)
+
+# Manter consolidação mensal por usuário (user_monthly_stats) a cada flush
+from services.user_monthly_stats_service import UserMonthlyStatsService
+UserMonthlyStatsService.register()
+
+# Manter estatísticas acumuladas por prestador (provider_stats) a cada flush
+from services.provider_stats_service import ProviderStatsService
+ProviderStatsService.register()
+
+# Invalidar dashboards em cache quando dados do usuário são gravados
+from services.dashboard_payload_service import DashboardPayloadService
+DashboardPayloadService.register()
+
 # Configurar Middleware de Performance
 from services.performance_middleware import PerformanceMiddleware
 performance = PerformanceMiddleware(app)
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3.11
+# -*- coding: utf-8 -*-
+
+"""
+Script para recalcular as métricas diárias de propostas (proposal_metrics)
+
+Deve ser executado após aplicar migrations/add_proposal_metrics_partials.sql.
+Processa o histórico em blocos de dias, cada um em sua transação; pode ser
+repetido ou retomado a partir de qualquer data.
+
+Uso:
+    python backfill_proposal_metrics.py
+    python backfill_proposal_metrics.py --start 2025-01-01 --end 2025-06-30 --chunk-days 7
+"""
+
+import sys
+import os
+import argparse
+from datetime import date
+
+# Adicionar diretório raiz ao path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import app
+from services.proposal_metrics_service import ProposalMetricsService
+import logging
+
+# Configurar logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Recalcula as métricas diárias de propostas')
+    parser.add_argument('--start', type=date.fromisoformat, default=None,
+                        help='Primeiro dia (AAAA-MM-DD; padrão: proposta mais antiga)')
+    parser.add_argument('--end', type=date.fromisoformat, default=None,
+                        help='Último dia (AAAA-MM-DD; padrão: hoje)')
+    parser.add_argument('--chunk-days', type=int, default=ProposalMetricsService.BACKFILL_CHUNK_DAYS,
+                        help='Dias por transação')
+    parser.add_argument('--batch-size', type=int, default=ProposalMetricsService.STREAM_BATCH_SIZE,
+                        help='Linhas lidas por lote')
+    args = parser.parse_args()
+
+    with app.app_context():
+        days = ProposalMetricsService.backfill_daily_metrics(
+            start_date=args.start,
+            end_date=args.end,
+            chunk_days=args.chunk_days,
+            batch_size=args.batch_size
+        )
+
+    logger.info(f"Backfill concluído: {days} dias gravados")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3.11
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark da geração de relatórios PDF paginados (ReportService.export_to_pdf_file)
+
+Cria um banco SQLite temporário com N contratos (ou usuários) sintéticos,
+gera o PDF completo e informa linhas por segundo, páginas, tamanho do
+arquivo e pico de memória residente (RSS) do processo. O banco da
+aplicação não é usado.
+
+Uso:
+    python benchmark_pdf_reports.py
+    python benchmark_pdf_reports.py --rows 50000 --report usuarios
+"""
+
+import sys
+import os
+import argparse
+import resource
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# Adicionar diretório raiz ao path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from flask import Flask
+from config import TestConfig
+from models import db, User, Order
+from services.report_service import ReportService
+import logging
+
+# Configurar logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def peak_rss_mb():
+    """Pico de RSS do processo (ru_maxrss é em KB no Linux e em bytes no macOS)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def seed(report_type, rows):
+    """Insere os dados sintéticos em lotes"""
+    start = datetime(2026, 1, 1)
+    if report_type == 'usuarios':
+        for offset in range(0, rows, 5000):
+            db.session.execute(User.__table__.insert(), [{
+                'email': f'usuario{index}@benchmark.local',
+                'nome': f'Usuário {index}',
+                'cpf': f'{index:011d}',
+                'phone': '11999999999',
+                'password_hash': '-',
+                'roles': 'cliente,prestador' if index % 3 == 0 else 'cliente',
+                'active': index % 10 != 0,
+                'created_at': start + timedelta(minutes=index),
+            } for index in range(offset, min(offset + 5000, rows))])
+        db.session.commit()
+        return
+
+    client = User(email='cliente@benchmark.local', nome='Cliente Benchmark', cpf='00000000000',
+                  phone='11999999999', roles='cliente', password_hash='-')
+    db.session.add(client)
+    db.session.commit()
+    for offset in range(0, rows, 5000):
+        db.session.execute(Order.__table__.insert(), [{
+            'client_id': client.id,
+            'title': f'Serviço de manutenção {index}',
+            'description': 'Contrato gerado para benchmark',
+            'value': 100 + index % 900,
+            'status': 'concluida' if index % 4 else 'aguardando_execucao',
+            'created_at': start + timedelta(minutes=index),
+            'service_deadline': start + timedelta(days=90),
+        } for index in range(offset, min(offset + 5000, rows))])
+    db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark do relatório PDF paginado')
+    parser.add_argument('--rows', type=int, default=20000,
+                        help='Número de linhas do relatório')
+    parser.add_argument('--report', choices=sorted(ReportService.PDF_LAYOUTS), default='contratos',
+                        help='Tipo de relatório')
+    parser.add_argument('--batch-size', type=int, default=ReportService.EXPORT_BATCH_SIZE,
+                        help='Linhas buscadas do banco por vez')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='benchmark_pdf_')
+    app = Flask(__name__)
+    app.config.from_object(TestConfig)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(workdir, 'benchmark.db')}"
+    db.init_app(app)
+
+    with app.app_context():
+        db.create_all()
+        seed(args.report, args.rows)
+        rss_before = peak_rss_mb()
+        logger.info(f"{args.rows} linhas inseridas; pico de RSS antes da geração: {rss_before:.1f} MB")
+
+        started = time.perf_counter()
+        path, rows = ReportService.export_to_pdf_file(
+            args.report, path=os.path.join(workdir, f'{args.report}.pdf'), batch_size=args.batch_size,
+            progress=lambda done: logger.debug(f"{done} linhas")
+        )
+        elapsed = time.perf_counter() - started
+        rss_after = peak_rss_mb()
+
+        with open(path, 'rb') as handle:
+            pages = handle.read().count(b'/Type /Page ')
+        size_mb = os.path.getsize(path) / (1024 * 1024)
+
+        logger.info(f"Relatório: {args.report} ({rows} linhas, {pages} páginas, {size_mb:.1f} MB)")
+        logger.info(f"Tempo: {elapsed:.2f}s ({rows / elapsed:,.0f} linhas/s)")
+        logger.info(f"Pico de RSS: {rss_after:.1f} MB (+{rss_after - rss_before:.1f} MB na geração)")
+        logger.info(f"Arquivos em {workdir}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -9,11 +9,56 @@ class Config:
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     WTF_CSRF_ENABLED = True
     
+    # Réplica de leitura (opcional) para relatórios, métricas e alertas tolerantes a atraso
+    DATABASE_REPLICA_URL = os.environ.get("DATABASE_REPLICA_URL")
+    SQLALCHEMY_BINDS = {'replica': DATABASE_REPLICA_URL} if DATABASE_REPLICA_URL else {}
+    REPLICA_PIN_SECONDS = float(os.environ.get("REPLICA_PIN_SECONDS", 5))  # Primário após escritas do usuário
+    
     # Configurações de Pré-Ordem
     # Requirement 15.1: Prazo padrão de negociação (7 dias)
     PRE_ORDER_DEFAULT_NEGOTIATION_DAYS = int(os.environ.get("PRE_ORDER_NEGOTIATION_DAYS", 7))
     PRE_ORDER_EXPIRATION_WARNING_HOURS = 24  # Notificar 24h antes da expiração
     
+    # Presença em pré-ordens: 'memory' (worker único) ou 'database' (compartilhado entre workers)
+    PRESENCE_BACKEND = os.environ.get("PRESENCE_BACKEND", "memory")
+    
+    # Barramento de invalidação de cache: 'memory' (worker único) ou 'database' (entre workers)
+    CACHE_INVALIDATION_BACKEND = os.environ.get("CACHE_INVALIDATION_BACKEND", "memory")
+    CACHE_INVALIDATION_POLL_INTERVAL = float(os.environ.get("CACHE_INVALIDATION_POLL_INTERVAL", 0.25))  # segundos
+    
+    # Rate limiting: 'database://' (padrão, compartilhado entre workers) ou 'local://' (worker único,
+    # memória limitada); URIs do pacote limits (ex: 'redis://localhost:6379') também são aceitas
+    RATELIMIT_STORAGE_URI = os.environ.get("RATELIMIT_STORAGE_URI", "database://")
+    RATELIMIT_STRATEGY = "sliding-window-counter"
+    
+    # Tentativas de login: gravação em lotes por thread (False grava na hora) e retenção das linhas brutas
+    LOGIN_ATTEMPT_ASYNC_WRITES = os.environ.get("LOGIN_ATTEMPT_ASYNC_WRITES", "true").lower() == "true"
+    LOGIN_ATTEMPT_RETENTION_DAYS = int(os.environ.get("LOGIN_ATTEMPT_RETENTION_DAYS", 30))
+    
+    # Log de auditoria: fila limitada + thread de gravação; fsync 'batch', 'interval' ou 'none'
+    AUDIT_QUEUE_MAX_SIZE = int(os.environ.get("AUDIT_QUEUE_MAX_SIZE", 10000))
+    AUDIT_QUEUE_BLOCK_TIMEOUT = float(os.environ.get("AUDIT_QUEUE_BLOCK_TIMEOUT", 1.0))  # segundos
+    AUDIT_FSYNC_POLICY = os.environ.get("AUDIT_FSYNC_POLICY", "batch")
+    AUDIT_FSYNC_INTERVAL = float(os.environ.get("AUDIT_FSYNC_INTERVAL", 1.0))  # segundos
+    AUDIT_EVENT_STORE_ENABLED = os.environ.get("AUDIT_EVENT_STORE_ENABLED", "true").lower() == "true"
+    
+    # Padrões suspeitos em propostas: detector em thread após o commit (False processa no próprio commit)
+    PROPOSAL_PATTERN_ASYNC = os.environ.get("PROPOSAL_PATTERN_ASYNC", "true").lower() == "true"
+    
+    # Relatórios em segundo plano: pool de workers (False gera no próprio pedido) e arquivos reaproveitados
+    REPORT_JOB_ASYNC = os.environ.get("REPORT_JOB_ASYNC", "true").lower() == "true"
+    REPORT_JOB_WORKERS = int(os.environ.get("REPORT_JOB_WORKERS", 2))
+    REPORT_ARTIFACT_DIR = os.environ.get("REPORT_ARTIFACT_DIR", os.path.join(BASE_DIR, 'instance', 'reports'))
+    REPORT_ARTIFACT_TTL = int(os.environ.get("REPORT_ARTIFACT_TTL", 3600))  # segundos
+    
+    # Exportação analítica em Parquet (pyarrow): job periódico e janela de acomodação das linhas recentes
+    ANALYTICS_EXPORT_ENABLED = os.environ.get("ANALYTICS_EXPORT_ENABLED", "false").lower() == "true"
+    ANALYTICS_EXPORT_DIR = os.environ.get("ANALYTICS_EXPORT_DIR", os.path.join(BASE_DIR, 'instance', 'analytics'))
+    ANALYTICS_EXPORT_SETTLE_SECONDS = int(os.environ.get("ANALYTICS_EXPORT_SETTLE_SECONDS", 60))
+    
+    # Rollups de volume de transações (dashboard e relatório financeiro): janela de acomodação das linhas recentes
+    TRANSACTION_ROLLUP_SETTLE_SECONDS = int(os.environ.get("TRANSACTION_ROLLUP_SETTLE_SECONDS", 60))
+    
     # Configurações de Performance (Requirement 8.1, 8.3, 8.5)
     # Compressão Gzip
     COMPRESS_MIMETYPES = [
@@ -41,6 +86,13 @@ class TestConfig(Config):
     TESTING = True
     DEBUG = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'  # Banco de dados em memória para testes
+    SQLALCHEMY_BINDS = {}
     WTF_CSRF_ENABLED = False  # Desabilitar CSRF em testes
     SESSION_COOKIE_SECURE = False
+    PRESENCE_BACKEND = 'memory'
+    CACHE_INVALIDATION_BACKEND = 'memory'
+    RATELIMIT_STORAGE_URI = 'local://'
+    LOGIN_ATTEMPT_ASYNC_WRITES = False
+    PROPOSAL_PATTERN_ASYNC = False
+    REPORT_JOB_ASYNC = False
 
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3.11
+# -*- coding: utf-8 -*-
+
+"""
+Script para importar logs/audit.log (e rotações) na tabela audit_events
+
+Deve ser executado após aplicar migrations/add_audit_events_table.sql. Pode
+ser repetido: entradas com audit_id já gravado são ignoradas.
+
+Uso:
+    python import_audit_log.py
+    python import_audit_log.py --path logs/audit.log.3
+"""
+
+import sys
+import os
+import glob
+import argparse
+
+# Adicionar diretório raiz ao path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import app
+from services.audit_store import AuditEventStore
+import logging
+
+# Configurar logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def import_file(path: str, batch_size: int) -> int:
+    """Importa um arquivo no formato 'timestamp - AUDIT - {json}'"""
+    imported = 0
+    batch = []
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        for line in f:
+            if ' - AUDIT - ' not in line:
+                continue
+            row = AuditEventStore.to_row(line.split(' - AUDIT - ', 1)[1].strip())
+            if row is None:
+                continue
+            batch.append(row)
+            if len(batch) >= batch_size:
+                imported += AuditEventStore.insert_rows(batch)
+                batch = []
+    imported += AuditEventStore.insert_rows(batch)
+    return imported
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Importa logs de auditoria em audit_events')
+    parser.add_argument('--path', default=None,
+                        help='Arquivo a importar (padrão: logs/audit.log e rotações)')
+    parser.add_argument('--batch-size', type=int, default=1000,
+                        help='Linhas por INSERT')
+    args = parser.parse_args()
+
+    # Rotações mais antigas primeiro (audit.log.20 ... audit.log.1, audit.log)
+    paths = [args.path] if args.path else sorted(
+        glob.glob('logs/audit.log.*'), key=lambda p: -int(p.rsplit('.', 1)[1]) if p.rsplit('.', 1)[1].isdigit() else 0
+    ) + ['logs/audit.log']
+
+    total = 0
+    with app.app_context():
+        for path in paths:
+            if os.path.exists(path):
+                count = import_file(path, args.batch_size)
+                logger.info(f"{path}: {count} eventos importados")
+                total += count
+
+    logger.info(f"Importação concluída: {total} eventos")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
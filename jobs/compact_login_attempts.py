@@ -0,0 +1,80 @@
+#!/usr/bin/env python3.11
+# -*- coding: utf-8 -*-
+
+"""
+Job de Compactação de Tentativas de Login
+
+Executado uma vez por dia para:
+1. Agregar os dias completos de login_attempts em login_attempt_daily
+2. Remover as tentativas brutas mais antigas que LOGIN_ATTEMPT_RETENTION_DAYS
+
+Uso:
+    python jobs/compact_login_attempts.py
+    python jobs/compact_login_attempts.py --retention-days 60
+"""
+
+import sys
+import os
+import argparse
+from datetime import datetime
+import logging
+
+# Adicionar o diretório raiz ao path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.login_throttle_service import LoginThrottleService
+
+logger = logging.getLogger(__name__)
+
+
+class LoginAttemptCompactionJob:
+    """Job para consolidar e reter tentativas de login"""
+
+    @staticmethod
+    def run(retention_days: int = None):
+        """
+        Executa a compactação
+
+        Returns:
+            Dict: Resultado com dias agregados e linhas removidas
+        """
+        start_time = datetime.utcnow()
+        try:
+            result = LoginThrottleService.compact(retention_days=retention_days)
+            return {
+                'success': True,
+                'days_aggregated': result['days'],
+                'attempts_purged': result['purged'],
+                'duration_seconds': (datetime.utcnow() - start_time).total_seconds(),
+            }
+        except Exception as e:
+            logger.error(f"Erro ao compactar tentativas de login: {str(e)}")
+            return {'success': False, 'error': str(e)}
+
+
+def main():
+    """Função principal para execução standalone do job"""
+    from app import app
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    parser = argparse.ArgumentParser(description='Compacta a tabela login_attempts')
+    parser.add_argument('--retention-days', type=int, default=None,
+                        help='Dias de tentativas brutas mantidos (padrão: LOGIN_ATTEMPT_RETENTION_DAYS)')
+    args = parser.parse_args()
+
+    with app.app_context():
+        result = LoginAttemptCompactionJob.run(retention_days=args.retention_days)
+
+    if result['success']:
+        logger.info(f"Compactação concluída: {result}")
+        sys.exit(0)
+    logger.error("Compactação falhou")
+    sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
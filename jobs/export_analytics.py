@@ -0,0 +1,88 @@
+#!/usr/bin/env python3.11
+# -*- coding: utf-8 -*-
+
+"""
+Job de Exportação Analítica
+
+Executado periodicamente para acrescentar aos arquivos Parquet de
+ANALYTICS_EXPORT_DIR as novas linhas de transactions, orders, pre_orders e
+proposal_audit_logs (marca d'água por id) e reescrever as ordens e
+pré-ordens alteradas (marca d'água por updated_at).
+
+Uso:
+    python jobs/export_analytics.py
+    python jobs/export_analytics.py --table transactions
+    python jobs/export_analytics.py --rebuild orders
+"""
+
+import sys
+import os
+import argparse
+from datetime import datetime
+import logging
+
+# Adicionar o diretório raiz ao path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.analytics_export_service import AnalyticsExportService, TABLES
+
+logger = logging.getLogger(__name__)
+
+
+class AnalyticsExportJob:
+    """Job para a exportação incremental em Parquet"""
+
+    @staticmethod
+    def run(table_name: str = None, rebuild: bool = False):
+        """
+        Executa a exportação
+
+        Returns:
+            Dict: Resultado com linhas exportadas por tabela
+        """
+        start_time = datetime.utcnow()
+        try:
+            if rebuild:
+                exported = {table_name: AnalyticsExportService.rebuild(table_name)}
+            elif table_name:
+                exported = {table_name: AnalyticsExportService.export_table(table_name)}
+            else:
+                exported = AnalyticsExportService.export_all()
+            return {
+                'success': True,
+                'exported': exported,
+                'duration_seconds': (datetime.utcnow() - start_time).total_seconds(),
+            }
+        except Exception as e:
+            logger.error(f"Erro na exportação analítica: {str(e)}")
+            return {'success': False, 'error': str(e)}
+
+
+def main():
+    """Função principal para execução standalone do job"""
+    from app import app
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    parser = argparse.ArgumentParser(description='Exporta tabelas de fatos para Parquet')
+    parser.add_argument('--table', choices=sorted(TABLES), default=None,
+                        help='Exportar apenas uma tabela (padrão: todas)')
+    parser.add_argument('--rebuild', choices=sorted(TABLES), default=None,
+                        help='Apagar os arquivos da tabela e exportar tudo novamente')
+    args = parser.parse_args()
+
+    with app.app_context():
+        result = AnalyticsExportJob.run(table_name=args.rebuild or args.table, rebuild=bool(args.rebuild))
+
+    if result['success']:
+        logger.info(f"Exportação concluída: {result}")
+        sys.exit(0)
+    logger.error("Exportação falhou")
+    sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3.11
+# -*- coding: utf-8 -*-
+
+"""
+Job de Consolidação do Volume de Transações
+
+Executado a cada poucos minutos para somar as transações novas (marca d'água
+por id) em transaction_volume_hourly e transaction_volume_daily, lidas pela
+dashboard administrativa e pelo relatório financeiro.
+
+Uso:
+    python jobs/rollup_transaction_volume.py
+    python jobs/rollup_transaction_volume.py --rebuild
+"""
+
+import sys
+import os
+import argparse
+from datetime import datetime
+import logging
+
+# Adicionar o diretório raiz ao path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.transaction_volume_rollup_service import TransactionVolumeRollupService
+
+logger = logging.getLogger(__name__)
+
+
+class TransactionVolumeRollupJob:
+    """Job para manter os rollups de volume de transações"""
+
+    @staticmethod
+    def run(rebuild: bool = False, batch_size: int = None):
+        """
+        Executa a consolidação
+
+        Returns:
+            Dict: Resultado com transações consolidadas e marca d'água
+        """
+        start_time = datetime.utcnow()
+        try:
+            if rebuild:
+                rolled = TransactionVolumeRollupService.rebuild(batch_size=batch_size)
+            else:
+                rolled = TransactionVolumeRollupService.roll_up(batch_size=batch_size)
+            return {
+                'success': True,
+                'transactions_rolled_up': rolled,
+                'watermark': TransactionVolumeRollupService.get_watermark(),
+                'duration_seconds': (datetime.utcnow() - start_time).total_seconds(),
+            }
+        except Exception as e:
+            logger.error(f"Erro ao consolidar volume de transações: {str(e)}")
+            return {'success': False, 'error': str(e)}
+
+
+def main():
+    """Função principal para execução standalone do job"""
+    from app import app
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    parser = argparse.ArgumentParser(description='Consolida o volume de transações por hora e por dia')
+    parser.add_argument('--rebuild', action='store_true',
+                        help='Apagar os rollups e consolidar todas as transações novamente')
+    parser.add_argument('--batch-size', type=int, default=None,
+                        help='Transações por lote')
+    args = parser.parse_args()
+
+    with app.app_context():
+        result = TransactionVolumeRollupJob.run(rebuild=args.rebuild, batch_size=args.batch_size)
+
+    if result['success']:
+        logger.info(f"Consolidação concluída: {result}")
+        sys.exit(0)
+    logger.error("Consolidação falhou")
+    sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -37,6 +37,8 @@ def init_scheduler(app):
     
     # Importar job dentro da função para evitar import circular
     from jobs.expire_pre_orders import PreOrderExpirationJob
+    from jobs.compact_login_attempts import LoginAttemptCompactionJob
+    from jobs.rollup_transaction_volume import TransactionVolumeRollupJob
     
     # Job 1: Expirar pré-ordens (a cada hora)
     scheduler.add_job(
@@ -48,6 +50,38 @@ def init_scheduler(app):
         max_instances=1  # Evitar execuções simultâneas
     )
     
+    # Job 2: Compactar tentativas de login (diariamente às 03:15)
+    scheduler.add_job(
+        func=lambda: run_job_with_context(app, LoginAttemptCompactionJob.run),
+        trigger=CronTrigger(hour=3, minute=15),
+        id='compact_login_attempts',
+        name='Compactar Tentativas de Login',
+        replace_existing=True,
+        max_instances=1
+    )
+    
+    # Job 3: Consolidar volume de transações (a cada 5 minutos)
+    scheduler.add_job(
+        func=lambda: run_job_with_context(app, TransactionVolumeRollupJob.run),
+        trigger=IntervalTrigger(minutes=5),
+        id='rollup_transaction_volume',
+        name='Consolidar Volume de Transações',
+        replace_existing=True,
+        max_instances=1
+    )
+    
+    # Job 4: Exportação analítica em Parquet (a cada 15 minutos, se habilitada)
+    if app.config.get('ANALYTICS_EXPORT_ENABLED'):
+        from jobs.export_analytics import AnalyticsExportJob
+        scheduler.add_job(
+            func=lambda: run_job_with_context(app, AnalyticsExportJob.run),
+            trigger=IntervalTrigger(minutes=15),
+            id='export_analytics',
+            name='Exportação Analítica',
+            replace_existing=True,
+            max_instances=1
+        )
+    
     # Iniciar scheduler
     scheduler.start()
     logger.info("Scheduler iniciado com sucesso")
@@ -0,0 +1,28 @@
+-- ============================================================================
+-- Migração: Tabela Indexada de Eventos de Auditoria
+-- ============================================================================
+-- Descrição: Cria a tabela audit_events (somente inserção), gravada em lotes
+--            pela thread do AuditLogWriter com as mesmas entradas de
+--            logs/audit.log. Índices por período, entidade, usuário e
+--            operação permitem buscas sem varrer os arquivos de log.
+--
+-- Após aplicar, importar o histórico dos arquivos com:
+--     python import_audit_log.py
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS audit_events (
+    id INTEGER PRIMARY KEY,
+    audit_id VARCHAR(36) NOT NULL UNIQUE,
+    timestamp TIMESTAMP NOT NULL,
+    level VARCHAR(10) NOT NULL DEFAULT 'INFO',
+    operation VARCHAR(100) NOT NULL,
+    entity_type VARCHAR(50) NOT NULL,
+    entity_id INTEGER,
+    user_id INTEGER,
+    details TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_audit_events_timestamp ON audit_events(timestamp);
+CREATE INDEX IF NOT EXISTS idx_audit_events_entity ON audit_events(entity_type, entity_id, timestamp);
+CREATE INDEX IF NOT EXISTS idx_audit_events_user ON audit_events(user_id, timestamp);
+CREATE INDEX IF NOT EXISTS idx_audit_events_operation ON audit_events(operation, timestamp);
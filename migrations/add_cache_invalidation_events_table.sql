@@ -0,0 +1,20 @@
+-- ============================================================================
+-- Migração: Tabela do Barramento de Invalidação de Cache
+-- ============================================================================
+-- Descrição: Cria a tabela usada pelo backend compartilhado do
+--            CacheInvalidationBus (CACHE_INVALIDATION_BACKEND=database) para
+--            propagar invalidações de cache entre todos os workers.
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS cache_invalidation_events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    origin VARCHAR(100) NOT NULL,
+    namespace VARCHAR(100) NOT NULL,
+    kind VARCHAR(20) NOT NULL,
+    payload TEXT NOT NULL DEFAULT '[]',
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Índice para a limpeza de eventos antigos
+CREATE INDEX IF NOT EXISTS idx_cache_invalidation_created
+ON cache_invalidation_events(created_at);
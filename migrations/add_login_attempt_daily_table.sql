@@ -0,0 +1,26 @@
+-- ============================================================================
+-- Migração: Consolidação Diária de Tentativas de Login
+-- ============================================================================
+-- Descrição: Cria a tabela login_attempt_daily, alimentada pela compactação
+--            diária (jobs/compact_login_attempts.py), e os índices de
+--            login_attempts: por data (estatísticas de 24h e remoção das
+--            tentativas mais antigas que a retenção) e por e-mail/IP e data
+--            (contagem de falhas quando o rate limiting é local ao processo).
+--
+-- Após aplicar, consolidar o histórico existente com:
+--     python jobs/compact_login_attempts.py
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS login_attempt_daily (
+    day DATE NOT NULL,
+    user_type VARCHAR(20) NOT NULL,
+    total_attempts INTEGER NOT NULL DEFAULT 0,
+    failed_attempts INTEGER NOT NULL DEFAULT 0,
+    unique_ips INTEGER NOT NULL DEFAULT 0,
+    unique_emails INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, user_type)
+);
+
+CREATE INDEX IF NOT EXISTS idx_login_attempts_time ON login_attempts(attempt_time);
+CREATE INDEX IF NOT EXISTS idx_login_attempts_email_time ON login_attempts(email, attempt_time);
+CREATE INDEX IF NOT EXISTS idx_login_attempts_ip_time ON login_attempts(ip_address, attempt_time);
@@ -0,0 +1,19 @@
+-- ============================================================================
+-- Migração: Data de Alteração das Ordens
+-- ============================================================================
+-- Descrição: Adiciona orders.updated_at e índices por data de alteração em
+--            orders e pre_orders. A exportação analítica
+--            (AnalyticsExportService) usa essas colunas como marca d'água
+--            para reescrever as linhas alteradas depois da primeira cópia.
+-- ============================================================================
+
+ALTER TABLE orders ADD COLUMN updated_at TIMESTAMP;
+
+-- Ordens existentes: considera a criação como última alteração
+UPDATE orders SET updated_at = created_at WHERE updated_at IS NULL;
+
+CREATE INDEX IF NOT EXISTS idx_orders_updated_at
+ON orders(updated_at);
+
+CREATE INDEX IF NOT EXISTS idx_pre_orders_updated_at
+ON pre_orders(updated_at);
@@ -0,0 +1,19 @@
+-- ============================================================================
+-- Migração: Tabela de Presença em Pré-Ordens
+-- ============================================================================
+-- Descrição: Cria a tabela usada pelo backend compartilhado do PresenceService
+--            (PRESENCE_BACKEND=database) para que todos os workers vejam os
+--            mesmos usuários visualizando cada pré-ordem.
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS pre_order_presence (
+    pre_order_id INTEGER NOT NULL REFERENCES pre_orders(id),
+    user_id INTEGER NOT NULL REFERENCES users(id),
+    last_seen TIMESTAMP NOT NULL,
+    expires_at TIMESTAMP NOT NULL,
+    PRIMARY KEY (pre_order_id, user_id)
+);
+
+-- Índice para a varredura de presenças expiradas
+CREATE INDEX IF NOT EXISTS idx_pre_order_presence_expires
+ON pre_order_presence(expires_at);
@@ -0,0 +1,13 @@
+-- ============================================================================
+-- Migração: Índices por Período em proposal_audit_logs
+-- ============================================================================
+-- Descrição: Índices compostos para as consultas de alertas e métricas,
+--            que filtram por tipo de ação ou por usuário dentro de um
+--            intervalo semiaberto de created_at (>= início AND < fim).
+-- ============================================================================
+
+CREATE INDEX IF NOT EXISTS idx_proposal_audit_logs_action_created
+    ON proposal_audit_logs(action_type, created_at);
+
+CREATE INDEX IF NOT EXISTS idx_proposal_audit_logs_actor_created
+    ON proposal_audit_logs(actor_user_id, created_at);
@@ -0,0 +1,22 @@
+-- ============================================================================
+-- Migração: Agregados Combináveis em proposal_metrics
+-- ============================================================================
+-- Descrição: Adiciona às métricas de propostas os agregados parciais que
+--            permitem obter semanas, meses e intervalos arbitrários
+--            combinando as linhas diárias: soma dos quadrados, mínimo e
+--            máximo do valor proposto, total de horas de resposta e sketches
+--            (HyperLogLog) de prestadores e clientes distintos.
+--
+-- Após aplicar, recalcular o histórico diário com:
+--     python backfill_proposal_metrics.py
+-- ============================================================================
+
+ALTER TABLE proposal_metrics ADD COLUMN proposed_value_sum_squares FLOAT NOT NULL DEFAULT 0;
+ALTER TABLE proposal_metrics ADD COLUMN min_proposed_value NUMERIC(10, 2);
+ALTER TABLE proposal_metrics ADD COLUMN max_proposed_value NUMERIC(10, 2);
+ALTER TABLE proposal_metrics ADD COLUMN responded_proposals INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE proposal_metrics ADD COLUMN total_response_time_hours FLOAT NOT NULL DEFAULT 0;
+ALTER TABLE proposal_metrics ADD COLUMN prestadores_sketch BYTEA;
+ALTER TABLE proposal_metrics ADD COLUMN clientes_sketch BYTEA;
+
+-- SQLite: usar BLOB no lugar de BYTEA
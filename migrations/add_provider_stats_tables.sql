@@ -0,0 +1,35 @@
+-- ============================================================================
+-- Migração: Tabelas de Estatísticas por Prestador
+-- ============================================================================
+-- Descrição: Cria as tabelas provider_stats e provider_client_stats, mantidas
+--            incrementalmente pelo ProviderStatsService e lidas pela
+--            dashboard do prestador (taxa de conclusão, ganho médio por
+--            ordem e clientes atendidos).
+--
+-- Após aplicar, popular com:
+--     python rebuild_provider_stats.py
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS provider_stats (
+    provider_id INTEGER NOT NULL PRIMARY KEY REFERENCES users(id),
+    total_orders INTEGER NOT NULL DEFAULT 0,
+    completed_orders INTEGER NOT NULL DEFAULT 0,
+    cancelled_orders INTEGER NOT NULL DEFAULT 0,
+    disputed_orders INTEGER NOT NULL DEFAULT 0,
+    receipts_count INTEGER NOT NULL DEFAULT 0,
+    total_received NUMERIC(18, 2) NOT NULL DEFAULT 0,
+    clients_served INTEGER NOT NULL DEFAULT 0,
+    completion_rate NUMERIC(5, 2) NOT NULL DEFAULT 0,
+    average_received NUMERIC(18, 2) NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_provider_stats_completion_rate ON provider_stats(completion_rate);
+CREATE INDEX IF NOT EXISTS idx_provider_stats_clients_served ON provider_stats(clients_served);
+
+CREATE TABLE IF NOT EXISTS provider_client_stats (
+    provider_id INTEGER NOT NULL REFERENCES users(id),
+    client_id INTEGER NOT NULL REFERENCES users(id),
+    completed_orders INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (provider_id, client_id)
+);
@@ -0,0 +1,17 @@
+-- ============================================================================
+-- Migração: Tabela de Contadores de Rate Limiting
+-- ============================================================================
+-- Descrição: Cria a tabela rate_limit_counters, usada quando
+--            RATELIMIT_STORAGE_URI = 'database://' para que os limites do
+--            Flask-Limiter e do SecurityValidator.check_rate_limit valham
+--            para todos os workers (janela deslizante por contadores).
+--            Linhas expiradas são removidas pelo próprio backend.
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS rate_limit_counters (
+    key VARCHAR(255) NOT NULL PRIMARY KEY,
+    count INTEGER NOT NULL DEFAULT 0,
+    expires_at FLOAT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_rate_limit_counters_expires ON rate_limit_counters(expires_at);
@@ -0,0 +1,33 @@
+-- ============================================================================
+-- Migração: Fila de Geração de Relatórios
+-- ============================================================================
+-- Descrição: Cria a tabela report_jobs usada pelo ReportJobService. Cada
+--            linha é um relatório enfileirado por um administrador; o
+--            arquivo gerado fica em REPORT_ARTIFACT_DIR e é reaproveitado
+--            por pedidos com os mesmos parâmetros (param_hash) até
+--            expires_at. worker_id/heartbeat_at identificam o processo dono
+--            e o último sinal de vida (detecção de jobs órfãos).
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS report_jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    param_hash VARCHAR(64) NOT NULL,
+    report_type VARCHAR(30) NOT NULL,
+    format VARCHAR(10) NOT NULL,
+    params TEXT,
+    status VARCHAR(20) NOT NULL DEFAULT 'queued',
+    artifact_path VARCHAR(500),
+    row_count INTEGER,
+    error TEXT,
+    requested_by INTEGER,
+    worker_id VARCHAR(100),
+    heartbeat_at TIMESTAMP,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP,
+    finished_at TIMESTAMP,
+    expires_at TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_report_jobs_hash_status ON report_jobs(param_hash, status);
+CREATE INDEX IF NOT EXISTS idx_report_jobs_expires ON report_jobs(expires_at);
+CREATE INDEX IF NOT EXISTS idx_report_jobs_status_heartbeat ON report_jobs(status, heartbeat_at);
@@ -0,0 +1,37 @@
+-- ============================================================================
+-- Migração: Rollups de Volume de Transações
+-- ============================================================================
+-- Descrição: Cria as tabelas transaction_volume_hourly e
+--            transaction_volume_daily (contagem, soma com sinal e volume
+--            absoluto por tipo) e rollup_watermarks, com o último
+--            transactions.id já consolidado. Mantidas pelo job
+--            rollup_transaction_volume e lidas pela dashboard administrativa
+--            e pelo relatório financeiro.
+--
+-- Após aplicar, popular com:
+--     python jobs/rollup_transaction_volume.py --rebuild
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS transaction_volume_hourly (
+    bucket TIMESTAMP NOT NULL,
+    type VARCHAR(50) NOT NULL,
+    transaction_count INTEGER NOT NULL DEFAULT 0,
+    total_amount NUMERIC(18, 2) NOT NULL DEFAULT 0,
+    total_volume NUMERIC(18, 2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (bucket, type)
+);
+
+CREATE TABLE IF NOT EXISTS transaction_volume_daily (
+    day DATE NOT NULL,
+    type VARCHAR(50) NOT NULL,
+    transaction_count INTEGER NOT NULL DEFAULT 0,
+    total_amount NUMERIC(18, 2) NOT NULL DEFAULT 0,
+    total_volume NUMERIC(18, 2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, type)
+);
+
+CREATE TABLE IF NOT EXISTS rollup_watermarks (
+    name VARCHAR(50) PRIMARY KEY,
+    last_id INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
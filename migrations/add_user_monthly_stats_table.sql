@@ -0,0 +1,23 @@
+-- ============================================================================
+-- Migração: Tabela de Consolidação Mensal por Usuário
+-- ============================================================================
+-- Descrição: Cria a tabela user_monthly_stats, mantida incrementalmente pelo
+--            UserMonthlyStatsService e lida pelas dashboards de cliente e
+--            prestador (DashboardDataService.get_dashboard_metrics).
+--
+-- Após aplicar, popular com:
+--     python rebuild_user_monthly_stats.py
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS user_monthly_stats (
+    user_id INTEGER NOT NULL REFERENCES users(id),
+    month DATE NOT NULL,
+    client_orders_created INTEGER NOT NULL DEFAULT 0,
+    client_orders_completed INTEGER NOT NULL DEFAULT 0,
+    client_total_spent NUMERIC(18, 2) NOT NULL DEFAULT 0,
+    provider_orders_accepted INTEGER NOT NULL DEFAULT 0,
+    provider_orders_completed INTEGER NOT NULL DEFAULT 0,
+    provider_total_received NUMERIC(18, 2) NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (user_id, month)
+);
@@ -2,8 +2,9 @@
 # -*- coding: utf-8 -*-
 
 from flask_sqlalchemy import SQLAlchemy
+from services.read_replica import RoutingSession
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
 import enum
@@ -168,6 +169,7 @@ class Order(db.Model):
     
     # Datas
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     accepted_at = db.Column(db.DateTime, nullable=True)
     completed_at = db.Column(db.DateTime, nullable=True)  # Quando prestador marcou como concluído
     confirmed_at = db.Column(db.DateTime, nullable=True)  # Quando cliente confirmou
@@ -222,6 +224,7 @@ class Order(db.Model):
     
     __table_args__ = (
         db.CheckConstraint('value > 0', name='check_order_value_positive'),
+        db.Index('idx_orders_updated_at', 'updated_at'),
     )
     
     @property
@@ -673,9 +676,35 @@ class LoginAttempt(db.Model):
     attempt_time = db.Column(db.DateTime, default=datetime.utcnow)
     user_type = db.Column(db.String(20), nullable=False, default='user')  # user, admin
     
+    __table_args__ = (
+        db.Index('idx_login_attempts_time', 'attempt_time'),
+        db.Index('idx_login_attempts_email_time', 'email', 'attempt_time'),
+        db.Index('idx_login_attempts_ip_time', 'ip_address', 'attempt_time'),
+    )
+    
     def __repr__(self):
         return f'<LoginAttempt {self.email} - {"Success" if self.success else "Failed"}>'
 
+class LoginAttemptDaily(db.Model):
+    """
+    Consolidação diária de tentativas de login.
+    
+    Gerada pela compactação de login_attempts (LoginThrottleService.compact):
+    dias completos são agregados aqui e as linhas brutas mais antigas que a
+    retenção são removidas.
+    """
+    __tablename__ = 'login_attempt_daily'
+    
+    day = db.Column(db.Date, primary_key=True)
+    user_type = db.Column(db.String(20), primary_key=True)  # user, admin
+    total_attempts = db.Column(db.Integer, default=0, nullable=False)
+    failed_attempts = db.Column(db.Integer, default=0, nullable=False)
+    unique_ips = db.Column(db.Integer, default=0, nullable=False)
+    unique_emails = db.Column(db.Integer, default=0, nullable=False)
+    
+    def __repr__(self):
+        return f'<LoginAttemptDaily {self.day} {self.user_type}: {self.total_attempts}>'
+
 class SystemAlert(db.Model):
     """Modelo para alertas do sistema"""
     __tablename__ = 'system_alerts'
@@ -883,6 +912,12 @@ class ProposalAuditLog(db.Model):
     actor_user = db.relationship('User', foreign_keys=[actor_user_id])
     actor_admin = db.relationship('AdminUser', foreign_keys=[actor_admin_id])
     
+    # Consultas por período usam intervalos semiabertos em created_at (services/time_window.py)
+    __table_args__ = (
+        db.Index('idx_proposal_audit_logs_action_created', 'action_type', 'created_at'),
+        db.Index('idx_proposal_audit_logs_actor_created', 'actor_user_id', 'created_at'),
+    )
+    
     def __repr__(self):
         return f'<ProposalAuditLog {self.action_type} - Proposal:{self.proposal_id} by {self.actor_role}>'
 
@@ -917,6 +952,15 @@ class ProposalMetrics(db.Model):
     unique_prestadores = db.Column(db.Integer, nullable=False, default=0)
     unique_clientes = db.Column(db.Integer, nullable=False, default=0)
     
+    # Agregados parciais combináveis (períodos maiores = soma/mín/máx/união dos dias)
+    proposed_value_sum_squares = db.Column(db.Float, nullable=False, default=0.0)
+    min_proposed_value = db.Column(db.Numeric(10, 2), nullable=True)
+    max_proposed_value = db.Column(db.Numeric(10, 2), nullable=True)
+    responded_proposals = db.Column(db.Integer, nullable=False, default=0)
+    total_response_time_hours = db.Column(db.Float, nullable=False, default=0.0)
+    prestadores_sketch = db.Column(db.LargeBinary, nullable=True)  # DistinctSketch serializado
+    clientes_sketch = db.Column(db.LargeBinary, nullable=True)
+    
     # Timestamps
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -1085,6 +1129,7 @@ class PreOrder(db.Model):
         db.Index('idx_pre_orders_client', 'client_id'),
         db.Index('idx_pre_orders_provider', 'provider_id'),
         db.Index('idx_pre_orders_expires', 'expires_at'),
+        db.Index('idx_pre_orders_updated_at', 'updated_at'),
     )
     
     @property
@@ -1353,3 +1398,291 @@ class PreOrderHistory(db.Model):
     
     def __repr__(self):
         return f'<PreOrderHistory {self.id}: {self.event_type} - PreOrder {self.pre_order_id}>'
+
+
+class PreOrderPresence(db.Model):
+    """
+    Modelo para presença de usuários visualizando uma pré-ordem.
+    
+    Usado pelo backend compartilhado do PresenceService para que todos os
+    workers enxerguem os mesmos visualizadores. Cada linha é renovada por
+    heartbeat e removida quando expira.
+    """
+    __tablename__ = 'pre_order_presence'
+    
+    pre_order_id = db.Column(db.Integer, db.ForeignKey('pre_orders.id'), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    last_seen = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+    
+    # Índices
+    __table_args__ = (
+        db.Index('idx_pre_order_presence_expires', 'expires_at'),
+    )
+    
+    def __repr__(self):
+        return f'<PreOrderPresence PreOrder {self.pre_order_id} - User {self.user_id}>'
+
+
+class CacheInvalidationEvent(db.Model):
+    """
+    Modelo para eventos do barramento de invalidação de cache.
+    
+    Cada worker grava aqui as invalidações feitas em seus namespaces de cache
+    e lê periodicamente os eventos dos demais workers (id > último lido).
+    Eventos antigos são removidos pelo próprio barramento.
+    """
+    __tablename__ = 'cache_invalidation_events'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    origin = db.Column(db.String(100), nullable=False)  # Worker que publicou
+    namespace = db.Column(db.String(100), nullable=False)
+    kind = db.Column(db.String(20), nullable=False)  # key, tag, pattern, clear
+    payload = db.Column(db.Text, nullable=False, default='[]')  # Lista JSON de chaves/tags
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    # Índices (AUTOINCREMENT evita reuso de ids no SQLite após a limpeza)
+    __table_args__ = (
+        db.Index('idx_cache_invalidation_created', 'created_at'),
+        {'sqlite_autoincrement': True},
+    )
+    
+    def __repr__(self):
+        return f'<CacheInvalidationEvent {self.id}: {self.namespace} {self.kind}>'
+
+
+class UserMonthlyStats(db.Model):
+    """
+    Modelo de consolidação mensal por usuário (rollup).
+    
+    Mantido incrementalmente a cada flush de Order/Transaction pelo
+    UserMonthlyStatsService e reconstruível com rebuild_user_monthly_stats.py.
+    Alimenta as estatísticas do mês das dashboards com uma consulta pela
+    chave primária.
+    """
+    __tablename__ = 'user_monthly_stats'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    month = db.Column(db.Date, primary_key=True)  # Primeiro dia do mês (UTC)
+    
+    # Como cliente
+    client_orders_created = db.Column(db.Integer, default=0, nullable=False)
+    client_orders_completed = db.Column(db.Integer, default=0, nullable=False)
+    client_total_spent = db.Column(db.Numeric(18, 2), default=0, nullable=False)
+    
+    # Como prestador
+    provider_orders_accepted = db.Column(db.Integer, default=0, nullable=False)
+    provider_orders_completed = db.Column(db.Integer, default=0, nullable=False)
+    provider_total_received = db.Column(db.Numeric(18, 2), default=0, nullable=False)
+    
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    def __repr__(self):
+        return f'<UserMonthlyStats User {self.user_id} - {self.month}>'
+
+
+class ProviderStats(db.Model):
+    """
+    Modelo de estatísticas acumuladas por prestador.
+    
+    Mantido incrementalmente a cada flush de Order/Transaction pelo
+    ProviderStatsService e reconstruível com rebuild_provider_stats.py.
+    Taxa de conclusão, ganho médio e clientes atendidos são lidos pela chave
+    primária e indexados para ordenar/filtrar prestadores sem varrer orders.
+    """
+    __tablename__ = 'provider_stats'
+    
+    provider_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    
+    # Contadores de ordens (todas as ordens em que é o prestador)
+    total_orders = db.Column(db.Integer, default=0, nullable=False)
+    completed_orders = db.Column(db.Integer, default=0, nullable=False)
+    cancelled_orders = db.Column(db.Integer, default=0, nullable=False)
+    disputed_orders = db.Column(db.Integer, default=0, nullable=False)  # contestada ou resolvida
+    
+    # Recebimentos (transações do tipo 'recebimento')
+    receipts_count = db.Column(db.Integer, default=0, nullable=False)
+    total_received = db.Column(db.Numeric(18, 2), default=0, nullable=False)
+    
+    # Valores derivados, recalculados junto com os contadores
+    clients_served = db.Column(db.Integer, default=0, nullable=False)
+    completion_rate = db.Column(db.Numeric(5, 2), default=0, nullable=False)  # Percentual
+    average_received = db.Column(db.Numeric(18, 2), default=0, nullable=False)
+    
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    __table_args__ = (
+        db.Index('idx_provider_stats_completion_rate', 'completion_rate'),
+        db.Index('idx_provider_stats_clients_served', 'clients_served'),
+    )
+    
+    def __repr__(self):
+        return f'<ProviderStats Provider {self.provider_id}>'
+
+
+class ProviderClientStats(db.Model):
+    """
+    Ordens concluídas por par (prestador, cliente).
+    
+    Permite manter incrementalmente a contagem de clientes distintos
+    atendidos (ProviderStats.clients_served).
+    """
+    __tablename__ = 'provider_client_stats'
+    
+    provider_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    client_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    completed_orders = db.Column(db.Integer, default=0, nullable=False)
+    
+    def __repr__(self):
+        return f'<ProviderClientStats Provider {self.provider_id} - Client {self.client_id}>'
+
+
+class RateLimitCounter(db.Model):
+    """
+    Contadores de rate limiting compartilhados entre workers.
+    
+    Usado pelo backend 'database://' do RateLimiterService: cada janela
+    (chave do limite + número da janela) é uma linha com contagem e
+    instante de expiração (epoch). Linhas expiradas são removidas
+    periodicamente pelo próprio backend.
+    """
+    __tablename__ = 'rate_limit_counters'
+    
+    key = db.Column(db.String(255), primary_key=True)
+    count = db.Column(db.Integer, default=0, nullable=False)
+    expires_at = db.Column(db.Float, nullable=False)  # time.time() da expiração
+    
+    __table_args__ = (
+        db.Index('idx_rate_limit_counters_expires', 'expires_at'),
+    )
+    
+    def __repr__(self):
+        return f'<RateLimitCounter {self.key}: {self.count}>'
+
+
+class AuditEvent(db.Model):
+    """
+    Eventos de auditoria do AuditService (somente inserção).
+    
+    Espelho indexado de logs/audit.log, gravado em lotes pela thread do
+    AuditLogWriter. Permite buscar por entidade, usuário, operação e período
+    sem varrer os arquivos de log.
+    """
+    __tablename__ = 'audit_events'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    audit_id = db.Column(db.String(36), nullable=False, unique=True)
+    timestamp = db.Column(db.DateTime, nullable=False)
+    level = db.Column(db.String(10), nullable=False, default='INFO')
+    operation = db.Column(db.String(100), nullable=False)
+    entity_type = db.Column(db.String(50), nullable=False)
+    entity_id = db.Column(db.Integer, nullable=True)
+    user_id = db.Column(db.Integer, nullable=True)
+    details = db.Column(db.Text, nullable=True)  # JSON
+    
+    __table_args__ = (
+        db.Index('idx_audit_events_timestamp', 'timestamp'),
+        db.Index('idx_audit_events_entity', 'entity_type', 'entity_id', 'timestamp'),
+        db.Index('idx_audit_events_user', 'user_id', 'timestamp'),
+        db.Index('idx_audit_events_operation', 'operation', 'timestamp'),
+    )
+    
+    def __repr__(self):
+        return f'<AuditEvent {self.operation} {self.entity_type} #{self.entity_id}>'
+
+
+class ReportJob(db.Model):
+    """
+    Geração de relatório em segundo plano (ReportJobService).
+    
+    O administrador enfileira o relatório com seus parâmetros; um worker gera
+    o arquivo em disco. Jobs com o mesmo param_hash reaproveitam o arquivo
+    enquanto ele não expira (expires_at). O processo dono (worker_id) renova
+    heartbeat_at; jobs sem sinal de vida recente são tratados como órfãos.
+    """
+    __tablename__ = 'report_jobs'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    param_hash = db.Column(db.String(64), nullable=False)
+    report_type = db.Column(db.String(30), nullable=False)  # contratos, usuarios, financeiro, convites
+    format = db.Column(db.String(10), nullable=False)  # csv, xlsx, pdf
+    params = db.Column(db.Text, nullable=True)  # JSON com os filtros
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, done, failed
+    artifact_path = db.Column(db.String(500), nullable=True)
+    row_count = db.Column(db.Integer, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    requested_by = db.Column(db.Integer, nullable=True)  # AdminUser.id
+    worker_id = db.Column(db.String(100), nullable=True)  # Processo dono (host:pid:token)
+    heartbeat_at = db.Column(db.DateTime, nullable=True)  # Último sinal de vida do dono
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    expires_at = db.Column(db.DateTime, nullable=True)
+    
+    __table_args__ = (
+        db.Index('idx_report_jobs_hash_status', 'param_hash', 'status'),
+        db.Index('idx_report_jobs_expires', 'expires_at'),
+        db.Index('idx_report_jobs_status_heartbeat', 'status', 'heartbeat_at'),
+    )
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'report_type': self.report_type,
+            'format': self.format,
+            'status': self.status,
+            'row_count': self.row_count,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'expires_at': self.expires_at.isoformat() if self.expires_at else None,
+        }
+    
+    def __repr__(self):
+        return f'<ReportJob {self.id} {self.report_type}.{self.format} {self.status}>'
+
+
+class TransactionVolumeHourly(db.Model):
+    """
+    Volume de transações por hora e tipo (rollup).
+    
+    Mantido pelo TransactionVolumeRollupService a partir da marca d'água de
+    transactions.id (job rollup_transaction_volume). total_amount é a soma com
+    sinal e total_volume a soma dos valores absolutos.
+    """
+    __tablename__ = 'transaction_volume_hourly'
+    
+    bucket = db.Column(db.DateTime, primary_key=True)  # Início da hora (UTC)
+    type = db.Column(db.String(50), primary_key=True)
+    transaction_count = db.Column(db.Integer, default=0, nullable=False)
+    total_amount = db.Column(db.Numeric(18, 2), default=0, nullable=False)
+    total_volume = db.Column(db.Numeric(18, 2), default=0, nullable=False)
+    
+    def __repr__(self):
+        return f'<TransactionVolumeHourly {self.bucket} {self.type}: {self.transaction_count}>'
+
+
+class TransactionVolumeDaily(db.Model):
+    """Volume de transações por dia e tipo (rollup, mesmas colunas do horário)"""
+    __tablename__ = 'transaction_volume_daily'
+    
+    day = db.Column(db.Date, primary_key=True)
+    type = db.Column(db.String(50), primary_key=True)
+    transaction_count = db.Column(db.Integer, default=0, nullable=False)
+    total_amount = db.Column(db.Numeric(18, 2), default=0, nullable=False)
+    total_volume = db.Column(db.Numeric(18, 2), default=0, nullable=False)
+    
+    def __repr__(self):
+        return f'<TransactionVolumeDaily {self.day} {self.type}: {self.transaction_count}>'
+
+
+class RollupWatermark(db.Model):
+    """Último id de origem já consolidado por cada rollup incremental"""
+    __tablename__ = 'rollup_watermarks'
+    
+    name = db.Column(db.String(50), primary_key=True)
+    last_id = db.Column(db.Integer, default=0, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    def __repr__(self):
+        return f'<RollupWatermark {self.name}: {self.last_id}>'
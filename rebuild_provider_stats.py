@@ -0,0 +1,50 @@
+#!/usr/bin/env python3.11
+# -*- coding: utf-8 -*-
+
+"""
+Script para reconstruir as estatísticas por prestador (provider_stats)
+
+Recalcula provider_stats e provider_client_stats a partir de orders e
+transactions. Deve ser executado após aplicar
+migrations/add_provider_stats_tables.sql e sempre que houver alterações em
+massa fora do ORM (query.update/delete, SQL manual).
+
+Uso:
+    python rebuild_provider_stats.py
+    python rebuild_provider_stats.py --provider-id 42
+"""
+
+import sys
+import os
+import argparse
+
+# Adicionar diretório raiz ao path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import app
+from services.provider_stats_service import ProviderStatsService
+import logging
+
+# Configurar logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Reconstrói as tabelas provider_stats e provider_client_stats')
+    parser.add_argument('--provider-id', type=int, default=None,
+                        help='Reconstruir apenas um prestador (padrão: todos)')
+    args = parser.parse_args()
+
+    with app.app_context():
+        providers = ProviderStatsService.rebuild(provider_id=args.provider_id)
+
+    logger.info(f"Reconstrução concluída: {providers} prestadores gravados")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3.11
+# -*- coding: utf-8 -*-
+
+"""
+Script para reconstruir a consolidação mensal por usuário (user_monthly_stats)
+
+Recalcula a tabela a partir de orders e transactions. Deve ser executado
+após aplicar migrations/add_user_monthly_stats_table.sql e sempre que
+houver alterações em massa fora do ORM (query.update/delete, SQL manual).
+
+Uso:
+    python rebuild_user_monthly_stats.py
+    python rebuild_user_monthly_stats.py --user-id 42
+"""
+
+import sys
+import os
+import argparse
+
+# Adicionar diretório raiz ao path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import app
+from services.user_monthly_stats_service import UserMonthlyStatsService
+import logging
+
+# Configurar logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Reconstrói a tabela user_monthly_stats')
+    parser.add_argument('--user-id', type=int, default=None,
+                        help='Reconstruir apenas um usuário (padrão: todos)')
+    parser.add_argument('--batch-size', type=int, default=1000,
+                        help='Tamanho dos lotes lidos do banco')
+    args = parser.parse_args()
+
+    with app.app_context():
+        rows = UserMonthlyStatsService.rebuild(user_id=args.user_id, batch_size=args.batch_size)
+
+    logger.info(f"Reconstrução concluída: {rows} linhas (usuário, mês) gravadas")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
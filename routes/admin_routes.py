@@ -7,6 +7,7 @@ from models import User, AdminUser, Order, Transaction, db, Invite
 from services.admin_service import AdminService
 from services.auth_service import admin_required
 from services.report_service import ReportService
+from services.report_job_service import ReportJobService
 from services.security_validator import SecurityValidator, rate_limit
 from sqlalchemy import desc
 from datetime import datetime
@@ -1274,28 +1275,131 @@ def relatorios():
     total_orders = Order.query.count()
     total_disputes = Order.query.filter(Order.dispute_reason != None).count()
     
-    # Gerar um relatório de exemplo (pode ser mais complexo)
-    report_data = ReportService.get_users_report_data()
+    # Relatórios completos são gerados em segundo plano (ReportJobService)
+    report_jobs = ReportJobService.recent_jobs(limit=10)
     
     return render_template('admin/relatorios.html', 
                            total_users=total_users, 
                            total_orders=total_orders, 
                            total_disputes=total_disputes,
-                           report_data=report_data)
+                           report_jobs=report_jobs)
 
 @admin_bp.route('/relatorios/gerar-pdf/<report_type>')
 @admin_required
 def gerar_pdf_relatorio(report_type):
-    """Gerar PDF de relatórios"""
+    """Enfileira a geração do PDF; o download fica disponível na página de relatórios"""
     try:
-        pdf_buffer = ReportService.generate_pdf_report(report_type)
-        response = make_response(pdf_buffer.getvalue())
-        response.headers['Content-Type'] = 'application/pdf'
-        response.headers['Content-Disposition'] = f'attachment; filename={report_type}_report.pdf'
-        return response
+        job = ReportJobService.enqueue(report_type, 'pdf', request.args.to_dict(),
+                                       requested_by=session.get('admin_id'))
+        if job.status == 'done':
+            return redirect(url_for('admin.baixar_relatorio_job', job_id=job.id))
+        flash('Relatório PDF em geração. O download aparecerá na lista de relatórios.', 'info')
     except Exception as e:
         flash(f'Erro ao gerar relatório PDF: {str(e)}', 'error')
+    return redirect(url_for('admin.relatorios'))
+
+@admin_bp.route('/relatorios/jobs', methods=['POST'])
+@admin_required
+def enfileirar_relatorio():
+    """Enfileira um relatório (tipo, formato e filtros) e retorna o job"""
+    payload = request.get_json(silent=True) or request.form.to_dict()
+    try:
+        job = ReportJobService.enqueue(
+            payload.get('report_type'), payload.get('format'), payload,
+            requested_by=session.get('admin_id')
+        )
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    return jsonify({'success': True, 'job': _report_job_payload(job)}), 202
+
+@admin_bp.route('/relatorios/jobs/<int:job_id>')
+@admin_required
+def status_relatorio_job(job_id):
+    """Status de um job de relatório (consultado periodicamente pela interface)"""
+    job = ReportJobService.get_job(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Job não encontrado'}), 404
+    return jsonify({'success': True, 'job': _report_job_payload(job)})
+
+@admin_bp.route('/relatorios/jobs/<int:job_id>/download')
+@admin_required
+def baixar_relatorio_job(job_id):
+    """Download do arquivo gerado por um job"""
+    from flask import send_file
+    
+    job = ReportJobService.get_artifact(job_id)
+    if job is None:
+        flash('Relatório indisponível ou expirado.', 'error')
+        return redirect(url_for('admin.relatorios'))
+    
+    return send_file(
+        job.artifact_path,
+        as_attachment=True,
+        download_name=f'relatorio_{job.report_type}_{job.finished_at.strftime("%Y%m%d_%H%M%S")}.{job.format}'
+    )
+
+def _report_job_payload(job):
+    payload = job.to_dict()
+    payload['status_url'] = url_for('admin.status_relatorio_job', job_id=job.id)
+    if job.status == 'done':
+        payload['download_url'] = url_for('admin.baixar_relatorio_job', job_id=job.id)
+    return payload
+
+@admin_bp.route('/relatorios/exportar/<report_type>.<fmt>')
+@admin_required
+def exportar_relatorio(report_type, fmt):
+    """
+    Exporta um relatório completo em CSV ou XLSX, em fluxo
+    
+    Query params: start_date, end_date (AAAA-MM-DD), status_filter, user_type
+    """
+    import os
+    from flask import Response, stream_with_context
+    
+    if report_type not in ReportService.EXPORT_COLUMNS or fmt not in ('csv', 'xlsx'):
+        flash('Exportação inválida.', 'error')
+        return redirect(url_for('admin.relatorios'))
+    
+    filters = {
+        'status_filter': request.args.get('status_filter'),
+        'user_type': request.args.get('user_type'),
+    }
+    try:
+        for key in ('start_date', 'end_date'):
+            value = request.args.get(key)
+            filters[key] = datetime.strptime(value, '%Y-%m-%d').date() if value else None
+    except ValueError:
+        flash('Formato de data inválido.', 'error')
+        return redirect(url_for('admin.relatorios'))
+    
+    def log_progress(rows):
+        logger.info(f"Exportação {report_type}.{fmt}: {rows} linhas")
+    
+    filename = f'relatorio_{report_type}_{datetime.now().strftime("%Y%m%d_%H%M%S")}.{fmt}'
+    headers = {'Content-Disposition': f'attachment; filename={filename}', 'X-Accel-Buffering': 'no'}
+    
+    if fmt == 'csv':
+        return Response(
+            stream_with_context(ReportService.stream_csv(report_type, filters, progress=log_progress)),
+            mimetype='text/csv; charset=utf-8',
+            headers=headers
+        )
+    
+    try:
+        path, rows = ReportService.export_to_xlsx_file(report_type, filters, progress=log_progress)
+    except Exception as e:
+        logger.error(f'Erro ao exportar relatório {report_type}: {str(e)}')
+        flash(f'Erro ao exportar relatório: {str(e)}', 'error')
         return redirect(url_for('admin.relatorios'))
+    
+    headers['Content-Length'] = str(os.path.getsize(path))
+    headers['X-Report-Rows'] = str(rows)
+    return Response(
+        ReportService.stream_file(path),
+        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        headers=headers
+    )
 
 # ==============================================================================
 #  LOGS DO SISTEMA
@@ -21,6 +21,7 @@ from services.auth_service import login_required, AuthService
 from services.pre_order_service import PreOrderService
 from services.pre_order_proposal_service import PreOrderProposalService
 from services.security_validator import SecurityValidator
+from services.presence_service import PresenceService
 from services.rate_limiter_service import (
     limiter,
     limit_pre_order_proposals,
@@ -1001,9 +1002,6 @@ def adicionar_saldo_e_aceitar(pre_order_id, pre_order=None):
 #  ROTAS DE TEMPO REAL (SSE E PRESENÇA)
 # ==============================================================================
 
-# Cache de presença em memória (em produção, usar Redis)
-_presence_cache = {}
-
 @pre_ordem_bp.route('/<int:pre_order_id>/stream')
 @login_required
 @require_pre_order_participant()
@@ -1019,7 +1017,7 @@ def stream_updates(pre_order_id, pre_order=None):
     - proposal_accepted: Quando proposta é aceita
     - proposal_rejected: Quando proposta é rejeitada
     - mutual_acceptance: Quando ambas as partes aceitam
-    - presence: Atualização de presença da outra parte
+    - presence: Entrada/saída da outra parte (action: join/leave)
     - heartbeat: Sinal de conexão ativa
     
     Requirements: 20.1-20.5
@@ -1045,6 +1043,13 @@ def stream_updates(pre_order_id, pre_order=None):
         last_proposal_count = current_pre_order.proposals.count()
         last_client_accepted = current_pre_order.client_accepted_terms
         last_provider_accepted = current_pre_order.provider_accepted_terms
+        last_viewers = set()
+        
+        # Nomes carregados uma única vez para os eventos de presença
+        participant_names = {
+            current_pre_order.client_id: current_pre_order.client.nome if current_pre_order.client else 'Outra parte',
+            current_pre_order.provider_id: current_pre_order.provider.nome if current_pre_order.provider else 'Outra parte'
+        }
         
         # Enviar evento de conexão
         yield format_sse_event({
@@ -1103,17 +1108,23 @@ def stream_updates(pre_order_id, pre_order=None):
                 last_client_accepted = current_pre_order.client_accepted_terms
                 last_provider_accepted = current_pre_order.provider_accepted_terms
                 
-                # Verificar presença da outra parte
-                other_party_id = current_pre_order.provider_id if user.id == current_pre_order.client_id else current_pre_order.client_id
-                other_party_present = is_user_present(pre_order_id, other_party_id)
+                # Stream aberto conta como heartbeat de presença do usuário
+                PresenceService.heartbeat(pre_order_id, user.id)
                 
-                if other_party_present:
-                    other_party = User.query.get(other_party_id)
+                # Emitir entrada/saída da outra parte
+                current_viewers = PresenceService.get_viewers(pre_order_id)
+                for presence_event in PresenceService.diff_viewers(
+                    last_viewers, current_viewers, ignore_user_id=user.id
+                ):
+                    if presence_event['user_id'] not in participant_names:
+                        continue
                     yield format_sse_event({
                         'type': 'presence',
-                        'other_party_present': True,
-                        'other_party_name': other_party.nome if other_party else 'Outra parte'
+                        'action': presence_event['action'],
+                        'other_party_present': presence_event['action'] == 'join',
+                        'other_party_name': participant_names[presence_event['user_id']]
                     }, event='presence')
+                last_viewers = current_viewers
                 
                 # Heartbeat
                 yield format_sse_event({
@@ -1127,6 +1138,7 @@ def stream_updates(pre_order_id, pre_order=None):
                 
             except GeneratorExit:
                 logger.info(f"Cliente desconectou do stream - Pré-ordem: {pre_order_id}, User: {user.id}")
+                PresenceService.leave(pre_order_id, user.id)
                 break
             except Exception as e:
                 logger.error(f"Erro no stream SSE: {e}")
@@ -1159,13 +1171,7 @@ def format_sse_event(data, event='message'):
 
 def is_user_present(pre_order_id, user_id):
     """Verifica se usuário está presente na pré-ordem"""
-    key = f"{pre_order_id}_{user_id}"
-    if key in _presence_cache:
-        # Verificar se presença ainda é válida (últimos 2 minutos)
-        last_seen = _presence_cache[key]
-        if (datetime.utcnow() - last_seen).total_seconds() < 120:
-            return True
-    return False
+    return PresenceService.is_present(pre_order_id, user_id)
 
 
 @pre_ordem_bp.route('/<int:pre_order_id>/presenca', methods=['GET', 'POST'])
@@ -1175,7 +1181,7 @@ def gerenciar_presenca(pre_order_id, pre_order=None):
     """
     Gerencia presença de usuários na pré-ordem
     
-    GET /pre-ordem/<id>/presenca - Verifica presença da outra parte
+    GET /pre-ordem/<id>/presenca - Verifica presença da outra parte (e renova a própria)
     POST /pre-ordem/<id>/presenca - Registra/remove presença
     
     Requirements: 20.3 (Indicador de presença)
@@ -1187,19 +1193,17 @@ def gerenciar_presenca(pre_order_id, pre_order=None):
         data = request.get_json() or {}
         action = data.get('action', 'enter')
         
-        key = f"{pre_order_id}_{user.id}"
-        
         if action == 'enter':
-            _presence_cache[key] = datetime.utcnow()
-            logger.debug(f"Presença registrada - Pré-ordem: {pre_order_id}, User: {user.id}")
+            PresenceService.heartbeat(pre_order_id, user.id)
         elif action == 'leave':
-            if key in _presence_cache:
-                del _presence_cache[key]
-            logger.debug(f"Presença removida - Pré-ordem: {pre_order_id}, User: {user.id}")
+            PresenceService.leave(pre_order_id, user.id)
         
         return jsonify({'success': True})
     
     else:
+        # Consulta periódica também renova o heartbeat de quem consulta
+        PresenceService.heartbeat(pre_order_id, user.id)
+        
         # Verificar presença da outra parte
         other_party_id = pre_order.provider_id if user.id == pre_order.client_id else pre_order.client_id
         other_party_present = is_user_present(pre_order_id, other_party_id)
@@ -5,10 +5,16 @@ from models import User, AdminUser, Order, Transaction, Wallet, db
 from datetime import datetime, timedelta
 from sqlalchemy import func
 from services.wallet_service import WalletService
+from services.user_loader import UserLoader
+from services.read_replica import replica_read
+from services.transaction_volume_rollup_service import TransactionVolumeRollupService
 
 class AdminService:
     """Serviço para operações administrativas"""
     
+    # Máximo de linhas examinadas ao filtrar erros no log principal
+    LOG_SCAN_LINES = 20000
+    
     @staticmethod
     def get_dashboard_stats():
         """Retorna estatísticas reais para o dashboard administrativo com terminologia técnica"""
@@ -42,33 +48,21 @@ class AdminService:
             tokens_em_circulacao = 0
             saldo_admin_tokens = 0
         
-        # Transações do mês atual
-        transacoes_mes = Transaction.query.filter(
-            Transaction.created_at >= inicio_mes
-        ).count()
+        # Transações do mês atual, por tipo (rollups horário/diário + transações ainda não consolidadas)
+        volumes_mes = TransactionVolumeRollupService.get_totals(start=inicio_mes)
+        taxas_mes = volumes_mes.get('taxa_sistema', {})
+        transacoes_mes = sum(stats['count'] for stats in volumes_mes.values())
         
         # Receita do mês (taxas do sistema)
-        receita_mes_result = db.session.query(
-            func.sum(Transaction.amount)
-        ).filter(
-            Transaction.type == 'taxa_sistema',
-            Transaction.created_at >= inicio_mes
-        ).scalar()
-        receita_mes = receita_mes_result or 0.0
+        receita_mes = taxas_mes.get('amount') or 0.0
         
         # Taxas totais recebidas (histórico completo)
-        taxas_totais_result = db.session.query(
-            func.sum(Transaction.amount)
-        ).filter(
-            Transaction.type == 'taxa_sistema'
-        ).scalar()
-        taxas_totais = taxas_totais_result or 0.0
+        taxas_totais = TransactionVolumeRollupService.get_totals(
+            types=['taxa_sistema']
+        ).get('taxa_sistema', {}).get('amount') or 0.0
         
         # Número de transações que geraram taxas no mês
-        transacoes_com_taxa_mes = Transaction.query.filter(
-            Transaction.type == 'taxa_sistema',
-            Transaction.created_at >= inicio_mes
-        ).count()
+        transacoes_com_taxa_mes = taxas_mes.get('count', 0)
         
         # Taxa média por transação no mês
         taxa_media_mes = receita_mes / transacoes_com_taxa_mes if transacoes_com_taxa_mes > 0 else 0.0
@@ -97,11 +91,7 @@ class AdminService:
             percentual_escrow = 0.0
         
         # Volume total de transações do mês
-        volume_transacoes_mes = db.session.query(
-            func.sum(func.abs(Transaction.amount))
-        ).filter(
-            Transaction.created_at >= inicio_mes
-        ).scalar() or 0.0
+        volume_transacoes_mes = sum(stats['volume'] for stats in volumes_mes.values()) or 0.0
         
         # Solicitações de tokens (nova funcionalidade)
         try:
@@ -136,6 +126,7 @@ class AdminService:
             'transacoes_mes': transacoes_mes,
             'receita_mes': receita_mes,
             'volume_transacoes_mes': volume_transacoes_mes,
+            'volume_mes_por_categoria': TransactionVolumeRollupService.by_category(volumes_mes),
             
             # Métricas de taxas (nova funcionalidade financeira)
             'taxas_totais': taxas_totais,
@@ -430,6 +421,7 @@ class AdminService:
         user.active = data['active']
         
         db.session.commit()
+        UserLoader.forget(user.id)
         return user
     
     @staticmethod
@@ -674,6 +666,7 @@ class AdminService:
             }
     
     @staticmethod
+    @replica_read
     def get_suspicious_activity_alerts():
         """Detecta atividades suspeitas no sistema"""
         alerts = []
@@ -1024,39 +1017,30 @@ class AdminService:
     
     @staticmethod
     def get_system_logs(limit=100):
-        """Retorna logs do sistema"""
-        import os
+        """Retorna logs do sistema (lidos do final dos arquivos, sem carregá-los inteiros)"""
+        from services.log_reader import tail
         
         logs = []
         
         try:
-            # Ler logs de erro críticos
-            error_log_path = 'logs/erros_criticos.log'
-            if os.path.exists(error_log_path):
-                with open(error_log_path, 'r', encoding='utf-8') as f:
-                    error_lines = f.readlines()[-limit//2:]  # Últimas linhas
-                    for line in error_lines:
-                        if line.strip():
-                            logs.append({
-                                'timestamp': line.split(' - ')[0] if ' - ' in line else 'N/A',
-                                'level': 'ERROR',
-                                'message': line.strip(),
-                                'source': 'erros_criticos.log'
-                            })
-            
-            # Ler logs do sistema principal
-            system_log_path = 'logs/sistema_combinado.log'
-            if os.path.exists(system_log_path):
-                with open(system_log_path, 'r', encoding='utf-8') as f:
-                    system_lines = f.readlines()[-limit//2:]  # Últimas linhas
-                    for line in system_lines:
-                        if line.strip() and 'ERROR' in line:
-                            logs.append({
-                                'timestamp': line.split(' - ')[0] if ' - ' in line else 'N/A',
-                                'level': 'ERROR' if 'ERROR' in line else 'INFO',
-                                'message': line.strip(),
-                                'source': 'sistema_combinado.log'
-                            })
+            # Últimas linhas dos logs de erro críticos
+            for line in tail('logs/erros_criticos.log', limit // 2):
+                logs.append({
+                    'timestamp': line.split(' - ')[0] if ' - ' in line else 'N/A',
+                    'level': 'ERROR',
+                    'message': line.strip(),
+                    'source': 'erros_criticos.log'
+                })
+            
+            # Últimos erros do log do sistema principal
+            for line in tail('logs/sistema_combinado.log', limit // 2,
+                             predicate=lambda l: 'ERROR' in l, max_scan=AdminService.LOG_SCAN_LINES):
+                logs.append({
+                    'timestamp': line.split(' - ')[0] if ' - ' in line else 'N/A',
+                    'level': 'ERROR',
+                    'message': line.strip(),
+                    'source': 'sistema_combinado.log'
+                })
             
             # Ordenar por timestamp (mais recentes primeiro)
             logs.sort(key=lambda x: x['timestamp'], reverse=True)
@@ -0,0 +1,417 @@
+#!/usr/bin/env python3.11
+# -*- coding: utf-8 -*-
+
+"""
+AnalyticsExportService - Exportação colunar incremental para análise offline
+
+As análises ad-hoc do financeiro consultavam o ReportService e as páginas
+administrativas direto no banco de produção. Este serviço copia as tabelas
+de fatos para arquivos Parquet em disco, e o AnalyticsQuery reproduz os
+resumos dos relatórios a partir desses arquivos.
+
+Funcionamento:
+- Tabelas exportadas: transactions, orders, pre_orders e proposal_audit_logs
+- Exportação incremental por marca d'água de id (última id exportada por
+  tabela em _watermarks.json no diretório de exportação)
+- Só entram linhas criadas há mais de ANALYTICS_EXPORT_SETTLE_SECONDS, para
+  que transações ainda não confirmadas com id menor não fiquem para trás
+- Arquivos particionados por mês de criação (estilo Hive):
+  <tabela>/month=AAAA-MM/part-<primeira id>.parquet
+- O nome pelo primeiro id torna a repetição de um lote interrompido
+  idempotente: o arquivo é sobrescrito e a marca d'água avança em seguida
+- orders e pre_orders mudam depois de criadas: além da marca d'água de id,
+  guardam a de alteração (updated_at, mesma janela de acomodação). Os
+  arquivos dessas tabelas cobrem faixas fixas de REWRITE_BLOCK_SIZE ids
+  (part-<início da faixa>); a faixa com linhas novas ou alteradas é lida
+  de novo do banco e seu arquivo substituído
+- rebuild() refaz uma tabela do zero
+
+Dependência opcional: pyarrow (pip install pyarrow).
+"""
+
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+import enum
+import json
+import glob
+import logging
+import os
+import shutil
+
+from sqlalchemy import func, types
+
+from models import db, Transaction, Order, PreOrder, ProposalAuditLog
+from services.report_service import ReportService
+from services.time_window import to_start, to_end
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - dependência opcional
+    pa = None
+
+logger = logging.getLogger(__name__)
+
+TABLES = {
+    'transactions': Transaction,
+    'orders': Order,
+    'pre_orders': PreOrder,
+    'proposal_audit_logs': ProposalAuditLog,
+}
+
+# Tabelas com linhas alteradas após a criação (reexportadas por updated_at)
+MUTABLE_TABLES = ('orders', 'pre_orders')
+
+PARTITION_KEY = 'month'
+NO_DATE_PARTITION = 'sem_data'
+WATERMARKS_FILE = '_watermarks.json'
+CHANGE_WATERMARK_SUFFIX = '.updated_at'
+
+DEFAULT_BATCH_SIZE = 5000
+DEFAULT_SETTLE_SECONDS = 60
+REWRITE_BLOCK_SIZE = 1000
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise RuntimeError("Exportação analítica requer o pacote pyarrow (pip install pyarrow)")
+
+
+class AnalyticsExportService:
+    """Cópia incremental das tabelas de fatos para Parquet particionado"""
+
+    # ------------------------------------------------------------------
+    # Configuração
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _config(key: str, default):
+        from flask import current_app
+
+        return current_app.config.get(key, default)
+
+    @classmethod
+    def export_dir(cls) -> str:
+        from flask import current_app
+
+        path = cls._config('ANALYTICS_EXPORT_DIR', os.path.join(current_app.instance_path, 'analytics'))
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    # ------------------------------------------------------------------
+    # Marcas d'água
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def get_watermarks(cls) -> Dict[str, Any]:
+        path = os.path.join(cls.export_dir(), WATERMARKS_FILE)
+        if not os.path.exists(path):
+            return {}
+        with open(path, encoding='utf-8') as handle:
+            return json.load(handle)
+
+    @classmethod
+    def _save_watermark(cls, table_name: str, last_id: int, changed_until: Optional[datetime] = None):
+        watermarks = cls.get_watermarks()
+        watermarks[table_name] = last_id
+        if changed_until is None:
+            watermarks.pop(f'{table_name}{CHANGE_WATERMARK_SUFFIX}', None)
+        else:
+            watermarks[f'{table_name}{CHANGE_WATERMARK_SUFFIX}'] = changed_until.isoformat()
+        path = os.path.join(cls.export_dir(), WATERMARKS_FILE)
+        with open(f'{path}.tmp', 'w', encoding='utf-8') as handle:
+            json.dump(watermarks, handle, sort_keys=True)
+        os.replace(f'{path}.tmp', path)
+
+    # ------------------------------------------------------------------
+    # Esquema
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _arrow_type(column):
+        column_type = column.type
+        if isinstance(column_type, types.Integer):
+            return pa.int64()
+        if isinstance(column_type, types.Float):
+            return pa.float64()
+        if isinstance(column_type, types.Numeric):
+            return pa.decimal128(column_type.precision or 18, column_type.scale or 2)
+        if isinstance(column_type, types.DateTime):
+            return pa.timestamp('us')
+        if isinstance(column_type, types.Date):
+            return pa.date32()
+        if isinstance(column_type, types.Boolean):
+            return pa.bool_()
+        return pa.string()
+
+    @classmethod
+    def schema(cls, table_name: str):
+        _require_pyarrow()
+        columns = TABLES[table_name].__table__.columns
+        return pa.schema([(column.name, cls._arrow_type(column)) for column in columns])
+
+    @staticmethod
+    def _convert(value, arrow_type):
+        if value is None:
+            return None
+        if pa.types.is_decimal(arrow_type):
+            return Decimal(value).quantize(Decimal(1).scaleb(-arrow_type.scale))
+        if pa.types.is_string(arrow_type) and not isinstance(value, str):
+            if isinstance(value, enum.Enum):
+                return str(value.value)
+            return json.dumps(value, default=str, ensure_ascii=False)
+        return value
+
+    # ------------------------------------------------------------------
+    # Exportação
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def export_all(cls, batch_size: int = None, now: datetime = None) -> Dict[str, int]:
+        """Exporta as linhas novas de todas as tabelas; retorna linhas por tabela"""
+        return {table_name: cls.export_table(table_name, batch_size=batch_size, now=now)
+                for table_name in TABLES}
+
+    @classmethod
+    def export_table(cls, table_name: str, batch_size: int = None, now: datetime = None) -> int:
+        """
+        Acrescenta aos arquivos as linhas com id acima da marca d'água
+
+        Em orders e pre_orders também reescreve as linhas alteradas desde a
+        última exportação.
+
+        Args:
+            table_name: transactions, orders, pre_orders ou proposal_audit_logs
+            batch_size: Linhas lidas e gravadas por lote (orders/pre_orders: por faixa de ids)
+            now: Referência para a janela de acomodação (padrão: agora)
+
+        Returns:
+            int: Linhas exportadas (novas e alteradas)
+        """
+        _require_pyarrow()
+        model = TABLES[table_name]
+        batch_size = batch_size or DEFAULT_BATCH_SIZE
+        last_id = cls.get_watermarks().get(table_name, 0)
+
+        settle = timedelta(seconds=cls._config('ANALYTICS_EXPORT_SETTLE_SECONDS', DEFAULT_SETTLE_SECONDS))
+        cutoff = (now or datetime.utcnow()) - settle
+        if table_name in MUTABLE_TABLES:
+            return cls._export_changes(table_name, cutoff)
+
+        upper_id = db.session.query(func.max(model.id)).filter(
+            model.id > last_id,
+            model.created_at <= cutoff
+        ).scalar()
+        if upper_id is None:
+            return 0
+
+        columns = list(model.__table__.columns)
+        query = db.session.query(*columns).filter(
+            model.id > last_id,
+            model.id <= upper_id
+        ).order_by(model.id)
+
+        exported = 0
+        batch = []
+        for row in query.yield_per(batch_size):
+            batch.append(row)
+            if len(batch) == batch_size:
+                exported += cls._write_batch(table_name, batch)
+                batch = []
+        if batch:
+            exported += cls._write_batch(table_name, batch)
+
+        logger.info(f"Exportação analítica {table_name}: {exported} linhas (até id {upper_id})")
+        return exported
+
+    @classmethod
+    def _export_changes(cls, table_name: str, cutoff: datetime) -> int:
+        """
+        Exporta as linhas novas e reescreve as alteradas de orders/pre_orders
+
+        Cada faixa de REWRITE_BLOCK_SIZE ids com linha nova ou alterada até
+        `cutoff` é lida inteira do banco e substitui seus arquivos. As marcas
+        d'água só avançam depois de todas as faixas gravadas: uma exportação
+        interrompida reescreve as mesmas faixas na próxima execução.
+        """
+        model = TABLES[table_name]
+        watermarks = cls.get_watermarks()
+        last_id = watermarks.get(table_name, 0)
+        changed_since = watermarks.get(f'{table_name}{CHANGE_WATERMARK_SUFFIX}')
+
+        if last_id and changed_since is None:
+            # Arquivos de uma versão anterior (lotes por primeira id, sem marca de alteração)
+            logger.info(f"Exportação analítica {table_name}: refazendo arquivos sem marca d'água de alteração")
+            shutil.rmtree(os.path.join(cls.export_dir(), table_name), ignore_errors=True)
+            last_id = 0
+
+        upper_id = db.session.query(func.max(model.id)).filter(
+            model.id > last_id,
+            model.created_at <= cutoff
+        ).scalar() or last_id
+
+        ids = [row.id for row in db.session.query(model.id).filter(
+            model.id > last_id,
+            model.id <= upper_id
+        )]
+        if changed_since is not None:
+            ids += [row.id for row in db.session.query(model.id).filter(
+                model.id <= last_id,
+                model.updated_at > datetime.fromisoformat(changed_since),
+                model.updated_at <= cutoff
+            )]
+
+        for block in sorted({row_id // REWRITE_BLOCK_SIZE for row_id in ids}):
+            start = block * REWRITE_BLOCK_SIZE
+            rows = db.session.query(*model.__table__.columns).filter(
+                model.id >= start,
+                model.id < start + REWRITE_BLOCK_SIZE,
+                model.id <= upper_id
+            ).order_by(model.id).all()
+            written = cls._write_partitions(table_name, rows, start) if rows else set()
+            pattern = os.path.join(cls.export_dir(), table_name, f'{PARTITION_KEY}=*', f'part-{start:012d}.parquet')
+            for path in set(glob.glob(pattern)) - written:
+                os.remove(path)  # Linhas da faixa removidas do banco
+
+        cls._save_watermark(table_name, upper_id, changed_until=cutoff)
+        logger.info(f"Exportação analítica {table_name}: {len(ids)} linhas novas ou alteradas (até id {upper_id})")
+        return len(ids)
+
+    @classmethod
+    def _write_partitions(cls, table_name: str, rows: List[Any], file_id: int) -> set:
+        """Grava as linhas por partição em part-<file_id>; retorna os caminhos gravados"""
+        schema = cls.schema(table_name)
+        partitions: Dict[str, List[Any]] = {}
+        for row in rows:
+            key = row.created_at.strftime('%Y-%m') if row.created_at else NO_DATE_PARTITION
+            partitions.setdefault(key, []).append(row)
+
+        written = set()
+        for key, partition_rows in partitions.items():
+            data = {
+                field.name: [cls._convert(value, field.type) for value in column_values]
+                for field, column_values in zip(schema, zip(*partition_rows))
+            }
+            directory = os.path.join(cls.export_dir(), table_name, f'{PARTITION_KEY}={key}')
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, f'part-{file_id:012d}.parquet')
+            pq.write_table(pa.Table.from_pydict(data, schema=schema), f'{path}.tmp')
+            os.replace(f'{path}.tmp', path)
+            written.add(path)
+        return written
+
+    @classmethod
+    def _write_batch(cls, table_name: str, rows: List[Any]) -> int:
+        """Grava um lote por partição e avança a marca d'água"""
+        cls._write_partitions(table_name, rows, rows[0].id)
+        cls._save_watermark(table_name, rows[-1].id)
+        return len(rows)
+
+    @classmethod
+    def rebuild(cls, table_name: str, batch_size: int = None) -> int:
+        """Apaga os arquivos de uma tabela e exporta tudo novamente"""
+        shutil.rmtree(os.path.join(cls.export_dir(), table_name), ignore_errors=True)
+        cls._save_watermark(table_name, 0)
+        return cls.export_table(table_name, batch_size=batch_size)
+
+
+class AnalyticsQuery:
+    """Resumos dos relatórios calculados sobre os arquivos exportados"""
+
+    @staticmethod
+    def _schema(table_name: str):
+        return AnalyticsExportService.schema(table_name).append(pa.field(PARTITION_KEY, pa.string()))
+
+    @classmethod
+    def dataset(cls, table_name: str):
+        """Dataset pyarrow da tabela (None se ainda não há arquivos)"""
+        _require_pyarrow()
+        path = os.path.join(AnalyticsExportService.export_dir(), table_name)
+        if not os.path.isdir(path):
+            return None
+        partitioning = ds.partitioning(pa.schema([(PARTITION_KEY, pa.string())]), flavor='hive')
+        return ds.dataset(path, format='parquet', partitioning=partitioning, schema=cls._schema(table_name))
+
+    @classmethod
+    def read(cls, table_name: str, columns: List[str], start_date=None, end_date=None, condition=None):
+        """Colunas da tabela no período (mesma semântica de in_period)"""
+        dataset = cls.dataset(table_name)
+        if dataset is None:
+            return cls._schema(table_name).empty_table().select(columns)
+
+        bounds = []
+        if start_date:
+            bounds.append(ds.field('created_at') >= pa.scalar(to_start(start_date), pa.timestamp('us')))
+        if end_date:
+            bounds.append(ds.field('created_at') < pa.scalar(to_end(end_date), pa.timestamp('us')))
+        for bound in bounds:
+            condition = bound if condition is None else condition & bound
+        return dataset.to_table(columns=columns, filter=condition)
+
+    @staticmethod
+    def _grouped(table, key: str, aggregations) -> Dict[str, Dict[str, Any]]:
+        grouped = table.group_by(key).aggregate(aggregations).to_pylist()
+        return {row.pop(key): row for row in grouped}
+
+    @classmethod
+    def contracts_summary(cls, start_date=None, end_date=None, status_filter=None) -> Dict[str, Any]:
+        """Mesmos números de ReportService.get_contracts_report_data (até a última exportação)"""
+        condition = None
+        if status_filter and status_filter != 'todos':
+            condition = ds.field('status').isin(status_filter.split(','))
+        table = cls.read('orders', ['status', 'value', PARTITION_KEY], start_date, end_date, condition)
+
+        status_stats = {
+            status: {'count': stats['value_count'], 'value': stats['value_sum'] or Decimal('0')}
+            for status, stats in cls._grouped(table, 'status', [('value', 'count'), ('value', 'sum')]).items()
+        }
+        monthly = cls._grouped(table, PARTITION_KEY, [('value', 'count'), ('value', 'sum')])
+        monthly_stats = {month: {'count': monthly[month]['value_count'], 'value': monthly[month]['value_sum']}
+                         for month in sorted(monthly, reverse=True)}
+
+        return {
+            'total_contratos': table.num_rows,
+            'valor_total': sum((stats['value'] for stats in status_stats.values()), Decimal('0')),
+            'status_stats': status_stats,
+            'monthly_stats': monthly_stats,
+        }
+
+    @classmethod
+    def financial_summary(cls, start_date=None, end_date=None) -> Dict[str, Any]:
+        """Mesmos números de ReportService.get_financial_report_data (top_users por id)"""
+        table = cls.read('transactions', ['user_id', 'type', 'amount', PARTITION_KEY], start_date, end_date)
+        table = table.append_column('volume', pc.abs(table['amount']))
+        table = table.append_column('fee', pc.if_else(
+            pc.is_in(table['type'], value_set=pa.array(ReportService.FEE_TRANSACTION_TYPES)),
+            table['volume'], pa.scalar(Decimal('0'), table.schema.field('volume').type)
+        ))
+
+        transaction_stats = {
+            t_type: {'count': stats['volume_count'], 'total_amount': stats['volume_sum']}
+            for t_type, stats in cls._grouped(table, 'type', [('volume', 'count'), ('volume', 'sum')]).items()
+        }
+        monthly = cls._grouped(table, PARTITION_KEY, [('volume', 'count'), ('volume', 'sum'), ('fee', 'sum')])
+        monthly_stats = {
+            month: {'count': monthly[month]['volume_count'], 'volume': monthly[month]['volume_sum'],
+                    'receita': monthly[month]['fee_sum']}
+            for month in sorted(monthly, reverse=True)
+        }
+        users = cls._grouped(table, 'user_id', [('volume', 'count'), ('volume', 'sum')])
+        top_users = sorted(
+            ({'user_id': user_id, 'transaction_count': stats['volume_count'], 'total_volume': stats['volume_sum']}
+             for user_id, stats in users.items()),
+            key=lambda user: user['total_volume'], reverse=True
+        )[:10]
+
+        return {
+            'total_transacoes': table.num_rows,
+            'volume_total': sum((stats['total_amount'] for stats in transaction_stats.values()), Decimal('0')),
+            'receita_taxas': sum((stats['total_amount'] for t_type, stats in transaction_stats.items()
+                                  if t_type in ReportService.FEE_TRANSACTION_TYPES), Decimal('0')),
+            'transaction_stats': transaction_stats,
+            'monthly_stats': monthly_stats,
+            'top_users': top_users,
+        }
@@ -13,18 +13,10 @@ from datetime import datetime
 from typing import Dict, Any, Optional
 from decimal import Decimal
 
-# Configurar logger específico para auditoria
-audit_logger = logging.getLogger('sistema_combinado.audit')
-audit_logger.setLevel(logging.INFO)
+from services.audit_writer import AuditLogWriter
 
-# Handler para arquivo de auditoria separado
-audit_handler = logging.FileHandler('logs/audit.log', encoding='utf-8')
-audit_handler.setLevel(logging.INFO)
-audit_formatter = logging.Formatter(
-    '%(asctime)s - AUDIT - %(message)s'
-)
-audit_handler.setFormatter(audit_formatter)
-audit_logger.addHandler(audit_handler)
+# Logger específico para auditoria; gravação assíncrona em logs/audit.log
+audit_logger = AuditLogWriter.install()
 
 
 class AuditService:
@@ -376,3 +368,17 @@ class AuditService:
         
         audit_logger.error(entry)
         return audit_id
+    
+    @staticmethod
+    def search_events(**filters) -> list:
+        """
+        Busca eventos de auditoria no armazenamento indexado (audit_events)
+        
+        Args:
+            **filters: entity_type, entity_id, user_id, operation, start, end, limit
+            
+        Returns:
+            list: Eventos, mais recentes primeiro
+        """
+        from services.audit_store import AuditEventStore
+        return AuditEventStore.search(**filters)
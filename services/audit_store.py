@@ -0,0 +1,165 @@
+#!/usr/bin/env python3.11
+# -*- coding: utf-8 -*-
+
+"""
+AuditEventStore - Armazenamento indexado dos eventos de auditoria
+
+Os registros do AuditService continuam em logs/audit.log; este armazenamento
+recebe os mesmos lotes na thread do AuditLogWriter e os insere na tabela
+audit_events (somente inserção), indexada por período, entidade, usuário e
+operação. Buscas e rastreamentos passam a custar proporcional ao resultado.
+"""
+
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+import json
+import logging
+
+from sqlalchemy import select
+
+from models import db, AuditEvent
+from services.audit_writer import AuditLogWriter
+
+logger = logging.getLogger(__name__)
+
+
+class AuditEventStore:
+    """Gravação em lote e consultas de audit_events"""
+
+    MAX_LIMIT = 1000
+
+    _app = None
+
+    @classmethod
+    def attach(cls, app):
+        """Passa a gravar os lotes do AuditLogWriter em audit_events"""
+        cls._app = app
+        AuditLogWriter.add_batch_sink(cls.write_records)
+
+    @classmethod
+    def detach(cls):
+        AuditLogWriter.remove_batch_sink(cls.write_records)
+        cls._app = None
+
+    @staticmethod
+    def _parse_timestamp(value: Optional[str], fallback: float) -> datetime:
+        if value:
+            try:
+                return datetime.fromisoformat(value)
+            except ValueError:
+                pass
+        return datetime.utcfromtimestamp(fallback)
+
+    @classmethod
+    def to_row(cls, message: str, level: str = 'INFO', created: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Converte a entrada JSON do AuditService em linha de audit_events"""
+        try:
+            entry = json.loads(message)
+        except (TypeError, ValueError):
+            return None
+        if not isinstance(entry, dict) or not entry.get('audit_id'):
+            return None
+
+        return {
+            'audit_id': entry['audit_id'],
+            'timestamp': cls._parse_timestamp(entry.get('timestamp'), created or 0),
+            'level': level,
+            'operation': str(entry.get('operation') or 'UNKNOWN')[:100],
+            'entity_type': str(entry.get('entity_type') or '')[:50],
+            'entity_id': entry.get('entity_id'),
+            'user_id': entry.get('user_id'),
+            'details': json.dumps(entry.get('details') or {}, ensure_ascii=False),
+        }
+
+    @classmethod
+    def write_records(cls, records: Iterable[logging.LogRecord]) -> int:
+        """Insere um lote de registros do logger de auditoria"""
+        rows = [
+            row for row in (
+                cls.to_row(record.getMessage(), record.levelname, record.created) for record in records
+            ) if row is not None
+        ]
+        try:
+            return cls.insert_rows(rows)
+        except Exception as e:
+            logger.error(f"Erro ao gravar {len(rows)} eventos de auditoria: {str(e)}")
+            raise
+
+    @classmethod
+    def insert_rows(cls, rows: List[Dict[str, Any]]) -> int:
+        """Insere linhas em uma transação própria; ignora audit_ids já gravados"""
+        if not rows:
+            return 0
+        from flask import has_app_context
+        from contextlib import nullcontext
+
+        context = nullcontext() if has_app_context() or cls._app is None else cls._app.app_context()
+        table = AuditEvent.__table__
+        with context:
+            with db.engine.begin() as connection:
+                existing = set(connection.execute(
+                    select(table.c.audit_id).where(table.c.audit_id.in_([row['audit_id'] for row in rows]))
+                ).scalars())
+                new_rows = [row for row in rows if row['audit_id'] not in existing]
+                if new_rows:
+                    connection.execute(table.insert(), new_rows)
+        return len(new_rows)
+
+    @staticmethod
+    def _to_dict(event: AuditEvent) -> Dict[str, Any]:
+        return {
+            'id': event.id,
+            'audit_id': event.audit_id,
+            'timestamp': event.timestamp.isoformat(),
+            'level': event.level,
+            'operation': event.operation,
+            'entity_type': event.entity_type,
+            'entity_id': event.entity_id,
+            'user_id': event.user_id,
+            'details': json.loads(event.details) if event.details else {},
+        }
+
+    @classmethod
+    def search(
+        cls,
+        entity_type: Optional[str] = None,
+        entity_id: Optional[int] = None,
+        user_id: Optional[int] = None,
+        operation: Optional[str] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        limit: int = 100,
+    ) -> List[Dict[str, Any]]:
+        """
+        Busca eventos (mais recentes primeiro)
+
+        Args:
+            start/end: Período [start, end); para paginar, `end` = timestamp do último evento
+            limit: Máximo de eventos (até MAX_LIMIT)
+
+        Returns:
+            List[Dict]: Eventos no formato das entradas do AuditService
+        """
+        query = AuditEvent.query
+        if entity_type is not None:
+            query = query.filter(AuditEvent.entity_type == entity_type)
+        if entity_id is not None:
+            query = query.filter(AuditEvent.entity_id == entity_id)
+        if user_id is not None:
+            query = query.filter(AuditEvent.user_id == user_id)
+        if operation is not None:
+            query = query.filter(AuditEvent.operation == operation)
+        if start is not None:
+            query = query.filter(AuditEvent.timestamp >= start)
+        if end is not None:
+            query = query.filter(AuditEvent.timestamp < end)
+
+        events = query.order_by(
+            AuditEvent.timestamp.desc(), AuditEvent.id.desc()
+        ).limit(max(1, min(limit, cls.MAX_LIMIT))).all()
+        return [cls._to_dict(event) for event in events]
+
+    @classmethod
+    def get_entity_trail(cls, entity_type: str, entity_id: int, limit: int = MAX_LIMIT) -> List[Dict[str, Any]]:
+        """Histórico de uma entidade em ordem cronológica"""
+        return list(reversed(cls.search(entity_type=entity_type, entity_id=entity_id, limit=limit)))
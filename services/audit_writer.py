@@ -0,0 +1,321 @@
+#!/usr/bin/env python3.11
+# -*- coding: utf-8 -*-
+
+"""
+AuditLogWriter - Gravação assíncrona dos registros de auditoria
+
+O logger 'sistema_combinado.audit' recebe apenas um handler de fila: a
+requisição só enfileira o registro, e uma thread dedicada o grava no
+destino único (logs/audit.log com rotação).
+
+Funcionamento:
+- Fila limitada a `AUDIT_QUEUE_MAX_SIZE` registros; com a fila cheia o
+  chamador espera até `AUDIT_QUEUE_BLOCK_TIMEOUT` segundos e, persistindo,
+  grava o registro ele mesmo (nenhum registro é descartado)
+- A thread grava em lotes e aplica a política de fsync
+  (`AUDIT_FSYNC_POLICY`): 'batch' (a cada lote), 'interval' (no máximo a
+  cada `AUDIT_FSYNC_INTERVAL` segundos) ou 'none'
+- Ao encerrar o processo (atexit), a fila é esvaziada, sincronizada e o
+  arquivo fechado
+- get_stats() expõe as métricas de pressão (profundidade, esperas,
+  gravações síncronas)
+- Consumidores de lote (add_batch_sink) recebem os mesmos lotes após a
+  gravação no arquivo, na thread de gravação (ex: AuditEventStore)
+"""
+
+from logging.handlers import RotatingFileHandler
+from typing import Any, Callable, Dict, List, Optional
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+
+AUDIT_LOGGER_NAME = 'sistema_combinado.audit'
+AUDIT_FORMAT = '%(asctime)s - AUDIT - %(message)s'
+
+
+class _AuditQueueHandler(logging.Handler):
+    """Handler instalado no logger de auditoria: só enfileira"""
+
+    def __init__(self, writer: 'type[AuditLogWriter]'):
+        super().__init__(logging.INFO)
+        self.writer = writer
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            # Mensagem resolvida no chamador; formatação final na thread
+            record.msg = record.getMessage()
+            record.args = None
+            record.exc_info = None
+            self.writer.submit(record)
+        except Exception:
+            self.handleError(record)
+
+
+class AuditLogWriter:
+    """Fila e thread de gravação do log de auditoria"""
+
+    DEFAULT_PATH = 'logs/audit.log'
+    MAX_BYTES = 20 * 1024 * 1024  # 20MB (maior porque auditoria é crítica)
+    BACKUP_COUNT = 20  # Mantém mais backups para auditoria
+    BATCH_SIZE = 500
+
+    FSYNC_POLICIES = ('batch', 'interval', 'none')
+
+    queue_max_size = 10000
+    block_timeout = 1.0
+    fsync_policy = 'batch'
+    fsync_interval = 1.0
+
+    _queue: Optional['queue.Queue[Optional[logging.LogRecord]]'] = None
+    _sink: Optional[logging.Handler] = None
+    _handler: Optional[_AuditQueueHandler] = None
+    _thread: Optional[threading.Thread] = None
+    _lock = threading.Lock()
+    _last_fsync = 0.0
+    _atexit_registered = False
+    _stats: Dict[str, int] = {}
+    _batch_sinks: List[Callable[[List[logging.LogRecord]], None]] = []
+
+    @classmethod
+    def _reset_stats(cls):
+        cls._stats = {
+            'enqueued': 0,
+            'written': 0,
+            'batches': 0,
+            'fsyncs': 0,
+            'blocked': 0,  # Chamador esperou por espaço na fila
+            'written_inline': 0,  # Fila cheia além do tempo limite: gravado no chamador
+            'max_depth': 0,
+            'errors': 0,
+        }
+
+    @classmethod
+    def install(cls, config: Optional[Dict[str, Any]] = None, path: Optional[str] = None,
+                sink: Optional[logging.Handler] = None) -> logging.Logger:
+        """
+        Instala (ou reconfigura) o handler de fila no logger de auditoria
+
+        Args:
+            config: Configuração da aplicação (AUDIT_*); padrões se None
+            path: Arquivo de destino (padrão: logs/audit.log)
+            sink: Handler de destino já criado (testes)
+
+        Returns:
+            logging.Logger: Logger de auditoria
+        """
+        config = config or {}
+        policy = config.get('AUDIT_FSYNC_POLICY', cls.fsync_policy)
+        if policy not in cls.FSYNC_POLICIES:
+            raise ValueError(f"Política de fsync inválida: {policy}")
+
+        with cls._lock:
+            cls.fsync_policy = policy
+            cls.fsync_interval = float(config.get('AUDIT_FSYNC_INTERVAL', cls.fsync_interval))
+            cls.block_timeout = float(config.get('AUDIT_QUEUE_BLOCK_TIMEOUT', cls.block_timeout))
+            queue_max_size = int(config.get('AUDIT_QUEUE_MAX_SIZE', cls.queue_max_size))
+
+            logger = logging.getLogger(AUDIT_LOGGER_NAME)
+            logger.setLevel(logging.INFO)
+            # Destino único: não repassar aos handlers da raiz
+            logger.propagate = False
+
+            if cls._handler is not None and sink is None and path is None \
+                    and queue_max_size == cls.queue_max_size:
+                return logger
+
+        cls.shutdown()
+
+        with cls._lock:
+            cls.queue_max_size = queue_max_size
+            if sink is None:
+                path = path or cls.DEFAULT_PATH
+                os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+                sink = RotatingFileHandler(path, maxBytes=cls.MAX_BYTES,
+                                           backupCount=cls.BACKUP_COUNT, encoding='utf-8')
+                sink.setFormatter(logging.Formatter(AUDIT_FORMAT))
+            cls._sink = sink
+            cls._queue = queue.Queue(maxsize=cls.queue_max_size)
+            cls._reset_stats()
+
+            for handler in list(logger.handlers):
+                logger.removeHandler(handler)
+            cls._handler = _AuditQueueHandler(cls)
+            logger.addHandler(cls._handler)
+
+            cls._thread = threading.Thread(target=cls._run, name='audit-log-writer', daemon=True)
+            cls._thread.start()
+
+            if not cls._atexit_registered:
+                atexit.register(cls.shutdown)
+                cls._atexit_registered = True
+        return logger
+
+    @classmethod
+    def add_batch_sink(cls, sink: Callable[[List[logging.LogRecord]], None]):
+        """Registra um consumidor dos lotes gravados (idempotente)"""
+        if sink not in cls._batch_sinks:
+            cls._batch_sinks.append(sink)
+
+    @classmethod
+    def remove_batch_sink(cls, sink: Callable[[List[logging.LogRecord]], None]):
+        if sink in cls._batch_sinks:
+            cls._batch_sinks.remove(sink)
+
+    @classmethod
+    def _notify_batch_sinks(cls, records: List[logging.LogRecord]):
+        for sink in list(cls._batch_sinks):
+            try:
+                sink(records)
+            except Exception:
+                cls._stats['errors'] += 1
+
+    @classmethod
+    def submit(cls, record: logging.LogRecord):
+        """Enfileira um registro; aplica contrapressão se a fila estiver cheia"""
+        work_queue = cls._queue
+        if work_queue is None:
+            cls._write_inline(record)
+            return
+
+        try:
+            work_queue.put_nowait(record)
+        except queue.Full:
+            cls._stats['blocked'] += 1
+            try:
+                work_queue.put(record, timeout=cls.block_timeout)
+            except queue.Full:
+                cls._write_inline(record)
+                return
+
+        cls._stats['enqueued'] += 1
+        depth = work_queue.qsize()
+        if depth > cls._stats['max_depth']:
+            cls._stats['max_depth'] = depth
+
+    @classmethod
+    def _write_inline(cls, record: logging.LogRecord):
+        if cls._sink is None:
+            return
+        cls._stats['written_inline'] += 1
+        cls._sink.handle(record)
+        cls._sink.flush()
+        cls._notify_batch_sinks([record])
+
+    @classmethod
+    def _fsync(cls, force: bool = False):
+        stream = getattr(cls._sink, 'stream', None)
+        if stream is None:
+            return
+        now = time.monotonic()
+        if not force:
+            if cls.fsync_policy == 'none':
+                return
+            if cls.fsync_policy == 'interval' and now - cls._last_fsync < cls.fsync_interval:
+                return
+        try:
+            os.fsync(stream.fileno())
+            cls._last_fsync = now
+            cls._stats['fsyncs'] += 1
+        except (OSError, ValueError):
+            cls._stats['errors'] += 1
+
+    @classmethod
+    def _write_batch(cls, records):
+        sink = cls._sink
+        for record in records:
+            try:
+                sink.handle(record)
+            except Exception:
+                cls._stats['errors'] += 1
+        sink.flush()
+        cls._stats['written'] += len(records)
+        cls._stats['batches'] += 1
+        cls._fsync()
+        cls._notify_batch_sinks(records)
+
+    @classmethod
+    def _run(cls):
+        work_queue = cls._queue
+        while True:
+            record = work_queue.get()
+            if record is None:
+                work_queue.task_done()
+                return
+
+            batch = [record]
+            stop = False
+            while len(batch) < cls.BATCH_SIZE:
+                try:
+                    record = work_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if record is None:
+                    stop = True
+                    break
+                batch.append(record)
+
+            try:
+                cls._write_batch(batch)
+            finally:
+                for _ in range(len(batch) + (1 if stop else 0)):
+                    work_queue.task_done()
+            if stop:
+                return
+
+    @classmethod
+    def flush(cls, timeout: float = 5.0) -> bool:
+        """Aguarda a gravação de tudo o que já foi enfileirado"""
+        work_queue = cls._queue
+        if work_queue is None:
+            return True
+        deadline = time.monotonic() + timeout
+        while work_queue.unfinished_tasks:
+            if time.monotonic() >= deadline or not (cls._thread and cls._thread.is_alive()):
+                return False
+            time.sleep(0.005)
+        return True
+
+    @classmethod
+    def shutdown(cls, timeout: float = 10.0):
+        """Esvazia a fila, sincroniza e fecha o destino"""
+        with cls._lock:
+            work_queue, thread, sink = cls._queue, cls._thread, cls._sink
+            if work_queue is None:
+                return
+            if thread is not None and thread.is_alive():
+                work_queue.put(None)
+                thread.join(timeout)
+
+            # Restante (thread parada ou sem tempo): gravar aqui
+            pending = []
+            while True:
+                try:
+                    record = work_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if record is not None:
+                    pending.append(record)
+            if pending and sink is not None:
+                cls._write_batch(pending)
+
+            if sink is not None:
+                cls._fsync(force=True)
+                sink.close()
+
+            logger = logging.getLogger(AUDIT_LOGGER_NAME)
+            if cls._handler is not None:
+                logger.removeHandler(cls._handler)
+            cls._queue = cls._thread = cls._sink = cls._handler = None
+
+    @classmethod
+    def get_stats(cls) -> Dict[str, Any]:
+        """Métricas da fila de auditoria"""
+        stats = dict(cls._stats)
+        stats['depth'] = cls._queue.qsize() if cls._queue is not None else 0
+        stats['queue_max_size'] = cls.queue_max_size
+        stats['fsync_policy'] = cls.fsync_policy
+        stats['running'] = bool(cls._thread and cls._thread.is_alive())
+        return stats
@@ -4,6 +4,7 @@
 from functools import wraps
 from flask import session, redirect, url_for, flash, current_app
 from models import AdminUser, User
+from services.user_loader import UserLoader
 
 class AuthService:
     """Serviço de autenticação e autorização"""
@@ -35,7 +36,7 @@ class AuthService:
     def get_current_user():
         """Retorna o usuário atual (apenas se não foi deletado)"""
         if AuthService.is_user_logged_in():
-            user = User.query.get(session['user_id'])
+            user = UserLoader.get(session['user_id'])
             # Verificar se o usuário não foi deletado
             if user and not user.is_deleted:
                 return user
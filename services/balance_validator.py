@@ -43,8 +43,9 @@ class BalanceValidator:
         Verifica primeiro nas configurações do sistema, senão usa o valor padrão
         """
         try:
-            fee = ConfigService.get_config('taxa_contestacao', float(BalanceValidator.DEFAULT_CONTESTATION_FEE))
-            return Decimal(str(fee))
+            return ConfigService.snapshot().get_decimal(
+                'taxa_contestacao', BalanceValidator.DEFAULT_CONTESTATION_FEE
+            )
         except Exception as e:
             logging.warning(f"Erro ao obter taxa de contestação das configurações: {e}")
             return BalanceValidator.DEFAULT_CONTESTATION_FEE
@@ -0,0 +1,387 @@
+#!/usr/bin/env python3.11
+# -*- coding: utf-8 -*-
+
+"""
+CacheInvalidationBus - Barramento de invalidação de cache entre workers
+
+Os namespaces do CacheService vivem na memória de cada worker. Sem este
+barramento, uma invalidação (ex: ConfigService.set_config, nova proposta em
+pré-ordem) só vale no worker que fez a escrita e os demais continuam servindo
+o valor antigo até o TTL expirar.
+
+Funcionamento:
+- Cada invalidação local (chave, tag, padrão ou limpeza) é publicada no
+  backend com a identificação do worker de origem
+- Uma thread por worker lê os eventos novos a cada
+  `CACHE_INVALIDATION_POLL_INTERVAL` segundos e os aplica localmente,
+  ignorando os próprios
+- A leitura relê uma janela de ids abaixo do último lido e descarta os já
+  aplicados: no PostgreSQL os ids da sequência podem ser confirmados fora de
+  ordem (N+1 visível antes de N), e um `id > último lido` puro perderia N
+- Eventos antigos são removidos periodicamente; se um worker ficar para trás
+  além da retenção, limpa seus namespaces por segurança
+
+Backends:
+- 'memory': registro em processo (testes / worker único)
+- 'database': tabela cache_invalidation_events, compartilhada entre workers
+"""
+
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+import logging
+
+from services.cache_service import CacheService
+
+logger = logging.getLogger(__name__)
+
+# (id, origem, namespace, tipo, valores)
+InvalidationEvent = Tuple[int, str, str, str, List[str]]
+
+
+class InMemoryInvalidationBackend:
+    """
+    Backend de eventos em memória
+
+    Mantém no máximo `max_events` eventos; útil para testes com vários
+    barramentos simulando workers no mesmo processo.
+    """
+
+    def __init__(self, max_events: int = 10000):
+        self._events = deque(maxlen=max_events)
+        self._next_id = 1
+        self._lock = threading.Lock()
+
+    def publish(self, origin: str, namespace: str, kind: str, values: List[str]) -> int:
+        with self._lock:
+            event_id = self._next_id
+            self._next_id += 1
+            self._events.append((event_id, origin, namespace, kind, list(values), time.monotonic()))
+            return event_id
+
+    def fetch_since(self, last_id: int, limit: int = 500) -> List[InvalidationEvent]:
+        with self._lock:
+            return [event[:5] for event in self._events if event[0] > last_id][:limit]
+
+    def latest_id(self) -> int:
+        with self._lock:
+            return self._next_id - 1
+
+    def oldest_id(self) -> Optional[int]:
+        with self._lock:
+            return self._events[0][0] if self._events else None
+
+    def prune(self, retention_seconds: float) -> int:
+        cutoff = time.monotonic() - retention_seconds
+        removed = 0
+        with self._lock:
+            while self._events and self._events[0][5] < cutoff:
+                self._events.popleft()
+                removed += 1
+        return removed
+
+
+class DatabaseInvalidationBackend:
+    """
+    Backend de eventos em banco de dados (tabela cache_invalidation_events)
+
+    A publicação usa uma conexão própria do engine, para não confirmar nem
+    desfazer a transação em andamento na sessão do chamador. A leitura é uma
+    consulta pela chave primária (id > início da janela), barata mesmo com
+    intervalos curtos.
+    """
+
+    def __init__(self, app=None):
+        self.app = app
+
+    def _app_context(self):
+        from flask import has_app_context
+        from contextlib import nullcontext
+
+        if has_app_context() or self.app is None:
+            return nullcontext()
+        return self.app.app_context()
+
+    def publish(self, origin: str, namespace: str, kind: str, values: List[str]) -> int:
+        from models import db, CacheInvalidationEvent
+
+        with self._app_context():
+            table = CacheInvalidationEvent.__table__
+            with db.engine.begin() as conn:
+                result = conn.execute(table.insert().values(
+                    origin=origin,
+                    namespace=namespace,
+                    kind=kind,
+                    payload=json.dumps(values),
+                    created_at=datetime.utcnow()
+                ))
+                return result.inserted_primary_key[0]
+
+    def fetch_since(self, last_id: int, limit: int = 500) -> List[InvalidationEvent]:
+        from models import db, CacheInvalidationEvent
+
+        with self._app_context():
+            table = CacheInvalidationEvent.__table__
+            with db.engine.connect() as conn:
+                rows = conn.execute(
+                    db.select(table.c.id, table.c.origin, table.c.namespace,
+                              table.c.kind, table.c.payload)
+                    .where(table.c.id > last_id)
+                    .order_by(table.c.id)
+                    .limit(limit)
+                ).all()
+        return [(row.id, row.origin, row.namespace, row.kind, json.loads(row.payload or '[]'))
+                for row in rows]
+
+    def latest_id(self) -> int:
+        from models import db, CacheInvalidationEvent
+
+        with self._app_context():
+            with db.engine.connect() as conn:
+                return conn.execute(
+                    db.select(db.func.max(CacheInvalidationEvent.__table__.c.id))
+                ).scalar() or 0
+
+    def oldest_id(self) -> Optional[int]:
+        from models import db, CacheInvalidationEvent
+
+        with self._app_context():
+            with db.engine.connect() as conn:
+                return conn.execute(
+                    db.select(db.func.min(CacheInvalidationEvent.__table__.c.id))
+                ).scalar()
+
+    def prune(self, retention_seconds: float) -> int:
+        from models import db, CacheInvalidationEvent
+
+        cutoff = datetime.utcnow() - timedelta(seconds=retention_seconds)
+        with self._app_context():
+            table = CacheInvalidationEvent.__table__
+            with db.engine.begin() as conn:
+                return conn.execute(table.delete().where(table.c.created_at < cutoff)).rowcount
+
+
+class CacheInvalidationBus:
+    """
+    Barramento de invalidação de cache
+
+    Uma instância por worker. `init_app` escolhe o backend por
+    `CACHE_INVALIDATION_BACKEND`, registra o barramento como ouvinte do
+    CacheService e, para o backend em banco, inicia a thread de leitura.
+    """
+
+    BACKENDS = {
+        'memory': InMemoryInvalidationBackend,
+        'database': DatabaseInvalidationBackend,
+    }
+
+    # Intervalo entre leituras de eventos (segundos)
+    POLL_INTERVAL_SECONDS = 0.25
+
+    # Tempo de retenção dos eventos (segundos)
+    RETENTION_SECONDS = 300
+
+    # Intervalo mínimo entre limpezas de eventos antigos (segundos)
+    PRUNE_INTERVAL_SECONDS = 60
+
+    # Ids abaixo do último lido relidos a cada leitura (confirmações fora de ordem)
+    REREAD_WINDOW = 100
+
+    # Máximo de eventos novos por leitura
+    FETCH_LIMIT = 500
+
+    _active: Optional['CacheInvalidationBus'] = None
+
+    def __init__(self, backend=None, origin: Optional[str] = None,
+                 poll_interval: Optional[float] = None):
+        self.backend = backend if backend is not None else InMemoryInvalidationBackend()
+        self.origin = origin or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.poll_interval = poll_interval or self.POLL_INTERVAL_SECONDS
+        self._started_at = time.monotonic()
+        self._last_id = self._initial_event_id()
+        # Ids até o piso nunca são aplicados (histórico anterior ao worker)
+        self._floor_id = self._last_id
+        # Ids já lidos dentro da janela de releitura
+        self._seen_ids = set()
+        self._last_prune = time.monotonic()
+        self._poll_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.stats: Dict[str, int] = dict(published=0, received=0, applied=0, resyncs=0, errors=0)
+
+    def _initial_event_id(self) -> int:
+        """Começa do evento mais recente: o histórico não interessa a um worker novo"""
+        try:
+            return self.backend.latest_id()
+        except Exception as e:
+            logger.error(f"Erro ao ler último evento de invalidação de cache: {e}")
+            return 0
+
+    # -------------------------------------------------------------------------
+    # Configuração
+    # -------------------------------------------------------------------------
+
+    @classmethod
+    def init_app(cls, app) -> 'CacheInvalidationBus':
+        """
+        Configura o barramento do worker a partir da configuração da aplicação
+
+        Args:
+            app: Aplicação Flask
+        """
+        backend_name = app.config.get('CACHE_INVALIDATION_BACKEND', 'memory')
+        backend_class = cls.BACKENDS.get(backend_name)
+        if backend_class is None:
+            raise ValueError(f"Backend de invalidação de cache desconhecido: {backend_name}")
+
+        if backend_name == 'database':
+            backend = backend_class(app)
+        else:
+            backend = backend_class()
+
+        with app.app_context():
+            bus = cls(backend, poll_interval=app.config.get('CACHE_INVALIDATION_POLL_INTERVAL'))
+        bus.install()
+        if backend_name == 'database':
+            bus.start()
+
+        logger.info(f"Barramento de invalidação de cache configurado: {type(backend).__name__}")
+        return bus
+
+    def install(self):
+        """Registra este barramento como ouvinte das invalidações locais"""
+        previous = CacheInvalidationBus._active
+        if previous is not None and previous is not self:
+            previous.stop()
+        CacheInvalidationBus._active = self
+        CacheService.set_invalidation_listener(self.publish)
+
+    def uninstall(self):
+        """Remove o barramento e interrompe a thread de leitura"""
+        self.stop()
+        if CacheInvalidationBus._active is self:
+            CacheInvalidationBus._active = None
+            CacheService.set_invalidation_listener(None)
+
+    @classmethod
+    def get_active(cls) -> Optional['CacheInvalidationBus']:
+        return cls._active
+
+    # -------------------------------------------------------------------------
+    # Publicação e leitura
+    # -------------------------------------------------------------------------
+
+    def publish(self, namespace: str, kind: str, values: List[str]):
+        """
+        Publica uma invalidação local para os demais workers
+
+        Assinatura compatível com o ouvinte do CacheService.
+        """
+        try:
+            self.backend.publish(self.origin, namespace, kind, list(values))
+            self.stats['published'] += 1
+        except Exception as e:
+            self.stats['errors'] += 1
+            logger.error(f"Erro ao publicar invalidação de cache '{namespace}' ({kind}): {e}")
+
+    def poll(self) -> int:
+        """
+        Lê e aplica os eventos publicados por outros workers
+
+        Returns:
+            int: Quantidade de eventos aplicados
+        """
+        with self._poll_lock:
+            since = max(self._floor_id, self._last_id - self.REREAD_WINDOW)
+            try:
+                events = self.backend.fetch_since(since, limit=self.FETCH_LIMIT + self.REREAD_WINDOW)
+            except Exception as e:
+                self.stats['errors'] += 1
+                logger.error(f"Erro ao ler eventos de invalidação de cache: {e}")
+                return 0
+
+            # Ids abaixo do último lido ainda não vistos foram confirmados depois
+            events = [event for event in events if event[0] not in self._seen_ids]
+            newer = [event for event in events if event[0] > self._last_id]
+
+            if newer and newer[0][0] > self._last_id + 1 and self._missed_events():
+                # Eventos entre o último lido e o mais antigo retido foram removidos
+                logger.warning("Barramento de cache atrasado além da retenção - limpando caches locais")
+                for ns_name in list(CacheService.get_stats()):
+                    CacheService.apply_invalidation(ns_name, 'clear', [])
+                self.stats['resyncs'] += 1
+
+            applied = 0
+            for event_id, origin, namespace, kind, values in events:
+                self._seen_ids.add(event_id)
+                self._last_id = max(self._last_id, event_id)
+                self.stats['received'] += 1
+                if origin == self.origin:
+                    continue
+                CacheService.apply_invalidation(namespace, kind, values)
+                applied += 1
+
+            window_start = self._last_id - self.REREAD_WINDOW
+            self._seen_ids = {event_id for event_id in self._seen_ids if event_id > window_start}
+
+            self.stats['applied'] += applied
+            self._maybe_prune()
+            return applied
+
+    def _missed_events(self) -> bool:
+        """
+        Verifica se a limpeza removeu eventos ainda não lidos por este worker
+
+        Um worker iniciado com a tabela vazia (último id 0) não sabe em que
+        ponto da sequência estava: ids ausentes podem ser de antes do seu
+        início. Eventos publicados depois dele só são removidos após a
+        retenção, então nesse caso a lacuna só conta passado esse tempo.
+        """
+        oldest = self.backend.oldest_id()
+        if oldest is None or oldest <= self._last_id + 1:
+            return False
+        return self._last_id > 0 or time.monotonic() - self._started_at >= self.RETENTION_SECONDS
+
+    def _maybe_prune(self):
+        """Remove eventos antigos no máximo uma vez por intervalo"""
+        now = time.monotonic()
+        if now - self._last_prune < self.PRUNE_INTERVAL_SECONDS:
+            return
+        self._last_prune = now
+        try:
+            removed = self.backend.prune(self.RETENTION_SECONDS)
+            if removed:
+                logger.debug(f"Barramento de cache: {removed} eventos antigos removidos")
+        except Exception as e:
+            logger.error(f"Erro ao limpar eventos de invalidação de cache: {e}")
+
+    # -------------------------------------------------------------------------
+    # Thread de leitura
+    # -------------------------------------------------------------------------
+
+    def start(self):
+        """Inicia a thread de leitura (idempotente)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name='cache-invalidation-bus', daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float = 2.0):
+        """Interrompe a thread de leitura"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.poll_interval):
+            self.poll()
@@ -0,0 +1,597 @@
+#!/usr/bin/env python3.11
+# -*- coding: utf-8 -*-
+
+"""
+CacheService - Camada de cache unificada do sistema
+
+Generaliza o cache que existia apenas no PreOrderCacheService e substitui os
+caches próprios do ConfigService e do RealtimeService.
+
+Funcionalidades:
+- Namespaces independentes (ex: 'pre_orders', 'config', 'realtime_state')
+- Limite de tamanho com despejo LRU e expiração por TTL
+- Invalidação por tags (ex: todas as chaves marcadas com 'user:42')
+  sem varrer o cache inteiro
+- Lock striping: cada namespace é dividido em faixas com lock próprio
+- Métricas de hit/miss/despejo por namespace
+- Segundo nível compartilhado opcional (ver SharedCacheTier)
+- Ouvinte de invalidações, usado pelo barramento entre workers
+  (ver services/cache_invalidation_service.py)
+
+TTLs usam time.monotonic(), que é barato e imune a ajustes de relógio.
+"""
+
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Namespace das invalidações publicadas para todos os namespaces de uma vez
+ALL_NAMESPACES = '*'
+
+
+class CacheEntry:
+    """Entrada de cache com TTL e tags"""
+
+    __slots__ = ('value', 'expires_at', 'tags')
+
+    def __init__(self, value: Any, ttl_seconds: Optional[float], tags: Iterable[str] = ()):
+        self.value = value
+        # None = sem expiração
+        self.expires_at = time.monotonic() + ttl_seconds if ttl_seconds is not None else None
+        self.tags = frozenset(tags)
+
+    def is_expired(self, now: Optional[float] = None) -> bool:
+        """Verifica se a entrada expirou"""
+        if self.expires_at is None:
+            return False
+        return (now if now is not None else time.monotonic()) >= self.expires_at
+
+    def get_value(self) -> Optional[Any]:
+        """Retorna o valor se não expirou, None caso contrário"""
+        if self.is_expired():
+            return None
+        return self.value
+
+    def remaining_ttl(self, now: Optional[float] = None) -> Optional[float]:
+        """Segundos restantes até expirar (None = sem expiração)"""
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - (now if now is not None else time.monotonic()))
+
+
+class _CacheStripe:
+    """Faixa de um namespace: entradas em ordem LRU, índice de tags e contadores"""
+
+    __slots__ = ('lock', 'entries', 'tags', 'hits', 'misses', 'shared_hits', 'sets',
+                 'evictions', 'expirations', 'invalidations')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries: 'OrderedDict[str, CacheEntry]' = OrderedDict()
+        self.tags: Dict[str, Set[str]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.shared_hits = 0
+        self.sets = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def unlink(self, key: str) -> Optional[CacheEntry]:
+        """Remove a chave e suas referências no índice de tags (chamar com lock)"""
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            for tag in entry.tags:
+                keys = self.tags.get(tag)
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del self.tags[tag]
+        return entry
+
+
+class SharedCacheTier(ABC):
+    """
+    Interface do segundo nível de cache, compartilhado entre workers
+
+    Implementações devem ser seguras para uso concorrente. As chaves recebidas
+    já vêm prefixadas com o nome do namespace.
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Tuple[Any, Optional[float], frozenset]]:
+        """Retorna (valor, ttl_restante, tags) ou None"""
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float], tags: Iterable[str]):
+        """Grava o valor com TTL e tags"""
+
+    @abstractmethod
+    def delete(self, key: str):
+        """Remove a chave"""
+
+    @abstractmethod
+    def invalidate_tags(self, tags: Iterable[str]):
+        """Remove as chaves marcadas com qualquer uma das tags"""
+
+    @abstractmethod
+    def clear(self, prefix: str = ''):
+        """Remove as chaves com o prefixo (todas se vazio)"""
+
+
+class LocalSharedTier(SharedCacheTier):
+    """
+    Segundo nível em processo
+
+    Substituto local de um armazenamento compartilhado (usado em testes e em
+    implantações com um único worker). Usa relógio de parede para que os TTLs
+    tenham o mesmo significado que teriam em um armazenamento externo.
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, Tuple[Any, Optional[float], frozenset]] = {}
+        self._tags: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            value, expires_at, tags = item
+            if expires_at is not None and time.time() >= expires_at:
+                self._unlink(key)
+                return None
+            remaining = None if expires_at is None else expires_at - time.time()
+            return value, remaining, tags
+
+    def set(self, key, value, ttl_seconds, tags):
+        tags = frozenset(tags)
+        expires_at = time.time() + ttl_seconds if ttl_seconds is not None else None
+        with self._lock:
+            self._unlink(key)
+            self._entries[key] = (value, expires_at, tags)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+
+    def delete(self, key):
+        with self._lock:
+            self._unlink(key)
+
+    def invalidate_tags(self, tags):
+        with self._lock:
+            for tag in tags:
+                for key in list(self._tags.get(tag, ())):
+                    self._unlink(key)
+
+    def clear(self, prefix=''):
+        with self._lock:
+            for key in [k for k in self._entries if k.startswith(prefix)]:
+                self._unlink(key)
+
+    def _unlink(self, key):
+        item = self._entries.pop(key, None)
+        if item is not None:
+            for tag in item[2]:
+                keys = self._tags.get(tag)
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del self._tags[tag]
+
+
+class CacheNamespace:
+    """
+    Namespace de cache com LRU, TTL, tags e lock striping
+
+    Args:
+        name: Nome do namespace (usado em métricas e no segundo nível)
+        max_entries: Número máximo de entradas (dividido entre as faixas)
+        default_ttl: TTL padrão em segundos (None = sem expiração)
+        stripes: Número de faixas com lock independente
+        shared_tier: Segundo nível compartilhado opcional
+        shared: Se o namespace deve acompanhar o segundo nível configurado
+                globalmente em CacheService
+        listener: Função chamada a cada invalidação local como
+                  listener(namespace, tipo, valores), com tipo em
+                  'key', 'tag', 'pattern' ou 'clear'
+    """
+
+    def __init__(self, name: str, max_entries: int = 1000, default_ttl: Optional[float] = 300,
+                 stripes: int = 8, shared_tier: Optional[SharedCacheTier] = None,
+                 shared: bool = False,
+                 listener: Optional[Callable[[str, str, List[str]], None]] = None):
+        self.name = name
+        self.shared = shared
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.shared_tier = shared_tier
+        self.listener = listener
+        self._stripes = [_CacheStripe() for _ in range(max(1, min(stripes, max_entries)))]
+        # Capacidade por faixa arredondada para baixo: o total nunca passa de max_entries
+        self._stripe_capacity = max(1, max_entries // len(self._stripes))
+        self._cleanups = 0
+
+    # -------------------------------------------------------------------------
+    # Utilitários internos
+    # -------------------------------------------------------------------------
+
+    def _stripe_for(self, key: str) -> _CacheStripe:
+        return self._stripes[hash(key) % len(self._stripes)]
+
+    def _shared_key(self, key: str) -> str:
+        return f"{self.name}:{key}"
+
+    def _shared_tags(self, tags: Iterable[str]) -> List[str]:
+        return [f"{self.name}|{tag}" for tag in tags]
+
+    def _store(self, stripe: _CacheStripe, key: str, entry: CacheEntry):
+        """Insere entrada na faixa aplicando despejo LRU (chamar com lock)"""
+        stripe.unlink(key)
+        stripe.entries[key] = entry
+        for tag in entry.tags:
+            stripe.tags.setdefault(tag, set()).add(key)
+        while len(stripe.entries) > self._stripe_capacity:
+            oldest_key = next(iter(stripe.entries))
+            stripe.unlink(oldest_key)
+            stripe.evictions += 1
+
+    def _notify(self, kind: str, values: List[str]):
+        """Repassa a invalidação ao ouvinte (falhas não afetam o chamador)"""
+        if self.listener is None:
+            return
+        try:
+            self.listener(self.name, kind, values)
+        except Exception as e:
+            logger.error(f"Cache '{self.name}': erro ao propagar invalidação {kind}: {e}")
+
+    def _get_entry(self, key: str) -> Optional[CacheEntry]:
+        """Retorna a entrada bruta (sem contar métricas nem checar TTL)"""
+        stripe = self._stripe_for(key)
+        with stripe.lock:
+            return stripe.entries.get(key)
+
+    # -------------------------------------------------------------------------
+    # API pública
+    # -------------------------------------------------------------------------
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """
+        Obtém valor do cache
+
+        Returns:
+            Valor armazenado ou `default` se não existir/expirou
+        """
+        stripe = self._stripe_for(key)
+        now = time.monotonic()
+        with stripe.lock:
+            entry = stripe.entries.get(key)
+            if entry is not None:
+                if not entry.is_expired(now):
+                    stripe.entries.move_to_end(key)
+                    stripe.hits += 1
+                    return entry.value
+                stripe.unlink(key)
+                stripe.expirations += 1
+
+            if self.shared_tier is None:
+                stripe.misses += 1
+                return default
+
+        # Segundo nível consultado fora do lock da faixa
+        shared = self.shared_tier.get(self._shared_key(key))
+        with stripe.lock:
+            if shared is None:
+                stripe.misses += 1
+                return default
+            value, remaining_ttl, shared_tags = shared
+            tags = [tag.split('|', 1)[1] for tag in shared_tags]
+            self._store(stripe, key, CacheEntry(value, remaining_ttl, tags))
+            stripe.shared_hits += 1
+            return value
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None,
+            tags: Iterable[str] = ()):
+        """
+        Armazena valor no cache
+
+        Args:
+            key: Chave do cache
+            value: Valor a armazenar
+            ttl_seconds: Tempo de vida (padrão do namespace se omitido)
+            tags: Tags para invalidação em grupo
+        """
+        ttl = self.default_ttl if ttl_seconds is None else ttl_seconds
+        entry = CacheEntry(value, ttl, tags)
+        stripe = self._stripe_for(key)
+        with stripe.lock:
+            self._store(stripe, key, entry)
+            stripe.sets += 1
+
+        if self.shared_tier is not None:
+            self.shared_tier.set(self._shared_key(key), value, ttl, self._shared_tags(entry.tags))
+
+    def get_or_set(self, key: str, loader: Callable[[], Any], ttl_seconds: Optional[float] = None,
+                   tags: Iterable[str] = ()) -> Any:
+        """Obtém do cache ou carrega com `loader` e armazena (None não é cacheado)"""
+        missing = object()
+        value = self.get(key, missing)
+        if value is not missing:
+            return value
+        value = loader()
+        if value is not None:
+            self.set(key, value, ttl_seconds, tags)
+        return value
+
+    def delete(self, key: str, propagate: bool = True) -> bool:
+        """
+        Remove uma chave. Retorna True se ela existia.
+
+        Args:
+            propagate: Se False, remove apenas deste processo (sem segundo
+                       nível nem ouvinte); usado ao aplicar invalidações
+                       recebidas de outros workers
+        """
+        stripe = self._stripe_for(key)
+        with stripe.lock:
+            removed = stripe.unlink(key) is not None
+            if removed:
+                stripe.invalidations += 1
+
+        if propagate:
+            if self.shared_tier is not None:
+                self.shared_tier.delete(self._shared_key(key))
+            self._notify('key', [key])
+        return removed
+
+    def invalidate_tags(self, *tags: str, propagate: bool = True, notify: bool = True) -> int:
+        """
+        Remove todas as entradas marcadas com qualquer uma das tags
+
+        Custo proporcional ao número de tags e de chaves afetadas, não ao
+        tamanho do cache.
+
+        Args:
+            propagate: Ver `delete`
+            notify: Se False, não repassa ao ouvinte (CacheService publica uma
+                    única vez para todos os namespaces)
+
+        Returns:
+            int: Quantidade de entradas removidas
+        """
+        removed = 0
+        for stripe in self._stripes:
+            with stripe.lock:
+                for tag in tags:
+                    keys = stripe.tags.get(tag)
+                    if not keys:
+                        continue
+                    for key in list(keys):
+                        stripe.unlink(key)
+                        stripe.invalidations += 1
+                        removed += 1
+
+        if propagate and tags:
+            if self.shared_tier is not None:
+                self.shared_tier.invalidate_tags(self._shared_tags(tags))
+            if notify:
+                self._notify('tag', list(tags))
+        return removed
+
+    def delete_pattern(self, pattern: str, propagate: bool = True) -> int:
+        """
+        Remove entradas cuja chave contém o padrão (sem '*')
+
+        Varre todas as chaves; prefira `invalidate_tags` em caminhos quentes.
+        """
+        fragment = pattern.replace('*', '')
+        removed = 0
+        for stripe in self._stripes:
+            with stripe.lock:
+                for key in [k for k in stripe.entries if fragment in k]:
+                    stripe.unlink(key)
+                    stripe.invalidations += 1
+                    removed += 1
+                    if propagate and self.shared_tier is not None:
+                        self.shared_tier.delete(self._shared_key(key))
+        if propagate:
+            self._notify('pattern', [pattern])
+        return removed
+
+    def cleanup_expired(self) -> int:
+        """Remove entradas expiradas. Retorna quantidade removida."""
+        now = time.monotonic()
+        removed = 0
+        for stripe in self._stripes:
+            with stripe.lock:
+                expired = [k for k, entry in stripe.entries.items() if entry.is_expired(now)]
+                for key in expired:
+                    stripe.unlink(key)
+                stripe.expirations += len(expired)
+                removed += len(expired)
+        if removed:
+            self._cleanups += 1
+            logger.info(f"Cache '{self.name}': {removed} entradas expiradas removidas")
+        return removed
+
+    def clear(self, propagate: bool = True, notify: bool = True):
+        """Limpa todas as entradas do namespace (`notify`: ver `invalidate_tags`)"""
+        for stripe in self._stripes:
+            with stripe.lock:
+                stripe.entries.clear()
+                stripe.tags.clear()
+        if propagate:
+            if self.shared_tier is not None:
+                self.shared_tier.clear(prefix=f"{self.name}:")
+            if notify:
+                self._notify('clear', [])
+
+    def reset_stats(self):
+        """Zera os contadores de métricas"""
+        for stripe in self._stripes:
+            with stripe.lock:
+                stripe.hits = stripe.misses = stripe.shared_hits = stripe.sets = 0
+                stripe.evictions = stripe.expirations = stripe.invalidations = 0
+        self._cleanups = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Retorna métricas agregadas do namespace"""
+        totals = dict(hits=0, misses=0, shared_hits=0, sets=0, evictions=0,
+                      expirations=0, invalidations=0, cache_size=0)
+        for stripe in self._stripes:
+            with stripe.lock:
+                totals['hits'] += stripe.hits
+                totals['misses'] += stripe.misses
+                totals['shared_hits'] += stripe.shared_hits
+                totals['sets'] += stripe.sets
+                totals['evictions'] += stripe.evictions
+                totals['expirations'] += stripe.expirations
+                totals['invalidations'] += stripe.invalidations
+                totals['cache_size'] += len(stripe.entries)
+
+        total_requests = totals['hits'] + totals['shared_hits'] + totals['misses']
+        hits = totals['hits'] + totals['shared_hits']
+        hit_rate = (hits / total_requests * 100) if total_requests > 0 else 0
+
+        return {
+            'namespace': self.name,
+            **totals,
+            'hit_rate': f"{hit_rate:.2f}%",
+            'total_requests': total_requests,
+            'cleanups': self._cleanups,
+            'max_entries': self.max_entries,
+        }
+
+    def __contains__(self, key: str) -> bool:
+        entry = self._get_entry(key)
+        return entry is not None and not entry.is_expired()
+
+    def __len__(self) -> int:
+        return sum(len(stripe.entries) for stripe in self._stripes)
+
+
+class CacheService:
+    """
+    Registro central de namespaces de cache
+
+    Uso:
+        cache = CacheService.namespace('config', max_entries=256, default_ttl=300)
+        cache.set('platform_fee_percentage', Decimal('5.0'), tags=['config:taxas'])
+        CacheService.invalidate_tags('user:42')  # todos os namespaces
+    """
+
+    _namespaces: Dict[str, CacheNamespace] = {}
+    _lock = threading.Lock()
+    _shared_tier: Optional[SharedCacheTier] = None
+    _listener: Optional[Callable[[str, str, List[str]], None]] = None
+
+    @classmethod
+    def namespace(cls, name: str, max_entries: int = 1000, default_ttl: Optional[float] = 300,
+                  stripes: int = 8, shared: bool = False) -> CacheNamespace:
+        """
+        Obtém ou cria um namespace
+
+        Args:
+            shared: Se True, usa o segundo nível configurado em
+                    `configure_shared_tier` (quando houver)
+        """
+        with cls._lock:
+            ns = cls._namespaces.get(name)
+            if ns is None:
+                ns = CacheNamespace(
+                    name,
+                    max_entries=max_entries,
+                    default_ttl=default_ttl,
+                    stripes=stripes,
+                    shared_tier=cls._shared_tier if shared else None,
+                    shared=shared,
+                    listener=cls._listener
+                )
+                cls._namespaces[name] = ns
+            return ns
+
+    @classmethod
+    def configure_shared_tier(cls, tier: Optional[SharedCacheTier]):
+        """Define o segundo nível para os namespaces criados com shared=True"""
+        with cls._lock:
+            cls._shared_tier = tier
+            for ns in cls._namespaces.values():
+                if ns.shared:
+                    ns.shared_tier = tier
+
+    @classmethod
+    def set_invalidation_listener(cls, listener: Optional[Callable[[str, str, List[str]], None]]):
+        """Define o ouvinte de invalidações de todos os namespaces (atuais e futuros)"""
+        with cls._lock:
+            cls._listener = listener
+            for ns in cls._namespaces.values():
+                ns.listener = listener
+
+    @classmethod
+    def apply_invalidation(cls, name: str, kind: str, values: Iterable[str]) -> int:
+        """
+        Aplica localmente uma invalidação recebida de outro worker
+
+        Não repassa ao segundo nível nem ao ouvinte (o worker de origem já o fez).
+
+        Returns:
+            int: Quantidade de entradas removidas
+        """
+        values = list(values)
+        if name == ALL_NAMESPACES:
+            return sum(cls.apply_invalidation(ns_name, kind, values) for ns_name in list(cls._namespaces))
+        ns = cls._namespaces.get(name)
+        if ns is None:
+            return 0
+        if kind == 'key':
+            return sum(1 for key in values if ns.delete(key, propagate=False))
+        if kind == 'tag':
+            return ns.invalidate_tags(*values, propagate=False)
+        if kind == 'pattern':
+            return sum(ns.delete_pattern(pattern, propagate=False) for pattern in values)
+        if kind == 'clear':
+            removed = len(ns)
+            ns.clear(propagate=False)
+            return removed
+        logger.warning(f"Tipo de invalidação desconhecido para '{name}': {kind}")
+        return 0
+
+    @classmethod
+    def get_namespace(cls, name: str) -> Optional[CacheNamespace]:
+        return cls._namespaces.get(name)
+
+    @classmethod
+    def _notify(cls, kind: str, values: List[str]):
+        """Repassa ao ouvinte uma invalidação de todos os namespaces (um único evento)"""
+        listener = cls._listener
+        if listener is None:
+            return
+        try:
+            listener(ALL_NAMESPACES, kind, values)
+        except Exception as e:
+            logger.error(f"Cache: erro ao propagar invalidação {kind} de todos os namespaces: {e}")
+
+    @classmethod
+    def invalidate_tags(cls, *tags: str) -> int:
+        """Invalida as tags em todos os namespaces"""
+        removed = sum(ns.invalidate_tags(*tags, notify=False) for ns in list(cls._namespaces.values()))
+        if tags:
+            cls._notify('tag', list(tags))
+        return removed
+
+    @classmethod
+    def clear_all(cls):
+        """Limpa todos os namespaces"""
+        for ns in list(cls._namespaces.values()):
+            ns.clear(notify=False)
+        cls._notify('clear', [])
+
+    @classmethod
+    def get_stats(cls) -> Dict[str, Dict[str, Any]]:
+        """Métricas de todos os namespaces, por nome"""
+        return {name: ns.get_stats() for name, ns in list(cls._namespaces.items())}
@@ -4,6 +4,7 @@
 from models import User, Order, Transaction, db
 from datetime import datetime, timedelta
 from sqlalchemy import desc, func
+from sqlalchemy.orm import joinedload
 from services.wallet_service import WalletService
 from services.dashboard_data_service import DashboardDataService
 
@@ -12,136 +13,15 @@ class ClienteService:
     
     @staticmethod
     def get_dashboard_data(user_id):
-        """Retorna dados reais para o dashboard do cliente com terminologia em R$"""
-        user = User.query.get(user_id)
-        if not user:
-            raise ValueError("Usuário não encontrado")
-        
-        # Usar DashboardDataService para obter métricas completas
-        metrics = DashboardDataService.get_dashboard_metrics(user_id, 'cliente')
-        
-        # Obter ordens em aberto formatadas
-        open_orders = metrics['open_orders']
-        
-        # Obter fundos bloqueados detalhados
-        blocked_funds = metrics['blocked_funds']
-        
-        # Início do mês atual para filtros
-        inicio_mes = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        
-        # Contar transações do mês atual
-        transacoes_mes = Transaction.query.filter(
-            Transaction.user_id == user_id,
-            Transaction.created_at >= inicio_mes
-        ).count()
-        
-        # Contar ordens concluídas (total histórico)
-        ordens_concluidas = Order.query.filter(
-            Order.client_id == user_id,
-            Order.status == 'concluida'
-        ).count()
-        
-        # Buscar última transação
-        ultima_transacao_obj = Transaction.query.filter_by(
-            user_id=user_id
-        ).order_by(desc(Transaction.created_at)).first()
-        
-        ultima_transacao = None
-        if ultima_transacao_obj:
-            ultima_transacao = {
-                'data': ultima_transacao_obj.created_at.strftime('%d/%m/%Y %H:%M'),
-                'valor': abs(ultima_transacao_obj.amount),
-                'tipo': ultima_transacao_obj.type,
-                'descricao': ultima_transacao_obj.description
-            }
-        
-        # Formatar próximas ordens (primeiras 3 ordens em aberto)
-        proximas_ordens = []
-        for ordem in open_orders[:3]:
-            proximas_ordens.append({
-                'id': ordem['id'],
-                'titulo': ordem['title'],
-                'data': ordem['created_at'].strftime('%d/%m/%Y'),
-                'status': ordem['status'],
-                'status_display': ordem['status_display'],
-                'valor': ordem['value'],
-                'prestador': ordem['related_user_name']
-            })
-        
-        # Converter alertas do DashboardDataService para formato legado
-        alertas = []
-        
-        # Adicionar notificações de propostas pendentes
-        from services.notification_service import NotificationService
-        proposal_notifications = NotificationService.get_proposal_notifications_for_client(user_id)
-        alertas.extend(proposal_notifications)
-        
-        # Adicionar alertas do DashboardDataService
-        for alert in metrics['alerts']:
-            alertas.append({
-                'tipo': alert['type'],
-                'mensagem': alert['message'],
-                'titulo': alert.get('title', ''),
-                'action': alert.get('action', ''),
-                'action_url': alert.get('action_url', '')
-            })
-        
-        # Alerta adicional se tem saldo bloqueado
-        if metrics['balance']['blocked'] > 0:
-            alertas.append({
-                'tipo': 'info',
-                'mensagem': f'Você tem R$ {metrics["balance"]["blocked"]:.2f} em garantia para ordens ativas.'
-            })
-        
-        # Alerta se não tem ordens ativas há muito tempo
-        if metrics['open_orders_count'] == 0 and metrics['balance']['available'] > 0:
-            alertas.append({
-                'tipo': 'info',
-                'mensagem': 'Que tal criar uma nova ordem de serviço?'
-            })
-        
-        # Buscar pré-ordens ativas
-        pre_orders_ativas = ClienteService.get_active_pre_orders(user_id)
-        pre_orders_count = len(pre_orders_ativas)
-        pre_orders_needing_action = len([po for po in pre_orders_ativas if po['needs_action']])
+        """
+        Retorna dados reais para o dashboard do cliente com terminologia em R$
         
-        dashboard_data = {
-            # Valores em formato numérico (serão convertidos para R$ no template)
-            'saldo_atual': metrics['balance']['available'],
-            'tokens_disponiveis': metrics['balance']['available'],  # Terminologia interna, será exibido como "Saldo Disponível"
-            'saldo_bloqueado': metrics['balance']['blocked'],
-            
-            # Contadores
-            'transacoes_mes': transacoes_mes,
-            'ordens_ativas': metrics['open_orders_count'],
-            'ordens_concluidas': ordens_concluidas,
-            
-            # Valores financeiros
-            'gasto_total_mes': metrics['month_stats']['total_spent'],
-            'economia_mes': 0.0,  # TODO: Implementar cálculo de economia
-            
-            # Atividades
-            'ultima_transacao': ultima_transacao,
-            'proximas_ordens': proximas_ordens,
-            'alertas': alertas,
-            
-            # Novos dados do DashboardDataService
-            'ordens_em_aberto': open_orders,  # Lista completa de ordens em aberto
-            'fundos_bloqueados_detalhados': blocked_funds['by_order'],  # Detalhamento por ordem
-            'ordens_por_status': metrics['orders_by_status'],  # Contagem por status
-            
-            # Pré-ordens
-            'pre_orders_ativas': pre_orders_ativas,
-            'pre_orders_count': pre_orders_count,
-            'pre_orders_needing_action': pre_orders_needing_action,
-            
-            # Estatísticas adicionais
-            'total_gasto_historico': ClienteService._calcular_gasto_total(user_id),
-            'media_valor_ordem': ClienteService._calcular_media_valor_ordem(user_id),
-            'taxa_conclusao': ClienteService._calcular_taxa_conclusao(user_id)
-        }
+        Montados pelo DashboardPayloadService com um número fixo de consultas
+        e guardados em cache por usuário até a próxima alteração relevante.
+        """
+        from services.dashboard_payload_service import DashboardPayloadService
         
-        return dashboard_data
+        return DashboardPayloadService.get_payload(user_id, 'cliente')
     
     @staticmethod
     def get_open_orders_for_client(user_id):
@@ -485,7 +365,7 @@ class ClienteService:
         Returns:
             list: Lista de pré-ordens ativas formatadas
         """
-        from models import PreOrder, PreOrderStatus, User
+        from models import PreOrder, PreOrderProposal, PreOrderStatus, User
         
         # Buscar pré-ordens ativas (não convertidas, canceladas ou expiradas)
         active_statuses = [
@@ -494,19 +374,30 @@ class ClienteService:
             PreOrderStatus.PRONTO_CONVERSAO.value
         ]
         
-        pre_orders = PreOrder.query.filter(
+        pre_orders = PreOrder.query.options(
+            joinedload(PreOrder.provider).load_only(User.id, User.nome)
+        ).filter(
             PreOrder.client_id == user_id,
             PreOrder.status.in_(active_statuses)
         ).order_by(PreOrder.updated_at.desc()).all()
         
+        # Autor das propostas ativas, em uma consulta para todas as pré-ordens
+        proposal_ids = [po.active_proposal_id for po in pre_orders
+                        if po.has_active_proposal and po.active_proposal_id]
+        proposers = dict(
+            db.session.query(PreOrderProposal.id, PreOrderProposal.proposed_by).filter(
+                PreOrderProposal.id.in_(proposal_ids)
+            ).all()
+        ) if proposal_ids else {}
+        
         # Formatar para exibição
         formatted_pre_orders = []
         for po in pre_orders:
             # Determinar se precisa de ação do cliente
             needs_action = False
             if po.has_active_proposal:
-                proposal = po.get_active_proposal()
-                if proposal and proposal.proposed_by != user_id:
+                proposed_by = proposers.get(po.active_proposal_id)
+                if proposed_by is not None and proposed_by != user_id:
                     needs_action = True
             elif po.status == PreOrderStatus.EM_NEGOCIACAO.value and not po.client_accepted_terms:
                 needs_action = True
@@ -5,20 +5,97 @@ import os
 import json
 import shutil
 import subprocess
+import threading
+import time
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta
-from typing import Dict, Any, List, Optional, Tuple
-from decimal import Decimal
+from types import MappingProxyType
+from typing import Dict, Any, List, Mapping, Optional, Tuple
+from decimal import Decimal, InvalidOperation
 from models import SystemConfig, SystemBackup, LoginAttempt, SystemAlert, db, User, Wallet, Transaction
-from sqlalchemy import func, desc
+from sqlalchemy import func, desc, case, cast, inspect, update, Integer, String
 import logging
 
+
+def parse_config_value(value: str) -> Any:
+    """Converte o texto gravado em bool, int, float ou mantém como string"""
+    if value.lower() in ['true', 'false']:
+        return value.lower() == 'true'
+    try:
+        if '.' in value:
+            return float(value)
+        return int(value)
+    except ValueError:
+        return value
+
+
+@dataclass(frozen=True)
+class ConfigEntry:
+    """Configuração já convertida para o tipo apropriado"""
+    key: str
+    raw: str
+    value: Any
+    category: str
+    description: Optional[str]
+    updated_at: Optional[datetime]
+
+
+@dataclass(frozen=True)
+class ConfigSnapshot:
+    """
+    Snapshot imutável de todas as configurações do sistema
+    
+    Carregado com uma consulta e substituído por inteiro a cada alteração;
+    leitores usam a referência atual sem lock.
+    """
+    version: int
+    entries: Mapping[str, ConfigEntry] = field(default_factory=lambda: MappingProxyType({}))
+    loaded_at: datetime = field(default_factory=datetime.utcnow)
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        """Valor tipado da configuração (ou `default` se não existir)"""
+        entry = self.entries.get(key)
+        return entry.value if entry is not None else default
+    
+    def get_decimal(self, key: str, default: Any = None) -> Optional[Decimal]:
+        """Valor como Decimal, convertido do texto gravado (sem passar por float)"""
+        entry = self.entries.get(key)
+        if entry is not None:
+            try:
+                return Decimal(entry.raw)
+            except InvalidOperation:
+                logging.error(f"Configuração {key} não é numérica: {entry.raw}")
+        return Decimal(str(default)) if default is not None else None
+    
+    def by_category(self, category: str) -> Dict[str, Any]:
+        """Configurações de uma categoria no formato de get_configs_by_category"""
+        return {
+            entry.key: {
+                'value': entry.value,
+                'description': entry.description,
+                'updated_at': entry.updated_at
+            }
+            for entry in self.entries.values()
+            if entry.category == category
+        }
+
+
 class ConfigService:
     """Serviço para gerenciamento de configurações avançadas do sistema"""
     
-    # Cache para configurações (5 minutos)
-    _config_cache = {}
-    _cache_timestamp = {}
-    _cache_ttl = 300  # 5 minutos em segundos
+    # Snapshot atual (None = ainda não carregado). Leitura sem lock: a
+    # referência é trocada por inteiro a cada recarga.
+    _snapshot: Optional[ConfigSnapshot] = None
+    _next_version_check = 0.0
+    _reload_lock = threading.Lock()
+    
+    # Intervalo entre verificações da versão gravada no banco, que detecta
+    # alterações feitas por outros workers (uma consulta pela chave)
+    VERSION_CHECK_INTERVAL = 5.0  # segundos
+    
+    # Linha reservada em system_configs com o contador de versão
+    VERSION_KEY = '_config_version'
+    VERSION_CATEGORY = '_interno'
     
     # Configurações padrão do sistema
     DEFAULT_CONFIGS = {
@@ -61,13 +138,134 @@ class ConfigService:
         'alerta_transacao_alto_valor': {'value': '10000.00', 'category': 'monitoramento', 'description': 'Limite para alerta de transação de alto valor'},
     }
     
+    # ==============================================================================
+    #  SNAPSHOT DE CONFIGURAÇÕES
+    # ==============================================================================
+    
+    @classmethod
+    def load_snapshot(cls) -> ConfigSnapshot:
+        """Carrega todas as configurações (e a versão) com uma única consulta"""
+        entries = {}
+        version = 0
+        for config in SystemConfig.query.all():
+            if config.key == cls.VERSION_KEY:
+                version = int(config.value)
+                continue
+            entries[config.key] = ConfigEntry(
+                key=config.key,
+                raw=config.value,
+                value=parse_config_value(config.value),
+                category=config.category,
+                description=config.description,
+                updated_at=config.updated_at
+            )
+        return ConfigSnapshot(version=version, entries=MappingProxyType(entries))
+    
+    @classmethod
+    def _stored_version(cls) -> int:
+        """Versão gravada no banco (0 se ainda não houve alterações)"""
+        value = db.session.query(SystemConfig.value).filter_by(key=cls.VERSION_KEY).scalar()
+        return int(value) if value is not None else 0
+    
+    @classmethod
+    def _install(cls, snapshot: ConfigSnapshot):
+        """Troca o snapshot atual (atribuição única, atômica para os leitores)"""
+        cls._snapshot = snapshot
+        cls._next_version_check = time.monotonic() + cls.VERSION_CHECK_INTERVAL
+    
+    @classmethod
+    def snapshot(cls) -> ConfigSnapshot:
+        """
+        Retorna o snapshot atual das configurações
+        
+        No caminho comum apenas lê a referência atual. A cada
+        VERSION_CHECK_INTERVAL segundos, uma thread confere a versão gravada
+        e recarrega o snapshot se outro worker alterou as configurações.
+        """
+        snapshot = cls._snapshot
+        if snapshot is not None and time.monotonic() < cls._next_version_check:
+            return snapshot
+        
+        # Outra thread já está verificando: usar o snapshot atual enquanto isso
+        if not cls._reload_lock.acquire(blocking=snapshot is None):
+            return snapshot
+        try:
+            snapshot = cls._snapshot
+            if snapshot is not None and time.monotonic() < cls._next_version_check:
+                return snapshot
+            if snapshot is None or cls._stored_version() != snapshot.version:
+                snapshot = cls.load_snapshot()
+            cls._install(snapshot)
+            return snapshot
+        except Exception as e:
+            logging.error(f"Erro ao carregar configurações: {str(e)}")
+            # Sem instalar: a próxima leitura tenta de novo
+            return snapshot if snapshot is not None else ConfigSnapshot(version=-1)
+        finally:
+            cls._reload_lock.release()
+    
+    @classmethod
+    def _bump_version(cls):
+        """Incrementa a versão na transação atual (antes do commit)"""
+        result = db.session.execute(
+            update(SystemConfig)
+            .where(SystemConfig.key == cls.VERSION_KEY)
+            .values(
+                value=cast(cast(SystemConfig.value, Integer) + 1, String),
+                updated_at=datetime.utcnow()
+            )
+        )
+        if result.rowcount == 0:
+            db.session.add(SystemConfig(
+                key=cls.VERSION_KEY,
+                value='1',
+                category=cls.VERSION_CATEGORY,
+                description='Versão das configurações (uso interno)'
+            ))
+    
+    # Colunas que compõem o snapshot (updated_at sozinho não muda a versão)
+    SNAPSHOT_COLUMNS = ('value', 'category', 'description')
+    
+    @classmethod
+    def _has_pending_changes(cls) -> bool:
+        """Verifica se a sessão cria, remove ou altera alguma configuração"""
+        session = db.session
+        if any(isinstance(obj, SystemConfig) for obj in list(session.new) + list(session.deleted)):
+            return True
+        for obj in session.dirty:
+            if not isinstance(obj, SystemConfig):
+                continue
+            state = inspect(obj)
+            if any(state.attrs[column].history.has_changes() for column in cls.SNAPSHOT_COLUMNS):
+                return True
+        return False
+    
+    @classmethod
+    def _commit_and_reload(cls):
+        """Grava as alterações pendentes com nova versão e troca o snapshot"""
+        if not cls._has_pending_changes():
+            # Nada mudou: sem nova versão, os demais workers mantêm seus snapshots
+            db.session.commit()
+            return
+        cls._bump_version()
+        db.session.commit()
+        try:
+            cls._install(cls.load_snapshot())
+        except Exception as e:
+            logging.error(f"Erro ao recarregar configurações: {str(e)}")
+            cls._clear_cache()
+    
+    # ==============================================================================
+    #  LEITURA E GRAVAÇÃO
+    # ==============================================================================
+    
     @staticmethod
     def initialize_default_configs():
         """Inicializa configurações padrão se não existirem"""
         try:
+            existing = {key for (key,) in db.session.query(SystemConfig.key).all()}
             for key, config_data in ConfigService.DEFAULT_CONFIGS.items():
-                existing = SystemConfig.query.filter_by(key=key).first()
-                if not existing:
+                if key not in existing:
                     config = SystemConfig(
                         key=key,
                         value=config_data['value'],
@@ -76,7 +274,7 @@ class ConfigService:
                     )
                     db.session.add(config)
             
-            db.session.commit()
+            ConfigService._commit_and_reload()
             return True
         except Exception as e:
             db.session.rollback()
@@ -85,25 +283,8 @@ class ConfigService:
     
     @staticmethod
     def get_config(key: str, default_value: Any = None) -> Any:
-        """Obtém uma configuração específica"""
-        try:
-            config = SystemConfig.query.filter_by(key=key).first()
-            if config:
-                # Tentar converter para o tipo apropriado
-                value = config.value
-                if value.lower() in ['true', 'false']:
-                    return value.lower() == 'true'
-                try:
-                    if '.' in value:
-                        return float(value)
-                    else:
-                        return int(value)
-                except ValueError:
-                    return value
-            return default_value
-        except Exception as e:
-            logging.error(f"Erro ao obter configuração {key}: {str(e)}")
-            return default_value
+        """Obtém uma configuração específica (do snapshot)"""
+        return ConfigService.snapshot().get(key, default_value)
     
     @staticmethod
     def set_config(key: str, value: Any, category: str = 'general', description: str = None) -> bool:
@@ -124,7 +305,7 @@ class ConfigService:
                 )
                 db.session.add(config)
             
-            db.session.commit()
+            ConfigService._commit_and_reload()
             return True
         except Exception as e:
             db.session.rollback()
@@ -133,40 +314,19 @@ class ConfigService:
     
     @staticmethod
     def get_configs_by_category(category: str) -> Dict[str, Any]:
-        """Obtém todas as configurações de uma categoria"""
-        try:
-            configs = SystemConfig.query.filter_by(category=category).all()
-            result = {}
-            for config in configs:
-                value = config.value
-                # Conversão automática de tipos
-                if value.lower() in ['true', 'false']:
-                    value = value.lower() == 'true'
-                else:
-                    try:
-                        if '.' in value:
-                            value = float(value)
-                        else:
-                            value = int(value)
-                    except ValueError:
-                        pass  # Manter como string
-                
-                result[config.key] = {
-                    'value': value,
-                    'description': config.description,
-                    'updated_at': config.updated_at
-                }
-            return result
-        except Exception as e:
-            logging.error(f"Erro ao obter configurações da categoria {category}: {str(e)}")
-            return {}
+        """Obtém todas as configurações de uma categoria (do snapshot)"""
+        return ConfigService.snapshot().by_category(category)
     
     @staticmethod
     def update_configs_batch(configs: Dict[str, Any]) -> bool:
         """Atualiza múltiplas configurações em lote"""
         try:
+            existing = {
+                config.key: config
+                for config in SystemConfig.query.filter(SystemConfig.key.in_(list(configs))).all()
+            }
             for key, value in configs.items():
-                config = SystemConfig.query.filter_by(key=key).first()
+                config = existing.get(key)
                 if config:
                     config.value = str(value)
                     config.updated_at = datetime.utcnow()
@@ -192,10 +352,8 @@ class ConfigService:
                     )
                     db.session.add(config)
             
-            db.session.commit()
-            # Limpar cache após atualização em lote
-            ConfigService._config_cache.clear()
-            ConfigService._cache_timestamp.clear()
+            # Uma nova versão e um único snapshot para todo o lote
+            ConfigService._commit_and_reload()
             return True
         except Exception as e:
             db.session.rollback()
@@ -208,38 +366,18 @@ class ConfigService:
     
     @staticmethod
     def _get_cached_config(key: str, default_value: Any = None) -> Any:
-        """Obtém configuração do cache ou do banco de dados"""
-        current_time = datetime.utcnow().timestamp()
-        
-        # Verificar se está no cache e não expirou
-        if key in ConfigService._config_cache:
-            cache_time = ConfigService._cache_timestamp.get(key, 0)
-            if current_time - cache_time < ConfigService._cache_ttl:
-                return ConfigService._config_cache[key]
-        
-        # Buscar do banco de dados
-        try:
-            config = SystemConfig.query.filter_by(key=key).first()
-            if config:
-                value = Decimal(config.value)
-                # Armazenar no cache
-                ConfigService._config_cache[key] = value
-                ConfigService._cache_timestamp[key] = current_time
-                return value
-            return Decimal(str(default_value)) if default_value is not None else None
-        except Exception as e:
-            logging.error(f"Erro ao obter configuração {key}: {str(e)}")
-            return Decimal(str(default_value)) if default_value is not None else None
+        """Obtém configuração numérica (Decimal) do snapshot"""
+        return ConfigService.snapshot().get_decimal(key, default_value)
     
-    @staticmethod
-    def _clear_cache(key: str = None):
-        """Limpa o cache de configurações"""
-        if key:
-            ConfigService._config_cache.pop(key, None)
-            ConfigService._cache_timestamp.pop(key, None)
-        else:
-            ConfigService._config_cache.clear()
-            ConfigService._cache_timestamp.clear()
+    @classmethod
+    def _clear_cache(cls, key: str = None):
+        """
+        Descarta o snapshot, forçando nova carga na próxima leitura
+        
+        O snapshot é único: `key` é aceito por compatibilidade e ignorado.
+        """
+        cls._snapshot = None
+        cls._next_version_check = 0.0
     
     @staticmethod
     def get_platform_fee_percentage() -> Decimal:
@@ -303,10 +441,8 @@ class ConfigService:
                 )
                 db.session.add(config)
             
-            db.session.commit()
-            
-            # Limpar cache
-            ConfigService._clear_cache('platform_fee_percentage')
+            # Gravar com nova versão e trocar o snapshot
+            ConfigService._commit_and_reload()
             
             # Log da alteração
             logging.info(f"Taxa da plataforma atualizada para {value}% por admin {admin_id}")
@@ -349,10 +485,8 @@ class ConfigService:
                 )
                 db.session.add(config)
             
-            db.session.commit()
-            
-            # Limpar cache
-            ConfigService._clear_cache('contestation_fee')
+            # Gravar com nova versão e trocar o snapshot
+            ConfigService._commit_and_reload()
             
             # Log da alteração
             logging.info(f"Taxa de contestação atualizada para R$ {value} por admin {admin_id}")
@@ -395,10 +529,8 @@ class ConfigService:
                 )
                 db.session.add(config)
             
-            db.session.commit()
-            
-            # Limpar cache
-            ConfigService._clear_cache('cancellation_fee_percentage')
+            # Gravar com nova versão e trocar o snapshot
+            ConfigService._commit_and_reload()
             
             # Log da alteração
             logging.info(f"Taxa de cancelamento atualizada para {value}% por admin {admin_id}")
@@ -421,10 +553,12 @@ class ConfigService:
                 'cancellation_fee_percentage': Decimal
             }
         """
+        # Um único snapshot para as três taxas (valores consistentes entre si)
+        snapshot = ConfigService.snapshot()
         return {
-            'platform_fee_percentage': ConfigService.get_platform_fee_percentage(),
-            'contestation_fee': ConfigService.get_contestation_fee(),
-            'cancellation_fee_percentage': ConfigService.get_cancellation_fee_percentage()
+            'platform_fee_percentage': snapshot.get_decimal('platform_fee_percentage', '5.0'),
+            'contestation_fee': snapshot.get_decimal('contestation_fee', '10.00'),
+            'cancellation_fee_percentage': snapshot.get_decimal('cancellation_fee_percentage', '10.0')
         }
 
 
@@ -738,52 +872,19 @@ class SecurityService:
     
     @staticmethod
     def log_login_attempt(email: str, ip_address: str, user_agent: str, success: bool, user_type: str = 'user'):
-        """Registra tentativa de login"""
+        """Registra tentativa de login (contadores de bloqueio + gravação em lote)"""
         try:
-            attempt = LoginAttempt(
-                email=email,
-                ip_address=ip_address,
-                user_agent=user_agent,
-                success=success,
-                user_type=user_type
-            )
-            db.session.add(attempt)
-            db.session.commit()
+            from services.login_throttle_service import LoginThrottleService
+            LoginThrottleService.record(email, ip_address, user_agent, success, user_type)
         except Exception as e:
             logging.error(f"Erro ao registrar tentativa de login: {str(e)}")
     
     @staticmethod
     def check_login_attempts(email: str, ip_address: str) -> Dict[str, Any]:
-        """Verifica tentativas de login recentes"""
+        """Verifica tentativas de login recentes (contadores por e-mail e IP, sem consulta)"""
         try:
-            max_attempts = ConfigService.get_config('max_tentativas_login', 5)
-            timeout_minutes = ConfigService.get_config('timeout_bloqueio_login', 30)
-            cutoff_time = datetime.utcnow() - timedelta(minutes=timeout_minutes)
-            
-            # Contar tentativas falhadas recentes
-            failed_attempts = LoginAttempt.query.filter(
-                LoginAttempt.email == email,
-                LoginAttempt.success == False,
-                LoginAttempt.attempt_time >= cutoff_time
-            ).count()
-            
-            # Verificar se há tentativas bem-sucedidas após as falhas
-            last_success = LoginAttempt.query.filter(
-                LoginAttempt.email == email,
-                LoginAttempt.success == True,
-                LoginAttempt.attempt_time >= cutoff_time
-            ).order_by(desc(LoginAttempt.attempt_time)).first()
-            
-            is_blocked = failed_attempts >= max_attempts
-            
-            return {
-                'is_blocked': is_blocked,
-                'failed_attempts': failed_attempts,
-                'max_attempts': max_attempts,
-                'remaining_attempts': max(0, max_attempts - failed_attempts),
-                'timeout_minutes': timeout_minutes,
-                'last_success': last_success.attempt_time if last_success else None
-            }
+            from services.login_throttle_service import LoginThrottleService
+            return LoginThrottleService.check(email, ip_address)
         except Exception as e:
             logging.error(f"Erro ao verificar tentativas de login: {str(e)}")
             return {
@@ -799,33 +900,28 @@ class SecurityService:
     def get_security_stats() -> Dict[str, Any]:
         """Retorna estatísticas de segurança"""
         try:
-            # Tentativas de login nas últimas 24h
-            last_24h = datetime.utcnow() - timedelta(hours=24)
+            from services.login_throttle_service import LoginAttemptWriter, LoginThrottleService
             
-            total_attempts = LoginAttempt.query.filter(
-                LoginAttempt.attempt_time >= last_24h
-            ).count()
-            
-            failed_attempts = LoginAttempt.query.filter(
-                LoginAttempt.attempt_time >= last_24h,
-                LoginAttempt.success == False
-            ).count()
-            
-            success_attempts = total_attempts - failed_attempts
+            # Tentativas ainda na fila deste worker entram nas contagens
+            LoginAttemptWriter.flush()
             
-            # IPs únicos
-            unique_ips = db.session.query(
-                func.count(func.distinct(LoginAttempt.ip_address))
-            ).filter(
-                LoginAttempt.attempt_time >= last_24h
-            ).scalar() or 0
+            # Tentativas de login nas últimas 24h (linhas brutas, dentro da retenção)
+            last_24h = datetime.utcnow() - timedelta(hours=24)
             
-            # Usuários únicos que tentaram login
-            unique_users = db.session.query(
+            totals = db.session.query(
+                func.count(LoginAttempt.id),
+                func.sum(case((LoginAttempt.success == False, 1), else_=0)),
+                func.count(func.distinct(LoginAttempt.ip_address)),
                 func.count(func.distinct(LoginAttempt.email))
             ).filter(
                 LoginAttempt.attempt_time >= last_24h
-            ).scalar() or 0
+            ).one()
+            
+            total_attempts = totals[0] or 0
+            failed_attempts = int(totals[1] or 0)
+            success_attempts = total_attempts - failed_attempts
+            unique_ips = totals[2] or 0
+            unique_users = totals[3] or 0
             
             return {
                 'total_attempts_24h': total_attempts,
@@ -834,6 +930,7 @@ class SecurityService:
                 'success_rate': (success_attempts / total_attempts * 100) if total_attempts > 0 else 0,
                 'unique_ips_24h': unique_ips,
                 'unique_users_24h': unique_users,
+                'daily_attempts': LoginThrottleService.get_daily_stats(),
                 'security_configs': {
                     'max_attempts': ConfigService.get_config('max_tentativas_login', 5),
                     'timeout_minutes': ConfigService.get_config('timeout_bloqueio_login', 30),
@@ -851,6 +948,7 @@ class SecurityService:
                 'success_rate': 0,
                 'unique_ips_24h': 0,
                 'unique_users_24h': 0,
+                'daily_attempts': [],
                 'security_configs': {}
             }
 
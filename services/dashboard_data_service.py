@@ -5,6 +5,49 @@ from models import db, Order, User, Wallet, Transaction
 from datetime import datetime, timedelta
 from sqlalchemy import and_, or_, func
 from decimal import Decimal
+from dataclasses import dataclass
+from typing import ClassVar, Optional, Tuple
+from sqlalchemy.orm import aliased
+from services.user_monthly_stats_service import UserMonthlyStatsService
+
+
+@dataclass(frozen=True)
+class OpenOrderRow:
+    """
+    Linha projetada de uma ordem em aberto (sem instância do ORM)
+    
+    As propriedades derivadas reutilizam as de Order, que dependem apenas
+    das colunas projetadas aqui.
+    """
+    ORDER_COLUMNS: ClassVar[Tuple[str, ...]] = (
+        'id', 'title', 'description', 'value', 'status', 'created_at', 'service_deadline',
+        'confirmation_deadline', 'dispute_deadline', 'client_id', 'provider_id'
+    )
+    
+    id: int
+    title: str
+    description: str
+    value: Decimal
+    status: str
+    created_at: datetime
+    service_deadline: datetime
+    confirmation_deadline: Optional[datetime]
+    dispute_deadline: Optional[datetime]
+    client_id: int
+    provider_id: Optional[int]
+    related_user_name: Optional[str]
+    
+    is_overdue = Order.is_overdue
+    can_be_cancelled = Order.can_be_cancelled
+    can_be_marked_completed = Order.can_be_marked_completed
+    can_be_confirmed = Order.can_be_confirmed
+    can_be_disputed = Order.can_be_disputed
+    hours_until_auto_confirmation = Order.hours_until_auto_confirmation
+    is_near_auto_confirmation = Order.is_near_auto_confirmation
+    status_display = Order.status_display
+    status_color_class = Order.status_color_class
+    status_icon_class = Order.status_icon_class
+
 
 class DashboardDataService:
     """Serviço para agregar dados das dashboards de cliente e prestador"""
@@ -14,6 +57,11 @@ class DashboardDataService:
         """
         Retorna ordens em aberto para o usuário
         
+        Uma única consulta de projeção: apenas as colunas usadas, com o nome da
+        outra parte obtido por JOIN. As flags derivadas (is_overdue,
+        hours_until_auto_confirmation etc.) são calculadas sobre a linha
+        projetada com as mesmas regras das propriedades de Order.
+        
         Args:
             user_id (int): ID do usuário
             role (str): 'cliente' ou 'prestador'
@@ -26,40 +74,34 @@ class DashboardDataService:
         
         # Construir query baseada no papel
         if role == 'cliente':
-            query = Order.query.filter(
-                and_(
-                    Order.client_id == user_id,
-                    Order.status.in_(open_statuses)
-                )
-            ).order_by(Order.created_at.desc())  # Cliente: mais recentes primeiro
-            
+            own_column, related_column = Order.client_id, Order.provider_id
+            ordering = Order.created_at.desc()  # Cliente: mais recentes primeiro
+            missing_name = "Aguardando prestador"
         elif role == 'prestador':
-            query = Order.query.filter(
-                and_(
-                    Order.provider_id == user_id,
-                    Order.status.in_(open_statuses)
-                )
-            ).order_by(Order.service_deadline.asc())  # Prestador: mais urgentes primeiro
-            
+            own_column, related_column = Order.provider_id, Order.client_id
+            ordering = Order.service_deadline.asc()  # Prestador: mais urgentes primeiro
+            missing_name = "Cliente desconhecido"
         else:
             raise ValueError(f"Role inválido: {role}. Use 'cliente' ou 'prestador'")
         
-        orders = query.all()
+        related_user = aliased(User)
+        rows = db.session.query(
+            *[getattr(Order, column) for column in OpenOrderRow.ORDER_COLUMNS],
+            related_user.nome.label('related_user_name')
+        ).outerjoin(
+            related_user, related_user.id == related_column
+        ).filter(
+            and_(
+                own_column == user_id,
+                Order.status.in_(open_statuses)
+            )
+        ).order_by(ordering).all()
         
         # Formatar dados para retorno
         result = []
-        for order in orders:
-            # Obter informações da parte relacionada
-            if role == 'cliente':
-                # Cliente vê informações do prestador
-                related_user = User.query.get(order.provider_id) if order.provider_id else None
-                related_user_name = related_user.nome if related_user else "Aguardando prestador"
-                related_user_id = order.provider_id
-            else:
-                # Prestador vê informações do cliente
-                related_user = User.query.get(order.client_id)
-                related_user_name = related_user.nome if related_user else "Cliente desconhecido"
-                related_user_id = order.client_id
+        for row in rows:
+            order = OpenOrderRow(*row)
+            related_user_id = order.provider_id if role == 'cliente' else order.client_id
             
             result.append({
                 'id': order.id,
@@ -73,7 +115,7 @@ class DashboardDataService:
                 'created_at': order.created_at,
                 'service_deadline': order.service_deadline,
                 'related_user_id': related_user_id,
-                'related_user_name': related_user_name,
+                'related_user_name': order.related_user_name or missing_name,
                 'is_overdue': order.is_overdue,
                 'can_be_cancelled': order.can_be_cancelled,
                 'can_be_marked_completed': order.can_be_marked_completed if role == 'prestador' else False,
@@ -86,12 +128,14 @@ class DashboardDataService:
         return result
     
     @staticmethod
-    def get_blocked_funds_summary(user_id):
+    def get_blocked_funds_summary(user_id, escrow_balance=None):
         """
         Retorna resumo de fundos bloqueados em escrow por usuário
         
         Args:
             user_id (int): ID do usuário
+            escrow_balance: Saldo em escrow já lido da carteira (evita nova
+                consulta à carteira; None = consultar)
             
         Returns:
             dict: {
@@ -100,78 +144,80 @@ class DashboardDataService:
             }
         """
         # Obter carteira do usuário
-        wallet = Wallet.query.filter_by(user_id=user_id).first()
-        if not wallet:
-            return {
-                'total_blocked': Decimal('0.00'),
-                'by_order': []
-            }
+        if escrow_balance is None:
+            wallet = Wallet.query.filter_by(user_id=user_id).first()
+            if not wallet:
+                return {
+                    'total_blocked': Decimal('0.00'),
+                    'by_order': []
+                }
+            escrow_balance = wallet.escrow_balance
         
-        total_blocked = wallet.escrow_balance
+        total_blocked = escrow_balance
         
         # Buscar ordens que têm valores bloqueados para este usuário
         # Cliente: ordens onde ele é o cliente e status indica valor em escrow
         # Prestador: ordens onde ele é o prestador e há taxa de contestação bloqueada
-        
-        by_order = []
-        
-        # Para cliente: buscar ordens em aberto onde ele é o cliente
-        client_orders = Order.query.filter(
-            and_(
+        # Os dois casos vêm de uma única consulta
+        blocking_statuses = ['aceita', 'em_andamento', 'aguardando_confirmacao', 'contestada']
+        orders = Order.query.filter(
+            Order.status.in_(blocking_statuses),
+            or_(
                 Order.client_id == user_id,
-                Order.status.in_(['aceita', 'em_andamento', 'aguardando_confirmacao', 'contestada'])
+                and_(
+                    Order.provider_id == user_id,
+                    Order.contestation_fee.isnot(None),
+                    Order.contestation_fee > 0
+                )
             )
-        ).all()
+        ).order_by(Order.id).all()
         
-        for order in client_orders:
-            # O valor da ordem está bloqueado no escrow do cliente
-            by_order.append({
-                'order_id': order.id,
-                'title': order.title,
-                'amount': float(order.value),
-                'status': order.status,
-                'status_display': order.status_display,
-                'created_at': order.created_at,
-                'service_deadline': order.service_deadline,
-                'blocked_type': 'valor_servico'  # Tipo de bloqueio
-            })
-        
-        # Para prestador: buscar ordens onde ele é o prestador e há taxa bloqueada
-        provider_orders = Order.query.filter(
-            and_(
-                Order.provider_id == user_id,
-                Order.status.in_(['aceita', 'em_andamento', 'aguardando_confirmacao', 'contestada']),
-                Order.contestation_fee.isnot(None),
-                Order.contestation_fee > 0
-            )
-        ).all()
+        client_entries = []
+        provider_entries = []
         
-        for order in provider_orders:
-            # Taxa de contestação bloqueada
-            by_order.append({
-                'order_id': order.id,
-                'title': order.title,
-                'amount': float(order.contestation_fee),
-                'status': order.status,
-                'status_display': order.status_display,
-                'created_at': order.created_at,
-                'service_deadline': order.service_deadline,
-                'blocked_type': 'taxa_contestacao'  # Tipo de bloqueio
-            })
+        for order in orders:
+            if order.client_id == user_id:
+                # O valor da ordem está bloqueado no escrow do cliente
+                client_entries.append({
+                    'order_id': order.id,
+                    'title': order.title,
+                    'amount': float(order.value),
+                    'status': order.status,
+                    'status_display': order.status_display,
+                    'created_at': order.created_at,
+                    'service_deadline': order.service_deadline,
+                    'blocked_type': 'valor_servico'  # Tipo de bloqueio
+                })
+            
+            if (order.provider_id == user_id and order.contestation_fee is not None
+                    and order.contestation_fee > 0):
+                # Taxa de contestação bloqueada
+                provider_entries.append({
+                    'order_id': order.id,
+                    'title': order.title,
+                    'amount': float(order.contestation_fee),
+                    'status': order.status,
+                    'status_display': order.status_display,
+                    'created_at': order.created_at,
+                    'service_deadline': order.service_deadline,
+                    'blocked_type': 'taxa_contestacao'  # Tipo de bloqueio
+                })
         
         return {
             'total_blocked': float(total_blocked),
-            'by_order': by_order
+            'by_order': client_entries + provider_entries
         }
     
     @staticmethod
-    def get_dashboard_metrics(user_id, role):
+    def get_dashboard_metrics(user_id, role, wallet_balances=None):
         """
         Retorna todas as métricas para a dashboard
         
         Args:
             user_id (int): ID do usuário
             role (str): 'cliente' ou 'prestador'
+            wallet_balances: Tupla (balance, escrow_balance) já lida da
+                carteira, usada pelo DashboardPayloadService (None = consultar)
             
         Returns:
             dict: Métricas completas incluindo:
@@ -181,16 +227,19 @@ class DashboardDataService:
                 - Alertas baseados em saldo e ordens
         """
         # 1. Obter informações da carteira
-        wallet = Wallet.query.filter_by(user_id=user_id).first()
-        if not wallet:
-            # Se não tem carteira, criar uma
-            from services.wallet_service import WalletService
-            wallet = WalletService.ensure_user_has_wallet(user_id)
+        if wallet_balances is None:
+            wallet = Wallet.query.filter_by(user_id=user_id).first()
+            if not wallet:
+                # Se não tem carteira, criar uma
+                from services.wallet_service import WalletService
+                wallet = WalletService.ensure_user_has_wallet(user_id)
+            wallet_balances = (wallet.balance, wallet.escrow_balance)
+        balance, escrow_balance = wallet_balances
         
         balance_info = {
-            'available': float(wallet.balance),
-            'blocked': float(wallet.escrow_balance),
-            'total': float(wallet.balance + wallet.escrow_balance)
+            'available': float(balance),
+            'blocked': float(escrow_balance),
+            'total': float(balance + escrow_balance)
         }
         
         # 2. Obter ordens em aberto
@@ -203,87 +252,10 @@ class DashboardDataService:
             orders_by_status[status] = orders_by_status.get(status, 0) + 1
         
         # 4. Obter fundos bloqueados detalhados
-        blocked_funds = DashboardDataService.get_blocked_funds_summary(user_id)
-        
-        # 5. Calcular estatísticas do mês atual
-        now = datetime.utcnow()
-        first_day_of_month = datetime(now.year, now.month, 1)
+        blocked_funds = DashboardDataService.get_blocked_funds_summary(user_id, escrow_balance)
         
-        if role == 'cliente':
-            # Estatísticas do cliente
-            # Ordens criadas este mês
-            orders_created_this_month = Order.query.filter(
-                and_(
-                    Order.client_id == user_id,
-                    Order.created_at >= first_day_of_month
-                )
-            ).count()
-            
-            # Ordens concluídas este mês
-            orders_completed_this_month = Order.query.filter(
-                and_(
-                    Order.client_id == user_id,
-                    Order.status == 'concluida',
-                    Order.completed_at >= first_day_of_month
-                )
-            ).count()
-            
-            # Total gasto este mês (ordens concluídas)
-            total_spent_query = db.session.query(
-                func.sum(Order.value)
-            ).filter(
-                and_(
-                    Order.client_id == user_id,
-                    Order.status == 'concluida',
-                    Order.completed_at >= first_day_of_month
-                )
-            ).scalar()
-            
-            total_spent_this_month = float(total_spent_query) if total_spent_query else 0.0
-            
-            month_stats = {
-                'orders_created': orders_created_this_month,
-                'orders_completed': orders_completed_this_month,
-                'total_spent': total_spent_this_month
-            }
-            
-        else:  # prestador
-            # Estatísticas do prestador
-            # Ordens aceitas este mês
-            orders_accepted_this_month = Order.query.filter(
-                and_(
-                    Order.provider_id == user_id,
-                    Order.accepted_at >= first_day_of_month
-                )
-            ).count()
-            
-            # Ordens concluídas este mês
-            orders_completed_this_month = Order.query.filter(
-                and_(
-                    Order.provider_id == user_id,
-                    Order.status == 'concluida',
-                    Order.completed_at >= first_day_of_month
-                )
-            ).count()
-            
-            # Total recebido este mês (transações de recebimento)
-            total_received_query = db.session.query(
-                func.sum(Transaction.amount)
-            ).filter(
-                and_(
-                    Transaction.user_id == user_id,
-                    Transaction.type == 'recebimento',
-                    Transaction.created_at >= first_day_of_month
-                )
-            ).scalar()
-            
-            total_received_this_month = float(total_received_query) if total_received_query else 0.0
-            
-            month_stats = {
-                'orders_accepted': orders_accepted_this_month,
-                'orders_completed': orders_completed_this_month,
-                'total_received': total_received_this_month
-            }
+        # 5. Estatísticas do mês atual (rollup user_monthly_stats, uma consulta)
+        month_stats = UserMonthlyStatsService.get_month_stats(user_id, role)
         
         # 6. Gerar alertas baseados em saldo e ordens
         alerts = []
@@ -0,0 +1,476 @@
+#!/usr/bin/env python3.11
+# -*- coding: utf-8 -*-
+
+"""
+DashboardPayloadService - Montagem dos dados das dashboards de cliente e prestador
+
+ClienteService.get_dashboard_data e PrestadorService.get_dashboard_data
+chamavam get_dashboard_metrics e, em seguida, faziam suas próprias contagens
+(transacoes_mes, ordens_concluidas, ordens_disponiveis), a busca da última
+transação e os helpers _calcular_*, cada um com mais uma ou duas consultas.
+
+Funcionamento:
+- Um único SELECT substitui todas essas contagens e agregações: CTEs de
+  ordens e transações mais subconsultas escalares de usuário, carteira e
+  última transação (cliente) ou a linha de provider_stats (prestador)
+- As demais partes (ordens em aberto, fundos bloqueados, estatísticas do mês,
+  notificações de propostas e pré-ordens) usam uma ou duas consultas cada,
+  independentemente da quantidade de registros
+- QUERY_BUDGET registra o máximo de consultas por papel em uma montagem sem
+  cache; os testes verificam esse limite
+- O resultado é guardado por usuário no namespace 'dashboard' do CacheService
+  com a tag user:<id>; ouvintes de sessão do ORM anotam, antes de cada flush,
+  os usuários das ordens, transações, carteiras, convites, propostas e
+  pré-ordens alteradas e invalidam suas tags após o commit. Dashboards de
+  prestador também levam a tag orders:available, invalidada quando ordens
+  entram ou saem do status 'disponivel'
+- Alterações em massa (query.update/delete) não passam pelos ouvintes; o TTL
+  curto limita a defasagem nesses casos e nos alertas que dependem do relógio
+"""
+
+from datetime import datetime
+from typing import Dict, Optional, Set
+import logging
+
+from sqlalchemy import and_, case, func, inspect, select, true
+
+from models import db, User, Order, Transaction, Wallet, Invite, Proposal, PreOrder, ProviderStats
+from services.cache_service import CacheService
+from services.dashboard_data_service import DashboardDataService
+from services.session_hooks import TagInvalidationHook, history_values
+
+logger = logging.getLogger(__name__)
+
+# Tipos de transação que contam como gasto do cliente
+SPENDING_TYPES = ('escrow_bloqueio', 'pagamento', 'taxa_sistema')
+
+# Tag das dashboards que exibem a contagem de ordens disponíveis
+AVAILABLE_ORDERS_TAG = 'orders:available'
+
+
+class DashboardPayloadService:
+    """Montagem, cache e invalidação dos dados das dashboards"""
+
+    # TTL curto: alertas dependem do relógio (atrasos, confirmação automática)
+    TTL = 60
+
+    # Máximo de consultas em uma montagem sem cache, por papel:
+    # resumo, ordens em aberto, fundos bloqueados, estatísticas do mês,
+    # propostas + usuários das propostas, pré-ordens + autores das propostas ativas
+    QUERY_BUDGET = {
+        'cliente': 8,
+        'prestador': 8,
+    }
+
+    _cache = CacheService.namespace('dashboard', max_entries=5000, default_ttl=TTL)
+
+    @staticmethod
+    def user_tag(user_id: int) -> str:
+        """Tag das dashboards de um usuário"""
+        return f'user:{user_id}'
+
+    # =========================================================================
+    # Leitura
+    # =========================================================================
+
+    @classmethod
+    def get_payload(cls, user_id: int, role: str) -> Dict:
+        """
+        Retorna os dados da dashboard do usuário (do cache quando possível)
+
+        Args:
+            user_id: ID do usuário
+            role: 'cliente' ou 'prestador'
+
+        Returns:
+            dict: Mesmo formato de ClienteService/PrestadorService.get_dashboard_data
+
+        Raises:
+            ValueError: Usuário não encontrado ou papel inválido
+        """
+        if role not in cls.QUERY_BUDGET:
+            raise ValueError(f"Role inválido: {role}. Use 'cliente' ou 'prestador'")
+
+        key = f'{role}:{user_id}'
+        payload = cls._cache.get(key)
+        if payload is not None:
+            return payload
+
+        payload = cls.build_payload(user_id, role)
+        tags = [cls.user_tag(user_id)]
+        if role == 'prestador':
+            tags.append(AVAILABLE_ORDERS_TAG)
+        cls._cache.set(key, payload, tags=tags)
+        return payload
+
+    @classmethod
+    def build_payload(cls, user_id: int, role: str) -> Dict:
+        """Monta os dados da dashboard sem usar o cache"""
+        summary = cls.get_summary(user_id, role)
+        if summary is None:
+            raise ValueError("Usuário não encontrado")
+
+        wallet_balances = None
+        if summary['balance'] is not None:
+            wallet_balances = (summary['balance'], summary['escrow_balance'])
+        metrics = DashboardDataService.get_dashboard_metrics(user_id, role, wallet_balances)
+
+        if role == 'cliente':
+            return cls._build_cliente_payload(user_id, metrics, summary)
+        return cls._build_prestador_payload(user_id, metrics, summary)
+
+    @staticmethod
+    def get_summary(user_id: int, role: str) -> Optional[Dict]:
+        """
+        Contagens e agregações da dashboard em uma única consulta
+
+        Para o cliente, CTEs agregam orders e transactions; para o prestador,
+        as estatísticas vêm da linha de provider_stats (ProviderStatsService).
+
+        Returns:
+            dict com os totais ou None se o usuário não existir
+        """
+        def wallet(column):
+            return select(column).where(Wallet.user_id == user_id).scalar_subquery()
+
+        columns = [
+            select(User.id).where(User.id == user_id).scalar_subquery().label('user_id'),
+            wallet(Wallet.balance).label('balance'),
+            wallet(Wallet.escrow_balance).label('escrow_balance'),
+        ]
+
+        if role == 'prestador':
+            def provider_stat(column):
+                return select(column).where(ProviderStats.provider_id == user_id).scalar_subquery()
+
+            columns += [
+                provider_stat(ProviderStats.completion_rate).label('completion_rate'),
+                provider_stat(ProviderStats.average_received).label('average_received'),
+                provider_stat(ProviderStats.total_received).label('total_received'),
+                provider_stat(ProviderStats.clients_served).label('clients_served'),
+                select(func.count(Order.id)).where(
+                    Order.status == 'disponivel', Order.provider_id.is_(None)
+                ).scalar_subquery().label('available_orders'),
+            ]
+            row = db.session.execute(select(*columns)).mappings().first()
+        else:
+            month_start = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+            completed = case((Order.status == 'concluida', 1), else_=0)
+            order_stats = select(
+                func.count(Order.id).label('total_orders'),
+                func.coalesce(func.sum(completed), 0).label('completed_orders'),
+                func.avg(Order.value).label('avg_order_value')
+            ).where(Order.client_id == user_id).cte('order_stats')
+
+            spending = case(
+                (and_(Transaction.amount < 0, Transaction.type.in_(SPENDING_TYPES)),
+                 func.abs(Transaction.amount)),
+                else_=None
+            )
+            transaction_stats = select(
+                func.count(case((Transaction.created_at >= month_start, 1), else_=None)).label('month_transactions'),
+                func.sum(spending).label('total_spent')
+            ).where(Transaction.user_id == user_id).cte('transaction_stats')
+
+            last_transaction = select(Transaction.id).where(
+                Transaction.user_id == user_id
+            ).order_by(Transaction.created_at.desc(), Transaction.id.desc()).limit(1).scalar_subquery()
+
+            def last(column):
+                return select(column).where(Transaction.id == last_transaction).scalar_subquery()
+
+            columns += [
+                order_stats.c.total_orders,
+                order_stats.c.completed_orders,
+                order_stats.c.avg_order_value,
+                transaction_stats.c.month_transactions,
+                transaction_stats.c.total_spent,
+                last(Transaction.created_at).label('last_transaction_at'),
+                last(Transaction.amount).label('last_transaction_amount'),
+                last(Transaction.type).label('last_transaction_type'),
+                last(Transaction.description).label('last_transaction_description'),
+            ]
+            row = db.session.execute(
+                select(*columns).select_from(order_stats).join(transaction_stats, true())
+            ).mappings().first()
+
+        if row is None or row['user_id'] is None:
+            return None
+        return dict(row)
+
+    # =========================================================================
+    # Formatação por papel
+    # =========================================================================
+
+    @staticmethod
+    def _completion_rate(summary: Dict) -> float:
+        if not summary['total_orders']:
+            return 0.0
+        return (summary['completed_orders'] / summary['total_orders']) * 100
+
+    @staticmethod
+    def _last_transaction(summary: Dict) -> Optional[Dict]:
+        created_at = summary['last_transaction_at']
+        if created_at is None:
+            return None
+        return {
+            'data': created_at.strftime('%d/%m/%Y %H:%M'),
+            'valor': abs(summary['last_transaction_amount']),
+            'tipo': summary['last_transaction_type'],
+            'descricao': summary['last_transaction_description']
+        }
+
+    @classmethod
+    def _build_cliente_payload(cls, user_id: int, metrics: Dict, summary: Dict) -> Dict:
+        from services.cliente_service import ClienteService
+        from services.notification_service import NotificationService
+
+        open_orders = metrics['open_orders']
+
+        # Formatar próximas ordens (primeiras 3 ordens em aberto)
+        proximas_ordens = []
+        for ordem in open_orders[:3]:
+            proximas_ordens.append({
+                'id': ordem['id'],
+                'titulo': ordem['title'],
+                'data': ordem['created_at'].strftime('%d/%m/%Y'),
+                'status': ordem['status'],
+                'status_display': ordem['status_display'],
+                'valor': ordem['value'],
+                'prestador': ordem['related_user_name']
+            })
+
+        # Notificações de propostas pendentes e alertas do DashboardDataService
+        alertas = list(NotificationService.get_proposal_notifications_for_client(user_id))
+        for alert in metrics['alerts']:
+            alertas.append({
+                'tipo': alert['type'],
+                'mensagem': alert['message'],
+                'titulo': alert.get('title', ''),
+                'action': alert.get('action', ''),
+                'action_url': alert.get('action_url', '')
+            })
+
+        # Alerta adicional se tem saldo bloqueado
+        if metrics['balance']['blocked'] > 0:
+            alertas.append({
+                'tipo': 'info',
+                'mensagem': f'Você tem R$ {metrics["balance"]["blocked"]:.2f} em garantia para ordens ativas.'
+            })
+
+        # Alerta se não tem ordens ativas há muito tempo
+        if metrics['open_orders_count'] == 0 and metrics['balance']['available'] > 0:
+            alertas.append({
+                'tipo': 'info',
+                'mensagem': 'Que tal criar uma nova ordem de serviço?'
+            })
+
+        pre_orders_ativas = ClienteService.get_active_pre_orders(user_id)
+
+        return {
+            # Valores em formato numérico (serão convertidos para R$ no template)
+            'saldo_atual': metrics['balance']['available'],
+            'tokens_disponiveis': metrics['balance']['available'],
+            'saldo_bloqueado': metrics['balance']['blocked'],
+
+            # Contadores
+            'transacoes_mes': summary['month_transactions'],
+            'ordens_ativas': metrics['open_orders_count'],
+            'ordens_concluidas': summary['completed_orders'],
+
+            # Valores financeiros
+            'gasto_total_mes': metrics['month_stats']['total_spent'],
+            'economia_mes': 0.0,  # TODO: Implementar cálculo de economia
+
+            # Atividades
+            'ultima_transacao': cls._last_transaction(summary),
+            'proximas_ordens': proximas_ordens,
+            'alertas': alertas,
+
+            # Dados do DashboardDataService
+            'ordens_em_aberto': open_orders,
+            'fundos_bloqueados_detalhados': metrics['blocked_funds']['by_order'],
+            'ordens_por_status': metrics['orders_by_status'],
+
+            # Pré-ordens
+            'pre_orders_ativas': pre_orders_ativas,
+            'pre_orders_count': len(pre_orders_ativas),
+            'pre_orders_needing_action': len([po for po in pre_orders_ativas if po['needs_action']]),
+
+            # Estatísticas adicionais
+            'total_gasto_historico': summary['total_spent'] or 0.0,
+            'media_valor_ordem': summary['avg_order_value'] or 0.0,
+            'taxa_conclusao': cls._completion_rate(summary)
+        }
+
+    @classmethod
+    def _build_prestador_payload(cls, user_id: int, metrics: Dict, summary: Dict) -> Dict:
+        from services.prestador_service import PrestadorService
+        from services.notification_service import NotificationService
+
+        ordens_em_aberto = metrics['open_orders']
+        ordens_concluidas_mes = metrics['month_stats'].get('orders_completed', 0)
+        ordens_disponiveis = summary['available_orders']
+
+        # Contar ordens ativas (aceita + em_andamento)
+        ordens_ativas = len([o for o in ordens_em_aberto if o['status'] in ['aceita', 'em_andamento']])
+
+        # Formatar próximas ordens (primeiras 3 ordens em aberto)
+        proximas_ordens = []
+        for ordem in ordens_em_aberto[:3]:
+            proximas_ordens.append({
+                'id': ordem['id'],
+                'titulo': ordem['title'],
+                'data': ordem['created_at'].strftime('%d/%m/%Y') if ordem['created_at'] else '',
+                'horario': ordem['created_at'].strftime('%H:%M') if ordem['created_at'] else '',
+                'valor': ordem['value'],
+                'status': ordem['status'],
+                'cliente': ordem['related_user_name'],
+                'prazo': ordem['service_deadline'].strftime('%d/%m/%Y') if ordem['service_deadline'] else ''
+            })
+
+        # Notificações de propostas e alertas do DashboardDataService
+        alertas = list(NotificationService.get_proposal_notifications_for_prestador(user_id))
+        for alert in metrics['alerts']:
+            alertas.append({
+                'tipo': alert['type'],
+                'mensagem': alert['message']
+            })
+
+        # Alerta de novas oportunidades
+        if ordens_disponiveis > 0:
+            alertas.append({
+                'tipo': 'info',
+                'mensagem': f'Há {ordens_disponiveis} novas oportunidades de trabalho disponíveis!'
+            })
+
+        # Alerta se não tem ordens ativas
+        if ordens_ativas == 0 and ordens_disponiveis > 0:
+            alertas.append({
+                'tipo': 'warning',
+                'mensagem': 'Você não tem ordens ativas. Que tal aceitar uma nova oportunidade?'
+            })
+
+        pre_orders_ativas = PrestadorService.get_active_pre_orders(user_id)
+
+        return {
+            # Valores em formato numérico (serão convertidos para R$ no template)
+            'saldo_atual': metrics['balance']['total'],
+            'saldo_disponivel': metrics['balance']['available'],
+            'saldo_bloqueado': metrics['balance']['blocked'],
+
+            # Contadores
+            'ordens_ativas': ordens_ativas,
+            'ordens_concluidas_mes': ordens_concluidas_mes,
+            'ordens_disponiveis': ordens_disponiveis,
+
+            # Valores financeiros
+            'ganhos_mes': metrics['month_stats'].get('total_received', 0.0),
+            'ganhos_total': float(summary['total_received'] or 0),
+
+            # Performance (simulada até existir sistema de avaliações)
+            'media_avaliacao': 4.5,
+            'total_avaliacoes': ordens_concluidas_mes * 2,
+
+            # Atividades
+            'proximas_ordens': proximas_ordens,
+            'alertas': alertas,
+
+            # Métricas adicionais
+            'taxa_conclusao': float(summary['completion_rate'] or 0),
+            'ganho_medio_ordem': float(summary['average_received'] or 0),
+            'clientes_atendidos': summary['clients_served'] or 0,
+
+            # Dados do DashboardDataService
+            'ordens_em_aberto': ordens_em_aberto,
+            'fundos_bloqueados_detalhados': metrics['blocked_funds']['by_order'],
+
+            # Pré-ordens
+            'pre_orders_ativas': pre_orders_ativas,
+            'pre_orders_count': len(pre_orders_ativas),
+            'pre_orders_needing_action': len([po for po in pre_orders_ativas if po['needs_action']])
+        }
+
+    # =========================================================================
+    # Invalidação por eventos da sessão
+    # =========================================================================
+
+    @staticmethod
+    def _may_change_availability(obj) -> bool:
+        """Ordem que entra ou sai do status 'disponivel'"""
+        history = inspect(obj).attrs['status'].history
+        if 'disponivel' in set(history.added) | set(history.unchanged) | set(history.deleted):
+            return True
+        # Status reatribuído em objeto expirado: o valor anterior é desconhecido
+        return bool(history.added) and not history.deleted and not inspect(obj).pending
+
+    @classmethod
+    def collect_affected(cls, session) -> Dict[str, Set]:
+        """
+        Usuários cujas dashboards mudam com o flush em andamento
+
+        Returns:
+            dict: {'users': {ids}, 'available': bool}
+        """
+        users = set()
+        available = False
+        user_attributes = (
+            (Order, ('client_id', 'provider_id')),
+            (Transaction, ('user_id',)),
+            (Wallet, ('user_id',)),
+            (Invite, ('client_id',)),
+            (Proposal, ('prestador_id',)),
+            (PreOrder, ('client_id', 'provider_id')),
+        )
+
+        for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+            for model, attributes in user_attributes:
+                if isinstance(obj, model):
+                    for attribute in attributes:
+                        users |= history_values(obj, attribute)
+            if isinstance(obj, Proposal):
+                # A dashboard do cliente lista as notificações de propostas dos seus convites
+                users |= cls._invite_clients(session, obj)
+            if isinstance(obj, Order) and not available:
+                available = cls._may_change_availability(obj)
+
+        return {'users': users, 'available': available}
+
+    @classmethod
+    def _invite_clients(cls, session, proposal) -> Set:
+        """Clientes dos convites (atual e anterior) de uma proposta"""
+        invites = set()
+        if proposal.__dict__.get('invite') is not None:
+            invites.add(proposal.__dict__['invite'])
+        with session.no_autoflush:
+            for invite_id in history_values(proposal, 'invite_id'):
+                invite = session.get(Invite, invite_id)
+                if invite is not None:
+                    invites.add(invite)
+        return {invite.client_id for invite in invites if invite.client_id is not None}
+
+    @classmethod
+    def collect_tags(cls, session) -> Set[str]:
+        """Tags das dashboards que mudam com o flush em andamento"""
+        affected = cls.collect_affected(session)
+        tags = {cls.user_tag(user_id) for user_id in affected['users']}
+        if affected['available']:
+            tags.add(AVAILABLE_ORDERS_TAG)
+        return tags
+
+    @classmethod
+    def invalidate_user(cls, user_id: int):
+        """Descarta as dashboards em cache de um usuário"""
+        cls._cache.invalidate_tags(cls.user_tag(user_id))
+
+    @classmethod
+    def register(cls):
+        """Registra os ouvintes de sessão (idempotente)"""
+        cls._invalidation_hook.register()
+
+
+DashboardPayloadService._invalidation_hook = TagInvalidationHook(
+    'dashboard_payload', DashboardPayloadService.collect_tags, DashboardPayloadService._cache.invalidate_tags, 'cache das dashboards'
+)
+DashboardPayloadService.register()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3.11
+# -*- coding: utf-8 -*-
+
+"""
+DistinctSketch - Contagem aproximada de valores distintos (HyperLogLog)
+
+Usado pelas métricas de propostas para guardar, por dia, quantos usuários
+distintos participaram sem guardar os IDs. Sketches de dias diferentes são
+combinados (registro a registro, pelo máximo) para estimar os distintos de
+uma semana, um mês ou qualquer intervalo.
+
+Com a precisão padrão (2^10 registros, 1 KB serializado) o erro padrão é de
+cerca de 3%; até algumas dezenas de valores a contagem é praticamente exata
+(correção de faixa pequena).
+"""
+
+from typing import Any, Iterable, Optional
+import hashlib
+import math
+
+
+class DistinctSketch:
+    """Sketch HyperLogLog serializável e combinável"""
+
+    PRECISION = 10
+
+    def __init__(self, precision: int = PRECISION, registers: Optional[bytearray] = None):
+        if not 4 <= precision <= 16:
+            raise ValueError(f"Precisão inválida: {precision}")
+        self.precision = precision
+        self.size = 1 << precision
+        self.registers = registers if registers is not None else bytearray(self.size)
+        if len(self.registers) != self.size:
+            raise ValueError("Número de registros incompatível com a precisão")
+
+    @staticmethod
+    def _hash(value: Any) -> int:
+        digest = hashlib.blake2b(str(value).encode('utf-8'), digest_size=8).digest()
+        return int.from_bytes(digest, 'big')
+
+    def add(self, value: Any):
+        """Registra um valor (None é ignorado)"""
+        if value is None:
+            return
+        hashed = self._hash(value)
+        bits = 64 - self.precision
+        index = hashed >> bits
+        remainder = hashed & ((1 << bits) - 1)
+        rank = bits - remainder.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def update(self, values: Iterable[Any]) -> 'DistinctSketch':
+        for value in values:
+            self.add(value)
+        return self
+
+    def merge(self, other: 'DistinctSketch') -> 'DistinctSketch':
+        """União com outro sketch (no próprio objeto)"""
+        if other.precision != self.precision:
+            raise ValueError("Sketches com precisões diferentes")
+        self.registers = bytearray(max(a, b) for a, b in zip(self.registers, other.registers))
+        return self
+
+    def estimate(self) -> int:
+        """Estimativa do número de valores distintos"""
+        m = self.size
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / sum(2.0 ** -register for register in self.registers)
+        zeros = self.registers.count(0)
+        if raw <= 2.5 * m and zeros:
+            # Correção para cardinalidades pequenas (linear counting)
+            return int(round(m * math.log(m / zeros)))
+        return int(round(raw))
+
+    def to_bytes(self) -> bytes:
+        return bytes([self.precision]) + bytes(self.registers)
+
+    @classmethod
+    def from_bytes(cls, data: Optional[bytes]) -> 'DistinctSketch':
+        """Reconstrói um sketch serializado; vazio se data for None"""
+        if not data:
+            return cls()
+        return cls(precision=data[0], registers=bytearray(data[1:]))
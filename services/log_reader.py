@@ -0,0 +1,74 @@
+#!/usr/bin/env python3.11
+# -*- coding: utf-8 -*-
+
+"""
+Leitura de arquivos de log a partir do final
+
+Lê o arquivo de trás para frente em blocos, de modo que obter as últimas N
+linhas (ou as últimas N que satisfazem um filtro) custa proporcional ao
+resultado, e não ao tamanho do arquivo.
+"""
+
+from typing import Callable, Iterator, List, Optional
+import os
+
+BLOCK_SIZE = 64 * 1024
+
+
+def iter_lines_reversed(path: str, block_size: int = BLOCK_SIZE) -> Iterator[str]:
+    """
+    Itera as linhas não vazias do arquivo, da última para a primeira
+
+    Args:
+        path: Caminho do arquivo
+        block_size: Tamanho dos blocos lidos a cada seek
+
+    Yields:
+        str: Linha sem o terminador
+    """
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        remainder = b''
+
+        while position > 0:
+            size = min(block_size, position)
+            position -= size
+            f.seek(position)
+            lines = (f.read(size) + remainder).split(b'\n')
+            # Primeira parte pode ser o final de uma linha do bloco anterior
+            remainder = lines[0]
+            for line in reversed(lines[1:]):
+                if line.strip():
+                    yield line.decode('utf-8', errors='replace').rstrip('\r')
+
+        if remainder.strip():
+            yield remainder.decode('utf-8', errors='replace').rstrip('\r')
+
+
+def tail(path: str, limit: int, predicate: Optional[Callable[[str], bool]] = None,
+         max_scan: Optional[int] = None, block_size: int = BLOCK_SIZE) -> List[str]:
+    """
+    Últimas `limit` linhas do arquivo (mais recentes primeiro)
+
+    Args:
+        path: Caminho do arquivo (inexistente retorna lista vazia)
+        limit: Número máximo de linhas
+        predicate: Filtro opcional aplicado a cada linha
+        max_scan: Máximo de linhas examinadas (limita filtros raros em arquivos grandes)
+
+    Returns:
+        List[str]: Linhas, da mais recente para a mais antiga
+    """
+    if limit <= 0 or not os.path.exists(path):
+        return []
+
+    lines = []
+    for scanned, line in enumerate(iter_lines_reversed(path, block_size)):
+        if max_scan is not None and scanned >= max_scan:
+            break
+        if predicate is None or predicate(line):
+            lines.append(line)
+            if len(lines) >= limit:
+                break
+    return lines
@@ -0,0 +1,331 @@
+#!/usr/bin/env python3.11
+# -*- coding: utf-8 -*-
+
+"""
+LoginThrottleService - Controle de tentativas de login
+
+Com armazenamento compartilhado (RATELIMIT_STORAGE_URI 'database://',
+'redis://', ...), a verificação de bloqueio não consulta login_attempts: as
+falhas são contadas no armazenamento do RateLimiterService (janela
+deslizante, com decaimento da janela anterior), por e-mail e por IP, em O(1).
+
+Com armazenamento local ao processo ('local://', 'memory://'), os contadores
+não valeriam entre workers nem após reinícios: as falhas são gravadas na hora
+e contadas em login_attempts pelos índices (e-mail, data) e (IP, data).
+
+As tentativas continuam registradas em login_attempts para auditoria, as
+demais em lotes gravados por uma thread (LoginAttemptWriter). A compactação diária
+agrega os dias completos em login_attempt_daily e remove as linhas brutas
+mais antigas que a retenção.
+"""
+
+from datetime import datetime, date, timedelta
+from typing import Any, Dict, List, Optional
+import atexit
+import queue
+import threading
+import logging
+
+from limits import RateLimitItemPerSecond
+from sqlalchemy import func, case, select, delete
+
+from models import db, LoginAttempt, LoginAttemptDaily
+from services.cache_service import CacheService
+from services.rate_limiter_service import RateLimiterService
+
+logger = logging.getLogger(__name__)
+
+
+class LoginAttemptWriter:
+    """
+    Fila de tentativas de login gravadas em lotes
+
+    Uma thread por worker grava até `BATCH_SIZE` linhas por INSERT, a cada
+    `FLUSH_INTERVAL` segundos ou quando o lote enche. Com
+    LOGIN_ATTEMPT_ASYNC_WRITES desativado (testes), grava na hora. As
+    pendências são gravadas ao encerrar o processo.
+    """
+
+    BATCH_SIZE = 200
+    FLUSH_INTERVAL = 1.0
+    MAX_PENDING = 10000
+
+    _queue: 'queue.Queue[Dict]' = queue.Queue(maxsize=MAX_PENDING)
+    _thread: Optional[threading.Thread] = None
+    _app = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def _async_enabled(cls) -> bool:
+        from flask import current_app, has_app_context
+
+        if not has_app_context():
+            return False
+        return current_app.config.get('LOGIN_ATTEMPT_ASYNC_WRITES', True)
+
+    @classmethod
+    def _ensure_started(cls):
+        if cls._thread is not None and cls._thread.is_alive():
+            return
+        from flask import current_app
+
+        with cls._lock:
+            if cls._thread is not None and cls._thread.is_alive():
+                return
+            cls._app = current_app._get_current_object()
+            cls._thread = threading.Thread(target=cls._run, name='login-attempt-writer', daemon=True)
+            cls._thread.start()
+            atexit.register(cls.flush)
+
+    @classmethod
+    def enqueue(cls, row: Dict):
+        """Agenda a gravação de uma tentativa"""
+        if not cls._async_enabled():
+            cls._write([row])
+            return
+
+        cls._ensure_started()
+        try:
+            cls._queue.put_nowait(row)
+        except queue.Full:
+            # Fila cheia: grava o acumulado no próprio chamador
+            cls.flush()
+            cls._write([row])
+
+    @classmethod
+    def _drain(cls, first: Optional[Dict] = None) -> List[Dict]:
+        rows = [first] if first is not None else []
+        while len(rows) < cls.BATCH_SIZE:
+            try:
+                rows.append(cls._queue.get_nowait())
+            except queue.Empty:
+                break
+        return rows
+
+    @classmethod
+    def _run(cls):
+        while True:
+            try:
+                first = cls._queue.get(timeout=cls.FLUSH_INTERVAL)
+            except queue.Empty:
+                continue
+            cls._write(cls._drain(first))
+
+    @classmethod
+    def flush(cls) -> int:
+        """Grava todas as tentativas pendentes; retorna quantas foram gravadas"""
+        written = 0
+        while True:
+            rows = cls._drain()
+            if not rows:
+                return written
+            cls._write(rows)
+            written += len(rows)
+
+    @classmethod
+    def _write(cls, rows: List[Dict]):
+        from flask import has_app_context
+        from contextlib import nullcontext
+
+        if not rows:
+            return
+        context = nullcontext() if has_app_context() or cls._app is None else cls._app.app_context()
+        try:
+            with context, db.engine.begin() as connection:
+                connection.execute(LoginAttempt.__table__.insert(), rows)
+        except Exception as e:
+            logger.error(f"Erro ao gravar {len(rows)} tentativas de login: {str(e)}")
+
+
+class LoginThrottleService:
+    """Bloqueio por tentativas de login e consolidação diária"""
+
+    # Limite por IP = limite por e-mail x fator (vários usuários atrás do mesmo NAT)
+    IP_ATTEMPTS_FACTOR = 4
+    DEFAULT_MAX_ATTEMPTS = 5
+    DEFAULT_TIMEOUT_MINUTES = 30
+
+    _last_success = CacheService.namespace('login_success', max_entries=20000, default_ttl=3600)
+
+    @staticmethod
+    def _normalize_email(email: str) -> str:
+        return (email or '').strip().lower()
+
+    @classmethod
+    def _settings(cls) -> Dict[str, int]:
+        from services.config_service import ConfigService
+
+        return {
+            'max_attempts': int(ConfigService.get_config('max_tentativas_login', cls.DEFAULT_MAX_ATTEMPTS)),
+            'timeout_minutes': int(ConfigService.get_config('timeout_bloqueio_login', cls.DEFAULT_TIMEOUT_MINUTES)),
+        }
+
+    @classmethod
+    def _limits(cls, settings: Dict[str, int]):
+        window = settings['timeout_minutes'] * 60
+        return (RateLimitItemPerSecond(settings['max_attempts'], window),
+                RateLimitItemPerSecond(settings['max_attempts'] * cls.IP_ATTEMPTS_FACTOR, window))
+
+    @staticmethod
+    def _count_failures(settings: Dict[str, int], email: str, ip_address: str):
+        """Falhas recentes por e-mail e por IP em login_attempts (sem contadores compartilhados)"""
+        cutoff = datetime.utcnow() - timedelta(minutes=settings['timeout_minutes'])
+        recent_failures = db.session.query(func.count(LoginAttempt.id)).filter(
+            LoginAttempt.success == False,
+            LoginAttempt.attempt_time >= cutoff,
+        )
+        by_email = recent_failures.filter(LoginAttempt.email == email).scalar() or 0
+        by_ip = 0
+        if ip_address:
+            by_ip = recent_failures.filter(LoginAttempt.ip_address == ip_address).scalar() or 0
+        return by_email, by_ip
+
+    @classmethod
+    def record(cls, email: str, ip_address: str, user_agent: str, success: bool,
+               user_type: str = 'user'):
+        """Conta a falha (e-mail e IP) e agenda o registro para auditoria"""
+        normalized = cls._normalize_email(email)
+        settings = cls._settings()
+        shared = RateLimiterService.is_shared_storage()
+
+        if success:
+            cls._last_success.set(normalized, datetime.utcnow(),
+                                  ttl_seconds=settings['timeout_minutes'] * 60)
+        elif shared:
+            email_limit, ip_limit = cls._limits(settings)
+            RateLimiterService.hit(f'login:email:{normalized}', email_limit)
+            RateLimiterService.hit(f'login:ip:{ip_address}', ip_limit)
+
+        row = {
+            'email': normalized,
+            'ip_address': ip_address,
+            'user_agent': (user_agent or '')[:255] or None,
+            'success': success,
+            'attempt_time': datetime.utcnow(),
+            'user_type': user_type,
+        }
+        if success or shared:
+            LoginAttemptWriter.enqueue(row)
+        else:
+            # Sem contadores compartilhados a falha conta pelo banco: grava na hora
+            LoginAttemptWriter._write([row])
+
+    @classmethod
+    def check(cls, email: str, ip_address: str) -> Dict[str, Any]:
+        """Situação de bloqueio do e-mail e do IP (pelos contadores, se compartilhados)"""
+        normalized = cls._normalize_email(email)
+        settings = cls._settings()
+        max_attempts = settings['max_attempts']
+        email_limit, ip_limit = cls._limits(settings)
+
+        if RateLimiterService.is_shared_storage():
+            failed_attempts = RateLimiterService.get_count(f'login:email:{normalized}', email_limit)
+            ip_failures = RateLimiterService.get_count(f'login:ip:{ip_address}', ip_limit) if ip_address else 0
+        else:
+            failed_attempts, ip_failures = cls._count_failures(settings, normalized, ip_address)
+        ip_blocked = ip_failures >= ip_limit.amount
+
+        return {
+            'is_blocked': failed_attempts >= max_attempts or ip_blocked,
+            'failed_attempts': failed_attempts,
+            'max_attempts': max_attempts,
+            'remaining_attempts': max(0, max_attempts - failed_attempts),
+            'timeout_minutes': settings['timeout_minutes'],
+            'last_success': cls._last_success.get(normalized),
+            'ip_blocked': ip_blocked,
+        }
+
+    @staticmethod
+    def _as_date(value) -> date:
+        if isinstance(value, str):
+            return date.fromisoformat(value[:10])
+        if isinstance(value, datetime):
+            return value.date()
+        return value
+
+    @classmethod
+    def compact(cls, retention_days: Optional[int] = None, today: Optional[date] = None) -> Dict[str, int]:
+        """
+        Agrega os dias completos ainda não consolidados e remove as linhas
+        brutas mais antigas que `retention_days`
+
+        Returns:
+            Dict: {'days': linhas diárias gravadas, 'purged': tentativas removidas}
+        """
+        from flask import current_app
+
+        if retention_days is None:
+            retention_days = current_app.config.get('LOGIN_ATTEMPT_RETENTION_DAYS', 30)
+        retention_days = max(1, int(retention_days))
+        today = today or datetime.utcnow().date()
+        end = datetime.combine(today, datetime.min.time())
+
+        LoginAttemptWriter.flush()
+
+        attempts = LoginAttempt.__table__
+        last_day = db.session.query(func.max(LoginAttemptDaily.day)).scalar()
+        start = datetime.combine(last_day + timedelta(days=1), datetime.min.time()) if last_day else None
+
+        day = func.date(attempts.c.attempt_time)
+        query = (
+            select(
+                day.label('day'),
+                attempts.c.user_type,
+                func.count().label('total_attempts'),
+                func.sum(case((attempts.c.success == False, 1), else_=0)).label('failed_attempts'),
+                func.count(func.distinct(attempts.c.ip_address)).label('unique_ips'),
+                func.count(func.distinct(attempts.c.email)).label('unique_emails'),
+            )
+            .where(attempts.c.attempt_time < end)
+            .group_by(day, attempts.c.user_type)
+        )
+        if start is not None:
+            query = query.where(attempts.c.attempt_time >= start)
+
+        rows = [
+            {
+                'day': cls._as_date(row.day),
+                'user_type': row.user_type,
+                'total_attempts': row.total_attempts,
+                'failed_attempts': int(row.failed_attempts or 0),
+                'unique_ips': row.unique_ips,
+                'unique_emails': row.unique_emails,
+            }
+            for row in db.session.execute(query)
+        ]
+        if rows:
+            db.session.execute(LoginAttemptDaily.__table__.insert(), rows)
+
+        cutoff = end - timedelta(days=retention_days)
+        purged = db.session.execute(
+            delete(attempts).where(attempts.c.attempt_time < cutoff)
+        ).rowcount or 0
+        db.session.commit()
+
+        logger.info(f"Tentativas de login compactadas: {len(rows)} dias agregados, {purged} linhas removidas")
+        return {'days': len(rows), 'purged': purged}
+
+    @staticmethod
+    def get_daily_stats(days: int = 30, today: Optional[date] = None) -> List[Dict[str, Any]]:
+        """Tentativas por dia consolidadas (mais recente primeiro)"""
+        today = today or datetime.utcnow().date()
+        rows = db.session.query(
+            LoginAttemptDaily.day,
+            func.sum(LoginAttemptDaily.total_attempts),
+            func.sum(LoginAttemptDaily.failed_attempts),
+            func.sum(LoginAttemptDaily.unique_ips),
+            func.sum(LoginAttemptDaily.unique_emails),
+        ).filter(
+            LoginAttemptDaily.day >= today - timedelta(days=days)
+        ).group_by(LoginAttemptDaily.day).order_by(LoginAttemptDaily.day.desc()).all()
+
+        return [
+            {
+                'date': day.isoformat(),
+                'total_attempts': int(total or 0),
+                'failed_attempts': int(failed or 0),
+                'unique_ips': int(ips or 0),
+                'unique_users': int(emails or 0),
+            }
+            for day, total, failed, ips, emails in rows
+        ]
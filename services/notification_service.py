@@ -7,6 +7,8 @@ from datetime import datetime, timedelta
 from decimal import Decimal
 from typing import Dict, List, Optional
 from sqlalchemy import and_
+from sqlalchemy.orm import contains_eager
+from services.user_loader import UserLoader
 import logging
 
 logger = logging.getLogger(__name__)
@@ -27,11 +29,11 @@ class NotificationService:
             if not invite:
                 raise ValueError("Convite não encontrado")
             
-            client = User.query.get(client_id)
+            client = UserLoader.get(client_id)
             if not client:
                 raise ValueError("Cliente não encontrado")
             
-            prestador = User.query.get(proposal.prestador_id)
+            prestador = UserLoader.get(proposal.prestador_id)
             prestador_name = prestador.nome if prestador else "Prestador"
             
             # Calcular diferença de valor
@@ -97,11 +99,11 @@ class NotificationService:
             if not invite:
                 raise ValueError("Convite não encontrado")
             
-            prestador = User.query.get(prestador_id)
+            prestador = UserLoader.get(prestador_id)
             if not prestador:
                 raise ValueError("Prestador não encontrado")
             
-            client = User.query.get(invite.client_id)
+            client = UserLoader.get(invite.client_id)
             client_name = client.nome if client else "Cliente"
             
             # Criar mensagem baseada no status
@@ -163,7 +165,7 @@ class NotificationService:
         Requirements: 3.1, 3.2, 3.3, 9.1, 9.3
         """
         try:
-            client = User.query.get(client_id)
+            client = UserLoader.get(client_id)
             if not client:
                 raise ValueError("Cliente não encontrado")
             
@@ -217,11 +219,11 @@ class NotificationService:
             if not invite:
                 raise ValueError("Convite não encontrado")
             
-            client = User.query.get(client_id)
+            client = UserLoader.get(client_id)
             if not client:
                 raise ValueError("Cliente não encontrado")
             
-            prestador = User.query.get(proposal.prestador_id)
+            prestador = UserLoader.get(proposal.prestador_id)
             prestador_name = prestador.nome if prestador else "Prestador"
             
             message = (f"Proposta cancelada. "
@@ -268,18 +270,23 @@ class NotificationService:
         """
         try:
             # Buscar propostas pendentes para convites do cliente
-            pending_proposals = db.session.query(Proposal).join(Invite).filter(
+            pending_proposals = db.session.query(Proposal).join(Invite).options(
+                contains_eager(Proposal.invite)
+            ).filter(
                 and_(
                     Invite.client_id == client_id,
                     Proposal.status == 'pending'
                 )
             ).all()
             
+            # Prestadores carregados em lote (uma consulta para todas as propostas)
+            prestadores = UserLoader.get_many(p.prestador_id for p in pending_proposals)
+            
             notifications = []
             
             for proposal in pending_proposals:
                 invite = proposal.invite
-                prestador = User.query.get(proposal.prestador_id)
+                prestador = prestadores.get(proposal.prestador_id)
                 prestador_name = prestador.nome if prestador else "Prestador"
                 
                 # Verificar se é aumento ou redução
@@ -328,7 +335,9 @@ class NotificationService:
         """
         try:
             # Buscar propostas do prestador com respostas recentes
-            recent_proposals = Proposal.query.filter(
+            recent_proposals = Proposal.query.join(Invite).options(
+                contains_eager(Proposal.invite)
+            ).filter(
                 and_(
                     Proposal.prestador_id == prestador_id,
                     Proposal.status.in_(['accepted', 'rejected']),
@@ -336,11 +345,14 @@ class NotificationService:
                 )
             ).order_by(Proposal.responded_at.desc()).limit(5).all()
             
+            # Clientes carregados em lote (uma consulta para todas as propostas)
+            clients = UserLoader.get_many(p.invite.client_id for p in recent_proposals)
+            
             notifications = []
             
             for proposal in recent_proposals:
                 invite = proposal.invite
-                client = User.query.get(invite.client_id)
+                client = clients.get(invite.client_id)
                 client_name = client.nome if client else "Cliente"
                 
                 if proposal.status == 'accepted':
@@ -386,8 +398,8 @@ class NotificationService:
         """
         try:
             invite = proposal.invite
-            prestador = User.query.get(proposal.prestador_id)
-            client = User.query.get(invite.client_id)
+            prestador = UserLoader.get(proposal.prestador_id)
+            client = UserLoader.get(invite.client_id)
             
             summary = {
                 'proposal_id': proposal.id,
@@ -451,15 +463,13 @@ class NotificationService:
         Requirements: 6.1, 6.2, 6.3, 6.4
         """
         try:
-            from models import User
-            
             # Obter nomes dos usuários se não fornecidos
             if not client_name:
-                client = User.query.get(order.client_id)
+                client = UserLoader.get(order.client_id)
                 client_name = client.nome if client else "Cliente"
             
             if not provider_name:
-                provider = User.query.get(order.provider_id)
+                provider = UserLoader.get(order.provider_id)
                 provider_name = provider.nome if provider else "Prestador"
             
             # Formatar data de entrega
@@ -538,9 +548,7 @@ class NotificationService:
         Requirements: 6.5, 8.3, 8.4
         """
         try:
-            from models import User
-            
-            user = User.query.get(user_id)
+            user = UserLoader.get(user_id)
             if not user:
                 raise ValueError("Usuário não encontrado")
             
@@ -606,11 +614,9 @@ class NotificationService:
         Requirements: 11.2, 3.5
         """
         try:
-            from models import User
-            
             # Obter nome do prestador se não fornecido
             if not provider_name:
-                provider = User.query.get(order.provider_id)
+                provider = UserLoader.get(order.provider_id)
                 provider_name = provider.nome if provider else "Prestador"
             
             # Calcular horas restantes
@@ -662,9 +668,7 @@ class NotificationService:
         Requirements: 11.3, 5.6
         """
         try:
-            from models import User
-            
-            client = User.query.get(order.client_id)
+            client = UserLoader.get(order.client_id)
             client_name = client.nome if client else "Cliente"
             
             # Calcular horas restantes
@@ -713,15 +717,13 @@ class NotificationService:
         Requirements: 11.4, 5.5
         """
         try:
-            from models import User
-            
             # Obter nomes dos usuários se não fornecidos
             if not client_name:
-                client = User.query.get(order.client_id)
+                client = UserLoader.get(order.client_id)
                 client_name = client.nome if client else "Cliente"
             
             if not provider_name:
-                provider = User.query.get(order.provider_id)
+                provider = UserLoader.get(order.provider_id)
                 provider_name = provider.nome if provider else "Prestador"
             
             # Mensagem para o cliente
@@ -776,20 +778,18 @@ class NotificationService:
         Requirements: 11.5
         """
         try:
-            from models import User
-            
             # Identificar quem cancelou
             is_client_cancelling = (order.cancelled_by == order.client_id)
             
             if not cancelled_by_name:
-                cancelled_by_user = User.query.get(order.cancelled_by)
+                cancelled_by_user = UserLoader.get(order.cancelled_by)
                 cancelled_by_name = cancelled_by_user.nome if cancelled_by_user else ("Cliente" if is_client_cancelling else "Prestador")
             
             # Identificar parte prejudicada
             injured_party_id = order.provider_id if is_client_cancelling else order.client_id
             
             if not injured_party_name:
-                injured_party_user = User.query.get(injured_party_id)
+                injured_party_user = UserLoader.get(injured_party_id)
                 injured_party_name = injured_party_user.nome if injured_party_user else ("Prestador" if is_client_cancelling else "Cliente")
             
             # Obter valor da multa
@@ -843,15 +843,13 @@ class NotificationService:
         Requirements: 11.6
         """
         try:
-            from models import User
-            
             # Obter nomes dos usuários se não fornecidos
             if not client_name:
-                client = User.query.get(order.client_id)
+                client = UserLoader.get(order.client_id)
                 client_name = client.nome if client else "Cliente"
             
             if not provider_name:
-                provider = User.query.get(order.provider_id)
+                provider = UserLoader.get(order.provider_id)
                 provider_name = provider.nome if provider else "Prestador"
             
             # Mensagem para o admin
@@ -910,11 +908,9 @@ class NotificationService:
         Requirements: 11.6
         """
         try:
-            from models import User
-            
             # Obter nome do prestador se não fornecido
             if not provider_name:
-                provider = User.query.get(order.provider_id)
+                provider = UserLoader.get(order.provider_id)
                 provider_name = provider.nome if provider else "Prestador"
             
             # Mensagem para o admin
@@ -960,15 +956,13 @@ class NotificationService:
         Requirements: 11.7
         """
         try:
-            from models import User
-            
             # Obter nomes dos usuários se não fornecidos
             if not client_name:
-                client = User.query.get(order.client_id)
+                client = UserLoader.get(order.client_id)
                 client_name = client.nome if client else "Cliente"
             
             if not provider_name:
-                provider = User.query.get(order.provider_id)
+                provider = UserLoader.get(order.provider_id)
                 provider_name = provider.nome if provider else "Prestador"
             
             winner_name = client_name if winner == 'client' else provider_name
@@ -1060,17 +1054,17 @@ class NotificationService:
             if not pre_order:
                 raise ValueError("Pré-ordem não encontrada")
             
-            user = User.query.get(user_id)
+            user = UserLoader.get(user_id)
             if not user:
                 raise ValueError("Usuário não encontrado")
             
             # Obter nome da outra parte
             if user_type == 'cliente':
-                other_party = User.query.get(pre_order.provider_id)
+                other_party = UserLoader.get(pre_order.provider_id)
                 other_party_name = other_party.nome if other_party else "Prestador"
                 other_party_role = "prestador"
             else:
-                other_party = User.query.get(pre_order.client_id)
+                other_party = UserLoader.get(pre_order.client_id)
                 other_party_name = other_party.nome if other_party else "Cliente"
                 other_party_role = "cliente"
             
@@ -1121,8 +1115,8 @@ class NotificationService:
             if not pre_order:
                 raise ValueError("Pré-ordem não encontrada")
             
-            client = User.query.get(client_id)
-            provider = User.query.get(provider_id)
+            client = UserLoader.get(client_id)
+            provider = UserLoader.get(provider_id)
             
             client_name = client.nome if client else "Cliente"
             provider_name = provider.nome if provider else "Prestador"
@@ -1173,7 +1167,7 @@ class NotificationService:
             if not pre_order:
                 raise ValueError("Pré-ordem não encontrada")
             
-            acceptor = User.query.get(acceptor_id)
+            acceptor = UserLoader.get(acceptor_id)
             acceptor_name = acceptor.nome if acceptor else acceptor_role.title()
             
             message = (
@@ -1222,7 +1216,7 @@ class NotificationService:
             if not pre_order:
                 raise ValueError("Pré-ordem não encontrada")
             
-            cancelled_by = User.query.get(cancelled_by_id)
+            cancelled_by = UserLoader.get(cancelled_by_id)
             cancelled_by_name = cancelled_by.nome if cancelled_by else cancelled_by_role.title()
             
             message = (
@@ -1273,16 +1267,16 @@ class NotificationService:
             if not pre_order:
                 raise ValueError(f"Pré-ordem {pre_order_id} não encontrada")
             
-            user = User.query.get(user_id)
+            user = UserLoader.get(user_id)
             if not user:
                 raise ValueError(f"Usuário {user_id} não encontrado")
             
             # Obter nome da outra parte
             if user_type == 'cliente':
-                other_user = User.query.get(pre_order.provider_id)
+                other_user = UserLoader.get(pre_order.provider_id)
                 other_name = other_user.nome if other_user else "Prestador"
             else:
-                other_user = User.query.get(pre_order.client_id)
+                other_user = UserLoader.get(pre_order.client_id)
                 other_name = other_user.nome if other_user else "Cliente"
             
             message = (
@@ -1327,8 +1321,8 @@ class NotificationService:
             if not pre_order:
                 raise ValueError(f"Pré-ordem {pre_order_id} não encontrada")
             
-            client = User.query.get(client_id)
-            provider = User.query.get(provider_id)
+            client = UserLoader.get(client_id)
+            provider = UserLoader.get(provider_id)
             
             client_name = client.nome if client else "Cliente"
             provider_name = provider.nome if provider else "Prestador"
@@ -1377,7 +1371,7 @@ class NotificationService:
             if not pre_order:
                 raise ValueError(f"Pré-ordem {pre_order_id} não encontrada")
             
-            acceptor = User.query.get(acceptor_id)
+            acceptor = UserLoader.get(acceptor_id)
             acceptor_name = acceptor.nome if acceptor else acceptor_role.title()
             
             message = (
@@ -1421,7 +1415,7 @@ class NotificationService:
             if not pre_order:
                 raise ValueError(f"Pré-ordem {pre_order_id} não encontrada")
             
-            canceller = User.query.get(cancelled_by_id)
+            canceller = UserLoader.get(cancelled_by_id)
             canceller_name = canceller.nome if canceller else cancelled_by_role.title()
             
             message = (
@@ -1470,8 +1464,8 @@ class NotificationService:
             if not pre_order or not order:
                 raise ValueError("Pré-ordem ou ordem não encontrada")
             
-            client = User.query.get(client_id)
-            provider = User.query.get(provider_id)
+            client = UserLoader.get(client_id)
+            provider = UserLoader.get(provider_id)
             
             client_name = client.nome if client else "Cliente"
             provider_name = provider.nome if provider else "Prestador"
@@ -1564,8 +1558,8 @@ class NotificationService:
             if not pre_order:
                 raise ValueError(f"Pré-ordem {pre_order_id} não encontrada")
             
-            client = User.query.get(client_id)
-            provider = User.query.get(provider_id)
+            client = UserLoader.get(client_id)
+            provider = UserLoader.get(provider_id)
             
             client_name = client.nome if client else "Cliente"
             provider_name = provider.nome if provider else "Prestador"
@@ -1622,8 +1616,8 @@ class NotificationService:
             if not pre_order:
                 raise ValueError(f"Pré-ordem {pre_order_id} não encontrada")
             
-            client = User.query.get(client_id)
-            provider = User.query.get(provider_id)
+            client = UserLoader.get(client_id)
+            provider = UserLoader.get(provider_id)
             
             client_name = client.nome if client else "Cliente"
             provider_name = provider.nome if provider else "Prestador"
@@ -1702,10 +1696,10 @@ class NotificationService:
             
             # Determinar a outra parte
             if user_type == 'cliente':
-                other_party = User.query.get(pre_order.provider_id)
+                other_party = UserLoader.get(pre_order.provider_id)
                 other_party_name = other_party.nome if other_party else "Prestador"
             else:
-                other_party = User.query.get(pre_order.client_id)
+                other_party = UserLoader.get(pre_order.client_id)
                 other_party_name = other_party.nome if other_party else "Cliente"
             
             return {
@@ -1733,7 +1727,7 @@ class NotificationService:
                 raise ValueError(f"Proposta {proposal_id} não encontrada")
             
             pre_order = proposal.pre_order
-            proposer = User.query.get(proposal.proposed_by)
+            proposer = UserLoader.get(proposal.proposed_by)
             proposer_name = proposer.nome if proposer else "Usuário"
             
             return {
@@ -1764,9 +1758,9 @@ class NotificationService:
             
             # Determinar quem aceitou (a outra parte que não propôs)
             if proposal.proposed_by == pre_order.client_id:
-                acceptor = User.query.get(pre_order.provider_id)
+                acceptor = UserLoader.get(pre_order.provider_id)
             else:
-                acceptor = User.query.get(pre_order.client_id)
+                acceptor = UserLoader.get(pre_order.client_id)
             
             acceptor_name = acceptor.nome if acceptor else "Usuário"
             
@@ -1798,9 +1792,9 @@ class NotificationService:
             
             # Determinar quem rejeitou (a outra parte que não propôs)
             if proposal.proposed_by == pre_order.client_id:
-                rejector = User.query.get(pre_order.provider_id)
+                rejector = UserLoader.get(pre_order.provider_id)
             else:
-                rejector = User.query.get(pre_order.client_id)
+                rejector = UserLoader.get(pre_order.client_id)
             
             rejector_name = rejector.nome if rejector else "Usuário"
             
@@ -1831,8 +1825,8 @@ class NotificationService:
             if not pre_order or not order:
                 raise ValueError("Pré-ordem ou ordem não encontrada")
             
-            client = User.query.get(pre_order.client_id)
-            provider = User.query.get(pre_order.provider_id)
+            client = UserLoader.get(pre_order.client_id)
+            provider = UserLoader.get(pre_order.provider_id)
             
             client_name = client.nome if client else "Cliente"
             provider_name = provider.nome if provider else "Prestador"
@@ -1863,7 +1857,7 @@ class NotificationService:
             if not pre_order:
                 raise ValueError(f"Pré-ordem {pre_order_id} não encontrada")
             
-            cancelled_by = User.query.get(pre_order.cancelled_by)
+            cancelled_by = UserLoader.get(pre_order.cancelled_by)
             cancelled_by_name = cancelled_by.nome if cancelled_by else "Usuário"
             
             return {
@@ -1893,10 +1887,10 @@ class NotificationService:
             
             # Determinar a outra parte
             if user_type == 'cliente':
-                other_party = User.query.get(pre_order.provider_id)
+                other_party = UserLoader.get(pre_order.provider_id)
                 other_party_name = other_party.nome if other_party else "Prestador"
             else:
-                other_party = User.query.get(pre_order.client_id)
+                other_party = UserLoader.get(pre_order.client_id)
                 other_party_name = other_party.nome if other_party else "Cliente"
             
             return {
@@ -1926,10 +1920,10 @@ class NotificationService:
             
             # Determinar a outra parte
             if user_type == 'cliente':
-                other_party = User.query.get(pre_order.provider_id)
+                other_party = UserLoader.get(pre_order.provider_id)
                 other_party_name = other_party.nome if other_party else "Prestador"
             else:
-                other_party = User.query.get(pre_order.client_id)
+                other_party = UserLoader.get(pre_order.client_id)
                 other_party_name = other_party.nome if other_party else "Cliente"
             
             # Contar rodadas de negociação
@@ -1966,10 +1960,10 @@ class NotificationService:
             
             # Determinar a outra parte
             if user_type == 'cliente':
-                other_party = User.query.get(pre_order.provider_id)
+                other_party = UserLoader.get(pre_order.provider_id)
                 other_party_name = other_party.nome if other_party else "Prestador"
             else:
-                other_party = User.query.get(pre_order.client_id)
+                other_party = UserLoader.get(pre_order.client_id)
                 other_party_name = other_party.nome if other_party else "Cliente"
             
             return {
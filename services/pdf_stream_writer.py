@@ -0,0 +1,162 @@
+#!/usr/bin/env python3.11
+# -*- coding: utf-8 -*-
+
+"""
+PdfStreamWriter - Escrita de PDF página a página em arquivo
+
+O canvas do ReportLab (e o SimpleDocTemplate) mantém todas as páginas em
+memória até o save(), por isso os relatórios em PDF eram limitados a 50
+linhas. Este escritor grava cada página no arquivo assim que ela termina:
+
+- O conteúdo da página é acumulado só enquanto ela está aberta, compactado
+  (FlateDecode) e gravado em end_page()
+- Em memória ficam apenas os offsets dos objetos (xref) e os IDs das páginas
+- A árvore de páginas, a tabela xref e o trailer são gravados em close()
+- Fontes padrão Helvetica/Helvetica-Bold (WinAnsiEncoding, com acentuação);
+  as larguras de texto vêm das métricas do ReportLab
+"""
+
+import zlib
+from typing import List, Optional, Tuple
+
+from reportlab.pdfbase.pdfmetrics import stringWidth
+
+FONTS = {
+    'regular': ('F1', 'Helvetica'),
+    'bold': ('F2', 'Helvetica-Bold'),
+}
+
+# Objetos fixos: 1 = catálogo, 2 = árvore de páginas, 3 e 4 = fontes
+CATALOG_ID, PAGES_ID = 1, 2
+FIRST_FREE_ID = 3 + len(FONTS)
+
+Color = Tuple[float, float, float]
+
+
+def _escape(text: str) -> bytes:
+    encoded = text.encode('cp1252', errors='replace')
+    return encoded.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)')
+
+
+def _number(value: float) -> str:
+    return f'{value:.2f}'.rstrip('0').rstrip('.')
+
+
+class PdfStreamWriter:
+    """Escreve um PDF em arquivo, uma página por vez"""
+
+    def __init__(self, path: str, pagesize: Tuple[float, float]):
+        self.path = path
+        self.width, self.height = pagesize
+        self._file = open(path, 'wb')
+        self._offsets = {}
+        self._page_ids: List[int] = []
+        self._next_id = FIRST_FREE_ID
+        self._content: Optional[List[bytes]] = None
+
+        self._file.write(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+        self._write_object(CATALOG_ID, f'<< /Type /Catalog /Pages {PAGES_ID} 0 R >>'.encode())
+        for object_id, (_, base_font) in enumerate(FONTS.values(), 3):
+            self._write_object(object_id, (
+                f'<< /Type /Font /Subtype /Type1 /BaseFont /{base_font} '
+                f'/Encoding /WinAnsiEncoding >>'
+            ).encode())
+
+    # ------------------------------------------------------------------
+    # Objetos
+    # ------------------------------------------------------------------
+
+    def _allocate(self) -> int:
+        object_id = self._next_id
+        self._next_id += 1
+        return object_id
+
+    def _write_object(self, object_id: int, body: bytes):
+        self._offsets[object_id] = self._file.tell()
+        self._file.write(f'{object_id} 0 obj\n'.encode())
+        self._file.write(body)
+        self._file.write(b'\nendobj\n')
+
+    # ------------------------------------------------------------------
+    # Páginas
+    # ------------------------------------------------------------------
+
+    @property
+    def page_count(self) -> int:
+        return len(self._page_ids)
+
+    def begin_page(self):
+        if self._content is not None:
+            self.end_page()
+        self._content = []
+
+    def end_page(self):
+        """Compacta e grava a página aberta; libera o conteúdo da memória"""
+        if self._content is None:
+            return
+        stream = zlib.compress(b'\n'.join(self._content))
+        self._content = None
+
+        content_id, page_id = self._allocate(), self._allocate()
+        self._write_object(content_id, (
+            f'<< /Length {len(stream)} /Filter /FlateDecode >>\nstream\n'.encode()
+            + stream + b'\nendstream'
+        ))
+        fonts = ' '.join(f'/{name} {object_id} 0 R' for object_id, (name, _) in enumerate(FONTS.values(), 3))
+        self._write_object(page_id, (
+            f'<< /Type /Page /Parent {PAGES_ID} 0 R '
+            f'/MediaBox [0 0 {_number(self.width)} {_number(self.height)}] '
+            f'/Resources << /Font << {fonts} >> >> /Contents {content_id} 0 R >>'
+        ).encode())
+        self._page_ids.append(page_id)
+
+    def close(self):
+        """Grava a árvore de páginas, a tabela xref e o trailer"""
+        self.end_page()
+        kids = ' '.join(f'{page_id} 0 R' for page_id in self._page_ids)
+        self._write_object(PAGES_ID, f'<< /Type /Pages /Kids [{kids}] /Count {len(self._page_ids)} >>'.encode())
+
+        xref_offset = self._file.tell()
+        self._file.write(f'xref\n0 {self._next_id}\n0000000000 65535 f \n'.encode())
+        for object_id in range(1, self._next_id):
+            self._file.write(f'{self._offsets[object_id]:010d} 00000 n \n'.encode())
+        self._file.write((
+            f'trailer\n<< /Size {self._next_id} /Root {CATALOG_ID} 0 R >>\n'
+            f'startxref\n{xref_offset}\n%%EOF\n'
+        ).encode())
+        self._file.close()
+
+    def abort(self):
+        """Fecha o arquivo sem finalizar o documento (em caso de erro)"""
+        self._content = None
+        self._file.close()
+
+    # ------------------------------------------------------------------
+    # Desenho (coordenadas em pontos, origem no canto inferior esquerdo)
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def text_width(text: str, font: str = 'regular', size: float = 10) -> float:
+        return stringWidth(text, FONTS[font][1], size)
+
+    def text(self, x: float, y: float, text: str, font: str = 'regular', size: float = 10,
+             align: str = 'left', color: Color = (0, 0, 0)):
+        if align != 'left':
+            width = self.text_width(text, font, size)
+            x -= width / 2 if align == 'center' else width
+        r, g, b = color
+        self._content.append(
+            f'{_number(r)} {_number(g)} {_number(b)} rg BT /{FONTS[font][0]} {_number(size)} Tf '
+            f'{_number(x)} {_number(y)} Td ('.encode() + _escape(text) + b') Tj ET'
+        )
+
+    def rect(self, x: float, y: float, width: float, height: float,
+             fill: Optional[Color] = None, stroke: bool = True):
+        operator = 'B' if fill and stroke else ('f' if fill else 'S')
+        fill_color = '{} {} {} rg '.format(*map(_number, fill)) if fill else ''
+        self._content.append(
+            f'{fill_color}0 0 0 RG {_number(x)} {_number(y)} {_number(width)} {_number(height)} re {operator}'.encode()
+        )
+
+    def line(self, x1: float, y1: float, x2: float, y2: float):
+        self._content.append(f'0 0 0 RG {_number(x1)} {_number(y1)} m {_number(x2)} {_number(y2)} l S'.encode())
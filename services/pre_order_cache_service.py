@@ -4,51 +4,39 @@
 """
 PreOrderCacheService - Serviço de cache para otimização de consultas de pré-ordens
 
-Este serviço implementa um sistema de cache em memória com TTL (Time To Live)
-para otimizar consultas frequentes no sistema de pré-ordens.
+Este serviço usa o namespace 'pre_orders' da camada de cache unificada
+(services/cache_service.py) para otimizar consultas frequentes no sistema
+de pré-ordens.
 
 Funcionalidades:
-- Cache de pré-ordens ativas por usuário (TTL: 5 min)
+- Cache de pré-ordens ativas por usuário, página e filtro (TTL: 5 min)
 - Cache de histórico de pré-ordens (TTL: 10 min)
-- Invalidação automática ao modificar dados
-- Limpeza automática de entradas expiradas
+- Invalidação por tags (user:<id>, pre_order:<id>) ao modificar dados
+- Ouvintes de sessão do ORM anotam, antes de cada flush, as pré-ordens
+  alteradas (e suas propostas e histórico) com cliente e prestador, e
+  invalidam as tags após o commit, qualquer que seja o serviço que as alterou
+- Limite de tamanho com despejo LRU e limpeza de entradas expiradas
 
 Requirements: Performance considerations (Task 22)
 """
 
-from datetime import datetime, timedelta
-from typing import Optional, Dict, List, Any
-import threading
+from typing import Optional, Dict, List, Any, Iterable, Set
 import logging
 from functools import wraps
 
-logger = logging.getLogger(__name__)
-
+from models import PreOrder, PreOrderProposal, PreOrderHistory
+from services.cache_service import CacheService, CacheEntry
+from services.session_hooks import TagInvalidationHook, history_values
 
-class CacheEntry:
-    """Entrada de cache com TTL"""
-    
-    def __init__(self, value: Any, ttl_seconds: int):
-        self.value = value
-        self.expires_at = datetime.utcnow() + timedelta(seconds=ttl_seconds)
-    
-    def is_expired(self) -> bool:
-        """Verifica se a entrada expirou"""
-        return datetime.utcnow() > self.expires_at
-    
-    def get_value(self) -> Optional[Any]:
-        """Retorna o valor se não expirou, None caso contrário"""
-        if self.is_expired():
-            return None
-        return self.value
+logger = logging.getLogger(__name__)
 
 
 class PreOrderCacheService:
     """
     Serviço de cache para pré-ordens
     
-    Implementa cache em memória com TTL para otimizar consultas frequentes.
-    Thread-safe usando locks para operações de escrita.
+    Fachada sobre o namespace 'pre_orders' do CacheService, que é thread-safe
+    (lock striping), limitado em tamanho e invalidado por tags.
     """
     
     # TTLs padrão (em segundos)
@@ -56,17 +44,21 @@ class PreOrderCacheService:
     TTL_HISTORY = 600  # 10 minutos
     TTL_DETAILS = 180  # 3 minutos
     
+    # Tamanho máximo do namespace
+    MAX_ENTRIES = 5000
+    
     # Armazenamento de cache
-    _cache: Dict[str, CacheEntry] = {}
-    _lock = threading.Lock()
+    _cache = CacheService.namespace('pre_orders', max_entries=MAX_ENTRIES, default_ttl=TTL_DETAILS)
     
-    # Estatísticas
-    _stats = {
-        'hits': 0,
-        'misses': 0,
-        'invalidations': 0,
-        'cleanups': 0
-    }
+    @staticmethod
+    def user_tag(user_id: int) -> str:
+        """Tag de todas as entradas de listagem de um usuário"""
+        return f'user:{user_id}'
+    
+    @staticmethod
+    def pre_order_tag(pre_order_id: int) -> str:
+        """Tag de todas as entradas ligadas a uma pré-ordem"""
+        return f'pre_order:{pre_order_id}'
     
     @classmethod
     def _generate_key(cls, prefix: str, *args) -> str:
@@ -85,26 +77,10 @@ class PreOrderCacheService:
         Returns:
             Valor armazenado ou None se não existir/expirou
         """
-        with cls._lock:
-            entry = cls._cache.get(key)
-            
-            if entry is None:
-                cls._stats['misses'] += 1
-                return None
-            
-            value = entry.get_value()
-            
-            if value is None:
-                # Entrada expirada, remover
-                del cls._cache[key]
-                cls._stats['misses'] += 1
-                return None
-            
-            cls._stats['hits'] += 1
-            return value
+        return cls._cache.get(key)
     
     @classmethod
-    def set(cls, key: str, value: Any, ttl_seconds: int):
+    def set(cls, key: str, value: Any, ttl_seconds: int, tags: Iterable[str] = ()):
         """
         Armazena valor no cache
         
@@ -112,9 +88,9 @@ class PreOrderCacheService:
             key: Chave do cache
             value: Valor a armazenar
             ttl_seconds: Tempo de vida em segundos
+            tags: Tags para invalidação em grupo
         """
-        with cls._lock:
-            cls._cache[key] = CacheEntry(value, ttl_seconds)
+        cls._cache.set(key, value, ttl_seconds, tags)
     
     @classmethod
     def delete(cls, key: str):
@@ -124,67 +100,45 @@ class PreOrderCacheService:
         Args:
             key: Chave do cache
         """
-        with cls._lock:
-            if key in cls._cache:
-                del cls._cache[key]
-                cls._stats['invalidations'] += 1
+        cls._cache.delete(key)
     
     @classmethod
     def delete_pattern(cls, pattern: str):
         """
         Remove todas as entradas que correspondem ao padrão
         
+        Varre todas as chaves; para grupos conhecidos use `invalidate_tags`.
+        
         Args:
             pattern: Padrão de chave (ex: "pre_order:123:*")
         """
-        with cls._lock:
-            keys_to_delete = [
-                key for key in cls._cache.keys()
-                if pattern.replace('*', '') in key
-            ]
-            
-            for key in keys_to_delete:
-                del cls._cache[key]
-                cls._stats['invalidations'] += 1
+        cls._cache.delete_pattern(pattern)
+    
+    @classmethod
+    def invalidate_tags(cls, *tags: str):
+        """
+        Remove todas as entradas marcadas com as tags informadas
+        
+        Args:
+            tags: Tags (ex: "user:42", "pre_order:7")
+        """
+        cls._cache.invalidate_tags(*tags)
     
     @classmethod
     def clear_all(cls):
         """Limpa todo o cache"""
-        with cls._lock:
-            cls._cache.clear()
-            logger.info("Cache de pré-ordens completamente limpo")
+        cls._cache.clear()
+        logger.info("Cache de pré-ordens completamente limpo")
     
     @classmethod
     def cleanup_expired(cls):
         """Remove entradas expiradas do cache"""
-        with cls._lock:
-            expired_keys = [
-                key for key, entry in cls._cache.items()
-                if entry.is_expired()
-            ]
-            
-            for key in expired_keys:
-                del cls._cache[key]
-            
-            if expired_keys:
-                cls._stats['cleanups'] += 1
-                logger.info(f"Limpeza de cache: {len(expired_keys)} entradas expiradas removidas")
+        cls._cache.cleanup_expired()
     
     @classmethod
     def get_stats(cls) -> Dict[str, Any]:
         """Retorna estatísticas do cache"""
-        total_requests = cls._stats['hits'] + cls._stats['misses']
-        hit_rate = (cls._stats['hits'] / total_requests * 100) if total_requests > 0 else 0
-        
-        return {
-            'hits': cls._stats['hits'],
-            'misses': cls._stats['misses'],
-            'hit_rate': f"{hit_rate:.2f}%",
-            'invalidations': cls._stats['invalidations'],
-            'cleanups': cls._stats['cleanups'],
-            'cache_size': len(cls._cache),
-            'total_requests': total_requests
-        }
+        return cls._cache.get_stats()
     
     # =========================================================================
     # Métodos específicos para pré-ordens
@@ -216,9 +170,48 @@ class PreOrderCacheService:
             pre_orders: Lista de pré-ordens
         """
         key = cls._generate_key('active_pre_orders', user_id, user_role)
-        cls.set(key, pre_orders, cls.TTL_ACTIVE_PRE_ORDERS)
+        cls.set(key, pre_orders, cls.TTL_ACTIVE_PRE_ORDERS, tags=[cls.user_tag(user_id)])
         logger.debug(f"Cache: pré-ordens ativas armazenadas para usuário {user_id} ({user_role})")
     
+    @classmethod
+    def get_active_pre_orders_page(cls, user_id: int, user_role: str, status_filter: Optional[str],
+                                   page: int, per_page: int) -> Optional[Dict]:
+        """
+        Obtém uma página de pré-ordens do cache
+        
+        Args:
+            user_id: ID do usuário
+            user_role: 'cliente' ou 'prestador'
+            status_filter: Filtro de status (None = ativas)
+            page: Número da página
+            per_page: Itens por página
+            
+        Returns:
+            Página serializada ou None se não estiver em cache
+        """
+        key = cls._generate_key('active_pre_orders_page', user_id, user_role,
+                                status_filter or 'all', page, per_page)
+        return cls.get(key)
+    
+    @classmethod
+    def set_active_pre_orders_page(cls, user_id: int, user_role: str, status_filter: Optional[str],
+                                   page: int, per_page: int, data: Dict):
+        """
+        Armazena uma página de pré-ordens no cache
+        
+        Marcada com a tag do usuário (qualquer mudança em suas pré-ordens
+        invalida todas as páginas e filtros) e com a tag de cada pré-ordem listada.
+        """
+        key = cls._generate_key('active_pre_orders_page', user_id, user_role,
+                                status_filter or 'all', page, per_page)
+        tags = [cls.user_tag(user_id)]
+        tags.extend(cls.pre_order_tag(item['id']) for item in data.get('pre_orders', []))
+        cls.set(key, data, cls.TTL_ACTIVE_PRE_ORDERS, tags=tags)
+        logger.debug(
+            f"Cache: página {page} de pré-ordens ({status_filter or 'all'}) "
+            f"armazenada para usuário {user_id} ({user_role})"
+        )
+    
     @classmethod
     def invalidate_user_pre_orders(cls, user_id: int):
         """
@@ -227,7 +220,7 @@ class PreOrderCacheService:
         Args:
             user_id: ID do usuário
         """
-        cls.delete_pattern(f'active_pre_orders:{user_id}:*')
+        cls.invalidate_tags(cls.user_tag(user_id))
         logger.debug(f"Cache: pré-ordens do usuário {user_id} invalidadas")
     
     @classmethod
@@ -254,7 +247,7 @@ class PreOrderCacheService:
             history: Lista de eventos de histórico
         """
         key = cls._generate_key('pre_order_history', pre_order_id)
-        cls.set(key, history, cls.TTL_HISTORY)
+        cls.set(key, history, cls.TTL_HISTORY, tags=[cls.pre_order_tag(pre_order_id)])
         logger.debug(f"Cache: histórico da pré-ordem {pre_order_id} armazenado")
     
     @classmethod
@@ -295,7 +288,7 @@ class PreOrderCacheService:
             details: Detalhes da pré-ordem
         """
         key = cls._generate_key('pre_order_details', pre_order_id, user_id)
-        cls.set(key, details, cls.TTL_DETAILS)
+        cls.set(key, details, cls.TTL_DETAILS, tags=[cls.pre_order_tag(pre_order_id)])
         logger.debug(f"Cache: detalhes da pré-ordem {pre_order_id} armazenados")
     
     @classmethod
@@ -308,14 +301,11 @@ class PreOrderCacheService:
         Args:
             pre_order_id: ID da pré-ordem
         """
-        # Invalidar detalhes
-        cls.delete_pattern(f'pre_order_details:{pre_order_id}:*')
-        
-        # Invalidar histórico
-        cls.invalidate_pre_order_history(pre_order_id)
+        # Invalidar detalhes (de todos os usuários) e histórico
+        cls.invalidate_tags(cls.pre_order_tag(pre_order_id))
         
         # Invalidar pré-ordens ativas dos usuários envolvidos
-        # (será invalidado quando soubermos os IDs dos usuários)
+        # (ver invalidate_pre_order_for_users)
         
         logger.debug(f"Cache: todos os dados da pré-ordem {pre_order_id} invalidados")
     
@@ -329,18 +319,54 @@ class PreOrderCacheService:
             client_id: ID do cliente
             provider_id: ID do prestador
         """
-        # Invalidar pré-ordem
-        cls.invalidate_pre_order(pre_order_id)
-        
-        # Invalidar listas de pré-ordens dos usuários
-        cls.invalidate_user_pre_orders(client_id)
-        cls.invalidate_user_pre_orders(provider_id)
+        # Invalidar pré-ordem e listas de pré-ordens dos usuários de uma vez
+        cls.invalidate_tags(
+            cls.pre_order_tag(pre_order_id),
+            cls.user_tag(client_id),
+            cls.user_tag(provider_id)
+        )
         
         logger.debug(
             f"Cache: pré-ordem {pre_order_id} e usuários "
             f"{client_id}, {provider_id} invalidados"
         )
 
+    
+    # =========================================================================
+    # Invalidação após o commit
+    # =========================================================================
+    
+    @classmethod
+    def collect_tags(cls, session) -> Set[str]:
+        """
+        Tags das entradas que mudam com o flush em andamento
+        
+        Pré-ordens: a própria e as listagens de cliente e prestador (valores
+        anterior e atual). Propostas e histórico: a pré-ordem a que pertencem.
+        """
+        tags = set()
+        for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+            if isinstance(obj, PreOrder):
+                if obj.id is not None:
+                    tags.add(cls.pre_order_tag(obj.id))
+                for attribute in ('client_id', 'provider_id'):
+                    tags.update(cls.user_tag(user_id) for user_id in history_values(obj, attribute))
+            elif isinstance(obj, (PreOrderProposal, PreOrderHistory)):
+                tags.update(cls.pre_order_tag(pre_order_id) for pre_order_id in history_values(obj, 'pre_order_id'))
+        return tags
+    
+    @classmethod
+    def register(cls):
+        """Registra os ouvintes de sessão (idempotente)"""
+        cls._invalidation_hook.register()
+
+
+PreOrderCacheService._invalidation_hook = TagInvalidationHook(
+    'pre_order_cache', PreOrderCacheService.collect_tags,
+    PreOrderCacheService.invalidate_tags, 'cache de pré-ordens'
+)
+PreOrderCacheService.register()
+
 
 def cached_pre_order_query(ttl_seconds: int = PreOrderCacheService.TTL_DETAILS):
     """
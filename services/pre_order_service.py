@@ -20,6 +20,7 @@ from services.pre_order_cache_service import PreOrderCacheService
 from datetime import datetime, timedelta
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy import or_, and_
+from sqlalchemy.orm import joinedload
 from typing import Optional, Dict, Tuple, List
 from decimal import Decimal
 import logging
@@ -721,25 +722,28 @@ class PreOrderService:
         if user_role not in ['cliente', 'prestador']:
             raise ValueError("user_role deve ser 'cliente' ou 'prestador'")
         
-        # Gerar chave de cache incluindo filtros
-        cache_key_suffix = f"{status_filter}" if status_filter else "all"
-        
-        # Tentar obter do cache (apenas primeira página sem filtro)
-        if use_cache and page == 1 and not status_filter:
-            cached_data = PreOrderCacheService.get_active_pre_orders(user_id, user_role)
+        # Tentar obter do cache (cada combinação de página/filtro tem sua entrada)
+        if use_cache:
+            cached_data = PreOrderCacheService.get_active_pre_orders_page(
+                user_id, user_role, status_filter, page, per_page
+            )
             if cached_data is not None:
-                logger.debug(f"Cache HIT: pré-ordens ativas do usuário {user_id}")
+                logger.debug(f"Cache HIT: pré-ordens ativas do usuário {user_id} (página {page})")
                 return cached_data
         
-        # Construir query base
+        # Construir query base, carregando nomes de cliente e prestador no mesmo SELECT
+        query = PreOrder.query.options(
+            joinedload(PreOrder.client).load_only(User.id, User.nome),
+            joinedload(PreOrder.provider).load_only(User.id, User.nome)
+        )
         if user_role == 'cliente':
-            query = PreOrder.query.filter_by(client_id=user_id)
+            query = query.filter(PreOrder.client_id == user_id)
         else:
-            query = PreOrder.query.filter_by(provider_id=user_id)
+            query = query.filter(PreOrder.provider_id == user_id)
         
         # Aplicar filtro de status se fornecido
         if status_filter:
-            query = query.filter_by(status=status_filter)
+            query = query.filter(PreOrder.status == status_filter)
         else:
             # Por padrão, excluir convertidas, canceladas e expiradas
             query = query.filter(
@@ -804,10 +808,12 @@ class PreOrderService:
             'status_filter': status_filter
         }
         
-        # Armazenar no cache (apenas primeira página sem filtro)
-        if use_cache and page == 1 and not status_filter:
-            PreOrderCacheService.set_active_pre_orders(user_id, user_role, result)
-            logger.debug(f"Cache SET: pré-ordens ativas do usuário {user_id}")
+        # Armazenar no cache
+        if use_cache:
+            PreOrderCacheService.set_active_pre_orders_page(
+                user_id, user_role, status_filter, page, per_page, result
+            )
+            logger.debug(f"Cache SET: pré-ordens ativas do usuário {user_id} (página {page})")
         
         return result
     
@@ -0,0 +1,340 @@
+#!/usr/bin/env python3.11
+# -*- coding: utf-8 -*-
+
+"""
+PresenceService - Registro de presença de usuários em pré-ordens
+
+Substitui o dicionário `_presence_cache` que vivia nas rotas de pré-ordem
+(por processo, sem expiração e incorreto com mais de um worker).
+
+Funcionalidades:
+- Heartbeat com TTL: cada visualização renova a presença do usuário
+- Varredura automática de presenças expiradas
+- Consulta "quem está vendo a pré-ordem X" sem varrer o registro inteiro
+- Backend em memória (testes / worker único) ou em banco de dados
+  (compartilhado entre workers)
+- Eventos de entrada/saída (join/leave) para o stream de negociação
+
+Requirements: 20.3 (Indicador de presença)
+"""
+
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class InMemoryPresenceBackend:
+    """
+    Backend de presença em memória
+
+    Indexado por pré-ordem: {pre_order_id: {user_id: expira_em}}, de modo que
+    a consulta de quem está visualizando uma pré-ordem não depende do número
+    total de pré-ordens acompanhadas.
+    """
+
+    def __init__(self):
+        self._viewers: Dict[int, Dict[int, float]] = {}
+        self._lock = threading.Lock()
+
+    def touch(self, pre_order_id: int, user_id: int, ttl_seconds: int) -> bool:
+        """Registra/renova presença. Retorna True se o usuário acabou de entrar."""
+        now = time.monotonic()
+        with self._lock:
+            viewers = self._viewers.setdefault(pre_order_id, {})
+            expires_at = viewers.get(user_id)
+            joined = expires_at is None or expires_at <= now
+            viewers[user_id] = now + ttl_seconds
+            return joined
+
+    def remove(self, pre_order_id: int, user_id: int) -> bool:
+        """Remove presença. Retorna True se o usuário estava presente."""
+        now = time.monotonic()
+        with self._lock:
+            viewers = self._viewers.get(pre_order_id)
+            if not viewers or user_id not in viewers:
+                return False
+            was_present = viewers.pop(user_id) > now
+            if not viewers:
+                del self._viewers[pre_order_id]
+            return was_present
+
+    def get_viewers(self, pre_order_id: int) -> Set[int]:
+        """Retorna IDs dos usuários presentes na pré-ordem"""
+        now = time.monotonic()
+        with self._lock:
+            viewers = self._viewers.get(pre_order_id, {})
+            return {user_id for user_id, expires_at in viewers.items() if expires_at > now}
+
+    def sweep(self) -> int:
+        """Remove presenças expiradas. Retorna quantidade removida."""
+        now = time.monotonic()
+        removed = 0
+        with self._lock:
+            for pre_order_id in list(self._viewers.keys()):
+                viewers = self._viewers[pre_order_id]
+                expired = [user_id for user_id, expires_at in viewers.items() if expires_at <= now]
+                for user_id in expired:
+                    del viewers[user_id]
+                removed += len(expired)
+                if not viewers:
+                    del self._viewers[pre_order_id]
+        return removed
+
+    def clear(self):
+        """Limpa todas as presenças"""
+        with self._lock:
+            self._viewers.clear()
+
+
+class DatabasePresenceBackend:
+    """
+    Backend de presença em banco de dados (tabela pre_order_presence)
+
+    Compartilhado entre todos os workers. A chave primária composta
+    (pre_order_id, user_id) mantém uma linha por visualizador e o índice em
+    expires_at torna a varredura barata.
+
+    As escritas usam uma conexão própria do engine, para que um heartbeat não
+    confirme nem desfaça a transação em andamento na sessão da requisição.
+    """
+
+    @staticmethod
+    def _key(table, pre_order_id: int, user_id: int):
+        return (table.c.pre_order_id == pre_order_id) & (table.c.user_id == user_id)
+
+    def touch(self, pre_order_id: int, user_id: int, ttl_seconds: int) -> bool:
+        from models import db, PreOrderPresence
+
+        now = datetime.utcnow()
+        table = PreOrderPresence.__table__
+        key = self._key(table, pre_order_id, user_id)
+        values = dict(last_seen=now, expires_at=now + timedelta(seconds=ttl_seconds))
+        try:
+            with db.engine.begin() as connection:
+                previous = connection.execute(db.select(table.c.expires_at).where(key)).scalar()
+                self._upsert(connection, table, key, dict(pre_order_id=pre_order_id, user_id=user_id), values)
+            # Dois streams do mesmo usuário ao mesmo tempo podem ambos relatar entrada (evento repetido)
+            return previous is None or previous <= now
+        except Exception as e:
+            logger.error(f"Erro ao registrar presença - Pré-ordem: {pre_order_id}, User: {user_id}: {e}")
+            return False
+
+    @staticmethod
+    def _upsert(connection, table, key, keys: Dict, values: Dict):
+        """Cria ou renova a linha do visualizador; UPSERT em SQLite/PostgreSQL"""
+        from sqlalchemy.exc import IntegrityError
+
+        dialect = connection.dialect.name
+        if dialect in ('sqlite', 'postgresql'):
+            if dialect == 'sqlite':
+                from sqlalchemy.dialects.sqlite import insert
+            else:
+                from sqlalchemy.dialects.postgresql import insert
+            stmt = insert(table).values(**keys, **values)
+            connection.execute(stmt.on_conflict_do_update(
+                index_elements=[table.c.pre_order_id, table.c.user_id],
+                set_=values
+            ))
+            return
+
+        if connection.execute(table.update().where(key).values(**values)).rowcount == 0:
+            try:
+                with connection.begin_nested():
+                    connection.execute(table.insert().values(**keys, **values))
+            except IntegrityError:
+                connection.execute(table.update().where(key).values(**values))
+
+    def remove(self, pre_order_id: int, user_id: int) -> bool:
+        from models import db, PreOrderPresence
+
+        table = PreOrderPresence.__table__
+        key = self._key(table, pre_order_id, user_id)
+        try:
+            with db.engine.begin() as connection:
+                expires_at = connection.execute(db.select(table.c.expires_at).where(key)).scalar()
+                if expires_at is None:
+                    return False
+                connection.execute(table.delete().where(key))
+            return expires_at > datetime.utcnow()
+        except Exception as e:
+            logger.error(f"Erro ao remover presença - Pré-ordem: {pre_order_id}, User: {user_id}: {e}")
+            return False
+
+    def get_viewers(self, pre_order_id: int) -> Set[int]:
+        from models import db, PreOrderPresence
+
+        rows = db.session.query(PreOrderPresence.user_id).filter(
+            PreOrderPresence.pre_order_id == pre_order_id,
+            PreOrderPresence.expires_at > datetime.utcnow()
+        ).all()
+        return {row.user_id for row in rows}
+
+    def sweep(self) -> int:
+        from models import db, PreOrderPresence
+
+        table = PreOrderPresence.__table__
+        try:
+            with db.engine.begin() as connection:
+                return connection.execute(
+                    table.delete().where(table.c.expires_at <= datetime.utcnow())
+                ).rowcount
+        except Exception as e:
+            logger.error(f"Erro na varredura de presenças: {e}")
+            return 0
+
+    def clear(self):
+        from models import db, PreOrderPresence
+
+        with db.engine.begin() as connection:
+            connection.execute(PreOrderPresence.__table__.delete())
+
+
+class PresenceService:
+    """
+    Serviço de presença para negociação de pré-ordens
+
+    O backend é escolhido por `PRESENCE_BACKEND` na configuração da aplicação
+    ('memory' ou 'database') ou explicitamente via `configure()`.
+    """
+
+    # Tempo de vida de um heartbeat (segundos)
+    TTL_SECONDS = 120
+
+    # Intervalo mínimo entre varreduras automáticas (segundos)
+    SWEEP_INTERVAL_SECONDS = 60
+
+    BACKENDS = {
+        'memory': InMemoryPresenceBackend,
+        'database': DatabasePresenceBackend,
+    }
+
+    _backend = None
+    _backend_lock = threading.Lock()
+    _last_sweep = 0.0
+
+    @classmethod
+    def configure(cls, backend=None):
+        """
+        Define o backend de presença
+
+        Args:
+            backend: Instância de backend, nome ('memory'/'database') ou None
+                     para ler `PRESENCE_BACKEND` da configuração da aplicação
+        """
+        if backend is None:
+            backend = cls._backend_name_from_config()
+
+        if isinstance(backend, str):
+            backend_class = cls.BACKENDS.get(backend)
+            if backend_class is None:
+                raise ValueError(f"Backend de presença desconhecido: {backend}")
+            backend = backend_class()
+
+        with cls._backend_lock:
+            cls._backend = backend
+            cls._last_sweep = time.monotonic()
+
+        logger.info(f"Backend de presença configurado: {type(backend).__name__}")
+        return backend
+
+    @classmethod
+    def _backend_name_from_config(cls) -> str:
+        try:
+            from flask import current_app
+            return current_app.config.get('PRESENCE_BACKEND', 'memory')
+        except RuntimeError:
+            return 'memory'
+
+    @classmethod
+    def get_backend(cls):
+        """Retorna o backend ativo, configurando o padrão na primeira chamada"""
+        if cls._backend is None:
+            cls.configure()
+        return cls._backend
+
+    @classmethod
+    def _maybe_sweep(cls):
+        """Executa varredura de expirados no máximo uma vez por intervalo"""
+        now = time.monotonic()
+        if now - cls._last_sweep < cls.SWEEP_INTERVAL_SECONDS:
+            return
+        cls._last_sweep = now
+        cls.sweep()
+
+    @classmethod
+    def sweep(cls) -> int:
+        """Remove presenças expiradas do backend"""
+        removed = cls.get_backend().sweep()
+        if removed:
+            logger.debug(f"Presença: {removed} registros expirados removidos")
+        return removed
+
+    @classmethod
+    def heartbeat(cls, pre_order_id: int, user_id: int) -> bool:
+        """
+        Registra ou renova a presença de um usuário
+
+        Returns:
+            bool: True se o usuário acabou de entrar (não estava presente)
+        """
+        backend = cls.get_backend()
+        cls._maybe_sweep()
+        joined = backend.touch(pre_order_id, user_id, cls.TTL_SECONDS)
+        if joined:
+            logger.debug(f"Presença registrada - Pré-ordem: {pre_order_id}, User: {user_id}")
+        return joined
+
+    @classmethod
+    def leave(cls, pre_order_id: int, user_id: int) -> bool:
+        """
+        Remove a presença de um usuário
+
+        Returns:
+            bool: True se o usuário estava presente
+        """
+        left = cls.get_backend().remove(pre_order_id, user_id)
+        logger.debug(f"Presença removida - Pré-ordem: {pre_order_id}, User: {user_id}")
+        return left
+
+    @classmethod
+    def get_viewers(cls, pre_order_id: int) -> Set[int]:
+        """Retorna IDs dos usuários visualizando a pré-ordem"""
+        cls._maybe_sweep()
+        return cls.get_backend().get_viewers(pre_order_id)
+
+    @classmethod
+    def is_present(cls, pre_order_id: int, user_id: int) -> bool:
+        """Verifica se o usuário está visualizando a pré-ordem"""
+        return user_id in cls.get_viewers(pre_order_id)
+
+    @classmethod
+    def diff_viewers(cls, previous: Set[int], current: Set[int],
+                     ignore_user_id: Optional[int] = None) -> List[Dict]:
+        """
+        Compara dois conjuntos de visualizadores e gera eventos join/leave
+
+        Args:
+            previous: Visualizadores na verificação anterior
+            current: Visualizadores atuais
+            ignore_user_id: Usuário cujos eventos não interessam (o próprio)
+
+        Returns:
+            Lista de eventos {'action': 'join'|'leave', 'user_id': id}
+        """
+        events = []
+        for user_id in sorted(current - previous):
+            if user_id != ignore_user_id:
+                events.append({'action': 'join', 'user_id': user_id})
+        for user_id in sorted(previous - current):
+            if user_id != ignore_user_id:
+                events.append({'action': 'leave', 'user_id': user_id})
+        return events
+
+    @classmethod
+    def clear_all(cls):
+        """Limpa todas as presenças (usado em testes)"""
+        cls.get_backend().clear()
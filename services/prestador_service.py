@@ -4,185 +4,39 @@
 from models import User, Order, Transaction, db
 from datetime import datetime, timedelta
 from sqlalchemy import desc, func
+from sqlalchemy.orm import joinedload
 from services.wallet_service import WalletService
+from services.provider_stats_service import ProviderStatsService
 
 class PrestadorService:
     """Serviço para operações da área do prestador"""
     
     @staticmethod
     def get_dashboard_data(user_id):
-        """Retorna dados reais para o dashboard do prestador com terminologia em R$"""
-        from services.dashboard_data_service import DashboardDataService
-        
-        user = User.query.get(user_id)
-        if not user:
-            raise ValueError("Usuário não encontrado")
-        
-        # Usar DashboardDataService para obter métricas completas
-        metrics = DashboardDataService.get_dashboard_metrics(user_id, 'prestador')
-        
-        # Obter ordens em aberto usando DashboardDataService
-        ordens_em_aberto = metrics['open_orders']
-        
-        # Obter fundos bloqueados detalhados
-        fundos_bloqueados = metrics['blocked_funds']
-        
-        # Extrair informações de saldo
-        saldo_disponivel = metrics['balance']['available']
-        saldo_bloqueado = metrics['balance']['blocked']
-        saldo_total = metrics['balance']['total']
-        
-        # Estatísticas do mês
-        ordens_aceitas_mes = metrics['month_stats'].get('orders_accepted', 0)
-        ordens_concluidas_mes = metrics['month_stats'].get('orders_completed', 0)
-        ganhos_mes = metrics['month_stats'].get('total_received', 0.0)
-        
-        # Calcular ganhos totais
-        ganhos_total_result = db.session.query(
-            func.sum(Transaction.amount)
-        ).filter(
-            Transaction.user_id == user_id,
-            Transaction.type == 'recebimento'
-        ).scalar()
-        ganhos_total = ganhos_total_result or 0.0
-        
-        # Contar ordens ativas (aceita + em_andamento)
-        ordens_ativas = len([o for o in ordens_em_aberto if o['status'] in ['aceita', 'em_andamento']])
-        
-        # Contar ordens disponíveis para aceitar (não aceitas por ninguém)
-        ordens_disponiveis = Order.query.filter(
-            Order.status == 'disponivel',
-            Order.provider_id.is_(None)
-        ).count()
-        
-        # Formatar próximas ordens (primeiras 3 ordens em aberto)
-        proximas_ordens = []
-        for ordem in ordens_em_aberto[:3]:
-            proximas_ordens.append({
-                'id': ordem['id'],
-                'titulo': ordem['title'],
-                'data': ordem['created_at'].strftime('%d/%m/%Y') if ordem['created_at'] else '',
-                'horario': ordem['created_at'].strftime('%H:%M') if ordem['created_at'] else '',
-                'valor': ordem['value'],
-                'status': ordem['status'],
-                'cliente': ordem['related_user_name'],
-                'prazo': ordem['service_deadline'].strftime('%d/%m/%Y') if ordem['service_deadline'] else ''
-            })
-        
-        # Calcular média de avaliação (simulada por enquanto)
-        # TODO: Implementar quando tivermos sistema de avaliações
-        media_avaliacao = 4.5  # Simulado
-        total_avaliacoes = ordens_concluidas_mes * 2  # Simulado
-        
-        # Converter alertas do DashboardDataService para formato legado
-        alertas = []
-        
-        # Adicionar notificações de propostas
-        from services.notification_service import NotificationService
-        proposal_notifications = NotificationService.get_proposal_notifications_for_prestador(user_id)
-        alertas.extend(proposal_notifications)
-        
-        # Adicionar alertas do DashboardDataService
-        for alert in metrics['alerts']:
-            alertas.append({
-                'tipo': alert['type'],
-                'mensagem': alert['message']
-            })
-        
-        # Alerta de novas oportunidades
-        if ordens_disponiveis > 0:
-            alertas.append({
-                'tipo': 'info',
-                'mensagem': f'Há {ordens_disponiveis} novas oportunidades de trabalho disponíveis!'
-            })
-        
-        # Alerta se não tem ordens ativas
-        if ordens_ativas == 0 and ordens_disponiveis > 0:
-            alertas.append({
-                'tipo': 'warning',
-                'mensagem': 'Você não tem ordens ativas. Que tal aceitar uma nova oportunidade?'
-            })
-        
-        # Buscar pré-ordens ativas
-        pre_orders_ativas = PrestadorService.get_active_pre_orders(user_id)
-        pre_orders_count = len(pre_orders_ativas)
-        pre_orders_needing_action = len([po for po in pre_orders_ativas if po['needs_action']])
+        """
+        Retorna dados reais para o dashboard do prestador com terminologia em R$
         
-        dashboard_data = {
-            # Valores em formato numérico (serão convertidos para R$ no template)
-            'saldo_atual': saldo_total,
-            'saldo_disponivel': saldo_disponivel,
-            'saldo_bloqueado': saldo_bloqueado,
-            
-            # Contadores
-            'ordens_ativas': ordens_ativas,
-            'ordens_concluidas_mes': ordens_concluidas_mes,
-            'ordens_disponiveis': ordens_disponiveis,
-            
-            # Valores financeiros
-            'ganhos_mes': ganhos_mes,
-            'ganhos_total': ganhos_total,
-            
-            # Performance
-            'media_avaliacao': media_avaliacao,
-            'total_avaliacoes': total_avaliacoes,
-            
-            # Atividades
-            'proximas_ordens': proximas_ordens,
-            'alertas': alertas,
-            
-            # Métricas adicionais
-            'taxa_conclusao': PrestadorService._calcular_taxa_conclusao(user_id),
-            'ganho_medio_ordem': PrestadorService._calcular_ganho_medio_ordem(user_id),
-            'clientes_atendidos': PrestadorService._contar_clientes_atendidos(user_id),
-            
-            # Novos dados do DashboardDataService
-            'ordens_em_aberto': ordens_em_aberto,
-            'fundos_bloqueados_detalhados': fundos_bloqueados['by_order'],
-            
-            # Pré-ordens
-            'pre_orders_ativas': pre_orders_ativas,
-            'pre_orders_count': pre_orders_count,
-            'pre_orders_needing_action': pre_orders_needing_action
-        }
+        Montados pelo DashboardPayloadService com um número fixo de consultas
+        e guardados em cache por usuário até a próxima alteração relevante.
+        """
+        from services.dashboard_payload_service import DashboardPayloadService
         
-        return dashboard_data
+        return DashboardPayloadService.get_payload(user_id, 'prestador')
     
     @staticmethod
     def _calcular_taxa_conclusao(user_id):
-        """Calcula a taxa de conclusão das ordens do prestador"""
-        total_ordens = Order.query.filter_by(provider_id=user_id).count()
-        ordens_concluidas = Order.query.filter_by(
-            provider_id=user_id, 
-            status='concluida'
-        ).count()
-        
-        if total_ordens == 0:
-            return 0.0
-        
-        return (ordens_concluidas / total_ordens) * 100
+        """Calcula a taxa de conclusão das ordens do prestador (de provider_stats)"""
+        return ProviderStatsService.get_stats(user_id)['completion_rate']
     
     @staticmethod
     def _calcular_ganho_medio_ordem(user_id):
-        """Calcula o ganho médio por ordem do prestador"""
-        ganho_medio = db.session.query(
-            func.avg(Transaction.amount)
-        ).filter(
-            Transaction.user_id == user_id,
-            Transaction.type == 'recebimento'
-        ).scalar()
-        return ganho_medio or 0.0
+        """Calcula o ganho médio por ordem do prestador (de provider_stats)"""
+        return ProviderStatsService.get_stats(user_id)['average_received']
     
     @staticmethod
     def _contar_clientes_atendidos(user_id):
-        """Conta quantos clientes únicos o prestador já atendeu"""
-        clientes_unicos = db.session.query(
-            func.count(func.distinct(Order.client_id))
-        ).filter(
-            Order.provider_id == user_id,
-            Order.status == 'concluida'
-        ).scalar()
-        return clientes_unicos or 0
+        """Conta quantos clientes únicos o prestador já atendeu (de provider_stats)"""
+        return ProviderStatsService.get_stats(user_id)['clients_served']
     
     @staticmethod
     def get_wallet_data(user_id):
@@ -411,7 +265,7 @@ class PrestadorService:
         Returns:
             list: Lista de pré-ordens ativas formatadas
         """
-        from models import PreOrder, PreOrderStatus, User
+        from models import PreOrder, PreOrderProposal, PreOrderStatus, User
         
         # Buscar pré-ordens ativas (não convertidas, canceladas ou expiradas)
         active_statuses = [
@@ -420,19 +274,30 @@ class PrestadorService:
             PreOrderStatus.PRONTO_CONVERSAO.value
         ]
         
-        pre_orders = PreOrder.query.filter(
+        pre_orders = PreOrder.query.options(
+            joinedload(PreOrder.client).load_only(User.id, User.nome)
+        ).filter(
             PreOrder.provider_id == user_id,
             PreOrder.status.in_(active_statuses)
         ).order_by(PreOrder.updated_at.desc()).all()
         
+        # Autor das propostas ativas, em uma consulta para todas as pré-ordens
+        proposal_ids = [po.active_proposal_id for po in pre_orders
+                        if po.has_active_proposal and po.active_proposal_id]
+        proposers = dict(
+            db.session.query(PreOrderProposal.id, PreOrderProposal.proposed_by).filter(
+                PreOrderProposal.id.in_(proposal_ids)
+            ).all()
+        ) if proposal_ids else {}
+        
         # Formatar para exibição
         formatted_pre_orders = []
         for po in pre_orders:
             # Determinar se precisa de ação do prestador
             needs_action = False
             if po.has_active_proposal:
-                proposal = po.get_active_proposal()
-                if proposal and proposal.proposed_by != user_id:
+                proposed_by = proposers.get(po.active_proposal_id)
+                if proposed_by is not None and proposed_by != user_id:
                     needs_action = True
             elif po.status == PreOrderStatus.EM_NEGOCIACAO.value and not po.provider_accepted_terms:
                 needs_action = True
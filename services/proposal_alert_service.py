@@ -10,10 +10,10 @@ incluindo detecção automática, notificação de administradores e resolução
 Requirements: 8.4, 8.5
 """
 
-from models import db, ProposalAlert, Proposal, ProposalAuditLog, User, AdminUser
+from models import db, ProposalAlert
 from datetime import datetime, timedelta
 from decimal import Decimal
-from sqlalchemy import func, and_, or_
+from sqlalchemy import and_
 from sqlalchemy.exc import SQLAlchemyError
 import json
 import logging
@@ -101,25 +101,20 @@ class ProposalAlertService:
         """
         Executa verificação completa de todas as condições de alerta
         
-        Este método deve ser executado periodicamente (ex: a cada hora)
-        para detectar padrões suspeitos no sistema.
+        As condições são avaliadas pelo ProposalPatternDetector a cada ação
+        confirmada; esta verificação periódica (ex: a cada hora) recarrega o
+        estado das tabelas e reavalia os limites, incluindo as ações dos
+        outros workers.
         """
         try:
             alert_logger.info("Iniciando verificação de alertas do sistema")
             
-            alerts_created = 0
+            from services.proposal_pattern_detector import ProposalPatternDetector
             
-            # 1. Verificar alertas de usuários individuais
-            alerts_created += ProposalAlertService._check_user_frequency_alerts()
-            alerts_created += ProposalAlertService._check_user_behavior_alerts()
+            # 1. Avaliar usuários, sistema e valores das últimas 24h
+            alerts_created = len(ProposalPatternDetector.evaluate())
             
-            # 2. Verificar alertas sistêmicos
-            alerts_created += ProposalAlertService._check_system_alerts()
-            
-            # 3. Verificar alertas de valores suspeitos
-            alerts_created += ProposalAlertService._check_value_alerts()
-            
-            # 4. Limpar alertas antigos resolvidos
+            # 2. Limpar alertas antigos resolvidos
             ProposalAlertService._cleanup_old_alerts()
             
             alert_logger.info(f"Verificação concluída. {alerts_created} novos alertas criados.")
@@ -130,378 +125,6 @@ class ProposalAlertService:
             alert_logger.error(f"Erro na verificação de alertas: {str(e)}")
             raise
     
-    @staticmethod
-    def _check_user_frequency_alerts() -> int:
-        """Verifica alertas de frequência de propostas por usuário"""
-        alerts_created = 0
-        now = datetime.utcnow()
-        
-        # Verificar propostas na última hora
-        hour_ago = now - timedelta(hours=1)
-        
-        # Buscar usuários com muitas propostas na última hora
-        frequent_users_hour = db.session.query(
-            ProposalAuditLog.actor_user_id,
-            func.count(ProposalAuditLog.id).label('proposal_count')
-        ).filter(
-            and_(
-                ProposalAuditLog.action_type == 'created',
-                ProposalAuditLog.created_at >= hour_ago,
-                ProposalAuditLog.actor_user_id.isnot(None)
-            )
-        ).group_by(
-            ProposalAuditLog.actor_user_id
-        ).having(
-            func.count(ProposalAuditLog.id) > ProposalAlertService.ALERT_THRESHOLDS['max_proposals_per_hour_user'].value
-        ).all()
-        
-        for user_id, count in frequent_users_hour:
-            # Verificar se já existe alerta ativo para este usuário
-            existing_alert = ProposalAlert.query.filter(
-                and_(
-                    ProposalAlert.alert_type == 'high_frequency_proposals_hour',
-                    ProposalAlert.user_id == user_id,
-                    ProposalAlert.status == 'active',
-                    ProposalAlert.created_at >= hour_ago
-                )
-            ).first()
-            
-            if not existing_alert:
-                ProposalAlertService._create_alert(
-                    alert_type='high_frequency_proposals_hour',
-                    severity='medium',
-                    title=f'Usuário criou {count} propostas na última hora',
-                    description=f'Usuário {user_id} excedeu o limite de propostas por hora ({count} > {ProposalAlertService.ALERT_THRESHOLDS["max_proposals_per_hour_user"].value})',
-                    user_id=user_id,
-                    pattern_data={
-                        'proposals_count': count,
-                        'time_period': 'last_hour',
-                        'threshold': ProposalAlertService.ALERT_THRESHOLDS['max_proposals_per_hour_user'].value
-                    },
-                    threshold_exceeded='max_proposals_per_hour_user'
-                )
-                alerts_created += 1
-        
-        # Verificar propostas no último dia
-        day_ago = now - timedelta(days=1)
-        
-        frequent_users_day = db.session.query(
-            ProposalAuditLog.actor_user_id,
-            func.count(ProposalAuditLog.id).label('proposal_count')
-        ).filter(
-            and_(
-                ProposalAuditLog.action_type == 'created',
-                ProposalAuditLog.created_at >= day_ago,
-                ProposalAuditLog.actor_user_id.isnot(None)
-            )
-        ).group_by(
-            ProposalAuditLog.actor_user_id
-        ).having(
-            func.count(ProposalAuditLog.id) > ProposalAlertService.ALERT_THRESHOLDS['max_proposals_per_day_user'].value
-        ).all()
-        
-        for user_id, count in frequent_users_day:
-            existing_alert = ProposalAlert.query.filter(
-                and_(
-                    ProposalAlert.alert_type == 'high_frequency_proposals_day',
-                    ProposalAlert.user_id == user_id,
-                    ProposalAlert.status == 'active',
-                    ProposalAlert.created_at >= day_ago
-                )
-            ).first()
-            
-            if not existing_alert:
-                ProposalAlertService._create_alert(
-                    alert_type='high_frequency_proposals_day',
-                    severity='high',
-                    title=f'Usuário criou {count} propostas no último dia',
-                    description=f'Usuário {user_id} excedeu o limite de propostas por dia ({count} > {ProposalAlertService.ALERT_THRESHOLDS["max_proposals_per_day_user"].value})',
-                    user_id=user_id,
-                    pattern_data={
-                        'proposals_count': count,
-                        'time_period': 'last_day',
-                        'threshold': ProposalAlertService.ALERT_THRESHOLDS['max_proposals_per_day_user'].value
-                    },
-                    threshold_exceeded='max_proposals_per_day_user'
-                )
-                alerts_created += 1
-        
-        return alerts_created
-    
-    @staticmethod
-    def _check_user_behavior_alerts() -> int:
-        """Verifica alertas de comportamento suspeito de usuários"""
-        alerts_created = 0
-        now = datetime.utcnow()
-        thirty_days_ago = now - timedelta(days=30)
-        
-        # Verificar usuários com alta taxa de rejeição
-        rejection_stats = db.session.query(
-            ProposalAuditLog.actor_user_id,
-            func.count(func.case([(ProposalAuditLog.action_type == 'approved', 1)])).label('approved_count'),
-            func.count(func.case([(ProposalAuditLog.action_type == 'rejected', 1)])).label('rejected_count'),
-            func.count(ProposalAuditLog.id).label('total_responses')
-        ).filter(
-            and_(
-                ProposalAuditLog.actor_role == 'cliente',
-                ProposalAuditLog.action_type.in_(['approved', 'rejected']),
-                ProposalAuditLog.created_at >= thirty_days_ago,
-                ProposalAuditLog.actor_user_id.isnot(None)
-            )
-        ).group_by(
-            ProposalAuditLog.actor_user_id
-        ).having(
-            func.count(ProposalAuditLog.id) >= 5  # Mínimo de 5 respostas para considerar
-        ).all()
-        
-        for user_id, approved, rejected, total in rejection_stats:
-            rejection_rate = (rejected / total) * 100 if total > 0 else 0
-            
-            if rejection_rate > ProposalAlertService.ALERT_THRESHOLDS['max_rejection_rate_percentage'].value:
-                # Verificar se já existe alerta ativo
-                existing_alert = ProposalAlert.query.filter(
-                    and_(
-                        ProposalAlert.alert_type == 'high_rejection_rate',
-                        ProposalAlert.user_id == user_id,
-                        ProposalAlert.status == 'active',
-                        ProposalAlert.created_at >= thirty_days_ago
-                    )
-                ).first()
-                
-                if not existing_alert:
-                    ProposalAlertService._create_alert(
-                        alert_type='high_rejection_rate',
-                        severity='medium',
-                        title=f'Cliente com alta taxa de rejeição: {rejection_rate:.1f}%',
-                        description=f'Cliente {user_id} tem taxa de rejeição de {rejection_rate:.1f}% ({rejected}/{total} propostas) nos últimos 30 dias',
-                        user_id=user_id,
-                        pattern_data={
-                            'rejection_rate': rejection_rate,
-                            'rejected_count': rejected,
-                            'total_responses': total,
-                            'period_days': 30,
-                            'threshold': ProposalAlertService.ALERT_THRESHOLDS['max_rejection_rate_percentage'].value
-                        },
-                        threshold_exceeded='max_rejection_rate_percentage'
-                    )
-                    alerts_created += 1
-        
-        # Verificar respostas muito rápidas
-        fast_responses = db.session.query(Proposal).filter(
-            and_(
-                Proposal.responded_at.isnot(None),
-                Proposal.created_at.isnot(None),
-                Proposal.responded_at >= now - timedelta(hours=24)  # Últimas 24 horas
-            )
-        ).all()
-        
-        for proposal in fast_responses:
-            response_time = proposal.responded_at - proposal.created_at
-            response_seconds = response_time.total_seconds()
-            
-            if response_seconds < ProposalAlertService.ALERT_THRESHOLDS['min_response_time_seconds'].value:
-                existing_alert = ProposalAlert.query.filter(
-                    and_(
-                        ProposalAlert.alert_type == 'very_fast_response',
-                        ProposalAlert.proposal_id == proposal.id,
-                        ProposalAlert.status == 'active'
-                    )
-                ).first()
-                
-                if not existing_alert:
-                    ProposalAlertService._create_alert(
-                        alert_type='very_fast_response',
-                        severity='medium',
-                        title=f'Resposta muito rápida: {response_seconds:.0f} segundos',
-                        description=f'Proposta {proposal.id} foi respondida em {response_seconds:.0f} segundos, abaixo do limite de {ProposalAlertService.ALERT_THRESHOLDS["min_response_time_seconds"].value} segundos',
-                        proposal_id=proposal.id,
-                        invite_id=proposal.invite_id,
-                        pattern_data={
-                            'response_time_seconds': response_seconds,
-                            'threshold': ProposalAlertService.ALERT_THRESHOLDS['min_response_time_seconds'].value,
-                            'created_at': proposal.created_at.isoformat(),
-                            'responded_at': proposal.responded_at.isoformat()
-                        },
-                        threshold_exceeded='min_response_time_seconds'
-                    )
-                    alerts_created += 1
-        
-        return alerts_created
-    
-    @staticmethod
-    def _check_system_alerts() -> int:
-        """Verifica alertas sistêmicos"""
-        alerts_created = 0
-        now = datetime.utcnow()
-        
-        # Verificar pico de propostas no sistema
-        today = now.date()
-        yesterday = today - timedelta(days=1)
-        week_ago = today - timedelta(days=7)
-        
-        # Contar propostas hoje vs média da semana passada
-        proposals_today = ProposalAuditLog.query.filter(
-            and_(
-                ProposalAuditLog.action_type == 'created',
-                func.date(ProposalAuditLog.created_at) == today
-            )
-        ).count()
-        
-        proposals_last_week = ProposalAuditLog.query.filter(
-            and_(
-                ProposalAuditLog.action_type == 'created',
-                func.date(ProposalAuditLog.created_at) >= week_ago,
-                func.date(ProposalAuditLog.created_at) < today
-            )
-        ).count()
-        
-        avg_daily_last_week = proposals_last_week / 7 if proposals_last_week > 0 else 1
-        
-        if avg_daily_last_week > 0:
-            increase_percentage = ((proposals_today - avg_daily_last_week) / avg_daily_last_week) * 100
-            
-            if increase_percentage > ProposalAlertService.ALERT_THRESHOLDS['system_proposal_spike_percentage'].value:
-                existing_alert = ProposalAlert.query.filter(
-                    and_(
-                        ProposalAlert.alert_type == 'system_proposal_spike',
-                        ProposalAlert.status == 'active',
-                        func.date(ProposalAlert.created_at) == today
-                    )
-                ).first()
-                
-                if not existing_alert:
-                    ProposalAlertService._create_alert(
-                        alert_type='system_proposal_spike',
-                        severity='high',
-                        title=f'Pico de propostas no sistema: {increase_percentage:.1f}% de aumento',
-                        description=f'Sistema registrou {proposals_today} propostas hoje vs média de {avg_daily_last_week:.1f} da semana passada ({increase_percentage:.1f}% de aumento)',
-                        pattern_data={
-                            'proposals_today': proposals_today,
-                            'avg_daily_last_week': avg_daily_last_week,
-                            'increase_percentage': increase_percentage,
-                            'threshold': ProposalAlertService.ALERT_THRESHOLDS['system_proposal_spike_percentage'].value
-                        },
-                        threshold_exceeded='system_proposal_spike_percentage'
-                    )
-                    alerts_created += 1
-        
-        # Verificar alta taxa de rejeição sistêmica
-        last_24h = now - timedelta(hours=24)
-        
-        system_responses = db.session.query(
-            func.count(func.case([(ProposalAuditLog.action_type == 'approved', 1)])).label('approved'),
-            func.count(func.case([(ProposalAuditLog.action_type == 'rejected', 1)])).label('rejected'),
-            func.count(ProposalAuditLog.id).label('total')
-        ).filter(
-            and_(
-                ProposalAuditLog.action_type.in_(['approved', 'rejected']),
-                ProposalAuditLog.created_at >= last_24h
-            )
-        ).first()
-        
-        if system_responses and system_responses.total >= 10:  # Mínimo de respostas
-            system_rejection_rate = (system_responses.rejected / system_responses.total) * 100
-            
-            if system_rejection_rate > ProposalAlertService.ALERT_THRESHOLDS['system_high_rejection_rate'].value:
-                existing_alert = ProposalAlert.query.filter(
-                    and_(
-                        ProposalAlert.alert_type == 'system_high_rejection_rate',
-                        ProposalAlert.status == 'active',
-                        ProposalAlert.created_at >= last_24h
-                    )
-                ).first()
-                
-                if not existing_alert:
-                    ProposalAlertService._create_alert(
-                        alert_type='system_high_rejection_rate',
-                        severity='medium',
-                        title=f'Alta taxa de rejeição sistêmica: {system_rejection_rate:.1f}%',
-                        description=f'Sistema tem taxa de rejeição de {system_rejection_rate:.1f}% nas últimas 24h ({system_responses.rejected}/{system_responses.total} propostas)',
-                        pattern_data={
-                            'rejection_rate': system_rejection_rate,
-                            'rejected_count': system_responses.rejected,
-                            'total_responses': system_responses.total,
-                            'period_hours': 24,
-                            'threshold': ProposalAlertService.ALERT_THRESHOLDS['system_high_rejection_rate'].value
-                        },
-                        threshold_exceeded='system_high_rejection_rate'
-                    )
-                    alerts_created += 1
-        
-        return alerts_created
-    
-    @staticmethod
-    def _check_value_alerts() -> int:
-        """Verifica alertas relacionados a valores suspeitos"""
-        alerts_created = 0
-        now = datetime.utcnow()
-        last_24h = now - timedelta(hours=24)
-        
-        # Buscar propostas recentes com valores suspeitos
-        recent_proposals = Proposal.query.filter(
-            Proposal.created_at >= last_24h
-        ).all()
-        
-        for proposal in recent_proposals:
-            # Verificar valores muito altos
-            if proposal.proposed_value > ProposalAlertService.ALERT_THRESHOLDS['unusual_high_value'].value:
-                existing_alert = ProposalAlert.query.filter(
-                    and_(
-                        ProposalAlert.alert_type == 'unusual_high_value',
-                        ProposalAlert.proposal_id == proposal.id,
-                        ProposalAlert.status == 'active'
-                    )
-                ).first()
-                
-                if not existing_alert:
-                    ProposalAlertService._create_alert(
-                        alert_type='unusual_high_value',
-                        severity='medium',
-                        title=f'Valor muito alto: R$ {proposal.proposed_value}',
-                        description=f'Proposta {proposal.id} tem valor de R$ {proposal.proposed_value}, acima do limite de R$ {ProposalAlertService.ALERT_THRESHOLDS["unusual_high_value"].value}',
-                        proposal_id=proposal.id,
-                        invite_id=proposal.invite_id,
-                        pattern_data={
-                            'proposed_value': float(proposal.proposed_value),
-                            'threshold': float(ProposalAlertService.ALERT_THRESHOLDS['unusual_high_value'].value)
-                        },
-                        threshold_exceeded='unusual_high_value'
-                    )
-                    alerts_created += 1
-            
-            # Verificar aumentos percentuais excessivos
-            if proposal.original_value > 0:
-                increase_percentage = (proposal.value_difference / proposal.original_value) * 100
-                
-                if increase_percentage > ProposalAlertService.ALERT_THRESHOLDS['max_value_increase_percentage'].value:
-                    existing_alert = ProposalAlert.query.filter(
-                        and_(
-                            ProposalAlert.alert_type == 'excessive_value_increase',
-                            ProposalAlert.proposal_id == proposal.id,
-                            ProposalAlert.status == 'active'
-                        )
-                    ).first()
-                    
-                    if not existing_alert:
-                        ProposalAlertService._create_alert(
-                            alert_type='excessive_value_increase',
-                            severity='high',
-                            title=f'Aumento excessivo: {increase_percentage:.1f}%',
-                            description=f'Proposta {proposal.id} tem aumento de {increase_percentage:.1f}% (R$ {proposal.original_value} -> R$ {proposal.proposed_value})',
-                            proposal_id=proposal.id,
-                            invite_id=proposal.invite_id,
-                            pattern_data={
-                                'original_value': float(proposal.original_value),
-                                'proposed_value': float(proposal.proposed_value),
-                                'increase_percentage': increase_percentage,
-                                'threshold': ProposalAlertService.ALERT_THRESHOLDS['max_value_increase_percentage'].value
-                            },
-                            threshold_exceeded='max_value_increase_percentage'
-                        )
-                        alerts_created += 1
-        
-        return alerts_created
-    
     @staticmethod
     def _create_alert(alert_type: str, severity: str, title: str, description: str, **kwargs):
         """Cria um novo alerta no sistema"""
@@ -533,6 +156,13 @@ class ProposalAlertService:
             alert_logger.error(f"Erro ao criar alerta: {str(e)}")
             raise
     
+    @staticmethod
+    def _forget_alert(alert: ProposalAlert):
+        """Retira o alerta encerrado do índice de alertas ativos do detector"""
+        from services.proposal_pattern_detector import ProposalPatternDetector
+        
+        ProposalPatternDetector.alert_closed(alert)
+    
     @staticmethod
     def _cleanup_old_alerts():
         """Remove alertas antigos resolvidos"""
@@ -616,6 +246,7 @@ class ProposalAlertService:
             
             alert.resolve(admin_id, resolution_notes)
             db.session.commit()
+            ProposalAlertService._forget_alert(alert)
             
             alert_logger.info(
                 f"ALERT_RESOLVED: {alert.alert_type} | "
@@ -651,6 +282,7 @@ class ProposalAlertService:
             
             alert.mark_false_positive(admin_id, notes)
             db.session.commit()
+            ProposalAlertService._forget_alert(alert)
             
             alert_logger.info(
                 f"ALERT_FALSE_POSITIVE: {alert.alert_type} | "
@@ -106,7 +106,8 @@ class ProposalAuditService:
             if context is None:
                 context = AuditContext.from_request()
             
-            # Criar registro de auditoria
+            # Criar registro de auditoria (gravado no commit de quem chamou)
+            now = datetime.utcnow()
             audit_log = ProposalAuditLog(
                 proposal_id=proposal_id,
                 invite_id=proposal.invite_id,
@@ -122,11 +123,11 @@ class ProposalAuditService:
                 session_id=context.session_id,
                 original_value=proposal.original_value,
                 proposed_value=proposal.proposed_value,
-                value_difference=proposal.value_difference
+                value_difference=proposal.value_difference,
+                created_at=now
             )
             
             db.session.add(audit_log)
-            db.session.flush()  # Para obter o ID
             
             # Log estruturado para análise
             audit_logger.info(
@@ -139,8 +140,8 @@ class ProposalAuditService:
                 f"Reason:{reason or 'N/A'}"
             )
             
-            # Verificar padrões suspeitos após cada ação
-            ProposalAuditService._check_suspicious_patterns(proposal, action_type, actor_user_id)
+            # Padrões suspeitos: analisados pelo detector após o commit, fora da requisição
+            ProposalAuditService._schedule_pattern_check(proposal, action_type, actor_user_id, actor_role, now)
             
             return audit_log
             
@@ -248,67 +249,38 @@ class ProposalAuditService:
         )
     
     @staticmethod
-    def _check_suspicious_patterns(proposal: Proposal, action_type: str, user_id: Optional[int]):
+    def _schedule_pattern_check(proposal: Proposal, action_type: str, user_id: Optional[int],
+                                actor_role: str, timestamp: datetime):
         """
-        Verifica padrões suspeitos após cada ação
+        Entrega a ação ao ProposalPatternDetector no commit da transação
         
-        Detecta:
+        Detecta (de forma assíncrona):
         - Muitas propostas em pouco tempo
         - Valores muito altos ou aumentos excessivos
         - Respostas muito rápidas
         - Padrões de rejeição anômalos
         """
-        if not user_id:
-            return
-        
-        try:
-            alerts_to_create = []
-            
-            # 1. Verificar frequência de propostas (apenas para criação)
-            if action_type == 'created':
-                alerts_to_create.extend(
-                    ProposalAuditService._check_proposal_frequency(user_id, proposal)
-                )
-                
-                # Verificar valores suspeitos
-                alerts_to_create.extend(
-                    ProposalAuditService._check_suspicious_values(proposal)
-                )
-            
-            # 2. Verificar tempo de resposta (para aprovação/rejeição)
-            elif action_type in ['approved', 'rejected']:
-                alerts_to_create.extend(
-                    ProposalAuditService._check_response_time(proposal)
-                )
-            
-            # 3. Verificar taxa de rejeição do usuário
-            if action_type == 'rejected':
-                alerts_to_create.extend(
-                    ProposalAuditService._check_rejection_rate(user_id)
-                )
-            
-            # Criar alertas encontrados
-            for alert_data in alerts_to_create:
-                ProposalAuditService._create_alert(**alert_data)
-                
-        except Exception as e:
-            audit_logger.error(f"Erro ao verificar padrões suspeitos: {str(e)}")
+        from services.proposal_pattern_detector import ProposalPatternDetector, ProposalActionEvent
+        
+        ProposalPatternDetector.track(db.session, ProposalActionEvent(
+            proposal_id=proposal.id,
+            invite_id=proposal.invite_id,
+            action_type=action_type,
+            actor_user_id=user_id,
+            actor_role=actor_role,
+            timestamp=timestamp,
+            original_value=proposal.original_value,
+            proposed_value=proposal.proposed_value,
+            value_difference=proposal.value_difference,
+            created_at=proposal.created_at,
+            responded_at=proposal.responded_at
+        ))
     
     @staticmethod
-    def _check_proposal_frequency(user_id: int, proposal: Proposal) -> List[Dict]:
-        """Verifica frequência de criação de propostas"""
+    def _check_proposal_frequency(user_id: int, proposal: Any, proposals_last_hour: int,
+                                  proposals_last_day: int) -> List[Dict]:
+        """Verifica frequência de criação de propostas a partir das contagens das janelas"""
         alerts = []
-        now = datetime.utcnow()
-        
-        # Verificar propostas na última hora
-        hour_ago = now - timedelta(hours=1)
-        proposals_last_hour = db.session.query(ProposalAuditLog).filter(
-            and_(
-                ProposalAuditLog.action_type == 'created',
-                ProposalAuditLog.actor_user_id == user_id,
-                ProposalAuditLog.created_at >= hour_ago
-            )
-        ).count()
         
         if proposals_last_hour > ProposalAuditService.SUSPICIOUS_PATTERNS['max_proposals_per_hour']:
             alerts.append({
@@ -327,16 +299,6 @@ class ProposalAuditService:
                 'threshold_exceeded': 'max_proposals_per_hour'
             })
         
-        # Verificar propostas no último dia
-        day_ago = now - timedelta(days=1)
-        proposals_last_day = db.session.query(ProposalAuditLog).filter(
-            and_(
-                ProposalAuditLog.action_type == 'created',
-                ProposalAuditLog.actor_user_id == user_id,
-                ProposalAuditLog.created_at >= day_ago
-            )
-        ).count()
-        
         if proposals_last_day > ProposalAuditService.SUSPICIOUS_PATTERNS['max_proposals_per_day']:
             alerts.append({
                 'alert_type': 'high_frequency_proposals_day',
@@ -357,7 +319,7 @@ class ProposalAuditService:
         return alerts
     
     @staticmethod
-    def _check_suspicious_values(proposal: Proposal) -> List[Dict]:
+    def _check_suspicious_values(proposal: Any) -> List[Dict]:
         """Verifica valores suspeitos na proposta"""
         alerts = []
         
@@ -405,7 +367,7 @@ class ProposalAuditService:
         return alerts
     
     @staticmethod
-    def _check_response_time(proposal: Proposal) -> List[Dict]:
+    def _check_response_time(proposal: Any) -> List[Dict]:
         """Verifica tempo de resposta suspeito"""
         alerts = []
         
@@ -435,32 +397,10 @@ class ProposalAuditService:
         return alerts
     
     @staticmethod
-    def _check_rejection_rate(user_id: int) -> List[Dict]:
-        """Verifica taxa de rejeição do usuário"""
+    def _check_rejection_rate(user_id: int, rejections: int, total_responses: int) -> List[Dict]:
+        """Verifica taxa de rejeição do cliente nos últimos 30 dias a partir das contagens das janelas"""
         alerts = []
         
-        # Buscar propostas dos últimos 30 dias para este cliente
-        thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-        
-        # Contar propostas respondidas pelo cliente
-        total_responses = db.session.query(ProposalAuditLog).filter(
-            and_(
-                ProposalAuditLog.actor_user_id == user_id,
-                ProposalAuditLog.actor_role == 'cliente',
-                ProposalAuditLog.action_type.in_(['approved', 'rejected']),
-                ProposalAuditLog.created_at >= thirty_days_ago
-            )
-        ).count()
-        
-        rejections = db.session.query(ProposalAuditLog).filter(
-            and_(
-                ProposalAuditLog.actor_user_id == user_id,
-                ProposalAuditLog.actor_role == 'cliente',
-                ProposalAuditLog.action_type == 'rejected',
-                ProposalAuditLog.created_at >= thirty_days_ago
-            )
-        ).count()
-        
         if total_responses >= 5:  # Só alertar se houver um mínimo de respostas
             rejection_rate = (rejections / total_responses) * 100
             max_rejection_rate = ProposalAuditService.SUSPICIOUS_PATTERNS['max_rejection_rate_percentage']
@@ -486,31 +426,6 @@ class ProposalAuditService:
         
         return alerts
     
-    @staticmethod
-    def _create_alert(alert_type: str, severity: str, title: str, description: str, **kwargs):
-        """Cria um alerta no sistema"""
-        try:
-            alert = ProposalAlert(
-                alert_type=alert_type,
-                severity=severity,
-                title=title,
-                description=description,
-                **kwargs
-            )
-            
-            db.session.add(alert)
-            db.session.flush()
-            
-            audit_logger.warning(
-                f"SUSPICIOUS_PATTERN_DETECTED: {alert_type} | "
-                f"Severity:{severity} | "
-                f"Title:{title} | "
-                f"Alert:{alert.id}"
-            )
-            
-        except Exception as e:
-            audit_logger.error(f"Erro ao criar alerta: {str(e)}")
-    
     @staticmethod
     def get_proposal_history(proposal_id: int) -> List[Dict]:
         """Retorna histórico completo de uma proposta"""
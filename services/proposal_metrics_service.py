@@ -7,17 +7,29 @@ Serviço de Métricas de Propostas
 Este serviço calcula e mantém métricas agregadas sobre propostas de alteração,
 incluindo estatísticas diárias, semanais e mensais para monitoramento e análise.
 
+As linhas diárias guardam agregados parciais combináveis (contagens, somas,
+soma dos quadrados, mínimo/máximo e sketches de usuários distintos): semanas,
+meses e intervalos arbitrários são obtidos combinando os dias, sem reler as
+propostas. Dias já calculados só são recalculados se forem hoje ou posteriores.
+Cada valor entra no dia do evento que o define (criação, resposta ou ação):
+o valor aprovado conta no dia da aceitação, de modo que um dia encerrado não
+muda depois.
+
 Requirements: 8.1, 8.2, 8.3, 8.4
 """
 
 from models import db, ProposalMetrics, Proposal, ProposalAuditLog, Invite, User
+from services.distinct_sketch import DistinctSketch
+from services.time_window import in_period, start_of_day
+from services.read_replica import replica_read
 from datetime import datetime, date, timedelta
 from decimal import Decimal
 from sqlalchemy import func, and_, or_, extract
 from sqlalchemy.exc import SQLAlchemyError
 import logging
-from typing import Dict, List, Optional, Tuple
-from dataclasses import dataclass
+import math
+from typing import Any, Dict, List, Optional, Tuple
+from dataclasses import dataclass, field
 
 # Logger para métricas
 metrics_logger = logging.getLogger('proposal_metrics')
@@ -51,9 +63,179 @@ class MetricsPeriod:
         return cls(start, end, 'monthly')
 
 
+@dataclass
+class MetricsPartial:
+    """Agregados parciais de um dia (ou da combinação de vários dias)"""
+    total_proposals: int = 0
+    proposals_created: int = 0
+    proposals_approved: int = 0
+    proposals_rejected: int = 0
+    proposals_cancelled: int = 0
+    total_original_value: Decimal = Decimal('0.00')
+    total_proposed_value: Decimal = Decimal('0.00')
+    total_approved_value: Decimal = Decimal('0.00')
+    proposals_with_increase: int = 0
+    proposals_with_decrease: int = 0
+    proposed_value_sum_squares: float = 0.0
+    min_proposed_value: Optional[Decimal] = None
+    max_proposed_value: Optional[Decimal] = None
+    responded_proposals: int = 0
+    total_response_time_hours: float = 0.0
+    prestadores: DistinctSketch = field(default_factory=DistinctSketch)
+    clientes: DistinctSketch = field(default_factory=DistinctSketch)
+    # IDs do dia durante o cálculo (contagem exata); vazios em combinações
+    prestador_ids: set = field(default_factory=set)
+    cliente_ids: set = field(default_factory=set)
+    exact_unique: bool = False
+    
+    ACTION_FIELDS = {
+        'created': 'proposals_created',
+        'approved': 'proposals_approved',
+        'rejected': 'proposals_rejected',
+        'cancelled': 'proposals_cancelled',
+    }
+    
+    def add_proposal(self, original_value: Decimal, proposed_value: Decimal,
+                     prestador_id: int, client_id: Optional[int]):
+        self.total_proposals += 1
+        self.total_original_value += original_value
+        self.total_proposed_value += proposed_value
+        if proposed_value > original_value:
+            self.proposals_with_increase += 1
+        elif proposed_value < original_value:
+            self.proposals_with_decrease += 1
+        self.proposed_value_sum_squares += float(proposed_value) ** 2
+        if self.min_proposed_value is None or proposed_value < self.min_proposed_value:
+            self.min_proposed_value = proposed_value
+        if self.max_proposed_value is None or proposed_value > self.max_proposed_value:
+            self.max_proposed_value = proposed_value
+        
+        self.prestadores.add(prestador_id)
+        self.prestador_ids.add(prestador_id)
+        if client_id:
+            self.clientes.add(client_id)
+            self.cliente_ids.add(client_id)
+    
+    def add_response(self, created_at: datetime, responded_at: datetime):
+        self.responded_proposals += 1
+        self.total_response_time_hours += (responded_at - created_at).total_seconds() / 3600
+    
+    def add_approval(self, proposed_value: Decimal):
+        self.total_approved_value += proposed_value
+    
+    def add_actions(self, action_type: str, count: int):
+        attribute = self.ACTION_FIELDS.get(action_type)
+        if attribute:
+            setattr(self, attribute, getattr(self, attribute) + count)
+    
+    def merge(self, other: 'MetricsPartial') -> 'MetricsPartial':
+        """Combina com os agregados de outro período (no próprio objeto)"""
+        for attribute in ('total_proposals', 'proposals_created', 'proposals_approved',
+                          'proposals_rejected', 'proposals_cancelled', 'total_original_value',
+                          'total_proposed_value', 'total_approved_value', 'proposals_with_increase',
+                          'proposals_with_decrease', 'proposed_value_sum_squares',
+                          'responded_proposals', 'total_response_time_hours'):
+            setattr(self, attribute, getattr(self, attribute) + getattr(other, attribute))
+        
+        values = [v for v in (self.min_proposed_value, other.min_proposed_value) if v is not None]
+        self.min_proposed_value = min(values) if values else None
+        values = [v for v in (self.max_proposed_value, other.max_proposed_value) if v is not None]
+        self.max_proposed_value = max(values) if values else None
+        
+        self.prestadores.merge(other.prestadores)
+        self.clientes.merge(other.clientes)
+        self.exact_unique = False
+        return self
+    
+    @property
+    def unique_prestadores(self) -> int:
+        return len(self.prestador_ids) if self.exact_unique else self.prestadores.estimate()
+    
+    @property
+    def unique_clientes(self) -> int:
+        return len(self.cliente_ids) if self.exact_unique else self.clientes.estimate()
+    
+    @property
+    def average_response_time_hours(self) -> Optional[Decimal]:
+        if not self.responded_proposals:
+            return None
+        return Decimal(str(round(self.total_response_time_hours / self.responded_proposals, 2)))
+    
+    @property
+    def proposed_value_stddev(self) -> float:
+        if not self.total_proposals:
+            return 0.0
+        mean = float(self.total_proposed_value) / self.total_proposals
+        variance = self.proposed_value_sum_squares / self.total_proposals - mean * mean
+        return math.sqrt(max(variance, 0.0))
+    
+    @classmethod
+    def from_metric(cls, metric: ProposalMetrics) -> 'MetricsPartial':
+        """Lê os agregados de uma linha de proposal_metrics"""
+        return cls(
+            total_proposals=metric.total_proposals or 0,
+            proposals_created=metric.proposals_created or 0,
+            proposals_approved=metric.proposals_approved or 0,
+            proposals_rejected=metric.proposals_rejected or 0,
+            proposals_cancelled=metric.proposals_cancelled or 0,
+            total_original_value=metric.total_original_value or Decimal('0.00'),
+            total_proposed_value=metric.total_proposed_value or Decimal('0.00'),
+            total_approved_value=metric.total_approved_value or Decimal('0.00'),
+            proposals_with_increase=metric.proposals_with_increase or 0,
+            proposals_with_decrease=metric.proposals_with_decrease or 0,
+            proposed_value_sum_squares=metric.proposed_value_sum_squares or 0.0,
+            min_proposed_value=metric.min_proposed_value,
+            max_proposed_value=metric.max_proposed_value,
+            responded_proposals=metric.responded_proposals or 0,
+            total_response_time_hours=metric.total_response_time_hours or 0.0,
+            prestadores=DistinctSketch.from_bytes(metric.prestadores_sketch),
+            clientes=DistinctSketch.from_bytes(metric.clientes_sketch),
+        )
+    
+    def apply_to(self, metric: ProposalMetrics):
+        """Grava os agregados em uma linha de proposal_metrics"""
+        for attribute in ('total_proposals', 'proposals_created', 'proposals_approved',
+                          'proposals_rejected', 'proposals_cancelled', 'total_original_value',
+                          'total_proposed_value', 'total_approved_value', 'proposals_with_increase',
+                          'proposals_with_decrease', 'proposed_value_sum_squares', 'min_proposed_value',
+                          'max_proposed_value', 'responded_proposals', 'total_response_time_hours',
+                          'average_response_time_hours', 'unique_prestadores', 'unique_clientes'):
+            setattr(metric, attribute, getattr(self, attribute))
+        metric.prestadores_sketch = self.prestadores.to_bytes()
+        metric.clientes_sketch = self.clientes.to_bytes()
+    
+    def to_dict(self) -> Dict[str, Any]:
+        total_responded = self.proposals_approved + self.proposals_rejected
+        return {
+            'total_proposals': self.total_proposals,
+            'proposals_created': self.proposals_created,
+            'proposals_approved': self.proposals_approved,
+            'proposals_rejected': self.proposals_rejected,
+            'proposals_cancelled': self.proposals_cancelled,
+            'approval_rate': (self.proposals_approved / total_responded * 100) if total_responded else 0,
+            'total_original_value': float(self.total_original_value),
+            'total_proposed_value': float(self.total_proposed_value),
+            'total_approved_value': float(self.total_approved_value),
+            'average_proposed_value': (float(self.total_proposed_value) / self.total_proposals
+                                       if self.total_proposals else 0),
+            'proposed_value_stddev': self.proposed_value_stddev,
+            'min_proposed_value': float(self.min_proposed_value) if self.min_proposed_value is not None else None,
+            'max_proposed_value': float(self.max_proposed_value) if self.max_proposed_value is not None else None,
+            'proposals_with_increase': self.proposals_with_increase,
+            'proposals_with_decrease': self.proposals_with_decrease,
+            'average_response_time_hours': (float(self.average_response_time_hours)
+                                            if self.responded_proposals else None),
+            'unique_prestadores': self.unique_prestadores,
+            'unique_clientes': self.unique_clientes,
+        }
+
+
 class ProposalMetricsService:
     """Serviço para cálculo e manutenção de métricas de propostas"""
     
+    BACKFILL_CHUNK_DAYS = 31
+    STREAM_BATCH_SIZE = 1000
+    
     @staticmethod
     def calculate_daily_metrics(target_date: date = None) -> ProposalMetrics:
         """
@@ -94,6 +276,9 @@ class ProposalMetricsService:
         """
         Calcula métricas para um período específico
         
+        Dias são calculados a partir das propostas; semanas e meses combinam
+        as linhas diárias do período.
+        
         Args:
             period: Período para cálculo
             
@@ -101,69 +286,15 @@ class ProposalMetricsService:
             ProposalMetrics: Métricas calculadas
         """
         try:
-            # Verificar se já existe métrica para este período
-            existing_metric = ProposalMetrics.query.filter_by(
-                metric_date=period.start_date,
-                metric_type=period.metric_type
-            ).first()
-            
-            if existing_metric:
-                # Atualizar métrica existente
-                metric = existing_metric
+            if period.metric_type == 'daily':
+                partials = ProposalMetricsService._collect_daily_partials(period.start_date, period.end_date)
             else:
-                # Criar nova métrica
-                metric = ProposalMetrics(
-                    metric_date=period.start_date,
-                    metric_type=period.metric_type
-                )
+                partial = MetricsPartial()
+                for daily in ProposalMetricsService._daily_partials(period.start_date, period.end_date):
+                    partial.merge(daily)
+                partials = {period.start_date: partial}
             
-            # Definir range de datas para consultas
-            start_datetime = datetime.combine(period.start_date, datetime.min.time())
-            end_datetime = datetime.combine(period.end_date, datetime.max.time())
-            
-            # 1. Métricas básicas de propostas
-            proposals_in_period = Proposal.query.filter(
-                and_(
-                    Proposal.created_at >= start_datetime,
-                    Proposal.created_at <= end_datetime
-                )
-            ).all()
-            
-            metric.total_proposals = len(proposals_in_period)
-            
-            # 2. Contar por status usando audit logs para maior precisão
-            status_counts = ProposalMetricsService._count_proposals_by_status(
-                start_datetime, end_datetime
-            )
-            
-            metric.proposals_created = status_counts.get('created', 0)
-            metric.proposals_approved = status_counts.get('approved', 0)
-            metric.proposals_rejected = status_counts.get('rejected', 0)
-            metric.proposals_cancelled = status_counts.get('cancelled', 0)
-            
-            # 3. Métricas de valor
-            value_metrics = ProposalMetricsService._calculate_value_metrics(proposals_in_period)
-            metric.total_original_value = value_metrics['total_original']
-            metric.total_proposed_value = value_metrics['total_proposed']
-            metric.total_approved_value = value_metrics['total_approved']
-            metric.proposals_with_increase = value_metrics['increases_count']
-            metric.proposals_with_decrease = value_metrics['decreases_count']
-            
-            # 4. Tempo médio de resposta
-            metric.average_response_time_hours = ProposalMetricsService._calculate_average_response_time(
-                start_datetime, end_datetime
-            )
-            
-            # 5. Usuários únicos
-            unique_users = ProposalMetricsService._count_unique_users(proposals_in_period)
-            metric.unique_prestadores = unique_users['prestadores']
-            metric.unique_clientes = unique_users['clientes']
-            
-            # Salvar ou atualizar
-            if not existing_metric:
-                db.session.add(metric)
-            
-            metric.updated_at = datetime.utcnow()
+            metric = ProposalMetricsService._store_partials(partials, period.metric_type)[period.start_date]
             db.session.commit()
             
             metrics_logger.info(
@@ -180,123 +311,201 @@ class ProposalMetricsService:
             raise
     
     @staticmethod
-    def _count_proposals_by_status(start_datetime: datetime, end_datetime: datetime) -> Dict[str, int]:
-        """Conta propostas por status usando audit logs"""
-        # Contar ações de criação
-        created_count = ProposalAuditLog.query.filter(
-            and_(
-                ProposalAuditLog.action_type == 'created',
-                ProposalAuditLog.created_at >= start_datetime,
-                ProposalAuditLog.created_at <= end_datetime
-            )
-        ).count()
+    def _collect_daily_partials(start_date: date, end_date: date,
+                                batch_size: int = None) -> Dict[date, MetricsPartial]:
+        """
+        Calcula os agregados de cada dia de [start_date, end_date] a partir das tabelas
         
-        # Contar ações de aprovação
-        approved_count = ProposalAuditLog.query.filter(
-            and_(
-                ProposalAuditLog.action_type == 'approved',
-                ProposalAuditLog.created_at >= start_datetime,
-                ProposalAuditLog.created_at <= end_datetime
-            )
-        ).count()
+        Propostas e respostas são lidas em lotes (yield_per); contagens de ações
+        saem de um único GROUP BY nos logs de auditoria. O valor aprovado entra
+        no dia da resposta (aceitas sem responded_at: no dia da criação).
+        """
+        batch_size = batch_size or ProposalMetricsService.STREAM_BATCH_SIZE
+        days = (end_date - start_date).days + 1
+        partials = {
+            start_date + timedelta(days=offset): MetricsPartial(exact_unique=True) for offset in range(days)
+        }
         
-        # Contar ações de rejeição
-        rejected_count = ProposalAuditLog.query.filter(
-            and_(
-                ProposalAuditLog.action_type == 'rejected',
-                ProposalAuditLog.created_at >= start_datetime,
-                ProposalAuditLog.created_at <= end_datetime
+        # 1. Propostas criadas no período (valores e usuários)
+        proposals = db.session.query(
+            Proposal.created_at, Proposal.original_value, Proposal.proposed_value,
+            Proposal.status, Proposal.responded_at, Proposal.prestador_id, Invite.client_id
+        ).outerjoin(
+            Invite, Invite.id == Proposal.invite_id
+        ).filter(
+            in_period(Proposal.created_at, start_date, end_date)
+        )
+        for created_at, original_value, proposed_value, status, responded_at, prestador_id, client_id in \
+                proposals.yield_per(batch_size):
+            partial = partials[created_at.date()]
+            partial.add_proposal(original_value, proposed_value, prestador_id, client_id)
+            if status == 'accepted' and responded_at is None:
+                partial.add_approval(proposed_value)
+        
+        # 2. Respostas no período (tempo de resposta e valor aprovado)
+        responses = db.session.query(
+            Proposal.created_at, Proposal.responded_at, Proposal.status, Proposal.proposed_value
+        ).filter(
+            in_period(Proposal.responded_at, start_date, end_date),
+            Proposal.status.in_(['accepted', 'rejected'])
+        )
+        for created_at, responded_at, status, proposed_value in responses.yield_per(batch_size):
+            partial = partials[responded_at.date()]
+            if created_at:
+                partial.add_response(created_at, responded_at)
+            if status == 'accepted':
+                partial.add_approval(proposed_value)
+        
+        # 3. Ações por dia e tipo (logs de auditoria)
+        day_column = func.date(ProposalAuditLog.created_at)
+        actions = db.session.query(
+            day_column, ProposalAuditLog.action_type, func.count(ProposalAuditLog.id)
+        ).filter(
+            in_period(ProposalAuditLog.created_at, start_date, end_date),
+            ProposalAuditLog.action_type.in_(list(MetricsPartial.ACTION_FIELDS))
+        ).group_by(day_column, ProposalAuditLog.action_type)
+        for day, action_type, count in actions:
+            day = day if isinstance(day, date) else date.fromisoformat(str(day)[:10])
+            partials[day].add_actions(action_type, count)
+        
+        return partials
+    
+    @staticmethod
+    def _store_partials(partials: Dict[date, MetricsPartial], metric_type: str) -> Dict[date, ProposalMetrics]:
+        """Cria ou atualiza as linhas de proposal_metrics (sem commit)"""
+        existing = {
+            metric.metric_date: metric for metric in ProposalMetrics.query.filter(
+                ProposalMetrics.metric_type == metric_type,
+                ProposalMetrics.metric_date.in_(list(partials))
             )
-        ).count()
+        }
+        now = datetime.utcnow()
         
-        # Contar ações de cancelamento
-        cancelled_count = ProposalAuditLog.query.filter(
-            and_(
-                ProposalAuditLog.action_type == 'cancelled',
-                ProposalAuditLog.created_at >= start_datetime,
-                ProposalAuditLog.created_at <= end_datetime
-            )
-        ).count()
+        for metric_date, partial in partials.items():
+            metric = existing.get(metric_date)
+            if metric is None:
+                metric = ProposalMetrics(metric_date=metric_date, metric_type=metric_type)
+                db.session.add(metric)
+                existing[metric_date] = metric
+            partial.apply_to(metric)
+            metric.updated_at = now
         
-        return {
-            'created': created_count,
-            'approved': approved_count,
-            'rejected': rejected_count,
-            'cancelled': cancelled_count
-        }
+        return existing
+    
+    @staticmethod
+    def _written_before_day_end(metric: ProposalMetrics, day: date) -> bool:
+        """Linha calculada com o dia ainda em andamento (não inclui as ações posteriores)"""
+        return metric.updated_at is None or metric.updated_at < start_of_day(day + timedelta(days=1))
     
     @staticmethod
-    def _calculate_value_metrics(proposals: List[Proposal]) -> Dict:
-        """Calcula métricas relacionadas a valores"""
-        total_original = Decimal('0.00')
-        total_proposed = Decimal('0.00')
-        total_approved = Decimal('0.00')
-        increases_count = 0
-        decreases_count = 0
+    def _daily_partials(start_date: date, end_date: date) -> List[MetricsPartial]:
+        """
+        Agregados diários de [start_date, end_date], calculando só os dias ausentes
         
-        for proposal in proposals:
-            total_original += proposal.original_value
-            total_proposed += proposal.proposed_value
-            
-            if proposal.is_accepted:
-                total_approved += proposal.proposed_value
-            
-            if proposal.is_increase:
-                increases_count += 1
-            elif proposal.is_decrease:
-                decreases_count += 1
+        Dias sem linha, com linha anterior aos agregados combináveis (sem
+        sketch), com linha gravada antes do fim do dia (ex: painel aberto
+        durante o dia) ou a partir de hoje (ainda mudam) são recalculados em
+        uma única leitura; dias futuros são ignorados.
+        """
+        today = date.today()
+        end_date = min(end_date, today)
+        if end_date < start_date:
+            return []
         
-        return {
-            'total_original': total_original,
-            'total_proposed': total_proposed,
-            'total_approved': total_approved,
-            'increases_count': increases_count,
-            'decreases_count': decreases_count
+        by_day = {
+            metric.metric_date: metric for metric in ProposalMetrics.query.filter(
+                ProposalMetrics.metric_type == 'daily',
+                ProposalMetrics.metric_date >= start_date,
+                ProposalMetrics.metric_date <= end_date
+            )
         }
+        days = [start_date + timedelta(days=offset) for offset in range((end_date - start_date).days + 1)]
+        stale = [
+            day for day in days
+            if day not in by_day or by_day[day].prestadores_sketch is None or day >= today
+            or ProposalMetricsService._written_before_day_end(by_day[day], day)
+        ]
+        if stale:
+            fresh = ProposalMetricsService._collect_daily_partials(stale[0], stale[-1])
+            by_day.update(ProposalMetricsService._store_partials(
+                {day: fresh[day] for day in stale}, 'daily'
+            ))
+        
+        return [MetricsPartial.from_metric(by_day[day]) for day in days]
     
     @staticmethod
-    def _calculate_average_response_time(start_datetime: datetime, end_datetime: datetime) -> Optional[Decimal]:
-        """Calcula tempo médio de resposta em horas"""
-        # Buscar propostas respondidas no período
-        responded_proposals = Proposal.query.filter(
-            and_(
-                Proposal.responded_at >= start_datetime,
-                Proposal.responded_at <= end_datetime,
-                Proposal.responded_at.isnot(None),
-                Proposal.status.in_(['accepted', 'rejected'])
-            )
-        ).all()
-        
-        if not responded_proposals:
-            return None
+    def get_range_metrics(start_date: date, end_date: date) -> Dict[str, Any]:
+        """
+        Métricas de um intervalo arbitrário [start_date, end_date] combinando os dias
         
-        total_response_time = Decimal('0.00')
-        count = 0
+        Usuários únicos são estimados pelos sketches (erro típico ~3%).
         
-        for proposal in responded_proposals:
-            if proposal.created_at and proposal.responded_at:
-                response_time = proposal.responded_at - proposal.created_at
-                hours = Decimal(str(response_time.total_seconds() / 3600))
-                total_response_time += hours
-                count += 1
+        Returns:
+            Dict: Agregados do intervalo
+        """
+        try:
+            partial = MetricsPartial()
+            dailies = ProposalMetricsService._daily_partials(start_date, end_date)
+            for daily in dailies:
+                partial.merge(daily)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            metrics_logger.error(f"Erro ao combinar métricas de {start_date} a {end_date}: {str(e)}")
+            raise
         
-        return total_response_time / count if count > 0 else None
+        summary = partial.to_dict()
+        summary.update({
+            'start_date': start_date.isoformat(),
+            'end_date': end_date.isoformat(),
+            'days': len(dailies),
+        })
+        return summary
     
     @staticmethod
-    def _count_unique_users(proposals: List[Proposal]) -> Dict[str, int]:
-        """Conta usuários únicos (prestadores e clientes)"""
-        unique_prestadores = set()
-        unique_clientes = set()
+    def backfill_daily_metrics(start_date: date = None, end_date: date = None,
+                               chunk_days: int = None, batch_size: int = None) -> int:
+        """
+        Recalcula as métricas diárias de um intervalo em blocos de dias
         
-        for proposal in proposals:
-            unique_prestadores.add(proposal.prestador_id)
-            if proposal.invite and proposal.invite.client_id:
-                unique_clientes.add(proposal.invite.client_id)
+        Cada bloco lê as propostas em lotes e é gravado em sua própria
+        transação, mantendo a memória limitada ao bloco.
         
-        return {
-            'prestadores': len(unique_prestadores),
-            'clientes': len(unique_clientes)
-        }
+        Args:
+            start_date: Primeiro dia (padrão: dia da proposta mais antiga)
+            end_date: Último dia (padrão: hoje)
+            chunk_days: Dias por bloco/transação
+            batch_size: Linhas por lote de leitura
+            
+        Returns:
+            int: Quantidade de dias gravados
+        """
+        chunk_days = chunk_days or ProposalMetricsService.BACKFILL_CHUNK_DAYS
+        end_date = end_date or date.today()
+        if start_date is None:
+            first = db.session.query(func.min(Proposal.created_at)).scalar()
+            if first is None:
+                return 0
+            start_date = first.date()
+        
+        written = 0
+        chunk_start = start_date
+        while chunk_start <= end_date:
+            chunk_end = min(chunk_start + timedelta(days=chunk_days - 1), end_date)
+            try:
+                partials = ProposalMetricsService._collect_daily_partials(chunk_start, chunk_end, batch_size)
+                ProposalMetricsService._store_partials(partials, 'daily')
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                metrics_logger.error(f"Erro no backfill de {chunk_start} a {chunk_end}: {str(e)}")
+                raise
+            
+            written += len(partials)
+            metrics_logger.info(f"Backfill de métricas: {chunk_start} a {chunk_end} ({len(partials)} dias)")
+            chunk_start = chunk_end + timedelta(days=1)
+        
+        return written
     
     @staticmethod
     def update_all_metrics_for_date(target_date: date = None):
@@ -329,6 +538,7 @@ class ProposalMetricsService:
             raise
     
     @staticmethod
+    @replica_read
     def get_metrics_summary(days: int = 30) -> Dict:
         """
         Retorna resumo de métricas dos últimos N dias
@@ -401,6 +611,7 @@ class ProposalMetricsService:
         }
     
     @staticmethod
+    @replica_read
     def get_top_users_by_proposals(limit: int = 10, days: int = 30) -> Dict:
         """
         Retorna usuários com mais propostas nos últimos N dias
@@ -470,6 +681,7 @@ class ProposalMetricsService:
         }
     
     @staticmethod
+    @replica_read
     def get_value_distribution_analysis(days: int = 30) -> Dict:
         """
         Analisa distribuição de valores das propostas
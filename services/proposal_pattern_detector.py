@@ -0,0 +1,848 @@
+#!/usr/bin/env python3.11
+# -*- coding: utf-8 -*-
+
+"""
+ProposalPatternDetector - Detecção assíncrona de padrões suspeitos em propostas
+
+O ProposalAuditService apenas registra a ação: o evento correspondente é
+entregue a este detector depois do commit da transação (ações desfeitas não
+são analisadas). Uma thread consome os eventos em micro-lotes e avalia, sobre
+o mesmo estado em memória, as verificações do ProposalAuditService e as
+condições de alerta do ProposalAlertService:
+
+- Janelas deslizantes por usuário (propostas criadas no último dia, respostas
+  do cliente nos últimos 30 dias)
+- Contadores do sistema (propostas criadas por dia na última semana,
+  respostas das últimas 24h)
+- Índice dos alertas ativos por (tipo, usuário ou proposta)
+
+Funcionamento:
+- A primeira vez que um usuário aparece, a janela é carregada de
+  proposal_audit_logs (uma consulta por lote, fora da requisição); janelas e
+  contadores do sistema são recarregados depois de `WINDOW_TTL` segundos,
+  para incluir as ações processadas pelos outros workers
+- Verificações de valor e de tempo de resposta usam só os dados do evento
+- Um alerta não se repete enquanto houver outro ativo para o mesmo sujeito
+  (na janela que o gerou, para frequência e taxas): os candidatos do lote são
+  conferidos no índice e, os que passarem, em proposal_alerts, em uma única
+  consulta — alertas gravados por outros workers também contam
+- A verificação periódica (ProposalAlertService.check_all_alert_conditions)
+  recarrega o estado e reavalia usuários, sistema e propostas das últimas 24h
+- Com PROPOSAL_PATTERN_ASYNC desativado (testes), o lote é processado no
+  próprio commit
+"""
+
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+from typing import Any, Deque, Dict, List, Optional, Tuple
+import atexit
+import json
+import queue
+import threading
+import time
+import logging
+
+from sqlalchemy import event, select, func, and_, or_
+from sqlalchemy.orm import Session
+
+from models import db, Proposal, ProposalAuditLog, ProposalAlert
+from services.proposal_alert_service import ProposalAlertService
+from services.time_window import in_period, start_of_day
+
+logger = logging.getLogger(__name__)
+
+# Chave em session.info com os eventos da transação em andamento
+_PENDING_KEY = 'proposal_pattern_events'
+
+HOUR = timedelta(hours=1)
+DAY = timedelta(days=1)
+WEEK = timedelta(days=7)
+RESPONSE_WINDOW = timedelta(days=30)
+
+# Período em que um alerta ativo impede outro igual (ausente: enquanto estiver ativo)
+DEDUP_WINDOWS = {
+    'high_frequency_proposals_hour': HOUR,
+    'high_frequency_proposals_day': DAY,
+    'high_rejection_rate': RESPONSE_WINDOW,
+    'system_high_rejection_rate': DAY,
+}
+# Alertas de uma proposta (os demais são de um usuário ou do sistema)
+PROPOSAL_ALERTS = ('unusual_high_value', 'excessive_value_increase', 'very_fast_response')
+MIN_USER_RESPONSES = 5  # Respostas mínimas para avaliar a taxa de rejeição do cliente
+MIN_SYSTEM_RESPONSES = 10
+
+AlertKey = Tuple[str, Optional[int], Optional[int]]  # (tipo, usuário, proposta)
+
+
+def _threshold(name: str) -> Any:
+    return ProposalAlertService.ALERT_THRESHOLDS[name].value
+
+
+def _as_date(value) -> date:
+    return value if isinstance(value, date) else date.fromisoformat(str(value)[:10])
+
+
+@dataclass
+class ProposalActionEvent:
+    """Dados de uma ação de proposta necessários à detecção"""
+    proposal_id: int
+    invite_id: int
+    action_type: str
+    actor_user_id: Optional[int]
+    actor_role: str
+    timestamp: datetime
+    original_value: Optional[Decimal] = None
+    proposed_value: Optional[Decimal] = None
+    value_difference: Optional[Decimal] = None
+    created_at: Optional[datetime] = None
+    responded_at: Optional[datetime] = None
+
+    def as_proposal(self) -> SimpleNamespace:
+        """Visão com os atributos de Proposal usados pelas verificações"""
+        return SimpleNamespace(
+            id=self.proposal_id,
+            invite_id=self.invite_id,
+            original_value=self.original_value,
+            proposed_value=self.proposed_value,
+            value_difference=self.value_difference,
+            created_at=self.created_at,
+            responded_at=self.responded_at,
+        )
+
+
+@dataclass
+class _UserWindow:
+    """Janelas deslizantes de um usuário"""
+    created: Deque[datetime] = field(default_factory=deque)
+    responses: Deque[Tuple[datetime, bool]] = field(default_factory=deque)  # (quando, rejeitou)
+    rejections: int = 0
+    loaded_at: float = field(default_factory=time.monotonic)
+
+    def is_stale(self, ttl: float) -> bool:
+        return time.monotonic() - self.loaded_at >= ttl
+
+    def prune(self, now: datetime):
+        while self.created and self.created[0] < now - DAY:
+            self.created.popleft()
+        while self.responses and self.responses[0][0] < now - RESPONSE_WINDOW:
+            _, rejected = self.responses.popleft()
+            self.rejections -= rejected
+
+    def add_response(self, when: datetime, rejected: bool):
+        self.responses.append((when, rejected))
+        self.rejections += rejected
+
+    def created_since(self, since: datetime) -> int:
+        return sum(1 for when in reversed(self.created) if when >= since)
+
+
+class ProposalPatternDetector:
+    """Fila, janelas por usuário, contadores do sistema e gravação dos alertas em lote"""
+
+    BATCH_SIZE = 500
+    BATCH_INTERVAL = 0.5  # segundos de espera por mais eventos antes de processar
+    MAX_PENDING = 10000
+    MAX_USERS = 50000  # Janelas mantidas em memória (as menos recentes são descartadas)
+    WINDOW_TTL = 60.0  # Segundos até recarregar janelas e contadores (ações dos outros workers)
+
+    _queue: 'queue.Queue[ProposalActionEvent]' = queue.Queue(maxsize=MAX_PENDING)
+    _thread: Optional[threading.Thread] = None
+    _app = None
+    _lock = threading.Lock()  # Inicialização da thread
+    _process_lock = threading.RLock()  # Um lote por vez (thread, flush ou verificação periódica)
+    _windows: 'OrderedDict[int, _UserWindow]' = OrderedDict()
+    _daily_created: Dict[date, int] = {}
+    _system_responses: Deque[Tuple[datetime, bool]] = deque()  # (quando, rejeitou)
+    _system_rejections = 0
+    _system_loaded_at: Optional[float] = None
+    _active: Dict[AlertKey, datetime] = {}  # Criação do alerta ativo mais recente
+    _stats: Dict[str, int] = {'events': 0, 'batches': 0, 'evaluations': 0, 'alerts': 0,
+                              'dropped': 0, 'errors': 0}
+
+    # ------------------------------------------------------------------
+    # Entrada dos eventos
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def track(cls, session, action_event: ProposalActionEvent):
+        """Associa o evento à transação; entregue ao detector no commit"""
+        session.info.setdefault(_PENDING_KEY, []).append(action_event)
+
+    @classmethod
+    def _after_commit(cls, session):
+        events = session.info.pop(_PENDING_KEY, None)
+        if events:
+            cls.submit(events)
+
+    @staticmethod
+    def _after_soft_rollback(session, previous_transaction):
+        # Savepoint desfeito não descarta os eventos da transação externa
+        if not previous_transaction.nested:
+            session.info.pop(_PENDING_KEY, None)
+
+    @classmethod
+    def _async_enabled(cls) -> bool:
+        from flask import current_app, has_app_context
+
+        if not has_app_context():
+            return False
+        return current_app.config.get('PROPOSAL_PATTERN_ASYNC', True)
+
+    @classmethod
+    def _ensure_started(cls):
+        if cls._thread is not None and cls._thread.is_alive():
+            return
+        from flask import current_app
+
+        with cls._lock:
+            if cls._thread is not None and cls._thread.is_alive():
+                return
+            cls._app = current_app._get_current_object()
+            cls._thread = threading.Thread(target=cls._run, name='proposal-pattern-detector', daemon=True)
+            cls._thread.start()
+            atexit.register(cls.flush)
+
+    @classmethod
+    def submit(cls, events: List[ProposalActionEvent]):
+        """Enfileira eventos já confirmados; sem fila assíncrona, processa na hora"""
+        if not cls._async_enabled():
+            try:
+                cls.process(events)
+            except Exception as e:
+                cls._stats['errors'] += 1
+                logger.error(f"Erro ao processar {len(events)} eventos de propostas: {str(e)}")
+            return
+
+        cls._ensure_started()
+        for action_event in events:
+            try:
+                cls._queue.put_nowait(action_event)
+            except queue.Full:
+                # Análise é secundária: não segura a requisição
+                cls._stats['dropped'] += 1
+
+    # ------------------------------------------------------------------
+    # Consumo em micro-lotes
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def _drain(cls, first: Optional[ProposalActionEvent] = None) -> List[ProposalActionEvent]:
+        events = [first] if first is not None else []
+        while len(events) < cls.BATCH_SIZE:
+            try:
+                events.append(cls._queue.get_nowait())
+            except queue.Empty:
+                break
+        return events
+
+    @classmethod
+    def _run(cls):
+        while True:
+            first = cls._queue.get()
+            # Pequena espera para agrupar eventos próximos no mesmo lote
+            time.sleep(cls.BATCH_INTERVAL)
+            events = cls._drain(first)
+            try:
+                cls.process(events)
+            except Exception as e:
+                cls._stats['errors'] += 1
+                logger.error(f"Erro ao processar {len(events)} eventos de propostas: {str(e)}")
+
+    @classmethod
+    def flush(cls) -> int:
+        """Processa os eventos pendentes no chamador; retorna quantos foram processados"""
+        processed = 0
+        while True:
+            events = cls._drain()
+            if not events:
+                return processed
+            cls.process(events)
+            processed += len(events)
+
+    @classmethod
+    def _app_context(cls):
+        from flask import has_app_context
+        from contextlib import nullcontext
+
+        return nullcontext() if has_app_context() or cls._app is None else cls._app.app_context()
+
+    @classmethod
+    def process(cls, events: List[ProposalActionEvent]) -> List[Dict[str, Any]]:
+        """
+        Atualiza janelas e contadores com um lote de eventos e grava os alertas gerados
+
+        Returns:
+            List[Dict]: Alertas gravados
+        """
+        events = sorted(events, key=lambda e: e.timestamp)
+        if not events:
+            return []
+
+        with cls._process_lock, cls._app_context():
+            if cls._system_loaded_at is None or time.monotonic() - cls._system_loaded_at >= cls.WINDOW_TTL:
+                cls._load_system(events[0].timestamp)
+            first_seen: Dict[int, datetime] = {}
+            for action_event in events:
+                window = cls._windows.get(action_event.actor_user_id)
+                if action_event.actor_user_id and (window is None or window.is_stale(cls.WINDOW_TTL)):
+                    first_seen.setdefault(action_event.actor_user_id, action_event.timestamp)
+            if first_seen:
+                cls._load_windows(first_seen)
+
+            candidates = []
+            for action_event in events:
+                candidates.extend((action_event.timestamp, alert) for alert in cls._evaluate(action_event))
+            created_at = datetime.utcnow()
+            alerts = cls._claim(candidates, created_at)
+            cls._write_alerts(alerts, created_at)
+
+        cls._stats['events'] += len(events)
+        cls._stats['batches'] += 1
+        return alerts
+
+    @classmethod
+    def evaluate(cls, now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """
+        Recarrega o estado das tabelas e reavalia todas as condições
+        (verificação periódica)
+
+        Returns:
+            List[Dict]: Alertas gravados
+        """
+        now = now or datetime.utcnow()
+        with cls._process_lock, cls._app_context():
+            cls._load_system(now)
+            cls._load_windows(now=now)
+            cls._prune(now)
+
+            candidates = []
+            for user_id, window in list(cls._windows.items()):
+                candidates.extend((now, alert) for alert in cls._user_alerts(user_id, window, now))
+            candidates.extend((now, alert) for alert in cls._system_alerts(now))
+            candidates.extend((now, alert) for alert in cls._recent_proposal_alerts(now))
+
+            created_at = datetime.utcnow()
+            alerts = cls._claim(candidates, created_at)
+            cls._write_alerts(alerts, created_at)
+
+        cls._stats['evaluations'] += 1
+        return alerts
+
+    # ------------------------------------------------------------------
+    # Carga das tabelas
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def _load_windows(cls, first_seen: Optional[Dict[int, datetime]] = None, now: Optional[datetime] = None):
+        """
+        Carrega de proposal_audit_logs as janelas dos usuários de `first_seen`
+        (só o histórico anterior à primeira ação de cada um no lote) ou, sem
+        `first_seen`, de todos os usuários com ações até `now`
+        """
+        table = ProposalAuditLog.__table__
+        if first_seen is None:
+            users = table.c.actor_user_id.isnot(None)
+            since = now - RESPONSE_WINDOW
+        else:
+            users = table.c.actor_user_id.in_(list(first_seen))
+            since = min(first_seen.values()) - RESPONSE_WINDOW
+        with db.engine.connect() as connection:
+            rows = connection.execute(
+                select(table.c.actor_user_id, table.c.action_type, table.c.created_at)
+                .where(
+                    and_(
+                        users,
+                        table.c.created_at >= since,
+                        or_(
+                            table.c.action_type == 'created',
+                            and_(table.c.actor_role == 'cliente',
+                                 table.c.action_type.in_(['approved', 'rejected'])),
+                        ),
+                    )
+                )
+                .order_by(table.c.created_at)
+            ).all()
+
+        windows = {user_id: _UserWindow() for user_id in first_seen or ()}
+        for user_id, action_type, created_at in rows:
+            # Os eventos do lote entram pela avaliação
+            cutoff = first_seen[user_id] if first_seen is not None else now
+            if created_at >= cutoff:
+                continue
+            window = windows.get(user_id) or windows.setdefault(user_id, _UserWindow())
+            if action_type == 'created':
+                if created_at >= cutoff - DAY:
+                    window.created.append(created_at)
+            else:
+                window.add_response(created_at, action_type == 'rejected')
+
+        for user_id, window in windows.items():
+            cls._windows[user_id] = window
+            cls._windows.move_to_end(user_id)
+        while len(cls._windows) > cls.MAX_USERS:
+            cls._windows.popitem(last=False)
+
+    @classmethod
+    def _load_system(cls, now: datetime):
+        """Carrega os contadores do sistema com as ações anteriores a `now`"""
+        table = ProposalAuditLog.__table__
+        day_column = func.date(table.c.created_at)
+        with db.engine.connect() as connection:
+            daily = connection.execute(
+                select(day_column, func.count())
+                .where(and_(table.c.action_type == 'created',
+                            table.c.created_at >= start_of_day(now.date() - WEEK),
+                            table.c.created_at < now))
+                .group_by(day_column)
+            ).all()
+            responses = connection.execute(
+                select(table.c.action_type, table.c.created_at)
+                .where(and_(table.c.action_type.in_(['approved', 'rejected']),
+                            table.c.created_at >= now - DAY,
+                            table.c.created_at < now))
+                .order_by(table.c.created_at)
+            ).all()
+
+        cls._daily_created = {_as_date(day): count for day, count in daily}
+        cls._system_responses = deque()
+        cls._system_rejections = 0
+        for action_type, created_at in responses:
+            cls._add_system_response(created_at, action_type == 'rejected')
+        cls._system_loaded_at = time.monotonic()
+
+    @classmethod
+    def _recent_proposal_alerts(cls, now: datetime) -> List[Dict[str, Any]]:
+        """Valores e tempos de resposta das propostas criadas ou respondidas nas últimas 24h"""
+        proposals = Proposal.__table__
+        with db.engine.connect() as connection:
+            rows = connection.execute(
+                select(proposals.c.id, proposals.c.invite_id, proposals.c.original_value,
+                       proposals.c.proposed_value, proposals.c.created_at, proposals.c.responded_at)
+                .where(or_(in_period(proposals.c.created_at, now - DAY, now),
+                           in_period(proposals.c.responded_at, now - DAY, now)))
+            ).all()
+
+        alerts = []
+        for row in rows:
+            proposal = SimpleNamespace(**row._mapping, value_difference=row.proposed_value - row.original_value)
+            if proposal.created_at and proposal.created_at >= now - DAY:
+                alerts.extend(cls._value_alerts(proposal))
+            if proposal.created_at and proposal.responded_at and proposal.responded_at >= now - DAY:
+                alerts.extend(cls._response_alerts(proposal))
+        return alerts
+
+    # ------------------------------------------------------------------
+    # Estado
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def _user_window(cls, user_id: int) -> _UserWindow:
+        window = cls._windows.get(user_id)
+        if window is None:
+            window = cls._windows[user_id] = _UserWindow()
+            while len(cls._windows) > cls.MAX_USERS:
+                cls._windows.popitem(last=False)
+        else:
+            cls._windows.move_to_end(user_id)
+        return window
+
+    @classmethod
+    def _add_system_response(cls, when: datetime, rejected: bool):
+        cls._system_responses.append((when, rejected))
+        cls._system_rejections += rejected
+
+    @classmethod
+    def _prune_system(cls, now: datetime):
+        while cls._system_responses and cls._system_responses[0][0] < now - DAY:
+            _, rejected = cls._system_responses.popleft()
+            cls._system_rejections -= rejected
+        for day in [day for day in cls._daily_created if day < now.date() - WEEK]:
+            del cls._daily_created[day]
+
+    @classmethod
+    def _prune(cls, now: datetime):
+        for user_id, window in list(cls._windows.items()):
+            window.prune(now)
+            if not window.created and not window.responses:
+                del cls._windows[user_id]
+        cls._prune_system(now)
+        # Alertas mais antigos que a maior janela não impedem mais nada
+        for key in [key for key, created_at in cls._active.items() if created_at < now - RESPONSE_WINDOW]:
+            del cls._active[key]
+
+    # ------------------------------------------------------------------
+    # Avaliação
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def _evaluate(cls, action_event: ProposalActionEvent) -> List[Dict[str, Any]]:
+        """Registra uma ação e aplica as verificações que ela pode ter disparado"""
+        from services.proposal_audit_service import ProposalAuditService
+
+        user_id = action_event.actor_user_id
+        now = action_event.timestamp
+        window = cls._user_window(user_id) if user_id else None
+        if window is not None:
+            window.prune(now)
+        proposal = action_event.as_proposal()
+        alerts = []
+
+        if action_event.action_type == 'created':
+            cls._daily_created[now.date()] = cls._daily_created.get(now.date(), 0) + 1
+            if window is not None:
+                window.created.append(now)
+                alerts.extend(ProposalAuditService._check_proposal_frequency(
+                    user_id, proposal, window.created_since(now - HOUR), len(window.created)))
+            if proposal.proposed_value is not None:
+                alerts.extend(ProposalAuditService._check_suspicious_values(proposal))
+            alerts.extend(cls._value_alerts(proposal))
+
+        elif action_event.action_type in ('approved', 'rejected'):
+            rejected = action_event.action_type == 'rejected'
+            cls._add_system_response(now, rejected)
+            alerts.extend(ProposalAuditService._check_response_time(proposal))
+            if proposal.created_at and proposal.responded_at:
+                alerts.extend(cls._response_alerts(proposal))
+            if window is not None and action_event.actor_role == 'cliente':
+                window.add_response(now, rejected)
+                if rejected:
+                    alerts.extend(ProposalAuditService._check_rejection_rate(
+                        user_id, window.rejections, len(window.responses)))
+
+        else:
+            return alerts
+
+        if window is not None:
+            alerts.extend(cls._user_alerts(user_id, window, now))
+        cls._prune_system(now)
+        alerts.extend(cls._system_alerts(now))
+        return alerts
+
+    @staticmethod
+    def _user_alerts(user_id: int, window: _UserWindow, now: datetime) -> List[Dict[str, Any]]:
+        """Frequência de propostas e taxa de rejeição de um usuário (limites do ProposalAlertService)"""
+        alerts = []
+
+        hour_limit = _threshold('max_proposals_per_hour_user')
+        count = window.created_since(now - HOUR)
+        if count > hour_limit:
+            alerts.append(dict(
+                alert_type='high_frequency_proposals_hour',
+                severity='medium',
+                title=f'Usuário criou {count} propostas na última hora',
+                description=f'Usuário {user_id} excedeu o limite de propostas por hora ({count} > {hour_limit})',
+                user_id=user_id,
+                pattern_data={'proposals_count': count, 'time_period': 'last_hour', 'threshold': hour_limit},
+                threshold_exceeded='max_proposals_per_hour_user'
+            ))
+
+        day_limit = _threshold('max_proposals_per_day_user')
+        count = window.created_since(now - DAY)
+        if count > day_limit:
+            alerts.append(dict(
+                alert_type='high_frequency_proposals_day',
+                severity='high',
+                title=f'Usuário criou {count} propostas no último dia',
+                description=f'Usuário {user_id} excedeu o limite de propostas por dia ({count} > {day_limit})',
+                user_id=user_id,
+                pattern_data={'proposals_count': count, 'time_period': 'last_day', 'threshold': day_limit},
+                threshold_exceeded='max_proposals_per_day_user'
+            ))
+
+        total, rejected = len(window.responses), window.rejections
+        rate_limit = _threshold('max_rejection_rate_percentage')
+        rejection_rate = (rejected / total) * 100 if total else 0
+        if total >= MIN_USER_RESPONSES and rejection_rate > rate_limit:
+            alerts.append(dict(
+                alert_type='high_rejection_rate',
+                severity='medium',
+                title=f'Cliente com alta taxa de rejeição: {rejection_rate:.1f}%',
+                description=f'Cliente {user_id} tem taxa de rejeição de {rejection_rate:.1f}% ({rejected}/{total} propostas) nos últimos 30 dias',
+                user_id=user_id,
+                pattern_data={
+                    'rejection_rate': rejection_rate,
+                    'rejected_count': rejected,
+                    'total_responses': total,
+                    'period_days': 30,
+                    'threshold': rate_limit
+                },
+                threshold_exceeded='max_rejection_rate_percentage'
+            ))
+
+        return alerts
+
+    @classmethod
+    def _system_alerts(cls, now: datetime) -> List[Dict[str, Any]]:
+        """Pico de propostas do dia e taxa de rejeição das últimas 24h"""
+        alerts = []
+        today = now.date()
+
+        proposals_today = cls._daily_created.get(today, 0)
+        proposals_last_week = sum(cls._daily_created.get(today - timedelta(days=offset), 0)
+                                  for offset in range(1, 8))
+        avg_daily_last_week = proposals_last_week / 7 if proposals_last_week > 0 else 1
+        increase_percentage = ((proposals_today - avg_daily_last_week) / avg_daily_last_week) * 100
+        spike_limit = _threshold('system_proposal_spike_percentage')
+        if increase_percentage > spike_limit:
+            alerts.append(dict(
+                alert_type='system_proposal_spike',
+                severity='high',
+                title=f'Pico de propostas no sistema: {increase_percentage:.1f}% de aumento',
+                description=f'Sistema registrou {proposals_today} propostas hoje vs média de {avg_daily_last_week:.1f} da semana passada ({increase_percentage:.1f}% de aumento)',
+                pattern_data={
+                    'proposals_today': proposals_today,
+                    'avg_daily_last_week': avg_daily_last_week,
+                    'increase_percentage': increase_percentage,
+                    'threshold': spike_limit
+                },
+                threshold_exceeded='system_proposal_spike_percentage'
+            ))
+
+        total, rejected = len(cls._system_responses), cls._system_rejections
+        rate_limit = _threshold('system_high_rejection_rate')
+        if total >= MIN_SYSTEM_RESPONSES:
+            rejection_rate = (rejected / total) * 100
+            if rejection_rate > rate_limit:
+                alerts.append(dict(
+                    alert_type='system_high_rejection_rate',
+                    severity='medium',
+                    title=f'Alta taxa de rejeição sistêmica: {rejection_rate:.1f}%',
+                    description=f'Sistema tem taxa de rejeição de {rejection_rate:.1f}% nas últimas 24h ({rejected}/{total} propostas)',
+                    pattern_data={
+                        'rejection_rate': rejection_rate,
+                        'rejected_count': rejected,
+                        'total_responses': total,
+                        'period_hours': 24,
+                        'threshold': rate_limit
+                    },
+                    threshold_exceeded='system_high_rejection_rate'
+                ))
+
+        return alerts
+
+    @staticmethod
+    def _value_alerts(proposal) -> List[Dict[str, Any]]:
+        """Valor muito alto ou aumento excessivo de uma proposta (limites do ProposalAlertService)"""
+        alerts = []
+        if proposal.proposed_value is None:
+            return alerts
+
+        high_value = _threshold('unusual_high_value')
+        if proposal.proposed_value > high_value:
+            alerts.append(dict(
+                alert_type='unusual_high_value',
+                severity='medium',
+                title=f'Valor muito alto: R$ {proposal.proposed_value}',
+                description=f'Proposta {proposal.id} tem valor de R$ {proposal.proposed_value}, acima do limite de R$ {high_value}',
+                proposal_id=proposal.id,
+                invite_id=proposal.invite_id,
+                pattern_data={'proposed_value': float(proposal.proposed_value), 'threshold': float(high_value)},
+                threshold_exceeded='unusual_high_value'
+            ))
+
+        if proposal.original_value and proposal.original_value > 0 and proposal.value_difference is not None:
+            increase_percentage = (proposal.value_difference / proposal.original_value) * 100
+            increase_limit = _threshold('max_value_increase_percentage')
+            if increase_percentage > increase_limit:
+                alerts.append(dict(
+                    alert_type='excessive_value_increase',
+                    severity='high',
+                    title=f'Aumento excessivo: {increase_percentage:.1f}%',
+                    description=f'Proposta {proposal.id} tem aumento de {increase_percentage:.1f}% (R$ {proposal.original_value} -> R$ {proposal.proposed_value})',
+                    proposal_id=proposal.id,
+                    invite_id=proposal.invite_id,
+                    pattern_data={
+                        'original_value': float(proposal.original_value),
+                        'proposed_value': float(proposal.proposed_value),
+                        'increase_percentage': float(increase_percentage),
+                        'threshold': increase_limit
+                    },
+                    threshold_exceeded='max_value_increase_percentage'
+                ))
+
+        return alerts
+
+    @staticmethod
+    def _response_alerts(proposal) -> List[Dict[str, Any]]:
+        """Resposta do cliente abaixo do tempo mínimo (limite do ProposalAlertService)"""
+        response_seconds = (proposal.responded_at - proposal.created_at).total_seconds()
+        limit = _threshold('min_response_time_seconds')
+        if response_seconds >= limit:
+            return []
+        return [dict(
+            alert_type='very_fast_response',
+            severity='medium',
+            title=f'Resposta muito rápida: {response_seconds:.0f} segundos',
+            description=f'Proposta {proposal.id} foi respondida em {response_seconds:.0f} segundos, abaixo do limite de {limit} segundos',
+            proposal_id=proposal.id,
+            invite_id=proposal.invite_id,
+            pattern_data={
+                'response_time_seconds': response_seconds,
+                'threshold': limit,
+                'created_at': proposal.created_at.isoformat(),
+                'responded_at': proposal.responded_at.isoformat()
+            },
+            threshold_exceeded='min_response_time_seconds'
+        )]
+
+    # ------------------------------------------------------------------
+    # Índice de alertas ativos
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _key(alert_type: str, user_id: Optional[int], proposal_id: Optional[int]) -> AlertKey:
+        """Sujeito do alerta: a proposta, para os de proposta; o usuário (ou o sistema) para os demais"""
+        if alert_type in PROPOSAL_ALERTS:
+            return alert_type, None, proposal_id
+        return alert_type, user_id, None
+
+    @staticmethod
+    def _alert_key(alert: Dict[str, Any]) -> AlertKey:
+        return ProposalPatternDetector._key(alert['alert_type'], alert.get('user_id'), alert.get('proposal_id'))
+
+    @classmethod
+    def _remember(cls, key: AlertKey, created_at: datetime):
+        if cls._active.get(key, datetime.min) < created_at:
+            cls._active[key] = created_at
+
+    @classmethod
+    def _is_active(cls, key: AlertKey, now: datetime) -> bool:
+        """Há alerta ativo para o sujeito, criado dentro da janela do tipo?"""
+        created_at = cls._active.get(key)
+        if created_at is None:
+            return False
+        alert_type = key[0]
+        if alert_type == 'system_proposal_spike':
+            return created_at >= start_of_day(now.date())
+        window = DEDUP_WINDOWS.get(alert_type)
+        return window is None or created_at >= now - window
+
+    @classmethod
+    def _load_active(cls, keys: List[AlertKey]):
+        """Traz para o índice os alertas ativos de proposal_alerts com estas chaves (uma consulta)"""
+        table = ProposalAlert.__table__
+        conditions = []
+        for alert_type, user_id, proposal_id in keys:
+            column, value = ((table.c.proposal_id, proposal_id) if alert_type in PROPOSAL_ALERTS
+                             else (table.c.user_id, user_id))
+            conditions.append(and_(table.c.alert_type == alert_type,
+                                   column.is_(None) if value is None else column == value))
+        with db.engine.connect() as connection:
+            rows = connection.execute(
+                select(table.c.alert_type, table.c.user_id, table.c.proposal_id, table.c.created_at)
+                .where(and_(table.c.status == 'active', or_(*conditions)))
+            ).all()
+        for alert_type, user_id, proposal_id, created_at in rows:
+            cls._remember(cls._key(alert_type, user_id, proposal_id), created_at)
+
+    @classmethod
+    def _claim(cls, candidates: List[Tuple[datetime, Dict[str, Any]]],
+               created_at: datetime) -> List[Dict[str, Any]]:
+        """
+        Alertas a gravar: um por sujeito no lote, sem alerta ativo no índice
+        nem em proposal_alerts (gravado por este ou por outro worker)
+
+        Args:
+            candidates: (instante da avaliação, alerta)
+            created_at: Criação registrada para os alertas gravados
+        """
+        pending: Dict[AlertKey, Dict[str, Any]] = {}
+        for now, alert in candidates:
+            key = cls._alert_key(alert)
+            if key not in pending and not cls._is_active(key, now):
+                pending[key] = alert
+        if not pending:
+            return []
+
+        cls._load_active(list(pending))
+        alerts = []
+        for key, alert in pending.items():
+            if cls._is_active(key, created_at):
+                continue
+            cls._remember(key, created_at)
+            alerts.append(alert)
+        return alerts
+
+    @classmethod
+    def alert_closed(cls, alert: ProposalAlert):
+        """Remove do índice um alerta resolvido ou marcado como falso positivo"""
+        key = cls._key(alert.alert_type, alert.user_id, alert.proposal_id)
+        with cls._process_lock:
+            if cls._active.get(key) == alert.created_at:
+                del cls._active[key]
+
+    # ------------------------------------------------------------------
+    # Gravação
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def _write_alerts(cls, alerts: List[Dict[str, Any]], now: Optional[datetime] = None):
+        """Grava os alertas do lote em um único INSERT"""
+        from services.proposal_audit_service import audit_logger
+
+        if not alerts:
+            return
+        now = now or datetime.utcnow()
+        columns = ('user_id', 'proposal_id', 'invite_id', 'pattern_data', 'threshold_exceeded')
+        rows = []
+        for alert in alerts:
+            row = {**{column: None for column in columns}, **alert, 'status': 'active', 'created_at': now}
+            if not isinstance(row['pattern_data'], (str, type(None))):
+                row['pattern_data'] = json.dumps(row['pattern_data'])
+            rows.append(row)
+        with db.engine.begin() as connection:
+            connection.execute(ProposalAlert.__table__.insert(), rows)
+        cls._stats['alerts'] += len(rows)
+
+        for alert in alerts:
+            audit_logger.warning(
+                f"SUSPICIOUS_PATTERN_DETECTED: {alert['alert_type']} | "
+                f"Severity:{alert['severity']} | "
+                f"Title:{alert['title']} | "
+                f"User:{alert.get('user_id')} | "
+                f"Proposal:{alert.get('proposal_id')}"
+            )
+
+    # ------------------------------------------------------------------
+    # Manutenção
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def reset(cls):
+        """Descarta janelas, contadores, índice e eventos pendentes (testes e reconfiguração)"""
+        with cls._process_lock:
+            while cls._drain():
+                pass
+            cls._windows.clear()
+            cls._daily_created = {}
+            cls._system_responses = deque()
+            cls._system_rejections = 0
+            cls._system_loaded_at = None
+            cls._active.clear()
+
+    @classmethod
+    def get_stats(cls) -> Dict[str, Any]:
+        """Métricas do detector"""
+        stats = dict(cls._stats)
+        stats['pending'] = cls._queue.qsize()
+        stats['tracked_users'] = len(cls._windows)
+        stats['active_alerts'] = len(cls._active)
+        stats['running'] = bool(cls._thread and cls._thread.is_alive())
+        return stats
+
+    @classmethod
+    def register(cls):
+        """Registra os ouvintes de sessão (idempotente)"""
+        listeners = (
+            ('after_commit', cls._after_commit),
+            ('after_soft_rollback', cls._after_soft_rollback),
+        )
+        for name, listener in listeners:
+            if not event.contains(Session, name, listener):
+                event.listen(Session, name, listener)
+
+
+ProposalPatternDetector.register()
@@ -0,0 +1,349 @@
+#!/usr/bin/env python3.11
+# -*- coding: utf-8 -*-
+
+"""
+ProviderStatsService - Estatísticas acumuladas por prestador
+
+Mantém as tabelas provider_stats e provider_client_stats. A dashboard do
+prestador recalculava taxa de conclusão, ganho médio por ordem e clientes
+atendidos com consultas de agregação sobre orders e transactions a cada
+carregamento.
+
+Funcionamento:
+- O ouvinte de flush compartilhado (RowChangeFeed, também usado pelo rollup
+  mensal) entrega, para cada Order/Transaction nova, alterada ou removida,
+  os valores antes e depois da mudança; a diferença entre as contribuições
+  (conclusão, cancelamento, contestação, recebimentos) é aplicada com
+  UPSERT na mesma transação
+- Clientes distintos são contados a partir de provider_client_stats
+  (ordens concluídas por par prestador/cliente)
+- Taxa de conclusão, ganho médio e clientes atendidos ficam gravados e
+  indexados: leitura pela chave primária e ordenação/filtro de prestadores
+  sem varrer orders
+- Alterações em massa (query.update/delete) não passam pelo ouvinte: para
+  elas, e para popular as tabelas pela primeira vez, use `rebuild`
+  (ou python rebuild_provider_stats.py)
+"""
+
+from collections import defaultdict
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+import logging
+
+from sqlalchemy import case, func, select, update
+
+from models import db, Order, Transaction, ProviderStats, ProviderClientStats
+from services.session_hooks import RowChange, RowChangeFeed, upsert_increment
+
+logger = logging.getLogger(__name__)
+
+# Atributos que definem a contribuição de cada modelo
+ORDER_FIELDS = ('provider_id', 'client_id', 'status')
+TRANSACTION_FIELDS = ('user_id', 'type', 'amount')
+
+DISPUTED_STATUSES = ('disputada', 'contestada', 'resolvida')
+
+# Colunas pelas quais os prestadores podem ser ordenados
+SORTABLE_COLUMNS = ('completion_rate', 'average_received', 'clients_served', 'completed_orders')
+
+
+class ProviderStatsService:
+    """Serviço de manutenção e leitura das estatísticas por prestador"""
+
+    # =========================================================================
+    # Contribuição de cada registro
+    # =========================================================================
+
+    @staticmethod
+    def order_contribution(values: Dict) -> Tuple[Dict, Dict]:
+        """
+        Contribuição de uma ordem
+
+        Returns:
+            tupla ({provider_id: {coluna: valor}}, {(provider_id, client_id): concluídas})
+        """
+        providers = defaultdict(lambda: defaultdict(Decimal))
+        pairs = defaultdict(int)
+        provider_id = values.get('provider_id')
+        if not provider_id:
+            return providers, pairs
+
+        status = values.get('status')
+        providers[provider_id]['total_orders'] += 1
+        if status == 'concluida':
+            providers[provider_id]['completed_orders'] += 1
+            if values.get('client_id'):
+                pairs[(provider_id, values['client_id'])] += 1
+        elif status == 'cancelada':
+            providers[provider_id]['cancelled_orders'] += 1
+        elif status in DISPUTED_STATUSES:
+            providers[provider_id]['disputed_orders'] += 1
+        return providers, pairs
+
+    @staticmethod
+    def transaction_contribution(values: Dict) -> Tuple[Dict, Dict]:
+        """Contribuição de uma transação (apenas recebimentos)"""
+        providers = defaultdict(lambda: defaultdict(Decimal))
+        if values.get('type') == 'recebimento' and values.get('user_id'):
+            providers[values['user_id']]['receipts_count'] += 1
+            providers[values['user_id']]['total_received'] += Decimal(values.get('amount') or 0)
+        return providers, {}
+
+    @classmethod
+    def collect_deltas(cls, changes: Iterable[RowChange]) -> Tuple[Dict, Dict]:
+        """
+        Calcula os incrementos para as mudanças de um flush
+
+        Returns:
+            tupla ({provider_id: {coluna: incremento}}, {(provider_id, client_id): incremento})
+        """
+        provider_deltas = defaultdict(lambda: defaultdict(Decimal))
+        pair_deltas = defaultdict(int)
+        contributions = {
+            Order: cls.order_contribution,
+            Transaction: cls.transaction_contribution,
+        }
+
+        def add(contribution, sign):
+            providers, pairs = contribution
+            for provider_id, columns in providers.items():
+                for column, amount in columns.items():
+                    provider_deltas[provider_id][column] += sign * amount
+            for pair, amount in pairs.items():
+                pair_deltas[pair] += sign * amount
+
+        for change in changes:
+            contribution = contributions.get(change.model)
+            if contribution is None:
+                continue
+            if change.before is not None:
+                add(contribution(change.before), -1)
+            if change.after is not None:
+                add(contribution(change.after), 1)
+
+        providers = {
+            provider_id: {column: amount for column, amount in columns.items() if amount}
+            for provider_id, columns in provider_deltas.items()
+            if any(columns.values())
+        }
+        pairs = {pair: amount for pair, amount in pair_deltas.items() if amount}
+        return providers, pairs
+
+    # =========================================================================
+    # Aplicação dos incrementos
+    # =========================================================================
+
+    @staticmethod
+    def _refresh_derived(connection, provider_ids):
+        """Recalcula taxa de conclusão, ganho médio e clientes atendidos"""
+        stats = ProviderStats.__table__
+        pairs = ProviderClientStats.__table__
+        connection.execute(
+            update(stats)
+            .where(stats.c.provider_id.in_(list(provider_ids)))
+            .values(
+                completion_rate=case(
+                    (stats.c.total_orders > 0, stats.c.completed_orders * 100.0 / stats.c.total_orders),
+                    else_=0
+                ),
+                average_received=case(
+                    (stats.c.receipts_count > 0, stats.c.total_received / stats.c.receipts_count),
+                    else_=0
+                ),
+                clients_served=select(func.count()).where(
+                    pairs.c.provider_id == stats.c.provider_id,
+                    pairs.c.completed_orders > 0
+                ).scalar_subquery()
+            )
+        )
+
+    @classmethod
+    def apply_deltas(cls, connection, providers: Dict, pairs: Dict):
+        """
+        Aplica incrementos (coluna = coluna + delta, seguro com vários workers)
+        e recalcula os valores derivados dos prestadores afetados
+        """
+        now = datetime.utcnow()
+        affected = set(providers)
+
+        for (provider_id, client_id), amount in pairs.items():
+            upsert_increment(
+                connection, ProviderClientStats.__table__,
+                {'provider_id': provider_id, 'client_id': client_id},
+                {'completed_orders': amount}, now
+            )
+            affected.add(provider_id)
+
+        for provider_id, columns in providers.items():
+            values = {
+                column: amount if column == 'total_received' else int(amount)
+                for column, amount in columns.items()
+            }
+            upsert_increment(
+                connection, ProviderStats.__table__, {'provider_id': provider_id}, values, now
+            )
+
+        for provider_id in affected - set(providers):
+            # Par alterado sem mudança nos contadores do prestador: garante a linha
+            upsert_increment(
+                connection, ProviderStats.__table__, {'provider_id': provider_id}, {'total_orders': 0}, now
+            )
+
+        if affected:
+            cls._refresh_derived(connection, affected)
+
+    @classmethod
+    def apply_changes(cls, connection, changes: List[RowChange]):
+        """Consumidor do RowChangeFeed: aplica os incrementos do flush"""
+        providers, pairs = cls.collect_deltas(changes)
+        if providers or pairs:
+            cls.apply_deltas(connection, providers, pairs)
+
+    @classmethod
+    def register(cls):
+        """Inscreve o serviço no ouvinte de flush compartilhado (idempotente)"""
+        RowChangeFeed.subscribe(cls.apply_changes, {Order: ORDER_FIELDS, Transaction: TRANSACTION_FIELDS})
+        RowChangeFeed.register()
+
+    # =========================================================================
+    # Leitura
+    # =========================================================================
+
+    @staticmethod
+    def get_stats(provider_id: int) -> Dict:
+        """
+        Estatísticas do prestador (uma consulta pela chave primária)
+
+        Returns:
+            dict: completion_rate (percentual), average_received, clients_served,
+                  total_received e contadores de ordens; zeros se não houver linha
+        """
+        table = ProviderStats.__table__
+        row = db.session.execute(
+            db.select(table).where(table.c.provider_id == provider_id)
+        ).first()
+
+        return {
+            'total_orders': row.total_orders if row else 0,
+            'completed_orders': row.completed_orders if row else 0,
+            'cancelled_orders': row.cancelled_orders if row else 0,
+            'disputed_orders': row.disputed_orders if row else 0,
+            'clients_served': row.clients_served if row else 0,
+            'completion_rate': float(row.completion_rate) if row else 0.0,
+            'average_received': float(row.average_received) if row else 0.0,
+            'total_received': float(row.total_received) if row else 0.0,
+        }
+
+    @staticmethod
+    def list_providers(sort_by: str = 'completion_rate', min_completed_orders: int = 0,
+                       min_completion_rate: Optional[float] = None, limit: int = 20) -> List[Dict]:
+        """
+        Lista prestadores ordenados por uma das estatísticas (decrescente)
+
+        Args:
+            sort_by: Uma das colunas de SORTABLE_COLUMNS
+            min_completed_orders: Mínimo de ordens concluídas
+            min_completion_rate: Taxa de conclusão mínima (percentual)
+            limit: Quantidade máxima de prestadores
+
+        Returns:
+            list: [{'provider_id', 'completion_rate', 'average_received', 'clients_served', 'completed_orders'}]
+        """
+        if sort_by not in SORTABLE_COLUMNS:
+            raise ValueError(f"Ordenação inválida: {sort_by}. Use uma de {', '.join(SORTABLE_COLUMNS)}")
+
+        table = ProviderStats.__table__
+        query = db.select(
+            table.c.provider_id, *[table.c[column] for column in SORTABLE_COLUMNS]
+        ).where(table.c.completed_orders >= min_completed_orders)
+        if min_completion_rate is not None:
+            query = query.where(table.c.completion_rate >= min_completion_rate)
+        query = query.order_by(table.c[sort_by].desc(), table.c.provider_id).limit(limit)
+
+        return [
+            {
+                'provider_id': row.provider_id,
+                'completion_rate': float(row.completion_rate),
+                'average_received': float(row.average_received),
+                'clients_served': row.clients_served,
+                'completed_orders': row.completed_orders,
+            }
+            for row in db.session.execute(query)
+        ]
+
+    # =========================================================================
+    # Reconstrução
+    # =========================================================================
+
+    @classmethod
+    def rebuild(cls, provider_id: Optional[int] = None) -> int:
+        """
+        Recalcula as estatísticas a partir de orders e transactions
+
+        As agregações são feitas no banco (GROUP BY), sem carregar as ordens.
+
+        Args:
+            provider_id: Reconstruir apenas este prestador (None = todos)
+
+        Returns:
+            int: Quantidade de prestadores gravados
+        """
+        providers = defaultdict(lambda: defaultdict(Decimal))
+        pairs = {}
+
+        def count_status(*statuses):
+            return func.sum(case((Order.status.in_(statuses), 1), else_=0))
+
+        order_query = db.session.query(
+            Order.provider_id,
+            func.count(Order.id),
+            count_status('concluida'),
+            count_status('cancelada'),
+            count_status(*DISPUTED_STATUSES)
+        ).filter(Order.provider_id.isnot(None)).group_by(Order.provider_id)
+        pair_query = db.session.query(
+            Order.provider_id, Order.client_id, func.count(Order.id)
+        ).filter(
+            Order.provider_id.isnot(None), Order.status == 'concluida'
+        ).group_by(Order.provider_id, Order.client_id)
+        receipt_query = db.session.query(
+            Transaction.user_id, func.count(Transaction.id), func.sum(Transaction.amount)
+        ).filter(Transaction.type == 'recebimento').group_by(Transaction.user_id)
+
+        if provider_id is not None:
+            order_query = order_query.filter(Order.provider_id == provider_id)
+            pair_query = pair_query.filter(Order.provider_id == provider_id)
+            receipt_query = receipt_query.filter(Transaction.user_id == provider_id)
+
+        for row_provider, total, completed, cancelled, disputed in order_query:
+            providers[row_provider].update(
+                total_orders=total, completed_orders=completed or 0,
+                cancelled_orders=cancelled or 0, disputed_orders=disputed or 0
+            )
+        for row_provider, client_id, completed in pair_query:
+            pairs[(row_provider, client_id)] = completed
+        for user_id, count, amount in receipt_query:
+            providers[user_id].update(receipts_count=count, total_received=Decimal(amount or 0))
+
+        try:
+            connection = db.session.connection()
+            stats_delete = ProviderStats.__table__.delete()
+            pairs_delete = ProviderClientStats.__table__.delete()
+            if provider_id is not None:
+                stats_delete = stats_delete.where(ProviderStats.__table__.c.provider_id == provider_id)
+                pairs_delete = pairs_delete.where(ProviderClientStats.__table__.c.provider_id == provider_id)
+            connection.execute(stats_delete)
+            connection.execute(pairs_delete)
+            cls.apply_deltas(connection, providers, pairs)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Erro ao reconstruir estatísticas de prestadores: {e}")
+            raise
+
+        logger.info(f"Estatísticas de prestadores reconstruídas: {len(providers)} prestadores")
+        return len(providers)
+
+
+ProviderStatsService.register()
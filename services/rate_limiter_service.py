@@ -7,17 +7,369 @@ Serviço de Rate Limiting
 Este módulo fornece rate limiting para proteger o sistema contra abuso.
 Usa Flask-Limiter para controlar taxa de requisições.
 
+Os limites por rota (Flask-Limiter) e os limites por ação
+(SecurityValidator.check_rate_limit) usam o mesmo armazenamento e a mesma
+estratégia de janela deslizante por contadores: duas contagens por chave
+(janela atual e anterior), custo O(1) por verificação.
+
+Armazenamentos (RATELIMIT_STORAGE_URI):
+- 'local://': memória do processo, com número máximo de chaves e remoção
+  periódica das expiradas (testes / worker único)
+- 'database://': tabela rate_limit_counters, compartilhada entre workers
+- demais URIs do pacote limits (ex: 'redis://localhost:6379')
+
 Requirements: Security considerations, Task 23
 """
 
+from math import floor
+from typing import Dict, Tuple, Union
+import threading
+import time
+
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
-from flask import request, session
+from flask import request, session, current_app, has_app_context
+from limits import RateLimitItem, RateLimitItemPerSecond, parse
+from limits.storage import MemoryStorage, Storage, storage_from_string
+from limits.storage.base import SlidingWindowCounterSupport, TimestampedSlidingWindow
+from limits.strategies import SlidingWindowCounterRateLimiter
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+def _sliding_window_info(previous_count: int, current_count: int,
+                         expiry: int, now: float) -> Tuple[int, float, int, float]:
+    """Contagens e TTLs das janelas anterior e atual (mesma convenção do limits)"""
+    if previous_count == 0:
+        previous_ttl = 0.0
+    else:
+        previous_ttl = (1 - (((now - expiry) / expiry) % 1)) * expiry
+    current_ttl = (1 - ((now / expiry) % 1)) * expiry + expiry
+    return previous_count, previous_ttl, current_count, current_ttl
+
+
+def _weighted_count(previous_count: int, previous_ttl: float,
+                    current_count: int, expiry: int) -> float:
+    return previous_count * previous_ttl / expiry + current_count
+
+
+class LocalRateLimitStorage(Storage, SlidingWindowCounterSupport, TimestampedSlidingWindow):
+    """
+    Armazenamento de rate limiting em memória do processo ('local://')
+
+    Guarda no máximo `max_keys` contadores e remove os expirados a cada
+    `SWEEP_INTERVAL` segundos, durante as próprias chamadas, sem thread
+    dedicada. Contadores ainda válidos nunca são descartados: com o limite
+    atingido (e nada expirado), chaves novas são recusadas — a requisição é
+    tratada como acima do limite (falha fechada), para que uma enxurrada de
+    chaves distintas não zere os contadores existentes.
+    """
+
+    STORAGE_SCHEME = ['local']
+    MAX_KEYS = 100000
+    SWEEP_INTERVAL = 30.0
+    REFUSED_COUNT = 2 ** 31  # contagem informada para chaves recusadas (acima de qualquer limite)
+
+    def __init__(self, uri: str = None, wrap_exceptions: bool = False,
+                 max_keys: int = None, **options):
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+        self.max_keys = int(max_keys or self.MAX_KEYS)
+        self._counters: Dict[str, list] = {}  # chave -> [contagem, expiração]
+        self._lock = threading.RLock()
+        self._next_sweep = time.time() + self.SWEEP_INTERVAL
+
+    @property
+    def base_exceptions(self):
+        return ValueError
+
+    @property
+    def size(self) -> int:
+        """Número de contadores em memória"""
+        return len(self._counters)
+
+    def _entry(self, key: str, now: float):
+        entry = self._counters.get(key)
+        if entry is not None and entry[1] <= now:
+            del self._counters[key]
+            return None
+        return entry
+
+    def _maybe_sweep(self, now: float):
+        if now < self._next_sweep:
+            return
+        self._next_sweep = now + self.SWEEP_INTERVAL
+        self.sweep(now)
+
+    def sweep(self, now: float = None) -> int:
+        """Remove os contadores expirados; retorna quantos foram removidos"""
+        now = now or time.time()
+        with self._lock:
+            expired = [key for key, (_, expires_at) in self._counters.items() if expires_at <= now]
+            for key in expired:
+                del self._counters[key]
+        return len(expired)
+
+    def _has_room(self, key: str, now: float) -> bool:
+        """Se `key` já existe ou cabe no armazenamento (varre os expirados se cheio)"""
+        if self._entry(key, now) is not None or len(self._counters) < self.max_keys:
+            return True
+        self.sweep(now)
+        if len(self._counters) < self.max_keys:
+            return True
+        logger.warning(f"Rate limiting local cheio ({self.max_keys} chaves): chave recusada")
+        return False
+
+    def incr(self, key: str, expiry: float, amount: int = 1) -> int:
+        now = time.time()
+        with self._lock:
+            self._maybe_sweep(now)
+            if not self._has_room(key, now):
+                return self.REFUSED_COUNT
+            entry = self._entry(key, now)
+            if entry is None:
+                entry = self._counters[key] = [0, now + expiry]
+            entry[0] += amount
+            return entry[0]
+
+    def decr(self, key: str, amount: int = 1) -> int:
+        with self._lock:
+            entry = self._entry(key, time.time())
+            if entry is None:
+                return 0
+            entry[0] = max(entry[0] - amount, 0)
+            return entry[0]
+
+    def get(self, key: str) -> int:
+        with self._lock:
+            entry = self._entry(key, time.time())
+            return entry[0] if entry else 0
+
+    def get_expiry(self, key: str) -> float:
+        now = time.time()
+        with self._lock:
+            entry = self._entry(key, now)
+            return entry[1] if entry else now
+
+    def check(self) -> bool:
+        return True
+
+    def reset(self) -> int:
+        with self._lock:
+            count = len(self._counters)
+            self._counters.clear()
+            return count
+
+    def clear(self, key: str) -> None:
+        with self._lock:
+            self._counters.pop(key, None)
+
+    def acquire_sliding_window_entry(self, key: str, limit: int, expiry: int, amount: int = 1) -> bool:
+        if amount > limit:
+            return False
+        now = time.time()
+        previous_key, current_key = self.sliding_window_keys(key, expiry, now)
+        with self._lock:
+            if not self._has_room(current_key, now):
+                return False
+            info = _sliding_window_info(self.get(previous_key), self.get(current_key), expiry, now)
+            if floor(_weighted_count(info[0], info[1], info[2], expiry)) + amount > limit:
+                return False
+            self.incr(current_key, 2 * expiry, amount)
+            return True
+
+    def get_sliding_window(self, key: str, expiry: int) -> Tuple[int, float, int, float]:
+        now = time.time()
+        previous_key, current_key = self.sliding_window_keys(key, expiry, now)
+        with self._lock:
+            return _sliding_window_info(self.get(previous_key), self.get(current_key), expiry, now)
+
+    def clear_sliding_window(self, key: str, expiry: int) -> None:
+        previous_key, current_key = self.sliding_window_keys(key, expiry, time.time())
+        with self._lock:
+            self._counters.pop(previous_key, None)
+            self._counters.pop(current_key, None)
+
+
+class DatabaseRateLimitStorage(Storage, SlidingWindowCounterSupport, TimestampedSlidingWindow):
+    """
+    Armazenamento de rate limiting em banco de dados ('database://')
+
+    Cada janela é uma linha de rate_limit_counters, compartilhada entre
+    workers. As escritas usam uma conexão própria do engine, para não
+    confirmar nem desfazer a transação da sessão do chamador; linhas
+    expiradas são removidas a cada `SWEEP_INTERVAL` segundos.
+    Requer contexto de aplicação (requisições e tarefas com app_context).
+    """
+
+    STORAGE_SCHEME = ['database']
+    SWEEP_INTERVAL = 60.0
+
+    def __init__(self, uri: str = None, wrap_exceptions: bool = False, **options):
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+        self._next_sweep = 0.0
+
+    @property
+    def base_exceptions(self):
+        from sqlalchemy.exc import SQLAlchemyError
+        return SQLAlchemyError
+
+    @staticmethod
+    def _table():
+        from models import RateLimitCounter
+        return RateLimitCounter.__table__
+
+    @staticmethod
+    def _begin():
+        from models import db
+        return db.engine.begin()
+
+    def _maybe_sweep(self, connection, now: float):
+        if now < self._next_sweep:
+            return
+        self._next_sweep = now + self.SWEEP_INTERVAL
+        table = self._table()
+        connection.execute(table.delete().where(table.c.expires_at <= now))
+
+    def _counts(self, connection, keys, now: float) -> Dict[str, int]:
+        from sqlalchemy import select
+
+        table = self._table()
+        rows = connection.execute(
+            select(table.c.key, table.c['count'])
+            .where(table.c.key.in_(list(keys)), table.c.expires_at > now)
+        ).all()
+        return {key: count for key, count in rows}
+
+    def _incr(self, connection, key: str, expiry: float, amount: int, now: float) -> int:
+        """Soma `amount` ao contador, reiniciando-o se expirado; UPSERT em SQLite/PostgreSQL"""
+        from sqlalchemy import case, select, update
+        from sqlalchemy.exc import IntegrityError
+
+        table = self._table()
+        expired = table.c.expires_at <= now
+        dialect = connection.dialect.name
+
+        if dialect in ('sqlite', 'postgresql'):
+            if dialect == 'sqlite':
+                from sqlalchemy.dialects.sqlite import insert
+            else:
+                from sqlalchemy.dialects.postgresql import insert
+            stmt = insert(table).values(key=key, count=amount, expires_at=now + expiry)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[table.c.key],
+                set_={
+                    'count': case((expired, stmt.excluded['count']), else_=table.c['count'] + stmt.excluded['count']),
+                    'expires_at': case((expired, stmt.excluded.expires_at), else_=table.c.expires_at),
+                }
+            )
+            connection.execute(stmt)
+        else:
+            result = connection.execute(
+                update(table)
+                .where(table.c.key == key)
+                .values(
+                    count=case((expired, amount), else_=table.c['count'] + amount),
+                    expires_at=case((expired, now + expiry), else_=table.c.expires_at),
+                )
+            )
+            if result.rowcount == 0:
+                try:
+                    with connection.begin_nested():
+                        connection.execute(table.insert().values(key=key, count=amount, expires_at=now + expiry))
+                except IntegrityError:
+                    connection.execute(update(table).where(table.c.key == key)
+                                       .values(count=table.c['count'] + amount))
+
+        return connection.execute(select(table.c['count']).where(table.c.key == key)).scalar() or 0
+
+    def incr(self, key: str, expiry: float, amount: int = 1) -> int:
+        now = time.time()
+        with self._begin() as connection:
+            self._maybe_sweep(connection, now)
+            return self._incr(connection, key, expiry, amount, now)
+
+    def decr(self, key: str, amount: int = 1) -> int:
+        from sqlalchemy import case, update
+
+        table = self._table()
+        with self._begin() as connection:
+            connection.execute(
+                update(table)
+                .where(table.c.key == key, table.c.expires_at > time.time())
+                .values(count=case((table.c['count'] > amount, table.c['count'] - amount), else_=0))
+            )
+        return self.get(key)
+
+    def get(self, key: str) -> int:
+        with self._begin() as connection:
+            return self._counts(connection, [key], time.time()).get(key, 0)
+
+    def get_expiry(self, key: str) -> float:
+        from sqlalchemy import select
+
+        now = time.time()
+        table = self._table()
+        with self._begin() as connection:
+            expires_at = connection.execute(
+                select(table.c.expires_at).where(table.c.key == key, table.c.expires_at > now)
+            ).scalar()
+        return expires_at or now
+
+    def check(self) -> bool:
+        from sqlalchemy import select, literal
+
+        try:
+            with self._begin() as connection:
+                connection.execute(select(literal(1)))
+            return True
+        except Exception:
+            return False
+
+    def reset(self) -> int:
+        with self._begin() as connection:
+            return connection.execute(self._table().delete()).rowcount
+
+    def clear(self, key: str) -> None:
+        table = self._table()
+        with self._begin() as connection:
+            connection.execute(table.delete().where(table.c.key == key))
+
+    def acquire_sliding_window_entry(self, key: str, limit: int, expiry: int, amount: int = 1) -> bool:
+        if amount > limit:
+            return False
+        now = time.time()
+        previous_key, current_key = self.sliding_window_keys(key, expiry, now)
+        with self._begin() as connection:
+            self._maybe_sweep(connection, now)
+            counts = self._counts(connection, (previous_key, current_key), now)
+            previous_count, previous_ttl, current_count, _ = _sliding_window_info(
+                counts.get(previous_key, 0), counts.get(current_key, 0), expiry, now
+            )
+            if floor(_weighted_count(previous_count, previous_ttl, current_count, expiry)) + amount > limit:
+                return False
+
+            current_count = self._incr(connection, current_key, 2 * expiry, amount, now)
+            if floor(_weighted_count(previous_count, previous_ttl, current_count, expiry)) > limit:
+                # Outro worker consumiu a vaga entre a leitura e o incremento
+                self._incr(connection, current_key, 2 * expiry, -amount, now)
+                return False
+            return True
+
+    def get_sliding_window(self, key: str, expiry: int) -> Tuple[int, float, int, float]:
+        now = time.time()
+        previous_key, current_key = self.sliding_window_keys(key, expiry, now)
+        with self._begin() as connection:
+            counts = self._counts(connection, (previous_key, current_key), now)
+        return _sliding_window_info(counts.get(previous_key, 0), counts.get(current_key, 0), expiry, now)
+
+    def clear_sliding_window(self, key: str, expiry: int) -> None:
+        previous_key, current_key = self.sliding_window_keys(key, expiry, time.time())
+        table = self._table()
+        with self._begin() as connection:
+            connection.execute(table.delete().where(table.c.key.in_([previous_key, current_key])))
+
+
 def get_user_identifier():
     """
     Obtém identificador único do usuário para rate limiting
@@ -37,16 +389,115 @@ def get_user_identifier():
     return get_remote_address()
 
 
-# Configurar limiter
+# Configurar limiter (armazenamento e estratégia vêm de RATELIMIT_STORAGE_URI
+# e RATELIMIT_STRATEGY na configuração da aplicação)
 limiter = Limiter(
     key_func=get_user_identifier,
     default_limits=["200 per day", "50 per hour"],
-    storage_uri="memory://",  # Em produção, usar Redis: "redis://localhost:6379"
-    strategy="fixed-window",
     headers_enabled=True,
 )
 
 
+class RateLimiterService:
+    """
+    API única de rate limiting
+
+    Usa o mesmo armazenamento do Flask-Limiter quando ele já foi inicializado
+    na aplicação atual; fora disso (scripts, testes sem init_app), um
+    armazenamento criado a partir de RATELIMIT_STORAGE_URI e mantido por URI.
+    """
+
+    DEFAULT_STORAGE_URI = 'local://'
+    _limiters: Dict[str, SlidingWindowCounterRateLimiter] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def _storage_uri(cls) -> str:
+        if has_app_context():
+            return current_app.config.get('RATELIMIT_STORAGE_URI', cls.DEFAULT_STORAGE_URI)
+        return cls.DEFAULT_STORAGE_URI
+
+    @classmethod
+    def get_limiter(cls) -> SlidingWindowCounterRateLimiter:
+        """Estratégia de janela deslizante sobre o armazenamento configurado"""
+        if has_app_context() and limiter in current_app.extensions.get('limiter', ()):
+            storage = limiter.storage
+            key = f'flask-limiter:{id(storage)}'
+        else:
+            storage = None
+            key = cls._storage_uri()
+
+        strategy = cls._limiters.get(key)
+        if strategy is None:
+            with cls._lock:
+                strategy = cls._limiters.get(key)
+                if strategy is None:
+                    strategy = SlidingWindowCounterRateLimiter(storage or storage_from_string(key))
+                    cls._limiters[key] = strategy
+        return strategy
+
+    @classmethod
+    def is_shared_storage(cls) -> bool:
+        """Se os contadores são compartilhados entre workers (e sobrevivem a reinícios)"""
+        return not isinstance(cls.get_limiter().storage, (LocalRateLimitStorage, MemoryStorage))
+
+    @staticmethod
+    def _item(limit: Union[str, RateLimitItem]) -> RateLimitItem:
+        return parse(limit) if isinstance(limit, str) else limit
+
+    @classmethod
+    def hit(cls, key: str, limit: Union[str, RateLimitItem], cost: int = 1) -> bool:
+        """
+        Consome `cost` unidades do limite para a chave
+
+        Args:
+            key: Identificador (ex: 'acao:42:cancel_order')
+            limit: Limite ('5 per minute') ou RateLimitItem
+
+        Returns:
+            bool: True se permitido, False se o limite foi atingido
+        """
+        return cls.get_limiter().hit(cls._item(limit), key, cost=cost)
+
+    @classmethod
+    def test(cls, key: str, limit: Union[str, RateLimitItem], cost: int = 1) -> bool:
+        """Verifica se a chave ainda teria `cost` unidades, sem consumir"""
+        return cls.get_limiter().test(cls._item(limit), key, cost=cost)
+
+    @classmethod
+    def get_count(cls, key: str, limit: Union[str, RateLimitItem]) -> int:
+        """Unidades consumidas na janela deslizante (no máximo o limite)"""
+        item = cls._item(limit)
+        return item.amount - cls.get_limiter().get_window_stats(item, key).remaining
+
+    @classmethod
+    def get_retry_after(cls, key: str, limit: Union[str, RateLimitItem]) -> int:
+        """Segundos até liberar uma unidade (0 se há saldo)"""
+        item = cls._item(limit)
+        stats = cls.get_limiter().get_window_stats(item, key)
+        if stats.remaining > 0:
+            return 0
+        return max(int(stats.reset_time - time.time()) + 1, 1)
+
+    @classmethod
+    def reset(cls, key: str, limit: Union[str, RateLimitItem]):
+        """Zera o limite da chave"""
+        cls.get_limiter().clear(cls._item(limit), key)
+
+    @classmethod
+    def check_action(cls, user_id: int, action: str, max_attempts: int,
+                     window_seconds: int) -> bool:
+        """Limite por usuário e ação (usado por SecurityValidator.check_rate_limit)"""
+        return cls.hit(f'acao:{user_id}:{action}',
+                       RateLimitItemPerSecond(max_attempts, window_seconds))
+
+    @classmethod
+    def clear_local(cls):
+        """Descarta as estratégias criadas fora do Flask-Limiter (testes)"""
+        with cls._lock:
+            cls._limiters.clear()
+
+
 class RateLimitConfig:
     """Configurações de rate limiting para diferentes ações"""
     
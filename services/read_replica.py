@@ -0,0 +1,202 @@
+#!/usr/bin/env python3.11
+# -*- coding: utf-8 -*-
+
+"""
+ReadReplicaRouter - Leituras tolerantes a atraso direcionadas à réplica
+
+Relatórios, métricas e alertas administrativos faziam consultas pesadas no
+mesmo banco das operações de carteira. Com uma réplica configurada
+(DATABASE_REPLICA_URL → SQLALCHEMY_BINDS['replica']), a sessão do
+Flask-SQLAlchemy passa a escolher o banco por consulta:
+
+- Apenas métodos marcados com @replica_read (somente leitura e tolerantes a
+  atraso de replicação) leem da réplica; todo o resto usa o primário
+- Somente SELECTs vão para a réplica; flush, INSERT/UPDATE/DELETE e SQL
+  textual continuam no primário
+- Os SELECTs da réplica executam em uma sessão à parte: os objetos lidos
+  ficam no mapa de identidade dela e uma leitura posterior no primário, na
+  mesma requisição, não devolve o estado (possivelmente atrasado) da réplica
+- Depois de um flush, a sessão lê do primário até o fim da transação
+- "Read your writes": quando uma requisição confirma escritas, o usuário
+  fica fixado no primário por REPLICA_PIN_SECONDS (marca na sessão Flask,
+  válida em todos os workers)
+- Sem réplica configurada, nada muda
+
+Este módulo não importa models (models.py usa RoutingSession).
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+import inspect
+import logging
+import time
+
+from flask import current_app, has_request_context, session as flask_session
+from flask_sqlalchemy.session import Session as FlaskSession
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+
+logger = logging.getLogger(__name__)
+
+REPLICA_BIND = 'replica'
+DEFAULT_PIN_SECONDS = 5.0
+
+_PIN_KEY = '_replica_pin_until'  # Sessão Flask (cookie do usuário)
+_WROTE_KEY = 'replica_wrote'  # session.info da transação atual
+
+_reading: ContextVar[bool] = ContextVar('replica_reading', default=False)
+
+
+class RoutingSession(FlaskSession):
+    """Sessão que envia os SELECTs marcados como tolerantes para a réplica"""
+
+    _replica_session = None
+
+    def execute(self, statement, *args, **kwargs):
+        if ReadReplicaRouter.should_use_replica(self, statement):
+            return self.replica_session().execute(statement, *args, **kwargs)
+        return super().execute(statement, *args, **kwargs)
+
+    def replica_session(self) -> Session:
+        """Sessão somente leitura na réplica, com mapa de identidade próprio"""
+        if self._replica_session is None:
+            self._replica_session = Session(bind=self._db.engines[REPLICA_BIND], autoflush=False)
+        return self._replica_session
+
+    def close(self):
+        if self._replica_session is not None:
+            self._replica_session.close()
+            self._replica_session = None
+        super().close()
+
+
+class ReadReplicaRouter:
+    """Decide entre primário e réplica e mantém a fixação após escritas"""
+
+    # ------------------------------------------------------------------
+    # Roteamento
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def replica_configured() -> bool:
+        return REPLICA_BIND in (current_app.config.get('SQLALCHEMY_BINDS') or {})
+
+    @staticmethod
+    def is_reading() -> bool:
+        return _reading.get()
+
+    @classmethod
+    @contextmanager
+    def reading(cls):
+        """Marca as consultas do bloco como tolerantes a atraso"""
+        token = _reading.set(True)
+        try:
+            yield
+        finally:
+            _reading.reset(token)
+
+    @classmethod
+    def should_use_replica(cls, session: Session, clause) -> bool:
+        if not _reading.get() or not isinstance(clause, Select):
+            return False
+        if session.info.get(_WROTE_KEY) or session.new or session.deleted:
+            return False
+        return cls.replica_configured() and not cls.is_pinned()
+
+    # ------------------------------------------------------------------
+    # Read your writes
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _pin_seconds() -> float:
+        return float(current_app.config.get('REPLICA_PIN_SECONDS', DEFAULT_PIN_SECONDS))
+
+    @staticmethod
+    def is_pinned() -> bool:
+        """Usuário da requisição atual confirmou escritas há pouco"""
+        if not has_request_context():
+            return False
+        return flask_session.get(_PIN_KEY, 0) > time.time()
+
+    @classmethod
+    def pin(cls):
+        """Fixa o usuário da requisição atual no primário"""
+        if not has_request_context():
+            return
+        try:
+            flask_session[_PIN_KEY] = time.time() + cls._pin_seconds()
+        except RuntimeError as e:
+            # Sessão Flask indisponível (sem SECRET_KEY): nada a fixar
+            logger.debug(f"Fixação no primário ignorada: {e}")
+
+    # ------------------------------------------------------------------
+    # Ouvintes de sessão
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _after_flush(session, flush_context):
+        session.info[_WROTE_KEY] = True
+
+    @classmethod
+    def _after_commit(cls, session):
+        if session.info.pop(_WROTE_KEY, False) and cls.replica_configured():
+            cls.pin()
+
+    @staticmethod
+    def _after_rollback(session):
+        session.info.pop(_WROTE_KEY, None)
+
+    @classmethod
+    def register(cls):
+        """Registra os ouvintes de sessão (idempotente)"""
+        listeners = (
+            ('after_flush', cls._after_flush),
+            ('after_commit', cls._after_commit),
+            ('after_rollback', cls._after_rollback),
+        )
+        for name, listener in listeners:
+            if not event.contains(Session, name, listener):
+                event.listen(Session, name, listener)
+
+
+def replica_read(func):
+    """
+    Decorator para métodos somente leitura tolerantes a atraso de replicação
+
+    Funções geradoras (exportações em fluxo) ficam marcadas apenas enquanto
+    o próprio gerador executa, não entre um item e outro.
+
+    Uso:
+        @staticmethod
+        @replica_read
+        def get_report_data(...):
+            ...
+    """
+    if inspect.isgeneratorfunction(func):
+        @wraps(func)
+        def generator_wrapper(*args, **kwargs):
+            generator = func(*args, **kwargs)
+            try:
+                while True:
+                    with ReadReplicaRouter.reading():
+                        try:
+                            item = next(generator)
+                        except StopIteration:
+                            return
+                    yield item
+            finally:
+                generator.close()
+
+        return generator_wrapper
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        with ReadReplicaRouter.reading():
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+ReadReplicaRouter.register()
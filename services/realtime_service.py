@@ -12,6 +12,7 @@ from flask import Response, stream_with_context
 from models import db, Order, Wallet
 from services.dashboard_data_service import DashboardDataService
 from services.wallet_service import WalletService
+from services.cache_service import CacheService
 
 logger = logging.getLogger(__name__)
 
@@ -19,8 +20,9 @@ logger = logging.getLogger(__name__)
 class RealtimeService:
     """Serviço para gerenciar atualizações em tempo real via SSE"""
     
-    # Cache de último estado conhecido por usuário
-    _last_state = {}
+    # Cache de último estado conhecido por usuário (namespace 'realtime_state')
+    # Usuários sem stream ativo expiram em 1 hora; tag 'user:<id>' agrupa os papéis
+    _last_state = CacheService.namespace('realtime_state', max_entries=10000, default_ttl=3600)
     
     @staticmethod
     def create_sse_stream(user_id, role):
@@ -121,7 +123,7 @@ class RealtimeService:
             
             # Obter último estado conhecido
             cache_key = f"{user_id}_{role}"
-            last_state = RealtimeService._last_state.get(cache_key, {})
+            last_state = RealtimeService._last_state.get(cache_key) or {}
             
             # Verificar mudanças no saldo
             if last_state.get('balance') != current_state.get('balance'):
@@ -175,7 +177,7 @@ class RealtimeService:
                 })
             
             # Atualizar cache com estado atual
-            RealtimeService._last_state[cache_key] = current_state
+            RealtimeService._last_state.set(cache_key, current_state, tags=[f"user:{user_id}"])
             
         except Exception as e:
             logger.error(f"Erro ao verificar atualizações: {e}")
@@ -281,14 +283,10 @@ class RealtimeService:
                 return
             
             # Invalidar cache do cliente
-            client_key = f"{order.client_id}_cliente"
-            if client_key in RealtimeService._last_state:
-                del RealtimeService._last_state[client_key]
+            RealtimeService._last_state.delete(f"{order.client_id}_cliente")
             
             # Invalidar cache do prestador
-            provider_key = f"{order.provider_id}_prestador"
-            if provider_key in RealtimeService._last_state:
-                del RealtimeService._last_state[provider_key]
+            RealtimeService._last_state.delete(f"{order.provider_id}_prestador")
             
             logger.info(f"Cache invalidado para ordem #{order_id}")
             
@@ -316,10 +314,7 @@ class RealtimeService:
         """
         try:
             # Invalidar cache para ambos os papéis
-            for role in ['cliente', 'prestador']:
-                cache_key = f"{user_id}_{role}"
-                if cache_key in RealtimeService._last_state:
-                    del RealtimeService._last_state[cache_key]
+            RealtimeService._last_state.invalidate_tags(f"user:{user_id}")
             
             logger.info(f"Cache de saldo invalidado para usuário #{user_id}")
             
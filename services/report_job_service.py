@@ -0,0 +1,388 @@
+#!/usr/bin/env python3.11
+# -*- coding: utf-8 -*-
+
+"""
+ReportJobService - Geração de relatórios em segundo plano
+
+Relatórios pesados não são mais gerados dentro da requisição: o
+administrador enfileira o relatório (tipo, formato e filtros), um pool de
+workers gera o arquivo em REPORT_ARTIFACT_DIR e a interface consulta o
+status do job até o download ficar disponível.
+
+Funcionamento:
+- Os parâmetros normalizados geram um hash (param_hash); o arquivo é salvo
+  como <hash>.<formato>
+- Um pedido com o mesmo hash reaproveita o job em andamento ou o arquivo já
+  gerado enquanto ele não expira (REPORT_ARTIFACT_TTL)
+- O estado fica na tabela report_jobs, visível para todos os workers web
+- Cada job registra o processo dono (worker_id), que renova heartbeat_at a
+  cada HEARTBEAT_INTERVAL enquanto o job está enfileirado ou em execução; só
+  jobs com sinal de vida recente são reaproveitados
+- Jobs órfãos (processo reiniciado ou encerrado) são tratados a cada pedido:
+  os enfileirados são assumidos e despachados de novo, os em execução são
+  marcados como falha (o próprio relatório pode ter derrubado o worker)
+- Com REPORT_JOB_ASYNC desativado (testes), o job é gerado no próprio pedido
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional
+import hashlib
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+
+from sqlalchemy import and_, or_, desc, select, update
+
+from models import db, ReportJob
+from services.report_service import ReportService
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ('csv', 'xlsx', 'pdf')
+PDF_REPORTS = ('contratos', 'usuarios')
+FILTER_KEYS = ('start_date', 'end_date', 'status_filter', 'user_type')
+
+DEFAULT_WORKERS = 2
+DEFAULT_TTL = 3600  # segundos
+HEARTBEAT_INTERVAL = 30  # segundos entre renovações do sinal de vida dos jobs do worker
+HEARTBEAT_TIMEOUT = timedelta(minutes=2)  # Sem sinal há mais tempo: job órfão
+
+
+class ReportJobService:
+    """Fila de relatórios, pool de workers e arquivos reaproveitáveis"""
+
+    _executor: Optional[ThreadPoolExecutor] = None
+    _app = None
+    _lock = threading.Lock()
+    _worker_ids: Dict[int, str] = {}  # pid -> identificação (processos filhos geram a sua)
+
+    # ------------------------------------------------------------------
+    # Configuração
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _config(key: str, default):
+        from flask import current_app
+
+        return current_app.config.get(key, default)
+
+    @classmethod
+    def artifact_dir(cls) -> str:
+        from flask import current_app
+
+        path = cls._config('REPORT_ARTIFACT_DIR', os.path.join(current_app.instance_path, 'reports'))
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    @classmethod
+    def _ttl(cls) -> timedelta:
+        return timedelta(seconds=cls._config('REPORT_ARTIFACT_TTL', DEFAULT_TTL))
+
+    @classmethod
+    def worker_id(cls) -> str:
+        """Identificação deste processo (host:pid:token), dona dos jobs que ele executa"""
+        pid = os.getpid()
+        if pid not in cls._worker_ids:
+            cls._worker_ids[pid] = f'{socket.gethostname()}:{pid}:{uuid.uuid4().hex[:8]}'
+        return cls._worker_ids[pid]
+
+    # ------------------------------------------------------------------
+    # Enfileiramento
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def normalize_params(params: Optional[Dict[str, Any]]) -> Dict[str, str]:
+        """Filtros conhecidos e preenchidos, como texto (datas em ISO)"""
+        normalized = {}
+        for key in FILTER_KEYS:
+            value = (params or {}).get(key)
+            if value in (None, '', 'todos'):
+                continue
+            normalized[key] = value.isoformat() if isinstance(value, date) else str(value)
+        return normalized
+
+    @staticmethod
+    def param_hash(report_type: str, fmt: str, params: Dict[str, str]) -> str:
+        payload = json.dumps({'report_type': report_type, 'format': fmt, 'params': params}, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    @classmethod
+    def enqueue(cls, report_type: str, fmt: str, params: Optional[Dict[str, Any]] = None,
+                requested_by: Optional[int] = None) -> ReportJob:
+        """
+        Enfileira um relatório ou reaproveita um job equivalente
+
+        Args:
+            report_type: contratos, usuarios, financeiro ou convites
+            fmt: csv, xlsx ou pdf (pdf apenas para contratos e usuarios)
+            params: Filtros (start_date, end_date, status_filter, user_type)
+            requested_by: ID do administrador
+
+        Returns:
+            ReportJob: Job novo, em andamento ou já concluído com arquivo válido
+
+        Raises:
+            ValueError: Tipo de relatório ou formato inválido
+        """
+        if report_type not in ReportService.EXPORT_COLUMNS:
+            raise ValueError(f"Tipo de relatório inválido: {report_type}")
+        if fmt not in FORMATS or (fmt == 'pdf' and report_type not in PDF_REPORTS):
+            raise ValueError(f"Formato inválido para {report_type}: {fmt}")
+
+        params = cls.normalize_params(params)
+        param_hash = cls.param_hash(report_type, fmt, params)
+
+        cls.recover_orphans()
+        existing = cls._reusable_job(param_hash)
+        if existing is not None:
+            logger.info(f"Relatório {report_type}.{fmt} reaproveitado do job {existing.id}")
+            return existing
+
+        job = ReportJob(
+            param_hash=param_hash,
+            report_type=report_type,
+            format=fmt,
+            params=json.dumps(params),
+            status='queued',
+            requested_by=requested_by,
+            worker_id=cls.worker_id(),
+            heartbeat_at=datetime.utcnow()
+        )
+        db.session.add(job)
+        db.session.commit()
+
+        cls._dispatch(job.id)
+        return job
+
+    @classmethod
+    def _reusable_job(cls, param_hash: str) -> Optional[ReportJob]:
+        now = datetime.utcnow()
+        candidates = ReportJob.query.filter(
+            ReportJob.param_hash == param_hash,
+            or_(
+                and_(ReportJob.status.in_(['queued', 'running']), ReportJob.heartbeat_at >= now - HEARTBEAT_TIMEOUT),
+                and_(ReportJob.status == 'done', ReportJob.expires_at > now)
+            )
+        ).order_by(desc(ReportJob.created_at)).all()
+
+        for job in candidates:
+            if job.status != 'done' or (job.artifact_path and os.path.exists(job.artifact_path)):
+                return job
+        return None
+
+    @classmethod
+    def _async_enabled(cls) -> bool:
+        return cls._config('REPORT_JOB_ASYNC', True)
+
+    @classmethod
+    def _dispatch(cls, job_id: int):
+        if not cls._async_enabled():
+            cls.run_job(job_id)
+            return
+
+        from flask import current_app
+
+        with cls._lock:
+            if cls._executor is None:
+                cls._app = current_app._get_current_object()
+                cls._executor = ThreadPoolExecutor(
+                    max_workers=cls._config('REPORT_JOB_WORKERS', DEFAULT_WORKERS),
+                    thread_name_prefix='report-job'
+                )
+                threading.Thread(target=cls._heartbeat_loop, name='report-job-heartbeat', daemon=True).start()
+        cls._executor.submit(cls._run_in_worker, job_id)
+
+    @classmethod
+    def _run_in_worker(cls, job_id: int):
+        with cls._app.app_context():
+            try:
+                cls.run_job(job_id)
+            finally:
+                db.session.remove()
+
+    @classmethod
+    def _heartbeat_loop(cls):
+        while True:
+            time.sleep(HEARTBEAT_INTERVAL)
+            try:
+                with cls._app.app_context():
+                    cls.heartbeat()
+            except Exception as e:
+                logger.error(f"Erro ao renovar jobs de relatório: {str(e)}")
+
+    @classmethod
+    def heartbeat(cls) -> int:
+        """Renova o sinal de vida dos jobs enfileirados e em execução deste worker"""
+        table = ReportJob.__table__
+        with db.engine.begin() as connection:
+            return connection.execute(
+                update(table)
+                .where(table.c.worker_id == cls.worker_id(), table.c.status.in_(['queued', 'running']))
+                .values(heartbeat_at=datetime.utcnow())
+            ).rowcount
+
+    @classmethod
+    def recover_orphans(cls) -> int:
+        """
+        Trata os jobs enfileirados ou em execução sem sinal de vida recente
+
+        Returns:
+            int: Quantidade de jobs despachados de novo ou marcados como falha
+        """
+        now = datetime.utcnow()
+        orphaned = or_(ReportJob.heartbeat_at.is_(None), ReportJob.heartbeat_at < now - HEARTBEAT_TIMEOUT)
+
+        failed = db.session.execute(
+            update(ReportJob)
+            .where(ReportJob.status == 'running', orphaned)
+            .values(status='failed', error='Geração interrompida: worker encerrado', finished_at=now)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+
+        claimed = []
+        for job_id in db.session.execute(
+                select(ReportJob.id).where(ReportJob.status == 'queued', orphaned)).scalars().all():
+            # Condicional: outro worker pode ter assumido o mesmo job
+            if db.session.execute(
+                    update(ReportJob)
+                    .where(ReportJob.id == job_id, ReportJob.status == 'queued', orphaned)
+                    .values(worker_id=cls.worker_id(), heartbeat_at=now)
+                    .execution_options(synchronize_session=False)
+            ).rowcount:
+                claimed.append(job_id)
+        db.session.commit()
+
+        if failed or claimed:
+            logger.warning(f"Jobs de relatório órfãos: {failed} marcados como falha, {len(claimed)} despachados de novo")
+        for job_id in claimed:
+            cls._dispatch(job_id)
+        return failed + len(claimed)
+
+    # ------------------------------------------------------------------
+    # Geração
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def run_job(cls, job_id: int) -> Optional[ReportJob]:
+        """Gera o arquivo de um job enfileirado (chamado pelo worker)"""
+        cls.cleanup_expired()
+
+        # Condicional: o job só é executado por um worker
+        now = datetime.utcnow()
+        claimed = db.session.execute(
+            update(ReportJob)
+            .where(ReportJob.id == job_id, ReportJob.status == 'queued')
+            .values(status='running', started_at=now, worker_id=cls.worker_id(), heartbeat_at=now)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.session.commit()
+
+        job = db.session.get(ReportJob, job_id)
+        if job is None or not claimed:
+            return job
+
+        path = os.path.join(cls.artifact_dir(), f'{job.param_hash}.{job.format}')
+        partial_path = f'{path}.{job.id}.tmp'
+        try:
+            job.row_count = cls._render(job.report_type, job.format, json.loads(job.params or '{}'), partial_path)
+            # Troca atômica: downloads em andamento do arquivo anterior não são afetados
+            os.replace(partial_path, path)
+
+            finished_at = datetime.utcnow()
+            job.status = 'done'
+            job.artifact_path = path
+            job.finished_at = finished_at
+            job.expires_at = finished_at + cls._ttl()
+            db.session.commit()
+            logger.info(
+                f"Relatório {job.report_type}.{job.format} gerado (job {job.id}): "
+                f"{job.row_count} linhas em {(finished_at - job.started_at).total_seconds():.1f}s"
+            )
+        except Exception as e:
+            db.session.rollback()
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+            job.status = 'failed'
+            job.error = str(e)
+            job.finished_at = datetime.utcnow()
+            db.session.commit()
+            logger.error(f"Erro ao gerar relatório (job {job.id}): {str(e)}")
+
+        return job
+
+    @staticmethod
+    def _filters(params: Dict[str, str]) -> Dict[str, Any]:
+        filters = dict(params)
+        for key in ('start_date', 'end_date'):
+            if filters.get(key):
+                filters[key] = date.fromisoformat(filters[key])
+        return filters
+
+    @classmethod
+    def _render(cls, report_type: str, fmt: str, params: Dict[str, str], path: str) -> int:
+        """Escreve o relatório em path; retorna o número de linhas"""
+        filters = cls._filters(params)
+
+        if fmt == 'csv':
+            rows = []
+            with open(path, 'wb') as handle:
+                for chunk in ReportService.stream_csv(report_type, filters, progress=rows.append):
+                    handle.write(chunk)
+            return rows[-1] if rows else 0
+
+        if fmt == 'xlsx':
+            _, rows = ReportService.export_to_xlsx_file(report_type, filters, path=path)
+            return rows
+
+        _, rows = ReportService.export_to_pdf_file(report_type, filters, path=path)
+        return rows
+
+    # ------------------------------------------------------------------
+    # Consulta e manutenção
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def get_job(job_id: int) -> Optional[ReportJob]:
+        return db.session.get(ReportJob, job_id)
+
+    @staticmethod
+    def get_artifact(job_id: int) -> Optional[ReportJob]:
+        """Job concluído com arquivo ainda válido, ou None"""
+        job = db.session.get(ReportJob, job_id)
+        if (job is None or job.status != 'done' or job.expires_at <= datetime.utcnow()
+                or not job.artifact_path or not os.path.exists(job.artifact_path)):
+            return None
+        return job
+
+    @staticmethod
+    def recent_jobs(limit: int = 10) -> List[ReportJob]:
+        return ReportJob.query.order_by(desc(ReportJob.created_at)).limit(limit).all()
+
+    @classmethod
+    def cleanup_expired(cls) -> int:
+        """Marca jobs vencidos como expirados e remove arquivos sem job válido"""
+        now = datetime.utcnow()
+        expired = ReportJob.query.filter(
+            ReportJob.status == 'done',
+            ReportJob.expires_at <= now
+        ).all()
+        if not expired:
+            return 0
+
+        live_paths = {path for (path,) in db.session.query(ReportJob.artifact_path).filter(
+            ReportJob.status == 'done',
+            ReportJob.expires_at > now
+        )}
+        for job in expired:
+            if job.artifact_path and job.artifact_path not in live_paths and os.path.exists(job.artifact_path):
+                os.remove(job.artifact_path)
+            job.status = 'expired'
+        db.session.commit()
+
+        logger.info(f"{len(expired)} relatórios expirados removidos")
+        return len(expired)
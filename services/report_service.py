@@ -3,90 +3,68 @@
 
 from models import User, Order, Transaction, Wallet, Invite, db
 from datetime import datetime, timedelta
-from sqlalchemy import func, desc, and_, or_
+from sqlalchemy import func, desc, and_, or_, case
+from services.time_window import in_period
+from services.read_replica import replica_read
+from services.transaction_volume_rollup_service import TransactionVolumeRollupService
 import json
 import io
 import csv
+import os
+import tempfile
 from reportlab.lib.pagesizes import letter, A4
 from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
 from reportlab.lib.units import inch
 import xlsxwriter
+from services.pdf_stream_writer import PdfStreamWriter
 
 class ReportService:
     """Serviço para geração de relatórios do sistema"""
     
+    # Linhas de detalhe por página nos relatórios (o conjunto completo sai pelas exportações)
+    REPORT_PAGE_SIZE = 50
+    
+    # Tipos de transação contabilizados como receita do sistema
+    FEE_TRANSACTION_TYPES = ('taxa_sistema', 'taxa_transacao', 'taxa_saque')
+    
     @staticmethod
-    def get_contracts_report_data(start_date=None, end_date=None, status_filter=None):
-        """Obtém dados para relatório de contratos/ordens"""
+    @replica_read
+    def get_contracts_report_data(start_date=None, end_date=None, status_filter=None, page=1, per_page=None):
+        """
+        Obtém dados para relatório de contratos/ordens
+        
+        Totais, estatísticas por status e por mês são agregados no banco;
+        'orders' traz apenas a página pedida das linhas de detalhe.
+        """
         try:
-            # Criar alias para o usuário prestador
-            from sqlalchemy.orm import aliased
-            ProviderUser = aliased(User)
-            
-            # Query base
-            query = db.session.query(
-                Order.id,
-                Order.title,
-                Order.description,
-                Order.value,
-                Order.status,
-                Order.created_at,
-                Order.accepted_at,
-                Order.completed_at,
-                User.nome.label('client_name'),
-                User.email.label('client_email'),
-                User.cpf.label('client_cpf'),
-                func.coalesce(ProviderUser.nome, 'Não aceito').label('provider_name'),
-                func.coalesce(ProviderUser.email, '').label('provider_email')
-            ).join(
-                User, Order.client_id == User.id
-            ).outerjoin(
-                ProviderUser, Order.provider_id == ProviderUser.id
-            )
-            
-            # Aplicar filtros de data
-            if start_date:
-                query = query.filter(Order.created_at >= start_date)
-            if end_date:
-                query = query.filter(Order.created_at <= end_date)
-            
-            # Aplicar filtro de status
-            if status_filter and status_filter != 'todos':
-                if ',' in status_filter:
-                    statuses = status_filter.split(',')
-                    query = query.filter(Order.status.in_(statuses))
-                else:
-                    query = query.filter(Order.status == status_filter)
-            
-            # Ordenar por data de criação (mais recentes primeiro)
-            orders = query.order_by(desc(Order.created_at)).all()
-            
-            # Estatísticas
-            total_contratos = len(orders)
-            valor_total = sum(order.value for order in orders)
+            conditions = ReportService._order_conditions(start_date, end_date, status_filter)
             
             # Estatísticas por status
-            status_stats = {}
-            for order in orders:
-                status = order.status
-                if status not in status_stats:
-                    status_stats[status] = {'count': 0, 'value': 0}
-                status_stats[status]['count'] += 1
-                status_stats[status]['value'] += order.value
+            status_rows = db.session.query(
+                Order.status,
+                func.count(Order.id),
+                func.coalesce(func.sum(Order.value), 0)
+            ).filter(*conditions).group_by(Order.status).all()
+            status_stats = {status: {'count': count, 'value': value} for status, count, value in status_rows}
             
             # Contratos por mês
-            monthly_stats = {}
-            for order in orders:
-                month_key = order.created_at.strftime('%Y-%m')
-                if month_key not in monthly_stats:
-                    monthly_stats[month_key] = {'count': 0, 'value': 0}
-                monthly_stats[month_key]['count'] += 1
-                monthly_stats[month_key]['value'] += order.value
+            month = ReportService._month_key(Order.created_at)
+            monthly_rows = db.session.query(
+                month,
+                func.count(Order.id),
+                func.coalesce(func.sum(Order.value), 0)
+            ).filter(*conditions).group_by(month).order_by(desc(month)).all()
+            monthly_stats = {key: {'count': count, 'value': value} for key, count, value in monthly_rows}
+            
+            total_contratos = sum(stats['count'] for stats in status_stats.values())
+            valor_total = sum((stats['value'] for stats in status_stats.values()), 0)
+            
+            query = ReportService._contracts_query(start_date, end_date, status_filter)
+            orders, pagination = ReportService._page(query, total_contratos, page, per_page)
             
             return {
                 'orders': orders,
+                'pagination': pagination,
                 'total_contratos': total_contratos,
                 'valor_total': valor_total,
                 'status_stats': status_stats,
@@ -101,88 +79,60 @@ class ReportService:
             raise ValueError(f"Erro ao gerar relatório de contratos: {str(e)}")
     
     @staticmethod
-    def get_users_report_data(start_date=None, end_date=None, user_type=None, status_filter=None):
-        """Obtém dados para relatório de usuários"""
+    @replica_read
+    def get_users_report_data(start_date=None, end_date=None, user_type=None, status_filter=None,
+                              page=1, per_page=None):
+        """
+        Obtém dados para relatório de usuários
+        
+        Contagens por situação e papel (SUM condicional), saldos, volume e
+        cadastros por mês são agregados no banco; 'users' traz apenas a
+        página pedida das linhas de detalhe.
+        """
         try:
-            # Query base com informações de carteira
-            query = db.session.query(
-                User.id,
-                User.nome,
-                User.email,
-                User.cpf,
-                User.phone,
-                User.roles,
-                User.active,
-                User.created_at,
-                func.coalesce(Wallet.balance, 0).label('balance'),
-                func.coalesce(Wallet.escrow_balance, 0).label('escrow_balance'),
-                func.count(Transaction.id).label('transaction_count'),
-                func.coalesce(func.sum(func.abs(Transaction.amount)), 0).label('total_volume')
-            ).outerjoin(
-                Wallet, User.id == Wallet.user_id
-            ).outerjoin(
-                Transaction, User.id == Transaction.user_id
-            ).group_by(
-                User.id, User.nome, User.email, User.cpf, User.phone,
-                User.roles, User.active, User.created_at,
-                Wallet.balance, Wallet.escrow_balance
-            )
-            
-            # Aplicar filtros de data
-            if start_date:
-                query = query.filter(User.created_at >= start_date)
-            if end_date:
-                query = query.filter(User.created_at <= end_date)
-            
-            # Aplicar filtro de tipo de usuário
-            if user_type and user_type != 'todos':
-                if user_type == 'cliente':
-                    query = query.filter(User.roles.contains('cliente'))
-                elif user_type == 'prestador':
-                    query = query.filter(User.roles.contains('prestador'))
-                elif user_type == 'dual':
-                    query = query.filter(and_(
-                        User.roles.contains('cliente'),
-                        User.roles.contains('prestador')
-                    ))
-            
-            # Aplicar filtro de status
-            if status_filter and status_filter != 'todos':
-                if status_filter == 'ativo':
-                    query = query.filter(User.active == True)
-                elif status_filter == 'inativo':
-                    query = query.filter(User.active == False)
-            
-            # Ordenar por data de criação (mais recentes primeiro)
-            users = query.order_by(desc(User.created_at)).all()
-            
-            # Estatísticas gerais
-            total_usuarios = len(users)
-            usuarios_ativos = len([u for u in users if u.active])
-            usuarios_inativos = total_usuarios - usuarios_ativos
-            
-            # Estatísticas por tipo
-            clientes = len([u for u in users if 'cliente' in u.roles])
-            prestadores = len([u for u in users if 'prestador' in u.roles])
-            usuarios_dual = len([u for u in users if 'cliente' in u.roles and 'prestador' in u.roles])
+            conditions = ReportService._user_conditions(start_date, end_date, user_type, status_filter)
+            is_cliente = User.roles.contains('cliente')
+            is_prestador = User.roles.contains('prestador')
+            
+            # Estatísticas gerais e por tipo
+            counts = db.session.query(
+                func.count(User.id),
+                func.coalesce(func.sum(case((User.active == True, 1), else_=0)), 0),
+                func.coalesce(func.sum(case((is_cliente, 1), else_=0)), 0),
+                func.coalesce(func.sum(case((is_prestador, 1), else_=0)), 0),
+                func.coalesce(func.sum(case((and_(is_cliente, is_prestador), 1), else_=0)), 0)
+            ).filter(*conditions).one()
+            total_usuarios, usuarios_ativos, clientes, prestadores, usuarios_dual = counts
             
             # Saldo total no sistema
-            saldo_total = sum(u.balance + u.escrow_balance for u in users)
-            volume_transacoes_total = sum(u.total_volume for u in users)
+            saldo_total = db.session.query(
+                func.coalesce(func.sum(
+                    func.coalesce(Wallet.balance, 0) + func.coalesce(Wallet.escrow_balance, 0)
+                ), 0)
+            ).select_from(User).outerjoin(Wallet, User.id == Wallet.user_id).filter(*conditions).scalar()
+            
+            # Volume de transações dos usuários do relatório
+            volume_transacoes_total = db.session.query(
+                func.coalesce(func.sum(func.abs(Transaction.amount)), 0)
+            ).join(User, Transaction.user_id == User.id).filter(*conditions).scalar()
             
             # Usuários por mês
-            monthly_stats = {}
-            for user in users:
-                month_key = user.created_at.strftime('%Y-%m')
-                if month_key not in monthly_stats:
-                    monthly_stats[month_key] = 0
-                monthly_stats[month_key] += 1
+            month = ReportService._month_key(User.created_at)
+            monthly_rows = db.session.query(
+                month,
+                func.count(User.id)
+            ).filter(*conditions).group_by(month).order_by(desc(month)).all()
+            monthly_stats = {key: count for key, count in monthly_rows}
+            
+            query = ReportService._users_query(start_date, end_date, user_type, status_filter)
+            users, pagination = ReportService._page(query, total_usuarios, page, per_page)
             
             return {
                 'users': users,
+                'pagination': pagination,
                 'total_usuarios': total_usuarios,
                 'usuarios_ativos': usuarios_ativos,
-                'usuarios_inativos': usuarios_inativos,
+                'usuarios_inativos': total_usuarios - usuarios_ativos,
                 'clientes': clientes,
                 'prestadores': prestadores,
                 'usuarios_dual': usuarios_dual,
@@ -200,70 +150,62 @@ class ReportService:
             raise ValueError(f"Erro ao gerar relatório de usuários: {str(e)}")
     
     @staticmethod
-    def get_financial_report_data(start_date=None, end_date=None):
-        """Obtém dados para relatório financeiro"""
+    @replica_read
+    def get_financial_report_data(start_date=None, end_date=None, page=1, per_page=None):
+        """
+        Obtém dados para relatório financeiro
+        
+        Volumes por tipo e por mês e receita de taxas vêm dos rollups de
+        volume (TransactionVolumeRollupService); maiores usuários são
+        agregados no banco; 'transactions' traz apenas a página pedida.
+        """
         try:
-            # Query base para transações
-            query = Transaction.query
-            
-            # Aplicar filtros de data
-            if start_date:
-                query = query.filter(Transaction.created_at >= start_date)
-            if end_date:
-                query = query.filter(Transaction.created_at <= end_date)
-            
-            transactions = query.order_by(desc(Transaction.created_at)).all()
-            
-            # Estatísticas por tipo de transação
-            transaction_stats = {}
-            for transaction in transactions:
-                t_type = transaction.type
-                if t_type not in transaction_stats:
-                    transaction_stats[t_type] = {'count': 0, 'total_amount': 0}
-                transaction_stats[t_type]['count'] += 1
-                transaction_stats[t_type]['total_amount'] += abs(transaction.amount)
+            period = in_period(Transaction.created_at, start_date, end_date)
+            amount = func.abs(Transaction.amount)
+            fee_types = ReportService.FEE_TRANSACTION_TYPES
+            
+            # Estatísticas por tipo de transação (rollups horário/diário)
+            transaction_stats = {
+                t_type: {'count': stats['count'], 'total_amount': stats['volume']}
+                for t_type, stats in TransactionVolumeRollupService.get_totals(start_date, end_date).items()
+            }
+            
+            total_transacoes = sum(stats['count'] for stats in transaction_stats.values())
+            volume_total = sum((stats['total_amount'] for stats in transaction_stats.values()), 0)
             
             # Receita do sistema (taxas)
-            receita_taxas = sum(
-                abs(t.amount) for t in transactions 
-                if t.type in ['taxa_sistema', 'taxa_transacao', 'taxa_saque']
-            )
-            
-            # Volume total de transações
-            volume_total = sum(abs(t.amount) for t in transactions)
-            
-            # Transações por mês
-            monthly_stats = {}
-            for transaction in transactions:
-                month_key = transaction.created_at.strftime('%Y-%m')
-                if month_key not in monthly_stats:
-                    monthly_stats[month_key] = {'count': 0, 'volume': 0, 'receita': 0}
-                monthly_stats[month_key]['count'] += 1
-                monthly_stats[month_key]['volume'] += abs(transaction.amount)
-                if transaction.type in ['taxa_sistema', 'taxa_transacao', 'taxa_saque']:
-                    monthly_stats[month_key]['receita'] += abs(transaction.amount)
+            receita_taxas = sum((stats['total_amount'] for t_type, stats in transaction_stats.items()
+                                 if t_type in fee_types), 0)
+            
+            # Transações por mês (mais recente primeiro)
+            series = TransactionVolumeRollupService.get_series(start_date, end_date, granularity='month')
+            monthly_stats = {
+                key: {
+                    'count': sum(stats['count'] for stats in series[key].values()),
+                    'volume': sum((stats['volume'] for stats in series[key].values()), 0),
+                    'receita': sum((stats['volume'] for t_type, stats in series[key].items() if t_type in fee_types), 0),
+                }
+                for key in sorted(series, reverse=True)
+            }
             
             # Top usuários por volume de transações
-            user_volumes = db.session.query(
+            top_users = db.session.query(
                 Transaction.user_id,
                 User.nome,
                 User.email,
                 func.count(Transaction.id).label('transaction_count'),
-                func.sum(func.abs(Transaction.amount)).label('total_volume')
-            ).join(User, Transaction.user_id == User.id)
-            
-            if start_date:
-                user_volumes = user_volumes.filter(Transaction.created_at >= start_date)
-            if end_date:
-                user_volumes = user_volumes.filter(Transaction.created_at <= end_date)
-            
-            top_users = user_volumes.group_by(
+                func.sum(amount).label('total_volume')
+            ).join(User, Transaction.user_id == User.id).filter(period).group_by(
                 Transaction.user_id, User.nome, User.email
             ).order_by(desc('total_volume')).limit(10).all()
             
+            query = Transaction.query.filter(period).order_by(desc(Transaction.created_at))
+            transactions, pagination = ReportService._page(query, total_transacoes, page, per_page)
+            
             return {
                 'transactions': transactions,
-                'total_transacoes': len(transactions),
+                'pagination': pagination,
+                'total_transacoes': total_transacoes,
                 'volume_total': volume_total,
                 'receita_taxas': receita_taxas,
                 'transaction_stats': transaction_stats,
@@ -278,74 +220,49 @@ class ReportService:
             raise ValueError(f"Erro ao gerar relatório financeiro: {str(e)}")
     
     @staticmethod
-    def get_invites_report_data(start_date=None, end_date=None, status_filter=None):
-        """Obtém dados para relatório de convites"""
+    @replica_read
+    def get_invites_report_data(start_date=None, end_date=None, status_filter=None, page=1, per_page=None):
+        """
+        Obtém dados para relatório de convites
+        
+        Contagens e valores por status, taxas de conversão e convites por mês
+        são agregados no banco; 'invites' traz apenas a página pedida.
+        """
         try:
-            # Query base
-            query = db.session.query(
-                Invite.id,
-                Invite.service_title,
-                Invite.service_description,
-                Invite.original_value,
-                Invite.final_value,
-                Invite.status,
-                Invite.created_at,
-                Invite.responded_at,
-                Invite.expires_at,
-                User.nome.label('client_name'),
-                User.email.label('client_email'),
-                Invite.invited_email,
-                func.coalesce(Order.id, None).label('order_id')
-            ).join(
-                User, Invite.client_id == User.id
-            ).outerjoin(
-                Order, Invite.order_id == Order.id
-            )
-            
-            # Aplicar filtros de data
-            if start_date:
-                query = query.filter(Invite.created_at >= start_date)
-            if end_date:
-                query = query.filter(Invite.created_at <= end_date)
-            
-            # Aplicar filtro de status
-            if status_filter and status_filter != 'todos':
-                query = query.filter(Invite.status == status_filter)
-            
-            invites = query.order_by(desc(Invite.created_at)).all()
-            
-            # Estatísticas
-            total_convites = len(invites)
+            conditions = ReportService._invite_conditions(start_date, end_date, status_filter)
             
             # Estatísticas por status
-            status_stats = {}
-            for invite in invites:
-                status = invite.status
-                if status not in status_stats:
-                    status_stats[status] = {'count': 0, 'value': 0}
-                status_stats[status]['count'] += 1
-                status_stats[status]['value'] += float(invite.final_value or invite.original_value)
+            status_rows = db.session.query(
+                Invite.status,
+                func.count(Invite.id),
+                func.coalesce(func.sum(func.coalesce(Invite.final_value, Invite.original_value)), 0)
+            ).filter(*conditions).group_by(Invite.status).all()
+            status_stats = {status: {'count': count, 'value': float(value)} for status, count, value in status_rows}
             
             # Taxa de conversão
-            aceitos = len([i for i in invites if i.status == 'aceito'])
-            convertidos = len([i for i in invites if i.status == 'convertido'])
+            total_convites = sum(stats['count'] for stats in status_stats.values())
+            aceitos = status_stats.get('aceito', {}).get('count', 0)
+            convertidos = status_stats.get('convertido', {}).get('count', 0)
             taxa_aceitacao = (aceitos / total_convites * 100) if total_convites > 0 else 0
             taxa_conversao = (convertidos / total_convites * 100) if total_convites > 0 else 0
             
             # Convites por mês
-            monthly_stats = {}
-            for invite in invites:
-                month_key = invite.created_at.strftime('%Y-%m')
-                if month_key not in monthly_stats:
-                    monthly_stats[month_key] = {'count': 0, 'aceitos': 0, 'convertidos': 0}
-                monthly_stats[month_key]['count'] += 1
-                if invite.status == 'aceito':
-                    monthly_stats[month_key]['aceitos'] += 1
-                elif invite.status == 'convertido':
-                    monthly_stats[month_key]['convertidos'] += 1
+            month = ReportService._month_key(Invite.created_at)
+            monthly_rows = db.session.query(
+                month,
+                func.count(Invite.id),
+                func.coalesce(func.sum(case((Invite.status == 'aceito', 1), else_=0)), 0),
+                func.coalesce(func.sum(case((Invite.status == 'convertido', 1), else_=0)), 0)
+            ).filter(*conditions).group_by(month).order_by(desc(month)).all()
+            monthly_stats = {key: {'count': count, 'aceitos': accepted, 'convertidos': converted}
+                             for key, count, accepted, converted in monthly_rows}
+            
+            query = ReportService._invites_query(start_date, end_date, status_filter)
+            invites, pagination = ReportService._page(query, total_convites, page, per_page)
             
             return {
                 'invites': invites,
+                'pagination': pagination,
                 'total_convites': total_convites,
                 'status_stats': status_stats,
                 'taxa_aceitacao': taxa_aceitacao,
@@ -360,7 +277,384 @@ class ReportService:
         except Exception as e:
             raise ValueError(f"Erro ao gerar relatório de convites: {str(e)}")
     
+    # ------------------------------------------------------------------
+    # Filtros, agrupamento por mês e paginação
+    # ------------------------------------------------------------------
+    
+    @staticmethod
+    def _month_key(column):
+        """Expressão 'AAAA-MM' da coluna para GROUP BY por mês, conforme o banco"""
+        dialect = db.engine.dialect.name
+        if dialect == 'postgresql':
+            return func.to_char(column, 'YYYY-MM')
+        if dialect in ('mysql', 'mariadb'):
+            return func.date_format(column, '%Y-%m')
+        return func.strftime('%Y-%m', column)
+    
+    @staticmethod
+    def _page(query, total, page=1, per_page=None):
+        """Uma página das linhas de detalhe e os dados de paginação"""
+        per_page = per_page or ReportService.REPORT_PAGE_SIZE
+        page = max(int(page or 1), 1)
+        rows = query.limit(per_page).offset((page - 1) * per_page).all()
+        return rows, {
+            'page': page,
+            'per_page': per_page,
+            'total': total,
+            'pages': (total + per_page - 1) // per_page
+        }
+    
+    @staticmethod
+    def _order_conditions(start_date=None, end_date=None, status_filter=None):
+        conditions = [in_period(Order.created_at, start_date, end_date)]
+        if status_filter and status_filter != 'todos':
+            if ',' in status_filter:
+                conditions.append(Order.status.in_(status_filter.split(',')))
+            else:
+                conditions.append(Order.status == status_filter)
+        return conditions
+    
+    @staticmethod
+    def _user_conditions(start_date=None, end_date=None, user_type=None, status_filter=None):
+        conditions = [in_period(User.created_at, start_date, end_date)]
+        
+        # Filtro de tipo de usuário
+        if user_type == 'cliente':
+            conditions.append(User.roles.contains('cliente'))
+        elif user_type == 'prestador':
+            conditions.append(User.roles.contains('prestador'))
+        elif user_type == 'dual':
+            conditions.append(and_(
+                User.roles.contains('cliente'),
+                User.roles.contains('prestador')
+            ))
+        
+        # Filtro de status
+        if status_filter == 'ativo':
+            conditions.append(User.active == True)
+        elif status_filter == 'inativo':
+            conditions.append(User.active == False)
+        return conditions
+    
+    @staticmethod
+    def _invite_conditions(start_date=None, end_date=None, status_filter=None):
+        conditions = [in_period(Invite.created_at, start_date, end_date)]
+        if status_filter and status_filter != 'todos':
+            conditions.append(Invite.status == status_filter)
+        return conditions
+    
+    # ------------------------------------------------------------------
+    # Consultas base (compartilhadas pelos relatórios e pelas exportações)
+    # ------------------------------------------------------------------
+    
+    @staticmethod
+    def _contracts_query(start_date=None, end_date=None, status_filter=None):
+        """Contratos/ordens com cliente e prestador, mais recentes primeiro"""
+        # Criar alias para o usuário prestador
+        from sqlalchemy.orm import aliased
+        ProviderUser = aliased(User)
+        
+        query = db.session.query(
+            Order.id,
+            Order.title,
+            Order.description,
+            Order.value,
+            Order.status,
+            Order.created_at,
+            Order.accepted_at,
+            Order.completed_at,
+            User.nome.label('client_name'),
+            User.email.label('client_email'),
+            User.cpf.label('client_cpf'),
+            func.coalesce(ProviderUser.nome, 'Não aceito').label('provider_name'),
+            func.coalesce(ProviderUser.email, '').label('provider_email')
+        ).join(
+            User, Order.client_id == User.id
+        ).outerjoin(
+            ProviderUser, Order.provider_id == ProviderUser.id
+        ).filter(
+            *ReportService._order_conditions(start_date, end_date, status_filter)
+        )
+        
+        return query.order_by(desc(Order.created_at))
+    
+    @staticmethod
+    def _users_query(start_date=None, end_date=None, user_type=None, status_filter=None):
+        """Usuários com saldos e volume de transações, mais recentes primeiro"""
+        query = db.session.query(
+            User.id,
+            User.nome,
+            User.email,
+            User.cpf,
+            User.phone,
+            User.roles,
+            User.active,
+            User.created_at,
+            func.coalesce(Wallet.balance, 0).label('balance'),
+            func.coalesce(Wallet.escrow_balance, 0).label('escrow_balance'),
+            func.count(Transaction.id).label('transaction_count'),
+            func.coalesce(func.sum(func.abs(Transaction.amount)), 0).label('total_volume')
+        ).outerjoin(
+            Wallet, User.id == Wallet.user_id
+        ).outerjoin(
+            Transaction, User.id == Transaction.user_id
+        ).filter(
+            *ReportService._user_conditions(start_date, end_date, user_type, status_filter)
+        ).group_by(
+            User.id, User.nome, User.email, User.cpf, User.phone,
+            User.roles, User.active, User.created_at,
+            Wallet.balance, Wallet.escrow_balance
+        )
+        
+        return query.order_by(desc(User.created_at))
+    
+    @staticmethod
+    def _financial_query(start_date=None, end_date=None):
+        """Transações com o usuário titular, mais recentes primeiro"""
+        query = db.session.query(
+            Transaction.id,
+            Transaction.transaction_id,
+            Transaction.type,
+            Transaction.amount,
+            Transaction.description,
+            Transaction.order_id,
+            Transaction.created_at,
+            User.nome.label('user_name'),
+            User.email.label('user_email')
+        ).join(
+            User, Transaction.user_id == User.id
+        ).filter(
+            in_period(Transaction.created_at, start_date, end_date)
+        )
+        
+        return query.order_by(desc(Transaction.created_at))
+    
+    @staticmethod
+    def _invites_query(start_date=None, end_date=None, status_filter=None):
+        """Convites com cliente e ordem gerada, mais recentes primeiro"""
+        query = db.session.query(
+            Invite.id,
+            Invite.service_title,
+            Invite.service_description,
+            Invite.original_value,
+            Invite.final_value,
+            Invite.status,
+            Invite.created_at,
+            Invite.responded_at,
+            Invite.expires_at,
+            User.nome.label('client_name'),
+            User.email.label('client_email'),
+            Invite.invited_email,
+            func.coalesce(Order.id, None).label('order_id')
+        ).join(
+            User, Invite.client_id == User.id
+        ).outerjoin(
+            Order, Invite.order_id == Order.id
+        ).filter(
+            *ReportService._invite_conditions(start_date, end_date, status_filter)
+        )
+        
+        return query.order_by(desc(Invite.created_at))
+    
+    # ------------------------------------------------------------------
+    # Exportação em fluxo (CSV/XLSX sem carregar o resultado inteiro)
+    # ------------------------------------------------------------------
+    
+    # Linhas lidas do cursor por vez (yield_per) e por bloco de CSV enviado
+    EXPORT_BATCH_SIZE = 1000
+    
+    # Colunas de cada exportação: (cabeçalho, atributo da linha, tipo)
+    EXPORT_COLUMNS = {
+        'contratos': [
+            ('ID', 'id', None), ('Título', 'title', None), ('Descrição', 'description', None),
+            ('Valor', 'value', 'currency'), ('Status', 'status', None),
+            ('Cliente', 'client_name', None), ('Email Cliente', 'client_email', None),
+            ('CPF Cliente', 'client_cpf', None), ('Prestador', 'provider_name', None),
+            ('Email Prestador', 'provider_email', None), ('Data Criação', 'created_at', 'datetime'),
+            ('Data Aceitação', 'accepted_at', 'datetime'), ('Data Conclusão', 'completed_at', 'datetime'),
+        ],
+        'usuarios': [
+            ('ID', 'id', None), ('Nome', 'nome', None), ('Email', 'email', None), ('CPF', 'cpf', None),
+            ('Telefone', 'phone', None), ('Papéis', 'roles', None), ('Ativo', 'active', None),
+            ('Saldo', 'balance', 'currency'), ('Saldo Escrow', 'escrow_balance', 'currency'),
+            ('Total Transações', 'transaction_count', None), ('Volume Total', 'total_volume', 'currency'),
+            ('Data Cadastro', 'created_at', 'datetime'),
+        ],
+        'financeiro': [
+            ('ID', 'id', None), ('Código', 'transaction_id', None), ('Tipo', 'type', None),
+            ('Valor', 'amount', 'currency'), ('Descrição', 'description', None), ('Ordem', 'order_id', None),
+            ('Usuário', 'user_name', None), ('Email', 'user_email', None), ('Data', 'created_at', 'datetime'),
+        ],
+        'convites': [
+            ('ID', 'id', None), ('Serviço', 'service_title', None), ('Descrição', 'service_description', None),
+            ('Valor Original', 'original_value', 'currency'), ('Valor Final', 'final_value', 'currency'),
+            ('Status', 'status', None), ('Cliente', 'client_name', None), ('Email Cliente', 'client_email', None),
+            ('Email Convidado', 'invited_email', None), ('Ordem', 'order_id', None),
+            ('Data Criação', 'created_at', 'datetime'), ('Data Resposta', 'responded_at', 'datetime'),
+            ('Expira em', 'expires_at', 'datetime'),
+        ],
+    }
+    
+    @staticmethod
+    def _export_query(report_type, filters=None):
+        """Consulta ordenada de uma exportação a partir dos filtros do relatório"""
+        filters = filters or {}
+        start_date, end_date = filters.get('start_date'), filters.get('end_date')
+        status_filter = filters.get('status_filter')
+        
+        if report_type == 'contratos':
+            return ReportService._contracts_query(start_date, end_date, status_filter)
+        if report_type == 'usuarios':
+            return ReportService._users_query(start_date, end_date, filters.get('user_type'), status_filter)
+        if report_type == 'financeiro':
+            return ReportService._financial_query(start_date, end_date)
+        if report_type == 'convites':
+            return ReportService._invites_query(start_date, end_date, status_filter)
+        raise ValueError(f"Tipo de relatório inválido: {report_type}")
+    
+    @staticmethod
+    @replica_read
+    def iter_export_rows(report_type, filters=None, batch_size=None):
+        """
+        Percorre as linhas de uma exportação com cursor no servidor
+        
+        Args:
+            report_type: contratos, usuarios, financeiro ou convites
+            filters: start_date, end_date, status_filter e user_type
+            batch_size: Linhas buscadas por vez (padrão EXPORT_BATCH_SIZE)
+            
+        Yields:
+            tuple: Valores da linha na ordem de EXPORT_COLUMNS[report_type]
+        """
+        columns = ReportService.EXPORT_COLUMNS[report_type]
+        query = ReportService._export_query(report_type, filters)
+        batch_size = batch_size or ReportService.EXPORT_BATCH_SIZE
+        
+        # stream_results: o PostgreSQL usa cursor nomeado e entrega batch_size linhas por vez
+        for row in query.yield_per(batch_size):
+            yield tuple(getattr(row, attribute) for _, attribute, _ in columns)
+    
+    @staticmethod
+    def _csv_value(value, kind):
+        if value is None:
+            return ''
+        if kind == 'datetime':
+            return value.strftime('%d/%m/%Y %H:%M')
+        if isinstance(value, bool):
+            return 'Sim' if value else 'Não'
+        return value
+    
     @staticmethod
+    @replica_read
+    def stream_csv(report_type, filters=None, batch_size=None, progress=None):
+        """
+        Gera a exportação CSV em blocos de bytes (UTF-8 com BOM, separador ';')
+        
+        Cada bloco contém até batch_size linhas; a memória usada não depende
+        do tamanho do relatório.
+        
+        Args:
+            progress: Chamado com o total de linhas escritas a cada bloco
+        """
+        columns = ReportService.EXPORT_COLUMNS[report_type]
+        batch_size = batch_size or ReportService.EXPORT_BATCH_SIZE
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, delimiter=';')
+        
+        writer.writerow([header for header, _, _ in columns])
+        yield ('\ufeff' + buffer.getvalue()).encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+        
+        rows = 0
+        for values in ReportService.iter_export_rows(report_type, filters, batch_size):
+            writer.writerow([ReportService._csv_value(value, kind)
+                             for value, (_, _, kind) in zip(values, columns)])
+            rows += 1
+            if rows % batch_size == 0:
+                yield buffer.getvalue().encode('utf-8')
+                buffer.seek(0)
+                buffer.truncate()
+                if progress:
+                    progress(rows)
+        
+        if buffer.tell():
+            yield buffer.getvalue().encode('utf-8')
+        if progress:
+            progress(rows)
+    
+    @staticmethod
+    @replica_read
+    def export_to_xlsx_file(report_type, filters=None, path=None, batch_size=None, progress=None):
+        """
+        Escreve a exportação XLSX em arquivo, linha a linha
+        
+        Usa o modo constant_memory do xlsxwriter: cada linha é gravada em
+        disco assim que a próxima começa, então a memória não cresce com o
+        número de linhas.
+        
+        Args:
+            path: Arquivo de destino (padrão: arquivo temporário)
+            progress: Chamado com o total de linhas escritas a cada batch_size linhas
+            
+        Returns:
+            tuple: (caminho do arquivo, linhas exportadas)
+        """
+        columns = ReportService.EXPORT_COLUMNS[report_type]
+        batch_size = batch_size or ReportService.EXPORT_BATCH_SIZE
+        if path is None:
+            handle, path = tempfile.mkstemp(prefix=f'relatorio_{report_type}_', suffix='.xlsx')
+            os.close(handle)
+        
+        workbook = xlsxwriter.Workbook(path, {'constant_memory': True})
+        try:
+            header_format = workbook.add_format({
+                'bold': True,
+                'bg_color': '#4472C4',
+                'font_color': 'white',
+                'border': 1
+            })
+            formats = {
+                'currency': workbook.add_format({'num_format': 'R$ #,##0.00'}),
+                'datetime': workbook.add_format({'num_format': 'dd/mm/yyyy hh:mm'}),
+                None: None,
+            }
+            column_formats = [formats[kind] for _, _, kind in columns]
+            
+            worksheet = workbook.add_worksheet(report_type.title())
+            for col, (header, _, _) in enumerate(columns):
+                worksheet.write(0, col, header, header_format)
+            
+            rows = 0
+            for rows, values in enumerate(ReportService.iter_export_rows(report_type, filters, batch_size), 1):
+                for col, value in enumerate(values):
+                    if value is not None:
+                        worksheet.write(rows, col, value, column_formats[col])
+                if progress and rows % batch_size == 0:
+                    progress(rows)
+        finally:
+            workbook.close()
+        
+        if progress:
+            progress(rows)
+        return path, rows
+    
+    @staticmethod
+    def stream_file(path, chunk_size=64 * 1024, delete=True):
+        """Lê um arquivo em blocos para uma resposta em fluxo, removendo-o ao final"""
+        try:
+            with open(path, 'rb') as handle:
+                while True:
+                    chunk = handle.read(chunk_size)
+                    if not chunk:
+                        break
+                    yield chunk
+        finally:
+            if delete and os.path.exists(path):
+                os.remove(path)
+    
+    @staticmethod
+    @replica_read
     def export_contracts_to_excel(data):
         """Exporta relatório de contratos para Excel"""
         try:
@@ -392,7 +686,9 @@ class ReportService:
                 worksheet.write(0, col, header, header_format)
             
             # Dados
-            for row, order in enumerate(data['orders'], 1):
+            # Todas as linhas dos filtros (data['orders'] traz só uma página)
+            orders = ReportService._export_query('contratos', data['filters']).yield_per(ReportService.EXPORT_BATCH_SIZE)
+            for row, order in enumerate(orders, 1):
                 worksheet.write(row, 0, order.id)
                 worksheet.write(row, 1, order.title)
                 worksheet.write(row, 2, order.description[:100] + '...' if len(order.description) > 100 else order.description)
@@ -439,6 +735,7 @@ class ReportService:
             raise ValueError(f"Erro ao exportar para Excel: {str(e)}")
     
     @staticmethod
+    @replica_read
     def export_users_to_excel(data):
         """Exporta relatório de usuários para Excel"""
         try:
@@ -470,7 +767,9 @@ class ReportService:
                 worksheet.write(0, col, header, header_format)
             
             # Dados
-            for row, user in enumerate(data['users'], 1):
+            # Todas as linhas dos filtros (data['users'] traz só uma página)
+            users = ReportService._export_query('usuarios', data['filters']).yield_per(ReportService.EXPORT_BATCH_SIZE)
+            for row, user in enumerate(users, 1):
                 worksheet.write(row, 0, user.id)
                 worksheet.write(row, 1, user.nome)
                 worksheet.write(row, 2, user.email)
@@ -510,170 +809,200 @@ class ReportService:
         except Exception as e:
             raise ValueError(f"Erro ao exportar para Excel: {str(e)}")
     
+    # ------------------------------------------------------------------
+    # PDF paginado em fluxo
+    # ------------------------------------------------------------------
+    
+    PDF_ROW_HEIGHT = 14
+    PDF_HEADER_HEIGHT = 20
+    PDF_MARGIN = 40
+    
+    # Colunas da tabela de detalhes: (cabeçalho, largura em polegadas)
+    PDF_LAYOUTS = {
+        'contratos': {
+            'title': 'Relatório de Contratos',
+            'heading': 'Detalhes dos Contratos',
+            'columns': [('ID', 0.5), ('Título', 2), ('Cliente', 1.5), ('Valor', 1), ('Status', 1), ('Data', 1)],
+        },
+        'usuarios': {
+            'title': 'Relatório de Usuários',
+            'heading': 'Detalhes dos Usuários',
+            'columns': [('ID', 0.5), ('Nome', 1.8), ('Email', 2), ('Papéis', 1), ('Saldo', 1), ('Status', 0.7)],
+        },
+    }
+    
+    @staticmethod
+    def _truncate(text, size):
+        text = text or ''
+        return text[:size] + '...' if len(text) > size else text
+    
+    @staticmethod
+    def _pdf_cells(report_type, row):
+        """Textos de uma linha da tabela de detalhes"""
+        if report_type == 'contratos':
+            return [
+                str(row.id),
+                ReportService._truncate(row.title, 30),
+                ReportService._truncate(row.client_name, 20),
+                f"R$ {row.value:,.2f}",
+                row.status.title(),
+                row.created_at.strftime('%d/%m/%Y') if row.created_at else ''
+            ]
+        return [
+            str(row.id),
+            ReportService._truncate(row.nome, 25),
+            ReportService._truncate(row.email, 30),
+            row.roles,
+            f"R$ {row.balance:,.2f}",
+            'Ativo' if row.active else 'Inativo'
+        ]
+    
+    @staticmethod
+    def _pdf_summary(report_type, data):
+        """Linhas (rótulo, valor) do quadro de resumo da primeira página"""
+        if report_type == 'contratos':
+            return [
+                ('Total de Contratos:', str(data['total_contratos'])),
+                ('Valor Total:', f"R$ {data['valor_total']:,.2f}"),
+                ('Período:', f"{data['filters']['start_date'] or 'Início'} até {data['filters']['end_date'] or 'Hoje'}")
+            ]
+        return [
+            ('Total de Usuários:', str(data['total_usuarios'])),
+            ('Usuários Ativos:', str(data['usuarios_ativos'])),
+            ('Clientes:', str(data['clientes'])),
+            ('Prestadores:', str(data['prestadores'])),
+            ('Saldo Total Sistema:', f"R$ {data['saldo_total']:,.2f}")
+        ]
+    
+    @staticmethod
+    def _pdf_report_data(report_type, filters):
+        """Resumo agregado no banco (as linhas de detalhe vêm do cursor)"""
+        start_date, end_date = filters.get('start_date'), filters.get('end_date')
+        if report_type == 'contratos':
+            return ReportService.get_contracts_report_data(start_date, end_date, filters.get('status_filter'),
+                                                           per_page=1)
+        return ReportService.get_users_report_data(start_date, end_date, filters.get('user_type'),
+                                                   filters.get('status_filter'), per_page=1)
+    
+    @staticmethod
+    @replica_read
+    def export_to_pdf_file(report_type, filters=None, path=None, data=None, batch_size=None, progress=None):
+        """
+        Escreve o relatório em PDF com todas as linhas, página a página
+        
+        As linhas vêm da mesma consulta das exportações (yield_per) e cada
+        página é gravada no arquivo assim que fica cheia (PdfStreamWriter),
+        então a memória não cresce com o número de linhas.
+        
+        Args:
+            report_type: contratos ou usuarios
+            filters: start_date, end_date, status_filter e user_type
+            path: Arquivo de destino (padrão: arquivo temporário)
+            data: Resumo já calculado (get_*_report_data); consultado se ausente
+            progress: Chamado com o total de linhas escritas a cada batch_size linhas
+            
+        Returns:
+            tuple: (caminho do arquivo, linhas exportadas)
+        """
+        if report_type not in ReportService.PDF_LAYOUTS:
+            raise ValueError(f"Relatório sem layout PDF: {report_type}")
+        
+        layout = ReportService.PDF_LAYOUTS[report_type]
+        filters = filters or {}
+        batch_size = batch_size or ReportService.EXPORT_BATCH_SIZE
+        if data is None:
+            data = ReportService._pdf_report_data(report_type, filters)
+        if path is None:
+            handle, path = tempfile.mkstemp(prefix=f'relatorio_{report_type}_', suffix='.pdf')
+            os.close(handle)
+        
+        row_height, margin = ReportService.PDF_ROW_HEIGHT, ReportService.PDF_MARGIN
+        headers = [header for header, _ in layout['columns']]
+        widths = [width * inch for _, width in layout['columns']]
+        pdf = PdfStreamWriter(path, A4)
+        left = (pdf.width - sum(widths)) / 2
+        
+        def draw_row(y, cells, height, font, size, fill, color):
+            pdf.rect(left, y, sum(widths), height, fill=fill.rgb())
+            x = left
+            for width, cell in zip(widths, cells):
+                if x > left:
+                    pdf.line(x, y, x, y + height)
+                pdf.text(x + width / 2, y + (height - size) / 2 + 1, cell, font=font, size=size,
+                         align='center', color=color.rgb())
+                x += width
+        
+        def draw_header(y):
+            y -= ReportService.PDF_HEADER_HEIGHT
+            draw_row(y, headers, ReportService.PDF_HEADER_HEIGHT, 'bold', 10, colors.grey, colors.whitesmoke)
+            return y
+        
+        def finish_page():
+            pdf.text(pdf.width / 2, margin / 2, f'Página {pdf.page_count + 1}', size=8, align='center')
+            pdf.end_page()
+        
+        try:
+            # Primeira página: título, resumo e início da tabela
+            pdf.begin_page()
+            y = pdf.height - margin - 18
+            pdf.text(pdf.width / 2, y, layout['title'], font='bold', size=18, align='center')
+            y -= 42
+            for label, value in ReportService._pdf_summary(report_type, data):
+                y -= 22
+                pdf.rect(left, y, 4 * inch, 22, fill=colors.lightgrey.rgb())
+                pdf.line(left + 2 * inch, y, left + 2 * inch, y + 22)
+                pdf.text(left + 6, y + 7, label, font='bold', size=10)
+                pdf.text(left + 2 * inch + 6, y + 7, value, font='bold', size=10)
+            y -= 36
+            pdf.text(left, y, layout['heading'], font='bold', size=14)
+            y = draw_header(y - 12)
+            
+            rows = 0
+            query = ReportService._export_query(report_type, filters)
+            for rows, row in enumerate(query.yield_per(batch_size), 1):
+                if y - row_height < margin:
+                    finish_page()
+                    pdf.begin_page()
+                    y = draw_header(pdf.height - margin)
+                y -= row_height
+                draw_row(y, ReportService._pdf_cells(report_type, row), row_height, 'regular', 8,
+                         colors.beige, colors.black)
+                if progress and rows % batch_size == 0:
+                    progress(rows)
+            
+            finish_page()
+            pdf.close()
+        except Exception:
+            pdf.abort()
+            if os.path.exists(path):
+                os.remove(path)
+            raise
+        
+        if progress:
+            progress(rows)
+        return path, rows
+    
+    @staticmethod
+    def _pdf_bytes(report_type, data):
+        path, _ = ReportService.export_to_pdf_file(report_type, data['filters'], data=data)
+        try:
+            with open(path, 'rb') as handle:
+                return handle.read()
+        finally:
+            os.remove(path)
+    
     @staticmethod
     def export_contracts_to_pdf(data):
-        """Exporta relatório de contratos para PDF"""
+        """Exporta relatório de contratos para PDF (todas as linhas dos filtros)"""
         try:
-            output = io.BytesIO()
-            doc = SimpleDocTemplate(output, pagesize=A4)
-            styles = getSampleStyleSheet()
-            story = []
-            
-            # Título
-            title_style = ParagraphStyle(
-                'CustomTitle',
-                parent=styles['Heading1'],
-                fontSize=18,
-                spaceAfter=30,
-                alignment=1  # Center
-            )
-            story.append(Paragraph("Relatório de Contratos", title_style))
-            story.append(Spacer(1, 12))
-            
-            # Resumo
-            summary_data = [
-                ['Total de Contratos:', str(data['total_contratos'])],
-                ['Valor Total:', f"R$ {data['valor_total']:,.2f}"],
-                ['Período:', f"{data['filters']['start_date'] or 'Início'} até {data['filters']['end_date'] or 'Hoje'}"]
-            ]
-            
-            summary_table = Table(summary_data, colWidths=[2*inch, 2*inch])
-            summary_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, -1), colors.lightgrey),
-                ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, -1), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
-            
-            story.append(summary_table)
-            story.append(Spacer(1, 20))
-            
-            # Tabela de contratos (primeiros 50)
-            story.append(Paragraph("Detalhes dos Contratos", styles['Heading2']))
-            story.append(Spacer(1, 12))
-            
-            table_data = [['ID', 'Título', 'Cliente', 'Valor', 'Status', 'Data']]
-            
-            for order in data['orders'][:50]:  # Limitar a 50 para não quebrar o PDF
-                table_data.append([
-                    str(order.id),
-                    order.title[:30] + '...' if len(order.title) > 30 else order.title,
-                    order.client_name[:20] + '...' if len(order.client_name) > 20 else order.client_name,
-                    f"R$ {order.value:,.2f}",
-                    order.status.title(),
-                    order.created_at.strftime('%d/%m/%Y')
-                ])
-            
-            contracts_table = Table(table_data, colWidths=[0.5*inch, 2*inch, 1.5*inch, 1*inch, 1*inch, 1*inch])
-            contracts_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                ('FONTSIZE', (0, 1), (-1, -1), 8),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
-            
-            story.append(contracts_table)
-            
-            if len(data['orders']) > 50:
-                story.append(Spacer(1, 12))
-                story.append(Paragraph(f"Nota: Mostrando apenas os primeiros 50 contratos de {len(data['orders'])} total.", styles['Normal']))
-            
-            doc.build(story)
-            output.seek(0)
-            
-            return output.getvalue()
+            return ReportService._pdf_bytes('contratos', data)
         except Exception as e:
             raise ValueError(f"Erro ao exportar para PDF: {str(e)}")
     
     @staticmethod
     def export_users_to_pdf(data):
-        """Exporta relatório de usuários para PDF"""
+        """Exporta relatório de usuários para PDF (todas as linhas dos filtros)"""
         try:
-            output = io.BytesIO()
-            doc = SimpleDocTemplate(output, pagesize=A4)
-            styles = getSampleStyleSheet()
-            story = []
-            
-            # Título
-            title_style = ParagraphStyle(
-                'CustomTitle',
-                parent=styles['Heading1'],
-                fontSize=18,
-                spaceAfter=30,
-                alignment=1  # Center
-            )
-            story.append(Paragraph("Relatório de Usuários", title_style))
-            story.append(Spacer(1, 12))
-            
-            # Resumo
-            summary_data = [
-                ['Total de Usuários:', str(data['total_usuarios'])],
-                ['Usuários Ativos:', str(data['usuarios_ativos'])],
-                ['Clientes:', str(data['clientes'])],
-                ['Prestadores:', str(data['prestadores'])],
-                ['Saldo Total Sistema:', f"R$ {data['saldo_total']:,.2f}"]
-            ]
-            
-            summary_table = Table(summary_data, colWidths=[2*inch, 2*inch])
-            summary_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, -1), colors.lightgrey),
-                ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, -1), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
-            
-            story.append(summary_table)
-            story.append(Spacer(1, 20))
-            
-            # Tabela de usuários (primeiros 50)
-            story.append(Paragraph("Detalhes dos Usuários", styles['Heading2']))
-            story.append(Spacer(1, 12))
-            
-            table_data = [['ID', 'Nome', 'Email', 'Papéis', 'Saldo', 'Status']]
-            
-            for user in data['users'][:50]:  # Limitar a 50
-                table_data.append([
-                    str(user.id),
-                    user.nome[:25] + '...' if len(user.nome) > 25 else user.nome,
-                    user.email[:30] + '...' if len(user.email) > 30 else user.email,
-                    user.roles,
-                    f"R$ {user.balance:,.2f}",
-                    'Ativo' if user.active else 'Inativo'
-                ])
-            
-            users_table = Table(table_data, colWidths=[0.5*inch, 1.8*inch, 2*inch, 1*inch, 1*inch, 0.7*inch])
-            users_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                ('FONTSIZE', (0, 1), (-1, -1), 8),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
-            
-            story.append(users_table)
-            
-            if len(data['users']) > 50:
-                story.append(Spacer(1, 12))
-                story.append(Paragraph(f"Nota: Mostrando apenas os primeiros 50 usuários de {len(data['users'])} total.", styles['Normal']))
-            
-            doc.build(story)
-            output.seek(0)
-            
-            return output.getvalue()
+            return ReportService._pdf_bytes('usuarios', data)
         except Exception as e:
-            raise ValueError(f"Erro ao exportar para PDF: {str(e)}")
\ No newline at end of file
+            raise ValueError(f"Erro ao exportar para PDF: {str(e)}")
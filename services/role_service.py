@@ -7,21 +7,15 @@ Implementa alternância entre cliente e prestador para usuários dual
 """
 
 from flask import session
-from models import User
+from services.user_loader import UserLoader
 
 class RoleService:
     """Serviço para gerenciamento de papéis de usuário"""
     
     @staticmethod
     def get_user_roles(user_id):
-        """Obter lista de papéis do usuário"""
-        user = User.query.get(user_id)
-        if not user:
-            return []
-        
-        # Dividir roles por vírgula e limpar espaços
-        roles = [role.strip() for role in user.roles.split(',')]
-        return roles
+        """Obter lista de papéis do usuário (uma consulta por requisição)"""
+        return UserLoader.get_roles(user_id)
     
     @staticmethod
     def is_dual_role_user(user_id):
@@ -29,9 +29,6 @@ class SecurityValidator:
     MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB em bytes
     MAX_FILES_PER_UPLOAD = 5
     
-    # Configurações de rate limiting (em memória - para produção usar Redis)
-    _rate_limit_store = {}
-    
     @staticmethod
     def validate_order_ownership(order, user_id: int, required_role: Optional[str] = None) -> Tuple[bool, str]:
         """
@@ -212,34 +209,17 @@ class SecurityValidator:
         Returns:
             Tuple[bool, str]: (is_allowed, error_message)
         """
-        now = datetime.utcnow()
-        key = f"{user_id}:{action}"
-        
-        # Obter histórico de tentativas
-        if key not in SecurityValidator._rate_limit_store:
-            SecurityValidator._rate_limit_store[key] = []
-        
-        attempts = SecurityValidator._rate_limit_store[key]
+        from services.rate_limiter_service import RateLimiterService
         
-        # Remover tentativas antigas (fora da janela de tempo)
-        cutoff_time = now.timestamp() - window_seconds
-        attempts = [t for t in attempts if t > cutoff_time]
-        SecurityValidator._rate_limit_store[key] = attempts
-        
-        # Verificar se excedeu o limite
-        if len(attempts) >= max_attempts:
+        if not RateLimiterService.check_action(user_id, action, max_attempts, window_seconds):
             logger.warning(
                 f"Rate limit excedido para usuário {user_id} na ação '{action}'. "
-                f"Tentativas: {len(attempts)}/{max_attempts} em {window_seconds}s"
+                f"Limite: {max_attempts} em {window_seconds}s"
             )
             return False, (
                 f"Muitas tentativas. Aguarde {window_seconds} segundos antes de tentar novamente."
             )
         
-        # Registrar nova tentativa
-        attempts.append(now.timestamp())
-        SecurityValidator._rate_limit_store[key] = attempts
-        
         return True, ""
     
     @staticmethod
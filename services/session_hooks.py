@@ -0,0 +1,248 @@
+#!/usr/bin/env python3.11
+# -*- coding: utf-8 -*-
+
+"""
+Ouvintes de sessão compartilhados pelos serviços de cache e de estatísticas
+
+TagInvalidationHook implementa o ciclo usado pelos caches invalidados por
+tags (dashboards, pré-ordens):
+
+- `before_flush`: o serviço informa as tags afetadas pelas mudanças
+  pendentes, acumuladas em session.info até o fim da transação
+- `after_commit`: as tags acumuladas são invalidadas de uma vez
+- `after_rollback`: as tags são descartadas (nada foi gravado)
+
+RowChangeFeed é o único ouvinte `before_flush` das tabelas de estatísticas
+(user_monthly_stats, provider_stats): monta, uma vez por flush, os valores
+antes/depois de cada registro novo, alterado ou removido — os anteriores
+lidos com uma consulta por modelo — e os entrega a cada serviço inscrito,
+que calcula e aplica seus incrementos com `upsert_increment`.
+"""
+
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Set, Tuple
+import logging
+
+from sqlalchemy import and_, event, inspect, select, update
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+
+def history_values(obj, attribute: str) -> Set:
+    """
+    Valor atual e, se conhecido, o anterior de um atributo
+
+    Atributos expirados (ex: após commit) são carregados do banco; isso é
+    seguro em before_flush, quando as linhas ainda não foram alteradas.
+    """
+    history = inspect(obj).attrs[attribute].history
+    values = set(history.added) | set(history.unchanged) | set(history.deleted)
+    if not values:
+        values = {getattr(obj, attribute, None)}
+    return {value for value in values if value is not None}
+
+
+class TagInvalidationHook:
+    """
+    Invalida tags de cache depois do commit das mudanças que as afetam
+
+    Uso:
+        hook = TagInvalidationHook('dashboard_payload', collect_tags, cache.invalidate_tags,
+                                   'cache das dashboards')
+        hook.register()
+    """
+
+    def __init__(self, name: str, collect: Callable[[Session], Iterable[str]],
+                 invalidate: Callable[..., object], description: str):
+        """
+        Args:
+            name: Identificação do hook (chave em session.info)
+            collect: Recebe a sessão em before_flush e retorna as tags afetadas
+            invalidate: Chamada com as tags acumuladas após o commit
+            description: Descrição do cache para as mensagens de erro
+        """
+        self.pending_key = f'{name}_pending_tags'
+        self.collect = collect
+        self.invalidate = invalidate
+        self.description = description
+
+    def _before_flush(self, session, flush_context, instances):
+        tags = set(self.collect(session))
+        if tags:
+            session.info.setdefault(self.pending_key, set()).update(tags)
+
+    def _after_commit(self, session):
+        tags = session.info.pop(self.pending_key, None)
+        if not tags:
+            return
+        try:
+            self.invalidate(*tags)
+        except Exception as e:
+            logger.error(f"Erro ao invalidar {self.description}: {e}")
+
+    def _after_rollback(self, session):
+        session.info.pop(self.pending_key, None)
+
+    def register(self):
+        """Registra os ouvintes de sessão (idempotente)"""
+        listeners = (
+            ('before_flush', self._before_flush),
+            ('after_commit', self._after_commit),
+            ('after_rollback', self._after_rollback),
+        )
+        for name, listener in listeners:
+            if not event.contains(Session, name, listener):
+                event.listen(Session, name, listener)
+
+
+class RowChange(NamedTuple):
+    """Valores de um registro antes e depois do flush"""
+    model: type
+    before: Optional[Dict]  # None: registro novo (ou linha já ausente)
+    after: Optional[Dict]  # None: registro removido
+
+
+class RowChangeFeed:
+    """
+    Ouvinte de flush único para os serviços de estatísticas
+
+    Uso:
+        RowChangeFeed.subscribe(Service.apply_changes, {Order: ORDER_FIELDS})
+        RowChangeFeed.register()
+    """
+
+    _consumers: List[Tuple[Callable, Dict[type, Tuple[str, ...]]]] = []
+
+    @classmethod
+    def subscribe(cls, consumer: Callable, fields: Dict[type, Sequence[str]]):
+        """
+        Inscreve um consumidor (idempotente)
+
+        Args:
+            consumer: Chamado com (connection, [RowChange]) a cada flush com mudanças
+            fields: Campos de que o consumidor precisa, por modelo
+        """
+        if any(existing == consumer for existing, _ in cls._consumers):
+            return
+        cls._consumers.append((consumer, {model: tuple(names) for model, names in fields.items()}))
+
+    @classmethod
+    def _fields(cls) -> Dict[type, Tuple[str, ...]]:
+        """União dos campos pedidos pelos consumidores, por modelo"""
+        fields: Dict[type, Tuple[str, ...]] = {}
+        for _, consumer_fields in cls._consumers:
+            for model, names in consumer_fields.items():
+                current = fields.get(model, ('id',))
+                fields[model] = current + tuple(name for name in names if name not in current)
+        return fields
+
+    @staticmethod
+    def _values_after(obj, fields: Sequence[str]) -> Dict:
+        """Valores atuais dos campos (created_at ainda vazio em objetos novos)"""
+        values = {field: getattr(obj, field) for field in fields}
+        if 'created_at' in values and values['created_at'] is None:
+            values['created_at'] = datetime.utcnow()
+        return values
+
+    @staticmethod
+    def _values_before(session, model, fields: Sequence[str], ids) -> Dict[int, Dict]:
+        """
+        Valores gravados no banco antes das mudanças pendentes, por id
+
+        Lidos pela chave primária: o histórico do ORM não traz o valor antigo
+        de atributos expirados (ex: após commit) que foram reatribuídos.
+        """
+        if not ids:
+            return {}
+        rows = session.execute(
+            select(*[getattr(model, field) for field in fields]).where(model.id.in_(list(ids)))
+        ).all()
+        return {row.id: dict(zip(fields, row)) for row in rows}
+
+    @classmethod
+    def collect_changes(cls, session) -> List[RowChange]:
+        """Mudanças pendentes na sessão nos modelos acompanhados"""
+        fields = cls._fields()
+        changes = []
+        stored = []  # (modelo, objeto, removido)
+
+        for obj in session.new:
+            for model, names in fields.items():
+                if isinstance(obj, model):
+                    changes.append(RowChange(model, None, cls._values_after(obj, names)))
+
+        for obj in session.dirty:
+            for model, names in fields.items():
+                if isinstance(obj, model):
+                    state = inspect(obj)
+                    if any(state.attrs[name].history.has_changes() for name in names):
+                        stored.append((model, obj, False))
+
+        for obj in session.deleted:
+            for model in fields:
+                if isinstance(obj, model):
+                    stored.append((model, obj, True))
+
+        before = {
+            model: cls._values_before(session, model, names,
+                                      {obj.id for obj_model, obj, _ in stored if obj_model is model})
+            for model, names in fields.items()
+        }
+        for model, obj, deleted in stored:
+            after = None if deleted else cls._values_after(obj, fields[model])
+            changes.append(RowChange(model, before[model].get(obj.id), after))
+        return changes
+
+    @classmethod
+    def _before_flush(cls, session, flush_context, instances):
+        if not cls._consumers:
+            return
+        changes = cls.collect_changes(session)
+        if not changes:
+            return
+        connection = session.connection()
+        for consumer, _ in list(cls._consumers):
+            consumer(connection, changes)
+
+    @classmethod
+    def register(cls):
+        """Registra o ouvinte de flush (idempotente)"""
+        if not event.contains(Session, 'before_flush', cls._before_flush):
+            event.listen(Session, 'before_flush', cls._before_flush)
+
+
+def upsert_increment(connection, table, keys: Dict, values: Dict, now: Optional[datetime] = None):
+    """
+    Soma `values` à linha identificada por `keys`, criando-a se necessário
+
+    Incrementos feitos no banco (coluna = coluna + delta), seguros com vários
+    workers. UPSERT em SQLite/PostgreSQL; UPDATE + INSERT nos demais bancos.
+    Atualiza `updated_at` quando a tabela tem essa coluna.
+    """
+    dialect = connection.dialect.name
+    extra = {'updated_at': now or datetime.utcnow()} if 'updated_at' in table.c else {}
+
+    if dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        stmt = insert(table).values(**keys, **values, **extra)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c[column] for column in keys],
+            set_={
+                **{column: table.c[column] + stmt.excluded[column] for column in values},
+                **extra,
+            }
+        )
+        connection.execute(stmt)
+        return
+
+    result = connection.execute(
+        update(table)
+        .where(and_(*[table.c[column] == value for column, value in keys.items()]))
+        .values(**extra, **{column: table.c[column] + amount for column, amount in values.items()})
+    )
+    if result.rowcount == 0:
+        connection.execute(table.insert().values(**keys, **values, **extra))
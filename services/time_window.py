@@ -0,0 +1,66 @@
+#!/usr/bin/env python3.11
+# -*- coding: utf-8 -*-
+
+"""
+Intervalos de tempo semiabertos para filtros de consultas
+
+Filtros como `func.date(coluna) == hoje` aplicam uma função à coluna e
+impedem o uso de índices (varredura completa da tabela). Aqui os períodos
+viram comparações diretas `coluna >= início AND coluna < fim`, atendidas
+por índices em (..., created_at).
+
+Convenção: datas (date) representam dias inteiros, incluídos os dois
+extremos; datetimes são instantes, com o fim exclusivo.
+"""
+
+from datetime import date, datetime, time, timedelta
+from typing import Optional, Union
+
+from sqlalchemy import and_, true
+
+Moment = Union[date, datetime]
+
+
+def start_of_day(day: date) -> datetime:
+    return datetime.combine(day, time.min)
+
+
+def to_start(value: Moment) -> datetime:
+    """Início do intervalo: data -> meia-noite do dia"""
+    if isinstance(value, datetime):
+        return value
+    return start_of_day(value)
+
+
+def to_end(value: Moment) -> datetime:
+    """Fim exclusivo do intervalo: data -> meia-noite do dia seguinte"""
+    if isinstance(value, datetime):
+        return value
+    return start_of_day(value + timedelta(days=1))
+
+
+def in_period(column, start: Optional[Moment] = None, end: Optional[Moment] = None):
+    """
+    Predicado indexável `column >= start AND column < end`
+
+    Args:
+        column: Coluna DateTime
+        start: Início (data ou datetime); vazio = sem limite inferior
+        end: Fim (data = dia incluído; datetime = exclusivo); vazio = sem limite superior
+
+    Returns:
+        Expressão SQLAlchemy para usar em filter()
+    """
+    conditions = []
+    if start:
+        conditions.append(column >= to_start(start))
+    if end:
+        conditions.append(column < to_end(end))
+    if not conditions:
+        return true()
+    return and_(*conditions)
+
+
+def on_day(column, day: date):
+    """Predicado indexável para `func.date(column) == day`"""
+    return in_period(column, day, day)
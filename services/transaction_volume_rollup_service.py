@@ -0,0 +1,424 @@
+#!/usr/bin/env python3.11
+# -*- coding: utf-8 -*-
+
+"""
+TransactionVolumeRollupService - Volume de transações por hora e por dia
+
+A dashboard administrativa e o relatório financeiro somavam
+transactions.amount (com e sem abs) sobre a tabela bruta a cada
+carregamento. Agora:
+
+- O job rollup_transaction_volume consolida as transações novas, a partir da
+  marca d'água em transactions.id (rollup_watermarks), em
+  transaction_volume_hourly e transaction_volume_daily, por tipo; rollups e
+  marca d'água são gravados na mesma transação
+- Só entram linhas criadas há mais de TRANSACTION_ROLLUP_SETTLE_SECONDS, para
+  não pular inserções ainda em andamento com ids menores
+- As leituras combinam dias completos (diário), horas completas (horário) e,
+  da tabela bruta, as frações de hora nas pontas do período e as transações
+  acima da marca d'água: o resultado é exato para qualquer intervalo
+- transactions é um livro-razão só de inserção; correções feitas
+  diretamente no banco exigem `rebuild`
+"""
+
+from collections import defaultdict
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import logging
+
+from flask import current_app
+from sqlalchemy import and_, func, update
+
+from models import db, Transaction, TransactionVolumeHourly, TransactionVolumeDaily, RollupWatermark
+from services.time_window import Moment, in_period, to_start, to_end
+
+logger = logging.getLogger(__name__)
+
+WATERMARK_NAME = 'transaction_volume'
+DEFAULT_SETTLE_SECONDS = 60
+DEFAULT_BATCH_SIZE = 5000
+
+# Formato das chaves de série: strftime/DATE_FORMAT e to_char (PostgreSQL)
+GRANULARITIES = {
+    'hour': ('%Y-%m-%d %H:00', 'YYYY-MM-DD HH24:00'),
+    'day': ('%Y-%m-%d', 'YYYY-MM-DD'),
+    'month': ('%Y-%m', 'YYYY-MM'),
+}
+
+# Categorias exibidas na dashboard (tipos não listados ficam em 'outros')
+CATEGORIES = {
+    'taxas': ('taxa_sistema', 'taxa_transacao', 'taxa_saque', 'taxa'),
+    'depositos': ('deposito', 'credito', 'compra_tokens'),
+    'saques': ('saque', 'saque_tokens'),
+    'escrow': ('escrow_bloqueio', 'escrow_liberacao', 'escrow_reembolso', 'transfer_to_escrow',
+               'release_from_escrow', 'refund_from_escrow', 'transfer_from_escrow_to_user',
+               'release_escrow_to_balance'),
+}
+
+Totals = List  # [quantidade, soma com sinal, volume absoluto]
+
+
+def hour_start(moment: datetime) -> datetime:
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def day_start(moment: datetime) -> datetime:
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _ceil(moment: datetime, floor, step: timedelta) -> datetime:
+    start = floor(moment)
+    return start if start == moment else start + step
+
+
+def _new_totals() -> Totals:
+    return [0, Decimal('0'), Decimal('0')]
+
+
+def _stats(totals: Totals) -> Dict:
+    return {'count': totals[0], 'amount': totals[1], 'volume': totals[2]}
+
+
+class TransactionVolumeRollupService:
+    """Manutenção e leitura dos rollups de volume de transações"""
+
+    @staticmethod
+    def _config(key: str, default):
+        return current_app.config.get(key, default)
+
+    # =========================================================================
+    # Marca d'água
+    # =========================================================================
+
+    @staticmethod
+    def get_watermark() -> int:
+        """Maior transactions.id já consolidado"""
+        last_id = db.session.query(RollupWatermark.last_id).filter(
+            RollupWatermark.name == WATERMARK_NAME
+        ).scalar()
+        return last_id or 0
+
+    @staticmethod
+    def _advance_watermark(connection, current: int, new: int) -> bool:
+        """
+        Move a marca d'água de `current` para `new`
+
+        Returns:
+            bool: False se outro processo já a moveu (lote deve ser descartado)
+        """
+        table = RollupWatermark.__table__
+        now = datetime.utcnow()
+        result = connection.execute(
+            update(table)
+            .where(and_(table.c.name == WATERMARK_NAME, table.c.last_id == current))
+            .values(last_id=new, updated_at=now)
+        )
+        if result.rowcount:
+            return True
+        if current == 0 and connection.execute(
+            db.select(table.c.name).where(table.c.name == WATERMARK_NAME)
+        ).first() is None:
+            connection.execute(table.insert().values(name=WATERMARK_NAME, last_id=new, updated_at=now))
+            return True
+        return False
+
+    # =========================================================================
+    # Consolidação
+    # =========================================================================
+
+    @staticmethod
+    def aggregate(rows: Iterable[Tuple]) -> Tuple[Dict, Dict]:
+        """
+        Soma transações por (hora, tipo) e por (dia, tipo)
+
+        Args:
+            rows: Tuplas (created_at, type, amount)
+
+        Returns:
+            tuple: (horário, diário) no formato {(balde, tipo): [quantidade, soma, volume]}
+        """
+        hourly = defaultdict(_new_totals)
+        daily = defaultdict(_new_totals)
+        for created_at, t_type, amount in rows:
+            if created_at is None:
+                continue
+            amount = Decimal(amount)
+            for totals in (hourly[(hour_start(created_at), t_type)], daily[(created_at.date(), t_type)]):
+                totals[0] += 1
+                totals[1] += amount
+                totals[2] += abs(amount)
+        return hourly, daily
+
+    @staticmethod
+    def _merge(connection, model, key_column: str, totals: Dict):
+        """
+        Soma os totais às linhas do rollup com UPSERT (SQLite/PostgreSQL) ou
+        UPDATE + INSERT
+        """
+        table = model.__table__
+        dialect = connection.dialect.name
+
+        for (key, t_type), (count, amount, volume) in totals.items():
+            values = {'transaction_count': count, 'total_amount': amount, 'total_volume': volume}
+
+            if dialect in ('sqlite', 'postgresql'):
+                if dialect == 'sqlite':
+                    from sqlalchemy.dialects.sqlite import insert
+                else:
+                    from sqlalchemy.dialects.postgresql import insert
+                stmt = insert(table).values(**{key_column: key, 'type': t_type}, **values)
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=[table.c[key_column], table.c.type],
+                    set_={column: table.c[column] + stmt.excluded[column] for column in values}
+                )
+                connection.execute(stmt)
+                continue
+
+            result = connection.execute(
+                update(table)
+                .where(and_(table.c[key_column] == key, table.c.type == t_type))
+                .values(**{column: table.c[column] + value for column, value in values.items()})
+            )
+            if result.rowcount == 0:
+                connection.execute(table.insert().values(**{key_column: key, 'type': t_type}, **values))
+
+    @classmethod
+    def roll_up(cls, batch_size: Optional[int] = None, now: Optional[datetime] = None) -> int:
+        """
+        Consolida as transações acima da marca d'água
+
+        Cada lote (rollups + marca d'água) é confirmado em uma transação; se
+        outro processo avançar a marca d'água primeiro, o lote é descartado.
+
+        Args:
+            batch_size: Transações por lote
+            now: Referência para a janela de acomodação (padrão: agora, UTC)
+
+        Returns:
+            int: Quantidade de transações consolidadas
+        """
+        batch_size = batch_size or DEFAULT_BATCH_SIZE
+        settle = timedelta(seconds=cls._config('TRANSACTION_ROLLUP_SETTLE_SECONDS', DEFAULT_SETTLE_SECONDS))
+        cutoff = (now or datetime.utcnow()) - settle
+
+        watermark = cls.get_watermark()
+        upper_id = db.session.query(func.max(Transaction.id)).filter(
+            Transaction.id > watermark,
+            Transaction.created_at <= cutoff
+        ).scalar()
+
+        rolled = 0
+        while upper_id and watermark < upper_id:
+            rows = db.session.query(
+                Transaction.id, Transaction.created_at, Transaction.type, Transaction.amount
+            ).filter(
+                Transaction.id > watermark,
+                Transaction.id <= upper_id
+            ).order_by(Transaction.id).limit(batch_size).all()
+            if not rows:
+                break
+
+            last_id = rows[-1].id
+            hourly, daily = cls.aggregate((row.created_at, row.type, row.amount) for row in rows)
+            try:
+                connection = db.session.connection()
+                if not cls._advance_watermark(connection, watermark, last_id):
+                    db.session.rollback()
+                    logger.info("Rollup de volume de transações avançado por outro processo")
+                    return rolled
+                cls._merge(connection, TransactionVolumeHourly, 'bucket', hourly)
+                cls._merge(connection, TransactionVolumeDaily, 'day', daily)
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Erro ao consolidar volume de transações: {e}")
+                raise
+
+            rolled += len(rows)
+            watermark = last_id
+
+        if rolled:
+            logger.info(f"Volume de transações consolidado: {rolled} transações (até id {watermark})")
+        return rolled
+
+    @classmethod
+    def rebuild(cls, batch_size: Optional[int] = None) -> int:
+        """Apaga os rollups e consolida novamente todas as transações"""
+        try:
+            connection = db.session.connection()
+            connection.execute(TransactionVolumeHourly.__table__.delete())
+            connection.execute(TransactionVolumeDaily.__table__.delete())
+            connection.execute(
+                RollupWatermark.__table__.delete().where(RollupWatermark.name == WATERMARK_NAME)
+            )
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Erro ao reconstruir rollups de volume: {e}")
+            raise
+        return cls.roll_up(batch_size)
+
+    # =========================================================================
+    # Leitura
+    # =========================================================================
+
+    @staticmethod
+    def bucket_key(column, granularity: str):
+        """Expressão texto do balde ('AAAA-MM-DD HH:00', 'AAAA-MM-DD' ou 'AAAA-MM'), conforme o banco"""
+        strftime_format, to_char_format = GRANULARITIES[granularity]
+        dialect = db.engine.dialect.name
+        if dialect == 'postgresql':
+            return func.to_char(column, to_char_format)
+        if dialect in ('mysql', 'mariadb'):
+            return func.date_format(column, strftime_format)
+        return func.strftime(strftime_format, column)
+
+    @classmethod
+    def _rollup_rows(cls, model, column, low, high, types, granularity) -> List[Tuple]:
+        conditions = []
+        if low is not None:
+            conditions.append(column >= low)
+        if high is not None:
+            conditions.append(column < high)
+        if types:
+            conditions.append(model.type.in_(types))
+
+        keys = [cls.bucket_key(column, granularity)] if granularity else []
+        rows = db.session.query(
+            *keys,
+            model.type,
+            func.sum(model.transaction_count),
+            func.sum(model.total_amount),
+            func.sum(model.total_volume)
+        ).filter(*conditions).group_by(*keys, model.type).all()
+        return [tuple(row) if granularity else (None, *row) for row in rows]
+
+    @classmethod
+    def _raw_rows(cls, low, high, types, granularity, above=None, up_to=None) -> List[Tuple]:
+        conditions = [in_period(Transaction.created_at, low, high)]
+        if above is not None:
+            conditions.append(Transaction.id > above)
+        if up_to is not None:
+            conditions.append(Transaction.id <= up_to)
+        if types:
+            conditions.append(Transaction.type.in_(types))
+
+        amount_type = Transaction.amount.type
+        keys = [cls.bucket_key(Transaction.created_at, granularity)] if granularity else []
+        rows = db.session.query(
+            *keys,
+            Transaction.type,
+            func.count(Transaction.id),
+            func.sum(Transaction.amount, type_=amount_type),
+            func.sum(func.abs(Transaction.amount, type_=amount_type), type_=amount_type)
+        ).filter(*conditions).group_by(*keys, Transaction.type).all()
+        return [tuple(row) if granularity else (None, *row) for row in rows]
+
+    @classmethod
+    def _collect(cls, start: Optional[Moment], end: Optional[Moment], types: Optional[Sequence[str]],
+                 granularity: Optional[str]) -> Dict[Tuple, Totals]:
+        """
+        Totais por (balde, tipo) no período [start, end)
+
+        Partes do período:
+        - dias completos: transaction_volume_daily (exceto granularidade 'hour')
+        - horas completas restantes: transaction_volume_hourly
+        - frações de hora nas pontas: transactions com id <= marca d'água
+        - qualquer instante: transactions com id > marca d'água
+        """
+        start_at = to_start(start) if start else None
+        end_at = to_end(end) if end else None
+        watermark = cls.get_watermark()
+        results = defaultdict(_new_totals)
+
+        def add(rows):
+            for key, t_type, count, amount, volume in rows:
+                totals = results[(key, t_type)]
+                totals[0] += count or 0
+                totals[1] += amount or 0
+                totals[2] += volume or 0
+
+        first_hour = _ceil(start_at, hour_start, timedelta(hours=1)) if start_at else None
+        last_hour = hour_start(end_at) if end_at else None
+
+        if first_hour and last_hour and first_hour >= last_hour:
+            # Período sem nenhuma hora completa: apenas a tabela bruta
+            add(cls._raw_rows(start_at, end_at, types, granularity))
+            return results
+
+        if watermark:
+            first_day = _ceil(first_hour, day_start, timedelta(days=1)) if first_hour else None
+            last_day = day_start(last_hour) if last_hour else None
+            hourly_column = TransactionVolumeHourly.bucket
+
+            if granularity != 'hour' and (first_day is None or last_day is None or first_day < last_day):
+                add(cls._rollup_rows(TransactionVolumeDaily, TransactionVolumeDaily.day,
+                                     first_day.date() if first_day else None,
+                                     last_day.date() if last_day else None, types, granularity))
+                if first_hour is not None and first_hour < first_day:
+                    add(cls._rollup_rows(TransactionVolumeHourly, hourly_column, first_hour, first_day,
+                                         types, granularity))
+                if last_hour is not None and last_day < last_hour:
+                    add(cls._rollup_rows(TransactionVolumeHourly, hourly_column, last_day, last_hour,
+                                         types, granularity))
+            else:
+                add(cls._rollup_rows(TransactionVolumeHourly, hourly_column, first_hour, last_hour,
+                                     types, granularity))
+
+            if start_at is not None and start_at < first_hour:
+                add(cls._raw_rows(start_at, first_hour, types, granularity, up_to=watermark))
+            if end_at is not None and last_hour < end_at:
+                add(cls._raw_rows(last_hour, end_at, types, granularity, up_to=watermark))
+
+        add(cls._raw_rows(start_at, end_at, types, granularity, above=watermark))
+        return results
+
+    @classmethod
+    def get_totals(cls, start: Optional[Moment] = None, end: Optional[Moment] = None,
+                   types: Optional[Sequence[str]] = None) -> Dict[str, Dict]:
+        """
+        Totais por tipo de transação no período
+
+        Args:
+            start: Início (data ou datetime); vazio = desde o início
+            end: Fim (data = dia incluído; datetime = exclusivo); vazio = até agora
+            types: Restringir a estes tipos
+
+        Returns:
+            dict: {tipo: {'count', 'amount' (soma com sinal), 'volume' (soma absoluta)}}
+        """
+        return {t_type: _stats(totals)
+                for (_, t_type), totals in cls._collect(start, end, types, None).items()}
+
+    @classmethod
+    def get_series(cls, start: Optional[Moment] = None, end: Optional[Moment] = None,
+                   granularity: str = 'day', types: Optional[Sequence[str]] = None) -> Dict[str, Dict[str, Dict]]:
+        """
+        Série temporal por tipo de transação
+
+        Args:
+            granularity: 'hour', 'day' ou 'month'
+
+        Returns:
+            dict: {balde: {tipo: {'count', 'amount', 'volume'}}} em ordem cronológica
+        """
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"Granularidade inválida: {granularity}")
+
+        series = defaultdict(dict)
+        for (key, t_type), totals in sorted(cls._collect(start, end, types, granularity).items()):
+            series[key][t_type] = _stats(totals)
+        return dict(series)
+
+    @staticmethod
+    def by_category(totals: Dict[str, Dict]) -> Dict[str, Dict]:
+        """Agrupa totais por tipo nas categorias de CATEGORIES ('outros' para os demais)"""
+        category_of = {t_type: category for category, types in CATEGORIES.items() for t_type in types}
+        result = {category: _new_totals() for category in (*CATEGORIES, 'outros')}
+        for t_type, stats in totals.items():
+            category = result[category_of.get(t_type, 'outros')]
+            category[0] += stats['count']
+            category[1] += stats['amount']
+            category[2] += stats['volume']
+        return {category: _stats(category_totals) for category, category_totals in result.items()}
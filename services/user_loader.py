@@ -0,0 +1,142 @@
+#!/usr/bin/env python3.11
+# -*- coding: utf-8 -*-
+
+"""
+UserLoader - Carregamento de usuários com escopo de requisição
+
+Dentro de uma mesma requisição o mesmo usuário era buscado várias vezes
+(load_user, RoleService.get_user_roles, notificações) e dashboards faziam um
+User.query.get por ordem para obter o nome da outra parte.
+
+Funcionalidades:
+- Mapa de identidade por requisição (guardado no objeto da requisição)
+- Carregamento em lote: `get_many`/`prime` buscam os ids que faltam com um
+  único SELECT ... WHERE id IN (...)
+- Cache dos papéis (lista de roles) por usuário
+- Fora de uma requisição (CLI, jobs, testes sem request context) não há
+  mapa persistente: cada chamada consulta o banco, ainda em lote
+"""
+
+from typing import Dict, Iterable, List, Optional
+import logging
+
+from flask import request, has_request_context
+from sqlalchemy import inspect
+
+from models import db, User
+
+logger = logging.getLogger(__name__)
+
+
+class UserLoader:
+    """Mapa de identidade de usuários com carregamento em lote"""
+
+    _USERS_ATTR = '_user_loader_users'
+    _ROLES_ATTR = '_user_loader_roles'
+
+    @classmethod
+    def _store(cls, attr: str) -> Optional[Dict]:
+        """Dicionário da requisição atual (None fora de requisição)"""
+        if not has_request_context():
+            return None
+        # Guardado no próprio objeto da requisição: flask.g pertence ao
+        # contexto de aplicação, que pode ser compartilhado entre requisições
+        return request._get_current_object().__dict__.setdefault(attr, {})
+
+    @staticmethod
+    def _is_usable(user: User) -> bool:
+        """Instância ainda ligada à sessão (não foi removida da sessão atual)"""
+        state = inspect(user)
+        return not state.detached
+
+    @classmethod
+    def get(cls, user_id: Optional[int]) -> Optional[User]:
+        """
+        Retorna o usuário pelo id, consultando o banco no máximo uma vez por requisição
+
+        Args:
+            user_id: ID do usuário (None retorna None)
+
+        Returns:
+            User ou None se não existir
+        """
+        if user_id is None:
+            return None
+        if cls._store(cls._USERS_ATTR) is None:
+            return db.session.get(User, int(user_id))
+        return cls.get_many([user_id]).get(int(user_id))
+
+    @classmethod
+    def get_many(cls, user_ids: Iterable[Optional[int]]) -> Dict[int, User]:
+        """
+        Retorna os usuários encontrados, carregando os que faltam em um único SELECT
+
+        Args:
+            user_ids: IDs (None e repetidos são ignorados)
+
+        Returns:
+            dict: {user_id: User} apenas com os usuários existentes
+        """
+        ids = {int(user_id) for user_id in user_ids if user_id is not None}
+        if not ids:
+            return {}
+
+        store = cls._store(cls._USERS_ATTR)
+        if store is None:
+            return {user.id: user for user in User.query.filter(User.id.in_(ids)).all()}
+
+        missing = [
+            user_id for user_id in ids
+            if user_id not in store or (store[user_id] is not None and not cls._is_usable(store[user_id]))
+        ]
+        if missing:
+            loaded = {user.id: user for user in User.query.filter(User.id.in_(missing)).all()}
+            for user_id in missing:
+                # Inexistentes também são lembrados para não repetir a consulta
+                store[user_id] = loaded.get(user_id)
+            logger.debug(f"UserLoader: {len(loaded)} usuários carregados em lote")
+
+        return {user_id: store[user_id] for user_id in ids if store[user_id] is not None}
+
+    @classmethod
+    def prime(cls, user_ids: Iterable[Optional[int]]):
+        """Pré-carrega usuários que serão acessados individualmente em seguida"""
+        cls.get_many(user_ids)
+
+    @classmethod
+    def get_roles(cls, user_id: Optional[int]) -> List[str]:
+        """
+        Retorna a lista de papéis do usuário (vazia se não existir)
+
+        Args:
+            user_id: ID do usuário
+        """
+        user_id = int(user_id) if user_id is not None else None
+        store = cls._store(cls._ROLES_ATTR)
+        if store is not None and user_id in store:
+            return list(store[user_id])
+
+        user = cls.get(user_id)
+        roles = [role.strip() for role in user.roles.split(',')] if user else []
+        if store is not None and user_id is not None:
+            store[user_id] = roles
+        return list(roles)
+
+    @classmethod
+    def forget(cls, user_id: Optional[int] = None):
+        """
+        Descarta usuários do mapa da requisição atual
+
+        Deve ser chamado após alterar papéis ou apagar o usuário na mesma requisição.
+
+        Args:
+            user_id: ID do usuário (None descarta todos)
+        """
+        for attr in (cls._USERS_ATTR, cls._ROLES_ATTR):
+            store = cls._store(attr)
+            if store is None:
+                continue
+            if user_id is None:
+                store.clear()
+            else:
+                store.pop(int(user_id), None)
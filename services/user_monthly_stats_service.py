@@ -0,0 +1,249 @@
+#!/usr/bin/env python3.11
+# -*- coding: utf-8 -*-
+
+"""
+UserMonthlyStatsService - Consolidação mensal de estatísticas por usuário
+
+Mantém a tabela user_monthly_stats usada pelas dashboards de cliente e
+prestador, que antes calculavam as estatísticas do mês com quatro ou mais
+consultas de agregação a cada carregamento.
+
+Funcionamento:
+- O ouvinte de flush compartilhado (RowChangeFeed, também usado pelas
+  estatísticas de prestador) entrega, para cada Order/Transaction nova,
+  alterada ou removida, os valores antes e depois da mudança; a diferença
+  entre as contribuições é aplicada com UPSERT na mesma transação
+- Transições de status (ex: para 'concluida'), aceite e recebimentos são
+  capturados em qualquer ponto do código que use a sessão do ORM
+- Alterações em massa (query.update/delete) não passam pelo ouvinte: para
+  elas, e para popular a tabela pela primeira vez, use `rebuild`
+  (ou python rebuild_user_monthly_stats.py)
+"""
+
+from collections import defaultdict
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+import logging
+
+from sqlalchemy import and_, or_
+
+from models import db, Order, Transaction, UserMonthlyStats
+from services.session_hooks import RowChange, RowChangeFeed, upsert_increment
+
+logger = logging.getLogger(__name__)
+
+# Atributos que definem a contribuição de cada modelo
+ORDER_FIELDS = ('client_id', 'provider_id', 'status', 'value', 'created_at', 'accepted_at', 'completed_at')
+TRANSACTION_FIELDS = ('user_id', 'type', 'amount', 'created_at')
+
+StatsKey = Tuple[int, date]
+
+
+def month_start(moment: datetime) -> date:
+    """Primeiro dia do mês de uma data"""
+    return date(moment.year, moment.month, 1)
+
+
+class UserMonthlyStatsService:
+    """Serviço de manutenção e leitura do rollup mensal por usuário"""
+
+    # =========================================================================
+    # Contribuição de cada registro
+    # =========================================================================
+
+    @staticmethod
+    def order_contribution(values: Dict) -> Dict[StatsKey, Dict[str, Decimal]]:
+        """
+        Contribuição de uma ordem para o rollup
+
+        Args:
+            values: Valores dos campos de ORDER_FIELDS
+
+        Returns:
+            dict: {(user_id, mês): {coluna: valor}}
+        """
+        result = defaultdict(lambda: defaultdict(Decimal))
+        client_id = values.get('client_id')
+        provider_id = values.get('provider_id')
+
+        if client_id and values.get('created_at'):
+            result[(client_id, month_start(values['created_at']))]['client_orders_created'] += 1
+
+        if provider_id and values.get('accepted_at'):
+            result[(provider_id, month_start(values['accepted_at']))]['provider_orders_accepted'] += 1
+
+        if values.get('status') == 'concluida' and values.get('completed_at'):
+            month = month_start(values['completed_at'])
+            if client_id:
+                result[(client_id, month)]['client_orders_completed'] += 1
+                result[(client_id, month)]['client_total_spent'] += Decimal(values.get('value') or 0)
+            if provider_id:
+                result[(provider_id, month)]['provider_orders_completed'] += 1
+
+        return result
+
+    @staticmethod
+    def transaction_contribution(values: Dict) -> Dict[StatsKey, Dict[str, Decimal]]:
+        """Contribuição de uma transação (apenas recebimentos) para o rollup"""
+        result = defaultdict(lambda: defaultdict(Decimal))
+        if values.get('type') == 'recebimento' and values.get('user_id') and values.get('created_at'):
+            key = (values['user_id'], month_start(values['created_at']))
+            result[key]['provider_total_received'] += Decimal(values.get('amount') or 0)
+        return result
+
+    @classmethod
+    def collect_deltas(cls, changes: Iterable[RowChange]) -> Dict[StatsKey, Dict[str, Decimal]]:
+        """
+        Calcula os incrementos do rollup para as mudanças de um flush
+
+        Returns:
+            dict: {(user_id, mês): {coluna: incremento}}
+        """
+        deltas = defaultdict(lambda: defaultdict(Decimal))
+        contributions = {
+            Order: cls.order_contribution,
+            Transaction: cls.transaction_contribution,
+        }
+
+        def add(contribution, sign):
+            for key, columns in contribution.items():
+                for column, amount in columns.items():
+                    deltas[key][column] += sign * amount
+
+        for change in changes:
+            contribution = contributions.get(change.model)
+            if contribution is None:
+                continue
+            if change.before is not None:
+                add(contribution(change.before), -1)
+            if change.after is not None:
+                add(contribution(change.after), 1)
+
+        return {
+            key: {column: amount for column, amount in columns.items() if amount}
+            for key, columns in deltas.items()
+            if any(columns.values())
+        }
+
+    # =========================================================================
+    # Aplicação dos incrementos
+    # =========================================================================
+
+    @staticmethod
+    def _db_value(column: str, amount: Decimal):
+        return amount if column.endswith(('_spent', '_received')) else int(amount)
+
+    @classmethod
+    def apply_deltas(cls, connection, deltas: Dict[StatsKey, Dict[str, Decimal]]):
+        """Aplica incrementos (coluna = coluna + delta, seguro com vários workers)"""
+        now = datetime.utcnow()
+        for (user_id, month), columns in deltas.items():
+            upsert_increment(
+                connection, UserMonthlyStats.__table__, {'user_id': user_id, 'month': month},
+                {column: cls._db_value(column, amount) for column, amount in columns.items()}, now
+            )
+
+    @classmethod
+    def apply_changes(cls, connection, changes: List[RowChange]):
+        """Consumidor do RowChangeFeed: aplica os incrementos do flush"""
+        deltas = cls.collect_deltas(changes)
+        if deltas:
+            cls.apply_deltas(connection, deltas)
+
+    @classmethod
+    def register(cls):
+        """Inscreve o serviço no ouvinte de flush compartilhado (idempotente)"""
+        RowChangeFeed.subscribe(cls.apply_changes, {Order: ORDER_FIELDS, Transaction: TRANSACTION_FIELDS})
+        RowChangeFeed.register()
+
+    # =========================================================================
+    # Leitura
+    # =========================================================================
+
+    @staticmethod
+    def get_month_stats(user_id: int, role: str, moment: Optional[datetime] = None) -> Dict:
+        """
+        Estatísticas do mês para a dashboard (uma consulta pela chave primária)
+
+        Args:
+            user_id: ID do usuário
+            role: 'cliente' ou 'prestador'
+            moment: Data de referência (padrão: agora, UTC)
+
+        Returns:
+            dict: Mesmo formato de month_stats em get_dashboard_metrics
+        """
+        table = UserMonthlyStats.__table__
+        month = month_start(moment or datetime.utcnow())
+        row = db.session.execute(
+            db.select(table).where(and_(table.c.user_id == user_id, table.c.month == month))
+        ).first()
+
+        if role == 'cliente':
+            return {
+                'orders_created': row.client_orders_created if row else 0,
+                'orders_completed': row.client_orders_completed if row else 0,
+                'total_spent': float(row.client_total_spent) if row else 0.0
+            }
+        return {
+            'orders_accepted': row.provider_orders_accepted if row else 0,
+            'orders_completed': row.provider_orders_completed if row else 0,
+            'total_received': float(row.provider_total_received) if row else 0.0
+        }
+
+    # =========================================================================
+    # Reconstrução
+    # =========================================================================
+
+    @classmethod
+    def rebuild(cls, user_id: Optional[int] = None, batch_size: int = 1000) -> int:
+        """
+        Recalcula o rollup a partir de orders e transactions
+
+        Args:
+            user_id: Reconstruir apenas este usuário (None = todos)
+            batch_size: Tamanho dos lotes lidos do banco
+
+        Returns:
+            int: Quantidade de linhas (usuário, mês) gravadas
+        """
+        totals = defaultdict(lambda: defaultdict(Decimal))
+
+        def add(contribution):
+            for key, columns in contribution.items():
+                if user_id is None or key[0] == user_id:
+                    for column, amount in columns.items():
+                        totals[key][column] += amount
+
+        order_query = db.session.query(*[getattr(Order, field) for field in ORDER_FIELDS])
+        transaction_query = db.session.query(
+            *[getattr(Transaction, field) for field in TRANSACTION_FIELDS]
+        ).filter(Transaction.type == 'recebimento')
+        if user_id is not None:
+            order_query = order_query.filter(or_(Order.client_id == user_id, Order.provider_id == user_id))
+            transaction_query = transaction_query.filter(Transaction.user_id == user_id)
+
+        for row in order_query.yield_per(batch_size):
+            add(cls.order_contribution(dict(zip(ORDER_FIELDS, row))))
+        for row in transaction_query.yield_per(batch_size):
+            add(cls.transaction_contribution(dict(zip(TRANSACTION_FIELDS, row))))
+
+        try:
+            delete = UserMonthlyStats.__table__.delete()
+            if user_id is not None:
+                delete = delete.where(UserMonthlyStats.__table__.c.user_id == user_id)
+            connection = db.session.connection()
+            connection.execute(delete)
+            cls.apply_deltas(connection, totals)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Erro ao reconstruir estatísticas mensais: {e}")
+            raise
+
+        logger.info(f"Estatísticas mensais reconstruídas: {len(totals)} linhas")
+        return len(totals)
+
+
+UserMonthlyStatsService.register()
@@ -13,7 +13,7 @@ import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from app import create_app
-from models import db, User, AdminUser, Wallet
+from models import db, User, AdminUser, Wallet, UserMonthlyStats, ProviderStats, ProviderClientStats
 from config import TestConfig
 
 
@@ -59,6 +59,9 @@ def db_session(app):
         db.session.query(User).delete()
         db.session.query(AdminUser).delete()
         db.session.query(Wallet).delete()
+        db.session.query(UserMonthlyStats).delete()
+        db.session.query(ProviderStats).delete()
+        db.session.query(ProviderClientStats).delete()
         db.session.commit()
         
         yield db.session
@@ -141,3 +144,20 @@ def authenticated_admin_client(client, test_admin):
         sess['admin_id'] = test_admin.id
     return client
 
+
+
+@pytest.fixture(scope='function')
+def sql_statements(app):
+    """Lista dos comandos SQL executados durante o teste (para orçamentos de consultas)"""
+    from sqlalchemy import event
+    
+    executed = []
+    
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+    
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', count_statement)
+    yield executed
+    event.remove(engine, 'before_cursor_execute', count_statement)
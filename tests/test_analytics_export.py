@@ -0,0 +1,187 @@
+#!/usr/bin/env python3.11
+# -*- coding: utf-8 -*-
+
+"""
+Testes para a exportação analítica incremental (AnalyticsExportService)
+
+Testa:
+- Arquivos Parquet particionados por mês e marca d'água por tabela
+- Exportações seguintes acrescentam apenas as linhas novas
+- Janela de acomodação para linhas recentes
+- Ordens alteradas depois da exportação reescritas por updated_at
+- Resumos calculados nos arquivos iguais aos do ReportService
+"""
+
+import os
+import pytest
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+pytest.importorskip('pyarrow')
+
+from models import Order, Transaction
+from services.analytics_export_service import AnalyticsExportService, AnalyticsQuery
+from services.report_service import ReportService
+
+
+@pytest.fixture
+def ledger(app, db_session, test_user, test_provider, tmp_path):
+    """Diretório de exportação temporário; insere transações e ordens a partir de 2026-01-20"""
+    app.config['ANALYTICS_EXPORT_DIR'] = str(tmp_path)
+    counter = {'transactions': 0, 'orders': 0}
+
+    def insert(transactions=0, orders=0, start=datetime(2026, 1, 20)):
+        first = counter['transactions']
+        if transactions:
+            db_session.execute(Transaction.__table__.insert(), [{
+                'transaction_id': f'TXA{index:06d}',
+                'user_id': test_provider.id if index % 2 else test_user.id,
+                'type': ('taxa_sistema', 'deposito', 'saque')[index % 3],
+                'amount': Decimal('-2.50') if index % 3 == 2 else Decimal('12.25'),
+                'description': f'Transação {index}',
+                'created_at': start + timedelta(days=index % 25, minutes=index),
+            } for index in range(first, first + transactions)])
+        first = counter['orders']
+        if orders:
+            db_session.execute(Order.__table__.insert(), [{
+                'client_id': test_user.id,
+                'title': f'Serviço {index}',
+                'description': 'Descrição',
+                'value': Decimal('80.00') + index,
+                'status': ('concluida', 'disputada', 'aguardando_execucao')[index % 3],
+                'created_at': start + timedelta(days=index % 25, minutes=index),
+                'updated_at': start + timedelta(days=index % 25, minutes=index),
+                'service_deadline': datetime(2026, 4, 1),
+            } for index in range(first, first + orders)])
+        db_session.commit()
+        counter['transactions'] += transactions
+        counter['orders'] += orders
+
+    yield insert
+
+    app.config.pop('ANALYTICS_EXPORT_DIR', None)
+    Transaction.query.delete()
+    Order.query.delete()
+    db_session.commit()
+
+
+def part_files(root, table_name):
+    return sorted(os.path.relpath(os.path.join(path, name), root)
+                  for path, _, names in os.walk(os.path.join(root, table_name)) for name in names)
+
+
+class TestIncrementalExport:
+    """Marca d'água e partições"""
+
+    def test_appends_only_new_rows(self, ledger, tmp_path):
+        ledger(transactions=40, orders=12)
+
+        assert AnalyticsExportService.export_all(batch_size=16) == {
+            'transactions': 40, 'orders': 12, 'pre_orders': 0, 'proposal_audit_logs': 0
+        }
+        first_files = part_files(tmp_path, 'transactions')
+        assert {name.split(os.sep)[1] for name in first_files} == {'month=2026-01', 'month=2026-02'}
+        watermarks = AnalyticsExportService.get_watermarks()
+
+        assert AnalyticsExportService.export_table('transactions') == 0
+
+        ledger(transactions=5)
+        assert AnalyticsExportService.export_table('transactions') == 5
+        assert set(first_files) < set(part_files(tmp_path, 'transactions'))
+        assert AnalyticsExportService.get_watermarks()['transactions'] == watermarks['transactions'] + 5
+        assert AnalyticsQuery.read('transactions', ['id']).num_rows == 45
+
+    def test_recent_rows_wait_for_settle_window(self, ledger, app):
+        ledger(transactions=3, start=datetime.utcnow() - timedelta(minutes=10))
+        app.config['ANALYTICS_EXPORT_SETTLE_SECONDS'] = 3600
+        try:
+            assert AnalyticsExportService.export_table('transactions') == 0
+        finally:
+            app.config.pop('ANALYTICS_EXPORT_SETTLE_SECONDS')
+
+        later = datetime.utcnow() + timedelta(days=3)  # Linhas criadas nos dias seguintes
+        assert AnalyticsExportService.export_table('transactions', now=later) == 3
+
+    def test_repeated_batch_overwrites_files(self, ledger, tmp_path):
+        """Lote refeito após falha (marca d'água não gravada) não duplica linhas"""
+        ledger(transactions=10)
+        AnalyticsExportService.export_table('transactions')
+        AnalyticsExportService._save_watermark('transactions', 0)
+
+        AnalyticsExportService.export_table('transactions')
+
+        assert AnalyticsQuery.read('transactions', ['id']).num_rows == 10
+
+    def test_changed_orders_replace_exported_rows(self, ledger, db_session, tmp_path):
+        ledger(orders=12)
+        AnalyticsExportService.export_all()
+        files = part_files(tmp_path, 'orders')
+
+        for order in Order.query.filter_by(status='aguardando_execucao'):
+            order.status = 'cancelada'
+        db_session.commit()
+
+        later = datetime.utcnow() + timedelta(minutes=5)
+        assert AnalyticsExportService.export_table('orders', now=later) == 4
+        assert part_files(tmp_path, 'orders') == files
+        statuses = AnalyticsQuery.read('orders', ['status']).column('status').to_pylist()
+        assert sorted(statuses) == sorted(order.status for order in Order.query)
+
+        assert AnalyticsExportService.export_table('orders', now=later) == 0
+
+    def test_files_without_change_watermark_are_rebuilt(self, ledger):
+        """Arquivos de ordens gravados sem a marca d'água de alteração são refeitos"""
+        ledger(orders=6)
+        AnalyticsExportService.export_table('orders')
+        AnalyticsExportService._save_watermark('orders', 6)
+
+        assert AnalyticsExportService.export_table('orders') == 6
+        assert AnalyticsQuery.read('orders', ['id']).num_rows == 6
+
+
+class TestSummaries:
+    """Resumos a partir dos arquivos"""
+
+    def test_contracts_match_report_service(self, ledger):
+        ledger(orders=45)
+        AnalyticsExportService.export_all()
+
+        for filters in ({}, {'status_filter': 'disputada'},
+                        {'start_date': datetime(2026, 1, 25).date(), 'end_date': datetime(2026, 2, 5).date()}):
+            expected = ReportService.get_contracts_report_data(**filters)
+            summary = AnalyticsQuery.contracts_summary(**filters)
+
+            for key in ('total_contratos', 'valor_total', 'status_stats', 'monthly_stats'):
+                assert summary[key] == expected[key], (filters, key)
+            assert list(summary['monthly_stats']) == list(expected['monthly_stats'])
+
+    def test_contracts_follow_status_changes(self, ledger, db_session):
+        ledger(orders=30)
+        AnalyticsExportService.export_all()
+
+        for order in Order.query.filter_by(status='disputada'):
+            order.status = 'resolvida'
+        db_session.commit()
+        AnalyticsExportService.export_all(now=datetime.utcnow() + timedelta(minutes=5))
+
+        expected = ReportService.get_contracts_report_data()
+        summary = AnalyticsQuery.contracts_summary()
+        assert summary['status_stats'] == expected['status_stats']
+        assert summary['valor_total'] == expected['valor_total']
+
+    def test_financial_matches_report_service(self, ledger):
+        ledger(transactions=60)
+        AnalyticsExportService.export_all()
+
+        expected = ReportService.get_financial_report_data()
+        summary = AnalyticsQuery.financial_summary()
+
+        for key in ('total_transacoes', 'volume_total', 'receita_taxas', 'transaction_stats', 'monthly_stats'):
+            assert summary[key] == expected[key], key
+        assert [(user['user_id'], user['transaction_count']) for user in summary['top_users']] == \
+               [(user.user_id, user.transaction_count) for user in expected['top_users']]
+
+    def test_empty_export(self, ledger):
+        summary = AnalyticsQuery.financial_summary()
+
+        assert (summary['total_transacoes'], summary['volume_total']) == (0, Decimal('0'))
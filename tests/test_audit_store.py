@@ -0,0 +1,132 @@
+#!/usr/bin/env python3.11
+# -*- coding: utf-8 -*-
+
+"""
+Testes para o armazenamento indexado de auditoria e a leitura de logs pelo final
+
+Testa:
+- Leitura reversa em blocos (linhas cortadas entre blocos, filtro, limite)
+- AdminService.get_system_logs sem ler os arquivos inteiros
+- Eventos do AuditService gravados em lote em audit_events
+- Buscas por entidade, usuário e operação usando os índices
+"""
+
+import os
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import text
+
+from models import db, AuditEvent
+from services.log_reader import tail, iter_lines_reversed
+from services.admin_service import AdminService
+from services.audit_service import AuditService
+from services.audit_store import AuditEventStore
+from services.audit_writer import AuditLogWriter
+
+
+@pytest.fixture
+def store(app, db_session, tmp_path):
+    """Writer em arquivo temporário com o armazenamento ligado"""
+    AuditLogWriter.install(path=str(tmp_path / 'audit.log'))
+    AuditEventStore.attach(app)
+    yield
+    AuditEventStore.detach()
+    AuditLogWriter.shutdown()
+    AuditLogWriter.install()
+    AuditEvent.query.delete()
+    db_session.commit()
+
+
+class TestLogReader:
+    """Leitura do final do arquivo"""
+
+    def test_reverse_across_blocks(self, tmp_path):
+        """Linhas maiores que o bloco e arquivo sem quebra final"""
+        path = tmp_path / 'app.log'
+        lines = [f'linha {i} ' + 'x' * (i % 37) for i in range(500)]
+        path.write_text('\n'.join(lines), encoding='utf-8')
+
+        assert list(iter_lines_reversed(str(path), block_size=16)) == lines[::-1]
+        assert tail(str(path), 3, block_size=64) == lines[:-4:-1]
+
+    def test_predicate_and_missing_file(self, tmp_path):
+        """Filtro aplicado do final; arquivo inexistente não é erro"""
+        path = tmp_path / 'app.log'
+        path.write_text(''.join(f'{i} - {"ERROR" if i % 10 == 0 else "INFO"} - msg\n' for i in range(100)))
+
+        errors = tail(str(path), 2, predicate=lambda line: 'ERROR' in line)
+
+        assert errors == ['90 - ERROR - msg', '80 - ERROR - msg']
+        assert tail(str(path), 5, predicate=lambda line: 'ERROR' in line, max_scan=5) == []
+        assert tail(str(tmp_path / 'inexistente.log'), 10) == []
+
+    def test_get_system_logs(self, tmp_path, monkeypatch):
+        """Página de logs usa apenas o final dos arquivos"""
+        monkeypatch.chdir(tmp_path)
+        os.makedirs('logs')
+        with open('logs/erros_criticos.log', 'w') as f:
+            f.writelines(f'2026-01-01 00:00:{i:02d} - CRITICAL - erro {i}\n' for i in range(60))
+        with open('logs/sistema_combinado.log', 'w') as f:
+            f.writelines(f'2026-01-01 00:01:{i:02d} - app - {"ERROR" if i % 2 else "INFO"} - m\n'
+                         for i in range(60))
+
+        logs = AdminService.get_system_logs(limit=10)
+
+        assert len(logs) == 10
+        assert {entry['source'] for entry in logs} == {'erros_criticos.log', 'sistema_combinado.log'}
+        assert logs[0]['timestamp'] == '2026-01-01 00:01:59'
+
+
+class TestAuditEventStore:
+    """Gravação em lote e consultas indexadas"""
+
+    def test_events_are_stored(self, store):
+        """Entradas do AuditService chegam em audit_events pela thread de gravação"""
+        AuditService.log_status_change(10, 1, 'aceita', 'concluida')
+        AuditService.log_status_change(11, 2, 'aceita', 'cancelada')
+        AuditService.log_error('CANCEL', 'Order', 10, 1, 'falhou')
+
+        assert AuditLogWriter.flush()
+
+        trail = AuditEventStore.get_entity_trail('Order', 10)
+        assert [event['operation'] for event in trail] == ['STATUS_CHANGED', 'ERROR_CANCEL']
+        assert trail[1]['level'] == 'ERROR'
+        assert trail[0]['details']['new_status'] == 'concluida'
+        assert [e['entity_id'] for e in AuditService.search_events(user_id=2)] == [11]
+        assert len(AuditEventStore.search(operation='STATUS_CHANGED', limit=1)) == 1
+
+    def test_duplicates_ignored(self, store):
+        """Reimportar as mesmas entradas não duplica eventos"""
+        row = AuditEventStore.to_row(
+            '{"audit_id": "a-1", "timestamp": "2026-01-01T10:00:00", "operation": "X", '
+            '"entity_type": "Order", "entity_id": 1, "user_id": 1, "details": {}}'
+        )
+
+        assert AuditEventStore.insert_rows([row]) == 1
+        assert AuditEventStore.insert_rows([row]) == 0
+        assert AuditEventStore.to_row('não é json') is None
+
+    def test_period_filter(self, store):
+        """Período [start, end) filtra pelo timestamp da entrada"""
+        base = datetime(2026, 1, 1, 12, 0)
+        rows = [
+            AuditEventStore.to_row(
+                f'{{"audit_id": "p-{i}", "timestamp": "{(base + timedelta(hours=i)).isoformat()}", '
+                f'"operation": "X", "entity_type": "Order", "entity_id": 1, "user_id": 1, "details": {{}}}}'
+            )
+            for i in range(5)
+        ]
+        AuditEventStore.insert_rows(rows)
+
+        found = AuditEventStore.search(start=base + timedelta(hours=1), end=base + timedelta(hours=3))
+
+        assert [event['audit_id'] for event in found] == ['p-2', 'p-1']
+
+    def test_entity_search_uses_index(self, store):
+        """Busca por entidade é atendida pelo índice composto"""
+        plan = db.session.execute(text(
+            "EXPLAIN QUERY PLAN SELECT * FROM audit_events "
+            "WHERE entity_type = 'Order' AND entity_id = 1 ORDER BY timestamp DESC LIMIT 10"
+        )).all()
+
+        assert any('idx_audit_events_entity' in str(row) for row in plan)
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3.11
+# -*- coding: utf-8 -*-
+
+"""
+Testes para a gravação assíncrona do log de auditoria (AuditLogWriter)
+
+Testa:
+- Destino único (sem repasse à raiz) no formato existente
+- Gravação de todas as entradas no encerramento
+- Contrapressão com a fila cheia, sem descarte
+- Política de fsync
+"""
+
+import json
+import logging
+import threading
+import pytest
+
+from services.audit_writer import AuditLogWriter, AUDIT_LOGGER_NAME
+from services.audit_service import AuditService
+
+
+class GatedSink(logging.Handler):
+    """Destino em memória que pode ser travado para simular disco lento"""
+
+    def __init__(self):
+        super().__init__()
+        self.gate = threading.Event()
+        self.gate.set()
+        self.messages = []
+
+    def handle(self, record):
+        if threading.current_thread().name == 'audit-log-writer':
+            self.gate.wait(5)
+        return super().handle(record)
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+@pytest.fixture
+def audit_file(tmp_path):
+    """Writer gravando em arquivo temporário; restaura o padrão ao final"""
+    path = tmp_path / 'audit.log'
+    AuditLogWriter.install(path=str(path))
+    yield path
+    AuditLogWriter.shutdown()
+    AuditLogWriter.install()
+
+
+@pytest.fixture
+def gated_sink():
+    sink = GatedSink()
+    AuditLogWriter.install({'AUDIT_QUEUE_MAX_SIZE': 2, 'AUDIT_QUEUE_BLOCK_TIMEOUT': 0.01}, sink=sink)
+    yield sink
+    sink.gate.set()
+    AuditLogWriter.shutdown()
+    AuditLogWriter.install({'AUDIT_QUEUE_MAX_SIZE': 10000, 'AUDIT_QUEUE_BLOCK_TIMEOUT': 1.0})
+
+
+class TestAuditLogWriter:
+    """Fila, thread de gravação e encerramento"""
+
+    def test_single_sink_and_format(self, audit_file):
+        """Entrada gravada uma vez, no formato lido por view_audit_logs"""
+        logger = logging.getLogger(AUDIT_LOGGER_NAME)
+        audit_id = AuditService.log_status_change(1, 2, 'aceita', 'concluida')
+
+        assert AuditLogWriter.flush()
+        lines = audit_file.read_text(encoding='utf-8').splitlines()
+
+        assert logger.propagate is False
+        assert [type(h) for h in logger.handlers if h.__module__ == 'services.audit_writer'] == [type(AuditLogWriter._handler)]
+        assert len(lines) == 1
+        entry = json.loads(lines[0].split(' - AUDIT - ', 1)[1])
+        assert entry['audit_id'] == audit_id
+
+    def test_shutdown_flushes_everything(self, audit_file):
+        """Todas as entradas enfileiradas estão no arquivo após o encerramento"""
+        for order_id in range(300):
+            AuditService.log_status_change(order_id, 1, 'a', 'b')
+
+        AuditLogWriter.shutdown()
+
+        assert len(audit_file.read_text(encoding='utf-8').splitlines()) == 300
+
+    def test_backpressure_without_loss(self, gated_sink):
+        """Fila cheia: chamador espera e grava ele mesmo; nada é descartado"""
+        gated_sink.gate.clear()
+        for order_id in range(6):
+            AuditService.log_status_change(order_id, 1, 'a', 'b')
+        gated_sink.gate.set()
+        assert AuditLogWriter.flush()
+
+        stats = AuditLogWriter.get_stats()
+        assert stats['blocked'] >= 1
+        assert stats['written_inline'] >= 1
+        assert stats['written'] + stats['written_inline'] == 6
+        assert len(gated_sink.messages) == 6
+
+    def test_fsync_policy(self, audit_file):
+        """Política 'batch' sincroniza a cada lote; política inválida é rejeitada"""
+        AuditService.log_status_change(1, 1, 'a', 'b')
+        assert AuditLogWriter.flush()
+
+        assert AuditLogWriter.get_stats()['fsyncs'] >= 1
+        with pytest.raises(ValueError):
+            AuditLogWriter.install({'AUDIT_FSYNC_POLICY': 'sempre'})
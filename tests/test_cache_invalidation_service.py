@@ -0,0 +1,240 @@
+#!/usr/bin/env python3.11
+# -*- coding: utf-8 -*-
+
+"""
+Testes para o barramento de invalidação de cache entre workers
+
+Testa:
+- Publicação das invalidações locais (chave, tag, limpeza)
+- Aplicação das invalidações de outro worker sem republicar
+- Eventos do próprio worker ignorados
+- Backend compartilhado em banco de dados
+- Eventos confirmados fora de ordem de id (releitura da janela)
+"""
+
+import pytest
+from datetime import datetime
+
+from services.cache_service import CacheService
+from services.cache_invalidation_service import (
+    CacheInvalidationBus, InMemoryInvalidationBackend, DatabaseInvalidationBackend
+)
+from models import db, CacheInvalidationEvent
+
+
+@pytest.fixture
+def workers():
+    """Dois barramentos no mesmo backend, simulando dois workers"""
+    backend = InMemoryInvalidationBackend()
+    worker_a = CacheInvalidationBus(backend, origin='worker-a')
+    worker_b = CacheInvalidationBus(backend, origin='worker-b')
+    ns = CacheService.namespace('test_bus', max_entries=100, default_ttl=60)
+    ns.clear(propagate=False)
+    worker_a.install()
+    yield worker_a, worker_b, ns
+    worker_a.uninstall()
+    ns.clear(propagate=False)
+
+
+class TestCacheInvalidationBus:
+    """Testes com o backend em memória"""
+
+    def test_local_invalidations_are_published(self, workers):
+        """delete, invalidate_tags e clear viram eventos no backend"""
+        worker_a, _, ns = workers
+        ns.set('k1', 1, tags=['user:1'])
+
+        ns.delete('k1')
+        ns.invalidate_tags('user:1')
+        ns.clear()
+
+        events = worker_a.backend.fetch_since(0)
+        assert [(e[2], e[3], e[4]) for e in events] == [
+            ('test_bus', 'key', ['k1']),
+            ('test_bus', 'tag', ['user:1']),
+            ('test_bus', 'clear', []),
+        ]
+        assert all(e[1] == 'worker-a' for e in events)
+
+    def test_remote_invalidation_is_applied(self, workers):
+        """Invalidação de outro worker remove a entrada local"""
+        worker_a, worker_b, ns = workers
+        ns.set('fee', 5, tags=['config'])
+        ns.set('other', 1)
+
+        worker_b.publish('test_bus', 'tag', ['config'])
+        assert worker_a.poll() == 1
+
+        assert ns.get('fee') is None
+        assert ns.get('other') == 1
+
+    def test_applied_invalidation_is_not_republished(self, workers):
+        """Aplicar evento remoto não gera novo evento"""
+        worker_a, worker_b, ns = workers
+        ns.set('k', 1)
+        worker_b.publish('test_bus', 'key', ['k'])
+
+        worker_a.poll()
+
+        assert worker_a.backend.latest_id() == 1
+
+    def test_own_events_are_ignored(self, workers):
+        """Eventos do próprio worker são apenas consumidos"""
+        worker_a, _, ns = workers
+        ns.delete('k')
+        ns.set('k', 1)
+
+        assert worker_a.poll() == 0
+        assert ns.get('k') == 1
+        assert worker_a.stats['received'] == 1
+
+    def test_new_worker_skips_history(self):
+        """Worker novo começa do último evento publicado"""
+        backend = InMemoryInvalidationBackend()
+        backend.publish('old', 'test_bus', 'clear', [])
+
+        bus = CacheInvalidationBus(backend, origin='new')
+
+        assert bus.poll() == 0
+
+    def test_missed_events_clear_local_caches(self, workers):
+        """Worker atrasado além da retenção limpa seus caches"""
+        worker_a, worker_b, ns = workers
+        worker_b.publish('other_ns', 'key', ['x'])
+        worker_a.poll()
+        ns.set('k', 1)
+
+        worker_b.publish('other_ns', 'key', ['y'])
+        worker_b.publish('other_ns', 'key', ['z'])
+        worker_a.backend._events.popleft()
+        worker_a.backend._events.popleft()
+
+        worker_a.poll()
+
+        assert ns.get('k') is None
+        assert worker_a.stats['resyncs'] == 1
+
+    def test_registry_invalidation_is_published_once(self, workers):
+        """CacheService.invalidate_tags gera um único evento para todos os namespaces"""
+        worker_a, worker_b, ns = workers
+        other = CacheService.namespace('test_bus_other', max_entries=10, default_ttl=60)
+        ns.set('k', 1, tags=['user:7'])
+        other.set('k', 1, tags=['user:7'])
+
+        CacheService.invalidate_tags('user:7')
+        assert len(worker_a.backend.fetch_since(0)) == 1
+
+        ns.set('k', 1, tags=['user:7'])
+        other.set('k', 1, tags=['user:7'])
+        worker_b.install()
+        try:
+            assert worker_b.poll() == 1
+        finally:
+            worker_a.install()
+        assert ns.get('k') is None
+        assert other.get('k') is None
+
+    def test_missed_events_detected_when_started_empty(self):
+        """Worker iniciado com o registro vazio também detecta eventos removidos"""
+        backend = InMemoryInvalidationBackend()
+        reader = CacheInvalidationBus(backend, origin='reader')
+        reader.RETENTION_SECONDS = 0  # Já passou a retenção desde o início do worker
+        writer = CacheInvalidationBus(backend, origin='writer')
+        ns = CacheService.namespace('test_bus', max_entries=100, default_ttl=60)
+        ns.set('k', 1)
+
+        for value in ('x', 'y', 'z'):
+            writer.publish('other_ns', 'key', [value])
+        backend._events.popleft()
+        backend._events.popleft()
+
+        reader.poll()
+
+        assert ns.get('k') is None
+        assert reader.stats['resyncs'] == 1
+        ns.clear(propagate=False)
+
+    def test_unknown_backend_raises(self, app):
+        """Backend desconhecido gera erro de configuração"""
+        app.config['CACHE_INVALIDATION_BACKEND'] = 'inexistente'
+        try:
+            with pytest.raises(ValueError):
+                CacheInvalidationBus.init_app(app)
+        finally:
+            app.config['CACHE_INVALIDATION_BACKEND'] = 'memory'
+
+
+class TestDatabaseInvalidationBackend:
+    """Testes para o backend compartilhado em banco de dados"""
+
+    @pytest.fixture(autouse=True)
+    def setup_backend(self, app):
+        with app.app_context():
+            CacheInvalidationEvent.query.delete()
+            db.session.commit()
+            self.backend = DatabaseInvalidationBackend(app)
+            yield
+            CacheInvalidationEvent.query.delete()
+            db.session.commit()
+
+    def test_publish_and_fetch(self):
+        """Eventos são lidos em ordem a partir do último id"""
+        first = self.backend.publish('w1', 'config', 'key', ['platform_fee_percentage'])
+        self.backend.publish('w1', 'pre_orders', 'tag', ['user:1', 'user:2'])
+
+        events = self.backend.fetch_since(0)
+        assert [(e[2], e[3], e[4]) for e in events] == [
+            ('config', 'key', ['platform_fee_percentage']),
+            ('pre_orders', 'tag', ['user:1', 'user:2']),
+        ]
+        assert len(self.backend.fetch_since(first)) == 1
+        assert self.backend.latest_id() == events[-1][0]
+
+    def test_workers_share_events(self):
+        """Invalidação publicada por um worker chega ao outro pelo banco"""
+        ns = CacheService.namespace('test_bus_db', max_entries=10, default_ttl=60)
+        ns.set('fee', 5)
+        reader = CacheInvalidationBus(self.backend, origin='reader')
+        writer = CacheInvalidationBus(self.backend, origin='writer')
+
+        writer.publish('test_bus_db', 'key', ['fee'])
+
+        assert reader.poll() == 1
+        assert ns.get('fee') is None
+
+    def test_out_of_order_commit_is_not_skipped(self):
+        """Id menor confirmado depois de um maior ainda é aplicado, uma única vez"""
+        ns = CacheService.namespace('test_bus_db', max_entries=10, default_ttl=60)
+        ns.set('a', 1)
+        ns.set('b', 2)
+        reader = CacheInvalidationBus(self.backend, origin='reader')
+        first = self.backend.publish('writer', 'test_bus_db', 'clear', [])
+        assert reader.poll() == 1
+
+        ns.set('a', 1)
+        ns.set('b', 2)
+        table = CacheInvalidationEvent.__table__
+        with db.engine.begin() as conn:
+            conn.execute(table.insert().values(
+                id=first + 2, origin='writer', namespace='test_bus_db', kind='key',
+                payload='["b"]', created_at=datetime.utcnow()))
+        assert reader.poll() == 1
+        assert ns.get('b') is None
+
+        with db.engine.begin() as conn:
+            conn.execute(table.insert().values(
+                id=first + 1, origin='writer', namespace='test_bus_db', kind='key',
+                payload='["a"]', created_at=datetime.utcnow()))
+        assert reader.poll() == 1
+        assert ns.get('a') is None
+
+        assert reader.poll() == 0
+        assert reader.stats['resyncs'] == 0
+
+    def test_prune(self):
+        """Limpeza remove apenas eventos antigos"""
+        self.backend.publish('w1', 'config', 'clear', [])
+
+        assert self.backend.prune(retention_seconds=60) == 0
+        assert self.backend.prune(retention_seconds=-1) == 1
+        assert self.backend.oldest_id() is None
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3.11
+# -*- coding: utf-8 -*-
+
+"""
+Testes para a camada de cache unificada (CacheService)
+
+Testa:
+- Despejo LRU com limite de tamanho
+- Expiração por TTL
+- Invalidação por tags
+- Métricas por namespace
+- Segundo nível compartilhado
+"""
+
+import time
+import threading
+import pytest
+
+from services.cache_service import (
+    CacheService, CacheNamespace, CacheEntry, LocalSharedTier, SharedCacheTier
+)
+
+
+class TestCacheNamespace:
+    """Testes para CacheNamespace"""
+
+    def test_set_and_get(self):
+        """Valor armazenado é retornado até expirar"""
+        ns = CacheNamespace('test', max_entries=10, default_ttl=60)
+        ns.set('a', {'x': 1})
+
+        assert ns.get('a') == {'x': 1}
+        assert ns.get('b') is None
+        assert ns.get('b', 'padrao') == 'padrao'
+
+    def test_ttl_expiration(self):
+        """Entrada expirada conta como miss e é removida"""
+        ns = CacheNamespace('test', max_entries=10, default_ttl=60)
+        ns.set('a', 1)
+        ns._get_entry('a').expires_at = time.monotonic() - 1
+
+        assert ns.get('a') is None
+        assert len(ns) == 0
+        assert ns.get_stats()['expirations'] == 1
+
+    def test_entry_without_ttl_never_expires(self):
+        """TTL None significa sem expiração"""
+        entry = CacheEntry('valor', None)
+        assert not entry.is_expired()
+        assert entry.remaining_ttl() is None
+
+    def test_lru_eviction(self):
+        """Ao exceder o limite, a entrada menos usada é despejada"""
+        ns = CacheNamespace('test', max_entries=3, default_ttl=60, stripes=1)
+        ns.set('a', 1)
+        ns.set('b', 2)
+        ns.set('c', 3)
+        ns.get('a')  # 'a' passa a ser a mais recente
+        ns.set('d', 4)
+
+        assert 'b' not in ns
+        assert 'a' in ns and 'c' in ns and 'd' in ns
+        assert ns.get_stats()['evictions'] == 1
+
+    def test_size_is_bounded_with_stripes(self):
+        """Tamanho total não passa do limite arredondado por faixa"""
+        ns = CacheNamespace('test', max_entries=64, default_ttl=60, stripes=8)
+        for i in range(1000):
+            ns.set(f'key:{i}', i)
+
+        assert len(ns) <= 64
+
+    def test_invalidate_tags(self):
+        """Invalidação por tag remove apenas as entradas marcadas"""
+        ns = CacheNamespace('test', max_entries=100, default_ttl=60)
+        ns.set('lista:42:cliente', [1], tags=['user:42'])
+        ns.set('lista:42:prestador', [2], tags=['user:42'])
+        ns.set('lista:7:cliente', [3], tags=['user:7'])
+        ns.set('detalhe:1', {}, tags=['user:42', 'pre_order:1'])
+
+        assert ns.invalidate_tags('user:42') == 3
+        assert ns.get('lista:7:cliente') == [3]
+        assert len(ns) == 1
+        # Índice de tags não guarda referências órfãs
+        assert all(not stripe.tags.get('pre_order:1') for stripe in ns._stripes)
+
+    def test_overwrite_replaces_tags(self):
+        """Regravar uma chave substitui suas tags"""
+        ns = CacheNamespace('test', max_entries=100, default_ttl=60)
+        ns.set('k', 1, tags=['antiga'])
+        ns.set('k', 2, tags=['nova'])
+
+        assert ns.invalidate_tags('antiga') == 0
+        assert ns.invalidate_tags('nova') == 1
+
+    def test_get_or_set(self):
+        """Loader é chamado apenas no miss"""
+        ns = CacheNamespace('test', max_entries=10, default_ttl=60)
+        calls = []
+
+        def loader():
+            calls.append(1)
+            return 'valor'
+
+        assert ns.get_or_set('k', loader) == 'valor'
+        assert ns.get_or_set('k', loader) == 'valor'
+        assert len(calls) == 1
+
+    def test_stats(self):
+        """Métricas contam hits e misses"""
+        ns = CacheNamespace('test', max_entries=10, default_ttl=60)
+        ns.set('a', 1)
+        ns.get('a')
+        ns.get('a')
+        ns.get('x')
+
+        stats = ns.get_stats()
+        assert stats['hits'] == 2
+        assert stats['misses'] == 1
+        assert stats['hit_rate'] == '66.67%'
+        assert stats['cache_size'] == 1
+
+    def test_concurrent_access(self):
+        """Acesso concorrente mantém o cache consistente"""
+        ns = CacheNamespace('test', max_entries=500, default_ttl=60)
+
+        def worker(offset):
+            for i in range(200):
+                ns.set(f'{offset}:{i}', i, tags=[f'grupo:{offset}'])
+                ns.get(f'{offset}:{i}')
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(ns) <= 500
+        assert ns.get_stats()['hits'] == 800
+
+
+class TestSharedTier:
+    """Testes para o segundo nível compartilhado"""
+
+    def test_miss_in_one_worker_hits_shared_tier(self):
+        """Valor gravado por um worker é lido por outro via segundo nível"""
+        tier = LocalSharedTier()
+        worker_a = CacheNamespace('test', max_entries=10, default_ttl=60, shared_tier=tier)
+        worker_b = CacheNamespace('test', max_entries=10, default_ttl=60, shared_tier=tier)
+
+        worker_a.set('k', 'valor', tags=['user:1'])
+
+        assert worker_b.get('k') == 'valor'
+        assert worker_b.get_stats()['shared_hits'] == 1
+        # Tags são preservadas ao promover para o primeiro nível
+        assert worker_b.invalidate_tags('user:1') == 1
+        assert worker_a.get('k') == 'valor'  # cópia local de A ainda existe
+        assert tier.get('test:k') is None
+
+    def test_interface_is_abstract(self):
+        """Implementação incompleta do segundo nível não pode ser instanciada"""
+        class PartialTier(SharedCacheTier):
+            def get(self, key):
+                return None
+
+        with pytest.raises(TypeError):
+            PartialTier()
+
+
+class TestCacheServiceRegistry:
+    """Testes para o registro de namespaces"""
+
+    def test_namespace_is_singleton(self):
+        """Mesmo nome retorna o mesmo namespace"""
+        assert CacheService.namespace('registro_teste') is CacheService.namespace('registro_teste')
+
+    def test_invalidate_tags_across_namespaces(self):
+        """Invalidação global atinge todos os namespaces"""
+        ns1 = CacheService.namespace('registro_a')
+        ns2 = CacheService.namespace('registro_b')
+        ns1.set('k', 1, tags=['user:99'])
+        ns2.set('k', 2, tags=['user:99'])
+
+        assert CacheService.invalidate_tags('user:99') == 2
+        assert 'registro_a' in CacheService.get_stats()
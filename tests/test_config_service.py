@@ -17,6 +17,7 @@ Testa:
 import pytest
 import os
 import sys
+import time
 from datetime import datetime, timedelta
 from decimal import Decimal
 
@@ -225,55 +226,57 @@ class TestConfigServiceSetMethods:
 
 
 class TestConfigServiceCache:
-    """Testes do sistema de cache do ConfigService"""
+    """Testes do snapshot de configurações do ConfigService"""
     
     def test_cache_functionality(self, client, init_configs):
-        """Testa que o cache funciona corretamente"""
+        """Testa que as leituras usam o mesmo snapshot"""
         with app.app_context():
-            # Primeira chamada - busca do banco
+            # Primeira chamada - carrega o snapshot
             value1 = ConfigService.get_platform_fee_percentage()
+            snapshot = ConfigService.snapshot()
             
-            # Segunda chamada - deve vir do cache
+            # Segunda chamada - deve vir do snapshot
             value2 = ConfigService.get_platform_fee_percentage()
             
             assert value1 == value2
-            
-            # Verificar que está no cache
-            assert 'platform_fee_percentage' in ConfigService._config_cache
+            assert ConfigService.snapshot() is snapshot
+            assert 'platform_fee_percentage' in snapshot.entries
     
     def test_cache_cleared_on_update(self, client, init_configs):
-        """Testa que o cache é limpo ao atualizar"""
+        """Testa que o snapshot é trocado ao atualizar"""
         with app.app_context():
-            # Carregar no cache
+            # Carregar snapshot
             value1 = ConfigService.get_platform_fee_percentage()
-            assert 'platform_fee_percentage' in ConfigService._config_cache
+            old_snapshot = ConfigService.snapshot()
             
             # Atualizar valor
             ConfigService.set_platform_fee_percentage(Decimal('8.0'), admin_id=1)
             
-            # Cache deve ter sido limpo
-            # Próxima chamada deve buscar novo valor
+            # Novo snapshot com versão maior
             value2 = ConfigService.get_platform_fee_percentage()
             assert value2 == Decimal('8.0')
+            assert ConfigService.snapshot().version > old_snapshot.version
+            # Snapshot antigo permanece inalterado para quem ainda o usa
+            assert old_snapshot.get_decimal('platform_fee_percentage') == value1
     
     def test_cache_ttl(self, client, init_configs):
-        """Testa que o cache expira após TTL"""
+        """Testa que alterações de outro worker são detectadas pela versão"""
         with app.app_context():
-            # Carregar no cache
-            value1 = ConfigService.get_platform_fee_percentage()
+            # Carregar snapshot
+            ConfigService.get_platform_fee_percentage()
             
-            # Simular expiração do cache (manipular timestamp)
-            ConfigService._cache_timestamp['platform_fee_percentage'] = (
-                datetime.utcnow().timestamp() - 400  # 400 segundos atrás (> 300s TTL)
-            )
+            # Simular outro worker: alterar direto no banco e incrementar a versão
+            config = SystemConfig.query.filter_by(key='platform_fee_percentage').first()
+            config.value = '6.5'
+            ConfigService._bump_version()
+            db.session.commit()
             
-            # Próxima chamada deve buscar do banco novamente
-            value2 = ConfigService.get_platform_fee_percentage()
+            # Antes da próxima verificação, o snapshot atual continua em uso
+            assert ConfigService.get_platform_fee_percentage() == Decimal('5.0')
             
-            # Timestamp deve ter sido atualizado
-            assert ConfigService._cache_timestamp['platform_fee_percentage'] > (
-                datetime.utcnow().timestamp() - 10
-            )
+            # Após o intervalo, a versão nova é detectada e o snapshot recarregado
+            ConfigService._next_version_check = time.monotonic() - 1
+            assert ConfigService.get_platform_fee_percentage() == Decimal('6.5')
 
 
 class TestConfigServiceBatchOperations:
@@ -315,18 +318,18 @@ class TestConfigServiceBatchOperations:
             assert value2 == 200
     
     def test_update_configs_batch_clears_cache(self, client, init_configs):
-        """Testa que update_configs_batch limpa o cache"""
+        """Testa que update_configs_batch troca o snapshot uma única vez"""
         with app.app_context():
-            # Carregar no cache
-            ConfigService.get_platform_fee_percentage()
-            assert len(ConfigService._config_cache) > 0
+            # Carregar snapshot
+            version = ConfigService.snapshot().version
             
             # Atualizar em lote
-            configs = {'platform_fee_percentage': '7.0'}
+            configs = {'platform_fee_percentage': '7.0', 'contestation_fee': '11.00'}
             ConfigService.update_configs_batch(configs)
             
-            # Cache deve ter sido limpo
-            assert len(ConfigService._config_cache) == 0
+            # Uma nova versão para todo o lote
+            assert ConfigService.snapshot().version == version + 1
+            assert ConfigService.get_platform_fee_percentage() == Decimal('7.0')
 
 
 class TestConfigServiceOrderTaxes:
@@ -580,8 +583,8 @@ class TestConfigServiceEdgeCases:
             # Todos devem ser iguais
             assert all(v == values[0] for v in values)
             
-            # Cache deve ter apenas uma entrada
-            assert 'platform_fee_percentage' in ConfigService._config_cache
+            # Todas as leituras usam o mesmo snapshot
+            assert 'platform_fee_percentage' in ConfigService.snapshot().entries
 
 
 def run_all_tests():
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3.11
+# -*- coding: utf-8 -*-
+
+"""
+Testes para o snapshot de configurações do ConfigService
+
+Testa:
+- Carga de todas as configurações com uma consulta
+- Leituras sem consultas enquanto o snapshot é válido
+- Verificação de versão (alterações de outros workers)
+- Imutabilidade e valores tipados
+"""
+
+import time
+import dataclasses
+import pytest
+from decimal import Decimal
+
+from models import db, SystemConfig
+from services.config_service import ConfigService, ConfigSnapshot
+from services.balance_validator import BalanceValidator
+
+
+@pytest.fixture
+def configs(app, db_session):
+    """Configurações padrão gravadas; limpa tabela e snapshot ao final"""
+    ConfigService.initialize_default_configs()
+    yield
+    SystemConfig.query.delete()
+    db_session.commit()
+    ConfigService._clear_cache()
+
+
+class TestConfigSnapshot:
+    """Testes do snapshot imutável e versionado"""
+
+    def test_load_is_single_query(self, configs, sql_statements):
+        """Todas as configurações (e a versão) vêm de um único SELECT"""
+        ConfigService._clear_cache()
+        sql_statements.clear()
+
+        snapshot = ConfigService.snapshot()
+
+        assert len(sql_statements) == 1
+        assert snapshot.version >= 1
+        assert ConfigService.VERSION_KEY not in snapshot.entries
+
+    def test_hot_path_has_no_queries(self, configs, sql_statements):
+        """Taxas, categorias e validador leem o snapshot atual sem consultas"""
+        ConfigService.snapshot()
+        sql_statements.clear()
+
+        fees = ConfigService.get_all_fees()
+        ConfigService.get_configs_by_category('taxas')
+        ConfigService.get_config('taxa_transacao')
+        BalanceValidator.get_contestation_fee()
+
+        assert sql_statements == []
+        assert fees['contestation_fee'] == Decimal('10.00')
+
+    def test_unchanged_version_keeps_snapshot(self, configs, sql_statements):
+        """Verificação periódica com versão igual é uma consulta e não recarrega"""
+        snapshot = ConfigService.snapshot()
+        ConfigService._next_version_check = time.monotonic() - 1
+        sql_statements.clear()
+
+        assert ConfigService.snapshot() is snapshot
+        assert len(sql_statements) == 1
+
+    def test_remote_change_is_detected(self, configs):
+        """Alteração gravada por outro worker é carregada após a verificação"""
+        ConfigService.snapshot()
+        config = SystemConfig.query.filter_by(key='contestation_fee').first()
+        config.value = '15.00'
+        ConfigService._bump_version()
+        db.session.commit()
+
+        assert ConfigService.get_contestation_fee() == Decimal('10.00')
+        ConfigService._next_version_check = time.monotonic() - 1
+        assert ConfigService.get_contestation_fee() == Decimal('15.00')
+
+    def test_set_config_swaps_snapshot(self, configs):
+        """set_config instala um novo snapshot com versão maior"""
+        old = ConfigService.snapshot()
+
+        assert ConfigService.set_config('modo_manutencao', 'true', category='sistema')
+
+        new = ConfigService.snapshot()
+        assert new is not old
+        assert new.version == old.version + 1
+        assert new.get('modo_manutencao') is True
+        assert old.get('modo_manutencao') is None
+
+    def test_unchanged_values_keep_version(self, configs):
+        """Gravações que não alteram nenhum valor não geram nova versão"""
+        old = ConfigService.snapshot()
+
+        assert ConfigService.set_config('taxa_transacao', old.entries['taxa_transacao'].raw)
+        assert ConfigService.update_configs_batch({'taxa_saque': old.entries['taxa_saque'].raw})
+        assert ConfigService.initialize_default_configs()
+
+        assert ConfigService._stored_version() == old.version
+        assert ConfigService.snapshot() is old
+
+    def test_snapshot_is_immutable(self, configs):
+        """Snapshot e suas entradas não podem ser alterados"""
+        snapshot = ConfigService.snapshot()
+
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            snapshot.version = 99
+        with pytest.raises(TypeError):
+            snapshot.entries['taxa_transacao'] = None
+
+    def test_typed_values(self, configs):
+        """Valores convertidos como em get_config; Decimal a partir do texto"""
+        snapshot = ConfigService.snapshot()
+
+        assert snapshot.get('taxa_transacao') == 5.0
+        assert snapshot.get('inexistente', 'padrao') == 'padrao'
+        assert snapshot.get_decimal('taxa_saque') == Decimal('2.50')
+        assert ConfigSnapshot(version=0).get_decimal('x', '1.5') == Decimal('1.5')
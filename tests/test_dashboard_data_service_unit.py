@@ -180,6 +180,56 @@ class TestGetOpenOrdersPrestador:
             assert orders[0]['id'] == order_urgente.id
 
 
+class TestGetOpenOrdersQueryCount:
+    """Benchmark: número de consultas de get_open_orders não cresce com as ordens"""
+    
+    @pytest.mark.parametrize('order_count', [1, 25])
+    def test_consultas_constantes(self, app, db_session, test_provider, sql_statements, order_count):
+        """Uma única consulta de projeção para 1 ou 25 ordens de clientes distintos"""
+        with app.app_context():
+            provider_id = test_provider.id
+            Order.query.filter_by(provider_id=provider_id).delete()
+            clients = []
+            for i in range(order_count):
+                client = User(
+                    email=f'bench{i}@example.com',
+                    nome=f'Cliente {i}',
+                    cpf=f'{70000000000 + i}',
+                    phone=f'{11970000000 + i}',
+                    roles='cliente'
+                )
+                client.set_password('senha123')
+                clients.append(client)
+            db_session.add_all(clients)
+            db_session.flush()
+            db_session.add_all([
+                Order(
+                    client_id=client.id,
+                    provider_id=provider_id,
+                    title=f'Ordem {i}',
+                    description='Desc',
+                    value=Decimal('10.00'),
+                    status='aceita',
+                    service_deadline=datetime.utcnow() + timedelta(days=i + 1),
+                    created_at=datetime.utcnow()
+                )
+                for i, client in enumerate(clients)
+            ])
+            db_session.commit()
+            db_session.expire_all()
+            sql_statements.clear()
+            
+            orders = DashboardDataService.get_open_orders(provider_id, 'prestador')
+            
+            assert len(sql_statements) == 1
+            assert len(orders) == order_count
+            assert orders[0]['related_user_name'] == 'Cliente 0'
+            assert orders[0]['is_overdue'] is False
+            
+            Order.query.filter_by(provider_id=provider_id).delete()
+            db_session.commit()
+
+
 class TestGetBlockedFundsSummary:
     """Testes para get_blocked_funds_summary"""
     
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3.11
+# -*- coding: utf-8 -*-
+
+"""
+Testes para a montagem dos dados das dashboards (DashboardPayloadService)
+
+Testa:
+- Valores equivalentes às contagens e helpers anteriores
+- Orçamento de consultas fixo, independente da quantidade de registros
+- Cache por usuário
+- Invalidação por eventos de sessão (commit, rollback, ordens disponíveis)
+"""
+
+import pytest
+from decimal import Decimal
+from datetime import datetime, timedelta
+
+from models import db, Order, Transaction, UserMonthlyStats, Invite, Proposal
+from services.cliente_service import ClienteService
+from services.prestador_service import PrestadorService
+from services.dashboard_payload_service import DashboardPayloadService
+
+
+def clear_activity(session):
+    """Remove ordens, transações e propostas (inclusive as deixadas por outros arquivos de teste)"""
+    Proposal.query.delete()
+    Invite.query.delete()
+    Transaction.query.delete()
+    Order.query.delete()
+    UserMonthlyStats.query.delete()
+    session.commit()
+    DashboardPayloadService._cache.clear(propagate=False)
+
+
+@pytest.fixture
+def parties(app, db_session, test_user, test_provider):
+    """IDs de cliente e prestador; limpa ordens, transações e cache antes e depois"""
+    clear_activity(db_session)
+    client_id, provider_id = test_user.id, test_provider.id
+    yield client_id, provider_id
+    clear_activity(db_session)
+
+
+def create_orders(session, client_id, provider_id, count, **kwargs):
+    for i in range(count):
+        values = dict(
+            client_id=client_id,
+            provider_id=provider_id,
+            title=f'Ordem {i}',
+            description='Desc',
+            value=Decimal('100.00') + i,
+            status='concluida' if i % 2 else 'aceita',
+            service_deadline=datetime.utcnow() + timedelta(days=7),
+        )
+        values.update(kwargs)
+        session.add(Order(**values))
+    session.commit()
+
+
+def create_transaction(session, user_id, type_, amount, **kwargs):
+    session.add(Transaction(user_id=user_id, type=type_, amount=Decimal(amount),
+                            description=f'{type_} {amount}', **kwargs))
+    session.commit()
+
+
+class TestPayloadValues:
+    """Valores calculados pelo resumo em uma consulta"""
+
+    def test_cliente_payload(self, db_session, parties):
+        """Contagens e totais do cliente"""
+        client_id, provider_id = parties
+        create_orders(db_session, client_id, provider_id, 4)
+        create_transaction(db_session, client_id, 'escrow_bloqueio', '-100.00',
+                           created_at=datetime.utcnow() - timedelta(minutes=5))
+        create_transaction(db_session, client_id, 'taxa_sistema', '-5.00')
+
+        data = ClienteService.get_dashboard_data(client_id)
+
+        assert data['transacoes_mes'] == 2
+        assert data['ordens_concluidas'] == 2
+        assert data['ordens_ativas'] == 2
+        assert float(data['total_gasto_historico']) == 105.0
+        assert float(data['media_valor_ordem']) == pytest.approx(101.5)
+        assert data['taxa_conclusao'] == 50.0
+        assert data['ultima_transacao']['tipo'] == 'taxa_sistema'
+        assert data['ultima_transacao']['valor'] == Decimal('5.00')
+
+    def test_prestador_payload(self, db_session, parties):
+        """Ganhos, clientes atendidos e ordens disponíveis do prestador"""
+        client_id, provider_id = parties
+        create_orders(db_session, client_id, provider_id, 2)
+        create_orders(db_session, client_id, None, 3, status='disponivel')
+        create_transaction(db_session, provider_id, 'recebimento', '80.00')
+        create_transaction(db_session, provider_id, 'recebimento', '40.00')
+
+        data = PrestadorService.get_dashboard_data(provider_id)
+
+        assert data['ordens_disponiveis'] == 3
+        assert float(data['ganhos_total']) == 120.0
+        assert float(data['ganho_medio_ordem']) == 60.0
+        assert data['clientes_atendidos'] == 1
+        assert data['taxa_conclusao'] == 50.0
+        assert data['saldo_atual'] == 50.0
+
+    def test_empty_user(self, db_session, parties):
+        """Usuário sem ordens nem transações"""
+        client_id, _ = parties
+
+        data = ClienteService.get_dashboard_data(client_id)
+
+        assert data['transacoes_mes'] == 0
+        assert data['ultima_transacao'] is None
+        assert data['taxa_conclusao'] == 0.0
+        assert data['total_gasto_historico'] == 0.0
+
+    def test_unknown_user_raises(self, db_session, parties):
+        """Usuário inexistente gera ValueError"""
+        with pytest.raises(ValueError):
+            ClienteService.get_dashboard_data(999999)
+
+
+class TestQueryBudget:
+    """Número de consultas fixo por papel"""
+
+    @pytest.mark.parametrize('role', ['cliente', 'prestador'])
+    @pytest.mark.parametrize('orders', [1, 20])
+    def test_build_within_budget(self, db_session, parties, sql_statements, role, orders):
+        """Montagem sem cache respeita QUERY_BUDGET com poucas ou muitas ordens"""
+        client_id, provider_id = parties
+        create_orders(db_session, client_id, provider_id, orders)
+        for _ in range(orders):
+            create_transaction(db_session, client_id, 'pagamento', '-10.00')
+        db_session.expire_all()
+        sql_statements.clear()
+
+        DashboardPayloadService.get_payload(client_id if role == 'cliente' else provider_id, role)
+
+        assert len(sql_statements) <= DashboardPayloadService.QUERY_BUDGET[role]
+
+    def test_cached_payload_uses_no_queries(self, db_session, parties, sql_statements):
+        """Segunda leitura vem do cache"""
+        client_id, provider_id = parties
+        create_orders(db_session, client_id, provider_id, 3)
+        ClienteService.get_dashboard_data(client_id)
+        sql_statements.clear()
+
+        ClienteService.get_dashboard_data(client_id)
+
+        assert sql_statements == []
+
+
+class TestInvalidation:
+    """Invalidação por eventos da sessão"""
+
+    def test_commit_invalidates_user(self, db_session, parties):
+        """Nova transação do usuário descarta a dashboard em cache"""
+        client_id, provider_id = parties
+        assert ClienteService.get_dashboard_data(client_id)['transacoes_mes'] == 0
+        provider_data = PrestadorService.get_dashboard_data(provider_id)
+
+        create_transaction(db_session, client_id, 'deposito', '10.00')
+
+        assert ClienteService.get_dashboard_data(client_id)['transacoes_mes'] == 1
+        assert PrestadorService.get_dashboard_data(provider_id) is provider_data
+
+    def test_status_change_on_expired_order(self, db_session, parties):
+        """Mudança de status após commit invalida cliente e prestador"""
+        client_id, provider_id = parties
+        create_orders(db_session, client_id, provider_id, 1)
+        order = Order.query.filter_by(client_id=client_id).first()
+        db_session.commit()
+        assert ClienteService.get_dashboard_data(client_id)['ordens_concluidas'] == 0
+
+        order.status = 'concluida'
+        db_session.commit()
+
+        assert ClienteService.get_dashboard_data(client_id)['ordens_concluidas'] == 1
+
+    def test_rollback_keeps_cache(self, db_session, parties):
+        """Alterações desfeitas não invalidam o cache"""
+        client_id, _ = parties
+        data = ClienteService.get_dashboard_data(client_id)
+
+        db_session.add(Transaction(user_id=client_id, type='deposito',
+                                   amount=Decimal('10.00'), description='Depósito'))
+        db_session.flush()
+        db_session.rollback()
+
+        assert ClienteService.get_dashboard_data(client_id) is data
+
+    def test_available_order_invalidates_providers(self, db_session, parties):
+        """Nova ordem disponível atualiza a contagem de todos os prestadores"""
+        client_id, provider_id = parties
+        assert PrestadorService.get_dashboard_data(provider_id)['ordens_disponiveis'] == 0
+
+        create_orders(db_session, client_id, None, 1, status='disponivel')
+
+        assert PrestadorService.get_dashboard_data(provider_id)['ordens_disponiveis'] == 1
+
+    def test_proposal_invalidates_invite_client(self, db_session, parties):
+        """Proposta do prestador descarta a dashboard do cliente do convite"""
+        client_id, provider_id = parties
+        invite = Invite(client_id=client_id, invited_phone='11999999999', service_title='Serviço',
+                        service_description='Desc', original_value=Decimal('100.00'),
+                        delivery_date=datetime.utcnow() + timedelta(days=7),
+                        expires_at=datetime.utcnow() + timedelta(days=3))
+        db_session.add(invite)
+        db_session.commit()
+        data = ClienteService.get_dashboard_data(client_id)
+
+        db_session.add(Proposal(invite_id=invite.id, prestador_id=provider_id,
+                                original_value=Decimal('100.00'), proposed_value=Decimal('120.00')))
+        db_session.commit()
+
+        assert ClienteService.get_dashboard_data(client_id) is not data
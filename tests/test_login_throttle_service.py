@@ -0,0 +1,178 @@
+#!/usr/bin/env python3.11
+# -*- coding: utf-8 -*-
+
+"""
+Testes para o controle de tentativas de login (LoginThrottleService)
+
+Testa:
+- Bloqueio por e-mail e por IP sem consultas ao banco (armazenamento compartilhado)
+- Contagem pelo banco com armazenamento local ao processo
+- Gravação das tentativas em lote
+- Compactação diária e retenção
+- Estatísticas de segurança a partir da consolidação
+"""
+
+import pytest
+from datetime import datetime, date, timedelta
+
+from models import db, LoginAttempt, LoginAttemptDaily, RateLimitCounter
+from services.config_service import SecurityService
+from services.login_throttle_service import LoginThrottleService, LoginAttemptWriter
+from services.rate_limiter_service import RateLimiterService
+
+
+@pytest.fixture
+def attempts(app, db_session):
+    """Limpa contadores, fila e tabelas de tentativas"""
+    RateLimiterService.clear_local()
+    LoginThrottleService._last_success.clear(propagate=False)
+    yield
+    LoginAttemptWriter.flush()
+    LoginAttempt.query.delete()
+    LoginAttemptDaily.query.delete()
+    db_session.commit()
+    RateLimiterService.clear_local()
+
+
+@pytest.fixture
+def shared_storage(app, attempts, db_session):
+    """Contadores em rate_limit_counters (compartilhados entre workers)"""
+    app.config['RATELIMIT_STORAGE_URI'] = 'database://'
+    RateLimiterService.clear_local()
+    yield
+    app.config['RATELIMIT_STORAGE_URI'] = 'local://'
+    RateLimiterService.clear_local()
+    RateLimitCounter.query.delete()
+    db_session.commit()
+
+
+def add_attempt(session, email, ip, success, when, user_type='user'):
+    session.add(LoginAttempt(email=email, ip_address=ip, success=success,
+                             attempt_time=when, user_type=user_type))
+
+
+class TestThrottle:
+    """Bloqueio pelos contadores"""
+
+    def test_blocks_after_max_failures(self, shared_storage, sql_statements):
+        """Falhas por e-mail bloqueiam sem consultar login_attempts"""
+        for _ in range(3):
+            SecurityService.log_login_attempt('a@test.com', '10.0.0.1', 'Browser', False)
+        sql_statements.clear()
+
+        info = SecurityService.check_login_attempts('A@test.com ', '10.0.0.1')
+
+        assert info['failed_attempts'] == 3
+        assert info['remaining_attempts'] == 2
+        assert not info['is_blocked']
+        assert not any('login_attempts' in statement for statement in sql_statements)
+
+        for _ in range(2):
+            SecurityService.log_login_attempt('a@test.com', '10.0.0.1', 'Browser', False)
+        assert SecurityService.check_login_attempts('a@test.com', '10.0.0.1')['is_blocked']
+        assert not SecurityService.check_login_attempts('b@test.com', '10.0.0.2')['is_blocked']
+
+    def test_blocks_ip_across_emails(self, shared_storage):
+        """Muitas falhas do mesmo IP bloqueiam qualquer e-mail"""
+        limit = 5 * LoginThrottleService.IP_ATTEMPTS_FACTOR
+        for index in range(limit):
+            LoginThrottleService.record(f'user{index}@test.com', '10.0.0.9', None, False)
+
+        info = LoginThrottleService.check('novo@test.com', '10.0.0.9')
+
+        assert info['is_blocked']
+        assert info['ip_blocked']
+        assert info['failed_attempts'] == 0
+
+    def test_local_storage_counts_in_database(self, attempts, sql_statements):
+        """Com contadores locais, as falhas valem entre workers e após reinícios"""
+        for _ in range(5):
+            LoginThrottleService.record('Vitima@test.com', '10.0.0.1', 'Browser', False)
+        RateLimiterService.clear_local()  # outro worker / processo reiniciado
+        sql_statements.clear()
+
+        info = LoginThrottleService.check('vitima@test.com ', '10.0.0.2')
+
+        assert info['is_blocked']
+        assert info['failed_attempts'] == 5
+        assert any('login_attempts' in statement for statement in sql_statements)
+
+    def test_local_storage_blocks_ip(self, attempts):
+        """Bloqueio por IP também contado pelo banco"""
+        limit = 5 * LoginThrottleService.IP_ATTEMPTS_FACTOR
+        for index in range(limit):
+            LoginThrottleService.record(f'user{index}@test.com', '10.0.0.9', None, False)
+
+        info = LoginThrottleService.check('novo@test.com', '10.0.0.9')
+
+        assert info['ip_blocked']
+        assert info['failed_attempts'] == 0
+
+    def test_success_is_recorded(self, attempts):
+        """Último login bem-sucedido disponível sem consulta"""
+        LoginThrottleService.record('ok@test.com', '10.0.0.1', 'Browser', True)
+
+        assert LoginThrottleService.check('ok@test.com', '10.0.0.1')['last_success'] is not None
+        assert LoginAttempt.query.filter_by(email='ok@test.com', success=True).count() == 1
+
+
+class TestWriter:
+    """Gravação em lote"""
+
+    def test_queued_rows_are_flushed(self, shared_storage, app):
+        """Com gravação assíncrona, as tentativas ficam na fila até o flush"""
+        app.config['LOGIN_ATTEMPT_ASYNC_WRITES'] = True
+        started = LoginAttemptWriter._ensure_started
+        LoginAttemptWriter._ensure_started = classmethod(lambda cls: None)
+        try:
+            for _ in range(3):
+                LoginThrottleService.record('fila@test.com', '10.0.0.1', 'Browser', False)
+            assert LoginAttempt.query.count() == 0
+
+            assert LoginAttemptWriter.flush() == 3
+            assert LoginAttempt.query.count() == 3
+        finally:
+            LoginAttemptWriter._ensure_started = started
+            app.config['LOGIN_ATTEMPT_ASYNC_WRITES'] = False
+
+
+class TestCompaction:
+    """Consolidação diária e retenção"""
+
+    def test_compact_aggregates_and_purges(self, attempts, db_session):
+        """Dias completos são agregados; linhas além da retenção são removidas"""
+        today = date(2026, 3, 10)
+        old = datetime(2026, 2, 1, 10, 0)
+        recent = datetime(2026, 3, 9, 15, 0)
+        add_attempt(db_session, 'a@test.com', '1.1.1.1', False, old)
+        add_attempt(db_session, 'a@test.com', '1.1.1.2', True, old + timedelta(hours=1))
+        add_attempt(db_session, 'b@test.com', '1.1.1.1', False, recent)
+        add_attempt(db_session, 'c@test.com', '1.1.1.3', True, datetime(2026, 3, 10, 8, 0))
+        db_session.commit()
+
+        result = LoginThrottleService.compact(retention_days=30, today=today)
+
+        assert result == {'days': 2, 'purged': 2}
+        first = db_session.get(LoginAttemptDaily, (date(2026, 2, 1), 'user'))
+        assert (first.total_attempts, first.failed_attempts, first.unique_ips, first.unique_emails) == (2, 1, 2, 1)
+        assert LoginAttempt.query.count() == 2
+
+        # Execução repetida não duplica os dias já consolidados
+        assert LoginThrottleService.compact(retention_days=30, today=today) == {'days': 0, 'purged': 0}
+
+    def test_security_stats_include_daily(self, attempts, db_session):
+        """get_security_stats usa linhas brutas para 24h e a consolidação para o histórico"""
+        yesterday = datetime.utcnow() - timedelta(days=1, hours=1)
+        add_attempt(db_session, 'a@test.com', '1.1.1.1', False, yesterday)
+        db_session.commit()
+        LoginThrottleService.compact()
+        SecurityService.log_login_attempt('x@test.com', '2.2.2.2', 'Browser', True)
+        SecurityService.log_login_attempt('y@test.com', '2.2.2.3', 'Browser', False)
+
+        stats = SecurityService.get_security_stats()
+
+        assert stats['total_attempts_24h'] == 2
+        assert stats['failed_attempts_24h'] == 1
+        assert stats['unique_ips_24h'] == 2
+        assert stats['daily_attempts'][0]['date'] == yesterday.date().isoformat()
+        assert stats['daily_attempts'][0]['failed_attempts'] == 1
@@ -15,6 +15,7 @@ Testa:
 Requirements: Performance considerations (Task 22)
 """
 
+import time
 import pytest
 from datetime import datetime, timedelta
 from decimal import Decimal
@@ -38,7 +39,7 @@ class TestCacheEntry:
         """Testa que entrada expirada retorna None"""
         entry = CacheEntry(value={'test': 'data'}, ttl_seconds=0)
         # Forçar expiração
-        entry.expires_at = datetime.utcnow() - timedelta(seconds=1)
+        entry.expires_at = time.monotonic() - 1
         assert entry.is_expired()
         assert entry.get_value() is None
 
@@ -74,7 +75,7 @@ class TestPreOrderCacheService:
         PreOrderCacheService.set(key, value, ttl_seconds=0)
         
         # Forçar expiração
-        PreOrderCacheService._cache[key].expires_at = datetime.utcnow() - timedelta(seconds=1)
+        PreOrderCacheService._cache._get_entry(key).expires_at = time.monotonic() - 1
         
         # Deve retornar None
         cached_value = PreOrderCacheService.get(key)
@@ -111,14 +112,14 @@ class TestPreOrderCacheService:
         PreOrderCacheService.set('expired:1', {'data': 2}, ttl_seconds=0)
         
         # Forçar expiração
-        PreOrderCacheService._cache['expired:1'].expires_at = datetime.utcnow() - timedelta(seconds=1)
+        PreOrderCacheService._cache._get_entry('expired:1').expires_at = time.monotonic() - 1
         
         # Executar limpeza
         PreOrderCacheService.cleanup_expired()
         
         # Válida deve permanecer, expirada deve ser removida
         assert PreOrderCacheService.get('valid:1') == {'data': 1}
-        assert 'expired:1' not in PreOrderCacheService._cache
+        assert PreOrderCacheService._cache._get_entry('expired:1') is None
     
     def test_cache_stats(self):
         """Testa estatísticas do cache"""
@@ -242,6 +243,107 @@ class TestPreOrderServicePagination:
         pass
 
 
+class TestActivePreOrdersPaginatedCache:
+    """Cache por página/filtro e carregamento antecipado em get_active_pre_orders_paginated"""
+    
+    @pytest.fixture(autouse=True)
+    def setup_pre_orders(self, app, db_session, test_user, test_provider, sql_statements):
+        PreOrderCacheService.clear_all()
+        self.client_id = test_user.id
+        self.provider_id = test_provider.id
+        db_session.query(PreOrder).delete()
+        for i in range(5):
+            db_session.add(PreOrder(
+                invite_id=9000 + i,
+                client_id=self.client_id,
+                provider_id=self.provider_id,
+                title=f'Serviço {i}',
+                description='Descrição',
+                current_value=Decimal('100.00'),
+                original_value=Decimal('100.00'),
+                delivery_date=datetime.utcnow() + timedelta(days=10),
+                status=(PreOrderStatus.AGUARDANDO_RESPOSTA.value if i == 0
+                        else PreOrderStatus.EM_NEGOCIACAO.value),
+                expires_at=datetime.utcnow() + timedelta(days=7)
+            ))
+        db_session.commit()
+        db_session.expunge_all()
+        sql_statements.clear()
+        self.statements = sql_statements
+        yield
+        db_session.query(PreOrder).delete()
+        db_session.commit()
+        PreOrderCacheService.clear_all()
+    
+    def test_miss_uses_at_most_two_queries(self):
+        """Página sem cache: contagem + SELECT com nomes carregados"""
+        result = PreOrderService.get_active_pre_orders_paginated(
+            self.client_id, 'cliente', page=1, per_page=3
+        )
+        
+        assert len(result['pre_orders']) == 3
+        assert result['pre_orders'][0]['client_name'] == 'Test User'
+        assert result['pre_orders'][0]['provider_name'] == 'Test Provider'
+        assert len(self.statements) <= 2
+    
+    def test_other_pages_and_filters_are_cached(self):
+        """Páginas seguintes e filtros de status também vêm do cache"""
+        page_2 = PreOrderService.get_active_pre_orders_paginated(
+            self.client_id, 'cliente', page=2, per_page=3
+        )
+        filtered = PreOrderService.get_active_pre_orders_paginated(
+            self.client_id, 'cliente', status_filter=PreOrderStatus.AGUARDANDO_RESPOSTA.value
+        )
+        queries_on_miss = len(self.statements)
+        
+        assert PreOrderService.get_active_pre_orders_paginated(
+            self.client_id, 'cliente', page=2, per_page=3
+        ) == page_2
+        assert PreOrderService.get_active_pre_orders_paginated(
+            self.client_id, 'cliente', status_filter=PreOrderStatus.AGUARDANDO_RESPOSTA.value
+        ) == filtered
+        assert len(self.statements) == queries_on_miss
+        assert len(page_2['pre_orders']) == 2
+        assert filtered['pagination']['total_items'] == 1
+    
+    def test_pre_order_change_invalidates_all_pages(self):
+        """Mudança em pré-ordem do usuário invalida todas as páginas e filtros"""
+        PreOrderService.get_active_pre_orders_paginated(self.client_id, 'cliente', page=2, per_page=3)
+        PreOrderService.get_active_pre_orders_paginated(
+            self.client_id, 'cliente', status_filter=PreOrderStatus.EM_NEGOCIACAO.value
+        )
+        
+        PreOrderService.invalidate_pre_order_cache(1, self.client_id, self.provider_id)
+        
+        assert PreOrderCacheService.get_active_pre_orders_page(
+            self.client_id, 'cliente', None, 2, 3
+        ) is None
+        assert PreOrderCacheService.get_active_pre_orders_page(
+            self.client_id, 'cliente', PreOrderStatus.EM_NEGOCIACAO.value, 1, 20
+        ) is None
+
+    
+    def test_proposal_service_change_invalidates_pages(self):
+        """Alteração feita por outro serviço (proposta) invalida as páginas após o commit"""
+        from services.pre_order_proposal_service import PreOrderProposalService
+        
+        pre_order = PreOrder.query.filter_by(status=PreOrderStatus.EM_NEGOCIACAO.value).first()
+        PreOrderService.get_active_pre_orders_paginated(self.client_id, 'cliente')
+        PreOrderService.get_active_pre_orders_paginated(self.provider_id, 'prestador')
+        
+        result = PreOrderProposalService.create_proposal(
+            pre_order.id, self.client_id, proposed_value=Decimal('120.00'),
+            justification='Ajuste de valor pelo escopo adicional solicitado pelo cliente na visita'
+        )
+        
+        assert result['success']
+        assert PreOrderCacheService.get_active_pre_orders_page(self.client_id, 'cliente', None, 1, 20) is None
+        assert PreOrderCacheService.get_active_pre_orders_page(self.provider_id, 'prestador', None, 1, 20) is None
+        page = PreOrderService.get_active_pre_orders_paginated(self.client_id, 'cliente')
+        listed = next(item for item in page['pre_orders'] if item['id'] == pre_order.id)
+        assert listed['status'] == PreOrderStatus.AGUARDANDO_RESPOSTA.value
+
+
 def test_cache_decorator():
     """Testa decorator de cache"""
     from services.pre_order_cache_service import cached_pre_order_query
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3.11
+# -*- coding: utf-8 -*-
+
+"""
+Testes para o registro de presença em pré-ordens (PresenceService)
+
+Testa:
+- Heartbeat e expiração por TTL
+- Varredura de presenças expiradas
+- Eventos join/leave
+- Backend em banco de dados compartilhado
+
+Requirements: 20.3 (Indicador de presença)
+"""
+
+import time
+import pytest
+from datetime import datetime, timedelta
+
+from services.presence_service import (
+    PresenceService, InMemoryPresenceBackend, DatabasePresenceBackend
+)
+from models import db, PreOrderPresence
+
+
+class TestInMemoryPresenceBackend:
+    """Testes para o backend em memória"""
+
+    def setup_method(self):
+        self.backend = InMemoryPresenceBackend()
+
+    def test_touch_reports_join_only_once(self):
+        """Primeiro heartbeat é entrada, os seguintes apenas renovam"""
+        assert self.backend.touch(1, 10, ttl_seconds=60) is True
+        assert self.backend.touch(1, 10, ttl_seconds=60) is False
+        assert self.backend.get_viewers(1) == {10}
+
+    def test_viewers_are_scoped_by_pre_order(self):
+        """Visualizadores de uma pré-ordem não aparecem em outra"""
+        self.backend.touch(1, 10, ttl_seconds=60)
+        self.backend.touch(1, 11, ttl_seconds=60)
+        self.backend.touch(2, 12, ttl_seconds=60)
+
+        assert self.backend.get_viewers(1) == {10, 11}
+        assert self.backend.get_viewers(2) == {12}
+        assert self.backend.get_viewers(3) == set()
+
+    def test_expired_heartbeat_is_not_present(self):
+        """Presença expirada não é retornada e conta como nova entrada"""
+        self.backend.touch(1, 10, ttl_seconds=60)
+        self.backend._viewers[1][10] = time.monotonic() - 1
+
+        assert self.backend.get_viewers(1) == set()
+        assert self.backend.touch(1, 10, ttl_seconds=60) is True
+
+    def test_remove(self):
+        """Remoção explícita retorna se o usuário estava presente"""
+        self.backend.touch(1, 10, ttl_seconds=60)
+
+        assert self.backend.remove(1, 10) is True
+        assert self.backend.remove(1, 10) is False
+        assert 1 not in self.backend._viewers
+
+    def test_sweep_removes_only_expired(self):
+        """Varredura remove expirados e descarta pré-ordens vazias"""
+        self.backend.touch(1, 10, ttl_seconds=60)
+        self.backend.touch(2, 20, ttl_seconds=60)
+        self.backend._viewers[2][20] = time.monotonic() - 1
+
+        assert self.backend.sweep() == 1
+        assert self.backend.get_viewers(1) == {10}
+        assert 2 not in self.backend._viewers
+
+
+class TestPresenceService:
+    """Testes para a API do PresenceService"""
+
+    def setup_method(self):
+        PresenceService.configure('memory')
+
+    def test_heartbeat_and_leave(self):
+        """Heartbeat registra presença e leave remove"""
+        assert PresenceService.heartbeat(5, 1) is True
+        assert PresenceService.is_present(5, 1)
+
+        assert PresenceService.leave(5, 1) is True
+        assert not PresenceService.is_present(5, 1)
+
+    def test_automatic_sweep_runs_after_interval(self):
+        """Varredura automática roda quando o intervalo mínimo passou"""
+        backend = PresenceService.get_backend()
+        backend.touch(7, 1, ttl_seconds=60)
+        backend._viewers[7][1] = time.monotonic() - 1
+
+        PresenceService._last_sweep = time.monotonic() - PresenceService.SWEEP_INTERVAL_SECONDS - 1
+        PresenceService.get_viewers(8)
+
+        assert 7 not in backend._viewers
+
+    def test_diff_viewers_emits_join_and_leave(self):
+        """Diferença de visualizadores gera eventos de entrada e saída"""
+        events = PresenceService.diff_viewers({1, 2}, {2, 3})
+
+        assert events == [
+            {'action': 'join', 'user_id': 3},
+            {'action': 'leave', 'user_id': 1},
+        ]
+
+    def test_diff_viewers_ignores_own_user(self):
+        """Eventos do próprio usuário não são emitidos"""
+        assert PresenceService.diff_viewers(set(), {1, 2}, ignore_user_id=1) == [
+            {'action': 'join', 'user_id': 2}
+        ]
+
+    def test_unknown_backend_raises(self):
+        """Backend desconhecido gera erro de configuração"""
+        with pytest.raises(ValueError):
+            PresenceService.configure('redis-inexistente')
+
+
+class TestDatabasePresenceBackend:
+    """Testes para o backend compartilhado em banco de dados"""
+
+    @pytest.fixture(autouse=True)
+    def setup_backend(self, app):
+        with app.app_context():
+            PreOrderPresence.query.delete()
+            db.session.commit()
+            self.backend = DatabasePresenceBackend()
+            yield
+            PreOrderPresence.query.delete()
+            db.session.commit()
+
+    def test_touch_and_viewers(self):
+        """Heartbeat persiste uma única linha por visualizador"""
+        assert self.backend.touch(1, 10, ttl_seconds=60) is True
+        assert self.backend.touch(1, 10, ttl_seconds=60) is False
+        self.backend.touch(1, 11, ttl_seconds=60)
+
+        assert self.backend.get_viewers(1) == {10, 11}
+        assert PreOrderPresence.query.filter_by(pre_order_id=1).count() == 2
+
+    def test_sweep_and_remove(self):
+        """Varredura apaga linhas expiradas; remove apaga a do usuário"""
+        self.backend.touch(1, 10, ttl_seconds=60)
+        self.backend.touch(1, 11, ttl_seconds=60)
+
+        expired = db.session.get(PreOrderPresence, (1, 11))
+        expired.expires_at = datetime.utcnow() - timedelta(seconds=1)
+        db.session.commit()
+
+        assert self.backend.get_viewers(1) == {10}
+        assert self.backend.sweep() == 1
+        assert self.backend.remove(1, 10) is True
+        assert PreOrderPresence.query.count() == 0
+
+    def test_concurrent_insert_is_upserted(self):
+        """Linha criada por outro stream entre a leitura e a escrita não gera erro"""
+        table = PreOrderPresence.__table__
+        key = (table.c.pre_order_id == 1) & (table.c.user_id == 10)
+        expires_at = datetime.utcnow() + timedelta(seconds=60)
+
+        with db.engine.begin() as connection:
+            for _ in range(2):
+                DatabasePresenceBackend._upsert(connection, table, key, dict(pre_order_id=1, user_id=10),
+                                                dict(last_seen=datetime.utcnow(), expires_at=expires_at))
+
+        assert self.backend.get_viewers(1) == {10}
+        assert PreOrderPresence.query.count() == 1
+
+    def test_heartbeat_keeps_caller_transaction(self):
+        """Heartbeat não confirma alterações pendentes da sessão da requisição"""
+        db.session.add(PreOrderPresence(pre_order_id=2, user_id=20,
+                                        expires_at=datetime.utcnow() + timedelta(seconds=60)))
+
+        self.backend.touch(1, 10, ttl_seconds=60)
+        self.backend.remove(1, 10)
+        self.backend.sweep()
+        db.session.rollback()
+
+        assert self.backend.get_viewers(2) == set()
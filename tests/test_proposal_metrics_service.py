@@ -0,0 +1,197 @@
+#!/usr/bin/env python3.11
+# -*- coding: utf-8 -*-
+
+"""
+Testes para as métricas combináveis de propostas (ProposalMetricsService)
+
+Testa:
+- Sketch de distintos (estimativa e união)
+- Agregados diários calculados em uma leitura por tipo
+- Semanas e intervalos arbitrários combinando as linhas diárias
+- Dias gravados antes do fim do dia são recalculados
+- Backfill em blocos com o mesmo resultado do cálculo direto
+"""
+
+import pytest
+from datetime import datetime, date, timedelta
+from decimal import Decimal
+
+from models import db, Invite, Proposal, ProposalAuditLog, ProposalMetrics
+from services.distinct_sketch import DistinctSketch
+from services.proposal_metrics_service import ProposalMetricsService, MetricsPartial
+
+MONDAY = date(2026, 3, 2)
+
+
+@pytest.fixture
+def proposals(app, db_session, test_user, test_provider):
+    """Convite do test_user com propostas do test_provider em dias da semana de MONDAY"""
+    invite = Invite(
+        client_id=test_user.id,
+        invited_phone='11999999999',
+        service_title='Serviço',
+        service_description='Descrição',
+        original_value=Decimal('100.00'),
+        delivery_date=datetime(2026, 4, 1),
+        expires_at=datetime(2026, 4, 1)
+    )
+    db_session.add(invite)
+    db_session.flush()
+
+    def add(day, proposed, status='pending', responded_hours=None, prestador_id=test_provider.id):
+        created_at = datetime.combine(day, datetime.min.time()) + timedelta(hours=10)
+        proposal = Proposal(
+            invite_id=invite.id, prestador_id=prestador_id, original_value=Decimal('100.00'),
+            proposed_value=Decimal(proposed), status=status, created_at=created_at,
+            responded_at=created_at + timedelta(hours=responded_hours) if responded_hours else None
+        )
+        db_session.add(proposal)
+        db_session.flush()
+        db_session.add(ProposalAuditLog(
+            proposal_id=proposal.id, invite_id=invite.id, action_type='created',
+            actor_user_id=prestador_id, actor_role='prestador', created_at=created_at
+        ))
+        return proposal
+
+    add(MONDAY, '150.00', status='accepted', responded_hours=2)
+    add(MONDAY, '80.00', status='rejected', responded_hours=4)
+    add(MONDAY + timedelta(days=2), '200.00', prestador_id=test_provider.id + 1000)
+    add(MONDAY + timedelta(days=6), '100.00')
+    db_session.commit()
+
+    yield invite
+
+    for model in (ProposalMetrics, ProposalAuditLog, Proposal, Invite):
+        model.query.delete()
+    db_session.commit()
+
+
+class TestDistinctSketch:
+    """Estimativa e combinação"""
+
+    def test_estimate_and_merge(self):
+        """Erro pequeno; a união de sketches estima a união dos conjuntos"""
+        first = DistinctSketch().update(range(0, 6000))
+        second = DistinctSketch().update(range(4000, 10000))
+        restored = DistinctSketch.from_bytes(first.to_bytes())
+
+        assert abs(first.estimate() - 6000) / 6000 < 0.1
+        assert restored.registers == first.registers
+        assert abs(restored.merge(second).estimate() - 10000) / 10000 < 0.1
+        assert DistinctSketch().update([1, 2, 3, 3]).estimate() == 3
+
+
+class TestDailyMetrics:
+    """Cálculo diário e combinação"""
+
+    def test_daily_aggregates(self, proposals, sql_statements):
+        """Um dia: contagens, valores, extremos e tempo de resposta"""
+        sql_statements.clear()
+        metric = ProposalMetricsService.calculate_daily_metrics(MONDAY)
+
+        assert metric.total_proposals == 2
+        assert metric.proposals_created == 2
+        assert metric.total_approved_value == Decimal('150.00')
+        assert (metric.proposals_with_increase, metric.proposals_with_decrease) == (1, 1)
+        assert (metric.min_proposed_value, metric.max_proposed_value) == (Decimal('80.00'), Decimal('150.00'))
+        assert float(metric.average_response_time_hours) == 3.0
+        assert (metric.unique_prestadores, metric.unique_clientes) == (1, 1)
+        audit_selects = [s for s in sql_statements if s.startswith('SELECT') and 'FROM proposal_audit_logs' in s]
+        assert len(audit_selects) == 1  # Um GROUP BY para todos os tipos de ação
+
+    def test_weekly_merges_dailies(self, proposals):
+        """Semana = combinação das linhas diárias, criadas se ausentes"""
+        weekly = ProposalMetricsService.calculate_weekly_metrics(MONDAY + timedelta(days=3))
+
+        assert weekly.metric_date == MONDAY
+        assert weekly.total_proposals == 4
+        assert weekly.proposals_created == 4
+        assert weekly.unique_prestadores == 2
+        assert weekly.max_proposed_value == Decimal('200.00')
+        assert ProposalMetrics.query.filter_by(metric_type='daily').count() == 7
+
+    def test_range_uses_stored_days(self, proposals, sql_statements):
+        """Intervalo arbitrário não relê propostas de dias já calculados"""
+        ProposalMetricsService.backfill_daily_metrics(MONDAY, MONDAY + timedelta(days=6))
+        sql_statements.clear()
+
+        summary = ProposalMetricsService.get_range_metrics(MONDAY, MONDAY + timedelta(days=2))
+
+        assert summary['total_proposals'] == 3
+        assert summary['days'] == 3
+        assert summary['unique_prestadores'] == 2
+        assert summary['proposed_value_stddev'] == pytest.approx(49.22, abs=0.01)
+        assert not any('invite_proposals' in s for s in sql_statements)
+
+    def test_day_written_midday_is_recomputed(self, proposals, test_provider):
+        """Linha gravada durante o dia (painel aberto) não congela o dia depois que ele passa"""
+        wednesday = MONDAY + timedelta(days=2)
+        metric = ProposalMetricsService.calculate_daily_metrics(wednesday)
+        metric.updated_at = datetime.combine(wednesday, datetime.min.time()) + timedelta(hours=12)
+        db.session.add(Proposal(
+            invite_id=proposals.id, prestador_id=test_provider.id, original_value=Decimal('100.00'),
+            proposed_value=Decimal('90.00'), status='pending',
+            created_at=metric.updated_at + timedelta(hours=3)
+        ))
+        db.session.commit()
+
+        summary = ProposalMetricsService.get_range_metrics(wednesday, wednesday)
+
+        assert summary['total_proposals'] == 2
+        assert ProposalMetrics.query.filter_by(metric_type='daily', metric_date=wednesday).one().updated_at \
+            >= datetime.combine(wednesday + timedelta(days=1), datetime.min.time())
+
+    def test_approval_after_day_end_counts_on_response_day(self, proposals, test_provider):
+        """Proposta criada num dia e aceita no seguinte, depois de o primeiro dia ser gravado"""
+        wednesday = MONDAY + timedelta(days=2)
+        created_at = datetime.combine(wednesday, datetime.min.time()) + timedelta(hours=9)
+        proposal = Proposal(
+            invite_id=proposals.id, prestador_id=test_provider.id, original_value=Decimal('100.00'),
+            proposed_value=Decimal('300.00'), status='pending', created_at=created_at
+        )
+        db.session.add(proposal)
+        db.session.commit()
+        ProposalMetricsService.backfill_daily_metrics(wednesday, wednesday)
+        ProposalMetrics.query.filter_by(metric_type='daily', metric_date=wednesday).one().updated_at = \
+            datetime.combine(wednesday + timedelta(days=1), datetime.min.time()) + timedelta(minutes=5)
+
+        proposal.status = 'accepted'
+        proposal.responded_at = created_at + timedelta(days=1)
+        db.session.commit()
+
+        summary = ProposalMetricsService.get_range_metrics(MONDAY, MONDAY + timedelta(days=6))
+        weekly = ProposalMetricsService.calculate_weekly_metrics(MONDAY)
+
+        assert summary['total_approved_value'] == 450.0
+        assert weekly.total_approved_value == Decimal('450.00')
+        assert ProposalMetrics.query.filter_by(metric_type='daily', metric_date=wednesday).one() \
+            .total_approved_value == Decimal('0.00')
+
+
+class TestBackfill:
+    """Recalculo do histórico"""
+
+    def test_chunked_backfill_matches(self, proposals):
+        """Blocos pequenos e lotes de uma linha produzem os mesmos dias"""
+        days = ProposalMetricsService.backfill_daily_metrics(chunk_days=2, batch_size=1,
+                                                             end_date=MONDAY + timedelta(days=6))
+        chunked = {m.metric_date: (m.total_proposals, m.total_proposed_value, m.proposals_created)
+                   for m in ProposalMetrics.query.filter_by(metric_type='daily')}
+
+        ProposalMetrics.query.delete()
+        db.session.commit()
+        ProposalMetricsService.backfill_daily_metrics(MONDAY, MONDAY + timedelta(days=6))
+        direct = {m.metric_date: (m.total_proposals, m.total_proposed_value, m.proposals_created)
+                  for m in ProposalMetrics.query.filter_by(metric_type='daily')}
+
+        assert days == 7
+        assert chunked == direct
+        assert chunked[MONDAY + timedelta(days=2)] == (1, Decimal('200.00'), 1)
+
+    def test_partial_roundtrip(self, proposals):
+        """Linha gravada e relida combina como o agregado original"""
+        metric = ProposalMetricsService.calculate_daily_metrics(MONDAY)
+        partial = MetricsPartial.from_metric(metric)
+
+        assert partial.merge(MetricsPartial()).to_dict()['total_proposed_value'] == 230.0
+        assert partial.unique_prestadores == 1
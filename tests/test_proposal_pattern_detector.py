@@ -0,0 +1,258 @@
+#!/usr/bin/env python3.11
+# -*- coding: utf-8 -*-
+
+"""
+Testes para a detecção assíncrona de padrões suspeitos (ProposalPatternDetector)
+
+Testa:
+- Frequência de propostas pelas janelas em memória, sem repetição de alertas
+- Carga das janelas a partir de proposal_audit_logs (inicial e após o TTL)
+- Tempo de resposta e taxa de rejeição
+- Condições do sistema e verificação periódica
+- Índice de alertas ativos, incluindo os gravados por outros workers
+- Entrega apenas após o commit e gravação dos alertas em lote
+"""
+
+import pytest
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from models import ProposalAlert, ProposalAuditLog
+from services.proposal_alert_service import ProposalAlertService
+from services.proposal_pattern_detector import ProposalPatternDetector, ProposalActionEvent
+
+
+@pytest.fixture
+def detector(app, db_session):
+    """Janelas vazias e tabelas de alertas/auditoria limpas"""
+    ProposalPatternDetector.reset()
+    yield ProposalPatternDetector
+    ProposalPatternDetector.reset()
+    ProposalAlert.query.delete()
+    ProposalAuditLog.query.delete()
+    db_session.commit()
+
+
+def make_event(user_id, when, action_type='created', proposal_id=1, role='prestador', **values):
+    values.setdefault('original_value', Decimal('100.00'))
+    values.setdefault('proposed_value', Decimal('120.00'))
+    values.setdefault('value_difference', values['proposed_value'] - values['original_value'])
+    return ProposalActionEvent(
+        proposal_id=proposal_id, invite_id=1, action_type=action_type,
+        actor_user_id=user_id, actor_role=role, timestamp=when, **values
+    )
+
+
+def alert_types():
+    return sorted(alert.alert_type for alert in ProposalAlert.query.all())
+
+
+def hourly(alerts):
+    return [alert for alert in alerts if alert['alert_type'] == 'high_frequency_proposals_hour']
+
+
+def add_created(db_session, user_id, count, now):
+    for minute in range(count):
+        db_session.add(ProposalAuditLog(
+            proposal_id=minute, invite_id=1, action_type='created', actor_user_id=user_id,
+            actor_role='prestador', created_at=now - timedelta(minutes=40 - minute)
+        ))
+
+
+class TestFrequency:
+    """Propostas criadas por hora e por dia"""
+
+    def test_hourly_limit_alerts_once(self, detector, sql_statements):
+        """Um único alerta por janela; alertas do lote gravados em um INSERT"""
+        start = datetime.utcnow() - timedelta(minutes=30)
+        events = [make_event(7, start + timedelta(minutes=i), proposal_id=i) for i in range(13)]
+
+        sql_statements.clear()
+        alerts = detector.process(events)
+
+        assert sorted(alert['alert_type'] for alert in alerts) == ['high_frequency_proposals_hour',
+                                                                   'system_proposal_spike']
+        assert '6 propostas' in hourly(alerts)[0]['title']  # Limite do ProposalAlertService (5 por hora)
+        assert alert_types() == ['high_frequency_proposals_hour', 'system_proposal_spike']
+        inserts = [s for s in sql_statements if s.startswith('INSERT INTO proposal_alerts')]
+        assert len(inserts) == 1
+
+    def test_window_loaded_from_history(self, detector, db_session):
+        """Usuário ainda não visto: janela carregada dos registros anteriores"""
+        now = datetime.utcnow()
+        for minute in range(10):
+            db_session.add(ProposalAuditLog(
+                proposal_id=1, invite_id=1, action_type='created', actor_user_id=8,
+                actor_role='prestador', created_at=now - timedelta(minutes=50 - minute)
+            ))
+        db_session.commit()
+
+        alerts = hourly(detector.process([make_event(8, now)]))
+
+        assert len(alerts) == 1
+        assert '11 propostas' in alerts[0]['title']
+
+        # Janela já em memória: nada é recarregado nem contado de novo
+        assert detector.process([make_event(8, now + timedelta(hours=2))]) == []
+
+    def test_stale_window_includes_other_workers(self, detector, db_session):
+        """Janela vencida é recarregada com as ações gravadas por outros workers"""
+        now = datetime.utcnow()
+        assert detector.process([make_event(15, now - timedelta(minutes=30))]) == []
+
+        # Outro worker processou 10 propostas do mesmo usuário
+        for minute in range(10):
+            db_session.add(ProposalAuditLog(
+                proposal_id=1, invite_id=1, action_type='created', actor_user_id=15,
+                actor_role='prestador', created_at=now - timedelta(minutes=20 - minute)
+            ))
+        db_session.commit()
+        assert detector.process([make_event(15, now - timedelta(seconds=30))]) == []
+
+        detector._windows[15].loaded_at -= detector.WINDOW_TTL
+        alerts = hourly(detector.process([make_event(15, now)]))
+
+        assert len(alerts) == 1
+        assert '11 propostas' in alerts[0]['title']
+
+
+class TestResponses:
+    """Respostas do cliente"""
+
+    def test_fast_response_and_rejection_rate(self, detector):
+        """Respostas rápidas e taxa de rejeição acima do limite geram alertas"""
+        now = datetime.utcnow()
+        events = [
+            make_event(9, now + timedelta(minutes=i), action_type='rejected', role='cliente',
+                       proposal_id=i, created_at=now - timedelta(hours=1),
+                       responded_at=now + timedelta(minutes=i))
+            for i in range(4)
+        ]
+        events.append(make_event(9, now + timedelta(minutes=5), action_type='rejected', role='cliente',
+                                 proposal_id=5, created_at=now + timedelta(minutes=5),
+                                 responded_at=now + timedelta(minutes=5, seconds=10)))
+
+        detector.process(events)
+
+        assert alert_types() == ['high_rejection_rate', 'very_fast_response']
+        assert detector.get_stats()['tracked_users'] == 1
+
+
+class TestAlertConditions:
+    """Condições do ProposalAlertService avaliadas sobre o mesmo estado"""
+
+    def test_periodic_check_reloads_and_deduplicates(self, detector, db_session, sql_statements):
+        """Verificação periódica lê as tabelas; alertas ativos não se repetem"""
+        now = datetime.utcnow()
+        add_created(db_session, 5, 7, now)
+        add_created(db_session, 6, 7, now)
+        db_session.add(ProposalAlert(
+            alert_type='high_frequency_proposals_hour', severity='medium', title='Existente',
+            description='Alerta anterior', user_id=6, status='active',
+            created_at=now - timedelta(minutes=10)
+        ))
+        db_session.commit()
+
+        sql_statements.clear()
+        created = ProposalAlertService.check_all_alert_conditions()
+        alert_selects = [s for s in sql_statements if s.startswith('SELECT') and 'FROM proposal_alerts' in s]
+
+        hourly_alerts = ProposalAlert.query.filter_by(alert_type='high_frequency_proposals_hour').all()
+        assert created == 2  # Usuário 5 + pico do sistema (14 propostas hoje)
+        assert sorted(alert.user_id for alert in hourly_alerts) == [5, 6]
+        assert 'system_proposal_spike' in alert_types()
+        assert len(alert_selects) == 2  # Alertas ativos dos candidatos + limpeza de resolvidos antigos
+
+        assert ProposalAlertService.check_all_alert_conditions() == 0
+        assert ProposalAlert.query.count() == 3
+        assert detector.get_stats()['tracked_users'] == 2
+
+    def test_events_raise_alerts_immediately(self, detector):
+        """Limite por hora ultrapassado no próprio lote, sem esperar a verificação"""
+        now = datetime.utcnow() + timedelta(seconds=1)
+
+        detector.submit([make_event(12, now + timedelta(minutes=i), proposal_id=i) for i in range(6)])
+
+        assert alert_types() == ['high_frequency_proposals_hour', 'system_proposal_spike']
+        assert ProposalAlertService.check_all_alert_conditions() == 0
+
+    def test_system_rejection_rate(self, detector):
+        """Rejeições de vários clientes nas últimas 24h"""
+        now = datetime.utcnow() + timedelta(seconds=1)
+
+        detector.process([make_event(100 + i, now + timedelta(minutes=i), action_type='rejected',
+                                     role='cliente', proposal_id=i) for i in range(10)])
+
+        assert alert_types() == ['system_high_rejection_rate']
+
+    def test_resolved_alert_leaves_index(self, detector):
+        """Depois de resolvido, a condição ainda presente volta a gerar alerta"""
+        now = datetime.utcnow() + timedelta(seconds=1)
+        detector.process([make_event(13, now + timedelta(minutes=i), proposal_id=i) for i in range(6)])
+        alert = ProposalAlert.query.filter_by(alert_type='high_frequency_proposals_hour').one()
+
+        assert ProposalAlertService.resolve_alert(alert.id, admin_id=1, resolution_notes='Verificado')
+        detector.process([make_event(13, now + timedelta(minutes=7), proposal_id=7)])
+
+        statuses = sorted(a.status for a in ProposalAlert.query.filter_by(alert_type='high_frequency_proposals_hour'))
+        assert statuses == ['active', 'resolved']
+
+    def test_one_alert_per_subject(self, detector):
+        """Verificações do ProposalAuditService e do ProposalAlertService: um alerta por (tipo, proposta)"""
+        high_value = make_event(14, datetime.utcnow(), proposal_id=42, proposed_value=Decimal('60000.00'))
+
+        detector.submit([high_value])
+        detector.submit([high_value])
+
+        keys = [(alert.alert_type, alert.proposal_id) for alert in ProposalAlert.query.all()]
+        assert sorted(keys) == [('excessive_value_increase', 42), ('unusual_high_value', 42)]
+
+    def test_alert_from_other_worker_not_repeated(self, detector, db_session, sql_statements):
+        """Alerta ativo gravado por outro worker (fora do índice) impede a repetição"""
+        db_session.add(ProposalAlert(
+            alert_type='unusual_high_value', severity='medium', title='Outro worker',
+            description='Gravado por outro worker', proposal_id=43, status='active'
+        ))
+        db_session.commit()
+        sql_statements.clear()
+
+        detector.process([make_event(16, datetime.utcnow(), proposal_id=43,
+                                     proposed_value=Decimal('60000.00'))])
+        alert_selects = [s for s in sql_statements if s.startswith('SELECT') and 'FROM proposal_alerts' in s]
+
+        keys = sorted((alert.alert_type, alert.title) for alert in ProposalAlert.query.filter_by(proposal_id=43))
+        assert [key[0] for key in keys] == ['excessive_value_increase', 'unusual_high_value']
+        assert ('unusual_high_value', 'Outro worker') in keys
+        assert len(alert_selects) == 1  # Uma consulta para todos os candidatos do lote
+
+
+class TestDelivery:
+    """Entrega dos eventos"""
+
+    def test_only_committed_actions_are_analyzed(self, detector, db_session):
+        """Ação desfeita é descartada; a confirmada é analisada no commit"""
+        high_value = dict(original_value=Decimal('20000.00'), proposed_value=Decimal('20000.00'))
+
+        assert ProposalAlert.query.count() == 0  # Transação em andamento
+        detector.track(db_session, make_event(10, datetime.utcnow(), **high_value))
+        db_session.rollback()
+        assert ProposalAlert.query.count() == 0
+
+        detector.track(db_session, make_event(10, datetime.utcnow(), **high_value))
+        db_session.commit()
+        assert alert_types() == ['unusual_high_value']
+
+    def test_async_events_wait_for_batch(self, detector, app):
+        """Com o detector assíncrono, os eventos ficam na fila até o lote"""
+        app.config['PROPOSAL_PATTERN_ASYNC'] = True
+        started = ProposalPatternDetector._ensure_started
+        ProposalPatternDetector._ensure_started = classmethod(lambda cls: None)
+        try:
+            detector.submit([make_event(11, datetime.utcnow(), proposed_value=Decimal('500.00'))])
+            assert ProposalAlert.query.count() == 0
+
+            assert detector.flush() == 1
+            assert alert_types() == ['excessive_value_increase']
+        finally:
+            ProposalPatternDetector._ensure_started = started
+            app.config['PROPOSAL_PATTERN_ASYNC'] = False
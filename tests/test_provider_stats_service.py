@@ -0,0 +1,202 @@
+#!/usr/bin/env python3.11
+# -*- coding: utf-8 -*-
+
+"""
+Testes para as estatísticas acumuladas por prestador (ProviderStatsService)
+
+Testa:
+- Manutenção incremental na conclusão, cancelamento e contestação
+- Clientes distintos atendidos
+- Reconstrução completa
+- Leitura pela chave primária e listagem ordenada
+- Valores anteriores lidos uma vez por flush para todas as estatísticas
+"""
+
+import pytest
+from decimal import Decimal
+from datetime import datetime, timedelta
+
+from models import db, User, Order, Transaction, ProviderStats, ProviderClientStats, UserMonthlyStats
+from services.provider_stats_service import ProviderStatsService
+from services.user_monthly_stats_service import UserMonthlyStatsService
+from services.prestador_service import PrestadorService
+
+
+@pytest.fixture
+def parties(app, db_session, test_user, test_provider):
+    """IDs de cliente e prestador; limpa ordens, transações e estatísticas ao final"""
+    client_id, provider_id = test_user.id, test_provider.id
+    yield client_id, provider_id
+    Transaction.query.delete()
+    Order.query.delete()
+    ProviderStats.query.delete()
+    ProviderClientStats.query.delete()
+    UserMonthlyStats.query.delete()
+    db_session.commit()
+
+
+def create_order(session, client_id, provider_id, **kwargs):
+    values = dict(
+        client_id=client_id,
+        provider_id=provider_id,
+        title='Ordem',
+        description='Desc',
+        value=Decimal('100.00'),
+        status='aceita',
+        service_deadline=datetime.utcnow() + timedelta(days=7),
+    )
+    values.update(kwargs)
+    order = Order(**values)
+    session.add(order)
+    session.commit()
+    return order
+
+
+def create_client(session, index):
+    user = User(email=f'stats{index}@example.com', nome=f'Cliente {index}',
+                cpf=f'4440000000{index}', phone=f'1180000000{index}', roles='cliente')
+    user.set_password('senha123')
+    session.add(user)
+    session.commit()
+    return user.id
+
+
+class TestIncrementalMaintenance:
+    """Estatísticas atualizadas a cada flush"""
+
+    def test_completion_updates_rate(self, db_session, parties):
+        """Conclusão de ordem já gravada atualiza taxa de conclusão e clientes"""
+        client_id, provider_id = parties
+        order = create_order(db_session, client_id, provider_id)
+        create_order(db_session, client_id, provider_id)
+        assert ProviderStatsService.get_stats(provider_id)['completion_rate'] == 0.0
+
+        order.status = 'concluida'
+        db_session.commit()
+
+        stats = ProviderStatsService.get_stats(provider_id)
+        assert stats['total_orders'] == 2
+        assert stats['completed_orders'] == 1
+        assert stats['completion_rate'] == 50.0
+        assert stats['clients_served'] == 1
+
+    def test_cancellation_and_dispute(self, db_session, parties):
+        """Cancelamento e contestação são contados; reversão da conclusão remove o cliente"""
+        client_id, provider_id = parties
+        order = create_order(db_session, client_id, provider_id, status='concluida')
+        cancelled = create_order(db_session, client_id, provider_id)
+
+        order.status = 'contestada'
+        cancelled.status = 'cancelada'
+        db_session.commit()
+
+        stats = ProviderStatsService.get_stats(provider_id)
+        assert stats['disputed_orders'] == 1
+        assert stats['cancelled_orders'] == 1
+        assert stats['completed_orders'] == 0
+        assert stats['clients_served'] == 0
+
+    def test_distinct_clients(self, db_session, parties):
+        """Vários pedidos do mesmo cliente contam um cliente"""
+        client_id, provider_id = parties
+        other_client = create_client(db_session, 1)
+        for _ in range(3):
+            create_order(db_session, client_id, provider_id, status='concluida')
+        create_order(db_session, other_client, provider_id, status='concluida')
+
+        assert ProviderStatsService.get_stats(provider_id)['clients_served'] == 2
+        assert PrestadorService._contar_clientes_atendidos(provider_id) == 2
+
+    def test_receipts_average(self, db_session, parties):
+        """Ganho médio é a média dos recebimentos"""
+        _, provider_id = parties
+        for amount in ('80.00', '40.00'):
+            db_session.add(Transaction(user_id=provider_id, type='recebimento',
+                                       amount=Decimal(amount), description='Pagamento'))
+        db_session.add(Transaction(user_id=provider_id, type='saque',
+                                   amount=Decimal('-10.00'), description='Saque'))
+        db_session.commit()
+
+        assert PrestadorService._calcular_ganho_medio_ordem(provider_id) == 60.0
+        assert ProviderStatsService.get_stats(provider_id)['total_received'] == 120.0
+
+    def test_deleted_order(self, db_session, parties):
+        """Ordem removida pelo ORM sai das estatísticas"""
+        client_id, provider_id = parties
+        order = create_order(db_session, client_id, provider_id, status='concluida')
+
+        db_session.delete(order)
+        db_session.commit()
+
+        stats = ProviderStatsService.get_stats(provider_id)
+        assert stats['total_orders'] == 0
+        assert stats['clients_served'] == 0
+
+
+class TestRebuildAndRead:
+    """Reconstrução, leitura e listagem"""
+
+    def test_rebuild_matches_incremental(self, db_session, parties):
+        """Reconstrução recupera os mesmos valores da manutenção incremental"""
+        client_id, provider_id = parties
+        create_order(db_session, client_id, provider_id, status='concluida')
+        create_order(db_session, client_id, provider_id, status='cancelada')
+        create_order(db_session, client_id, provider_id, status='disputada')
+        create_order(db_session, client_id, provider_id)
+        db_session.add(Transaction(user_id=provider_id, type='recebimento',
+                                   amount=Decimal('95.00'), description='Pagamento'))
+        db_session.commit()
+        expected = ProviderStatsService.get_stats(provider_id)
+        assert expected['disputed_orders'] == 1  # 'disputada', status aberto por order_service
+
+        ProviderStats.query.delete()
+        ProviderClientStats.query.delete()
+        db_session.commit()
+        assert ProviderStatsService.get_stats(provider_id)['total_orders'] == 0
+
+        assert ProviderStatsService.rebuild() == 1
+        assert ProviderStatsService.get_stats(provider_id) == expected
+
+    def test_previous_values_read_once_per_flush(self, db_session, parties, sql_statements):
+        """Estatísticas de prestador e mensais compartilham a leitura dos valores anteriores"""
+        client_id, provider_id = parties
+        orders = [create_order(db_session, client_id, provider_id) for _ in range(3)]
+        for order in orders:
+            order.status = 'concluida'
+            order.completed_at = datetime.utcnow()
+        sql_statements.clear()
+
+        db_session.commit()
+
+        previous_reads = [statement for statement in sql_statements
+                          if statement.lstrip().startswith('SELECT') and 'FROM orders' in statement
+                          and 'orders.id IN' in statement]
+        assert len(previous_reads) == 1
+        assert ProviderStatsService.get_stats(provider_id)['completed_orders'] == 3
+        assert UserMonthlyStatsService.get_month_stats(client_id, 'cliente')['orders_completed'] == 3
+
+    def test_read_is_single_query(self, db_session, parties, sql_statements):
+        """Taxa de conclusão é lida com uma consulta"""
+        client_id, provider_id = parties
+        create_order(db_session, client_id, provider_id, status='concluida')
+        sql_statements.clear()
+
+        assert PrestadorService._calcular_taxa_conclusao(provider_id) == 100.0
+        assert len(sql_statements) == 1
+
+    def test_list_providers(self, db_session, parties):
+        """Listagem ordenada e filtrada sem varrer orders"""
+        client_id, provider_id = parties
+        create_order(db_session, client_id, provider_id, status='concluida')
+        create_order(db_session, provider_id, client_id, status='concluida')
+        create_order(db_session, provider_id, client_id)
+
+        ranked = ProviderStatsService.list_providers(sort_by='completion_rate')
+        assert [row['provider_id'] for row in ranked] == [provider_id, client_id]
+        assert ranked[1]['completion_rate'] == 50.0
+
+        filtered = ProviderStatsService.list_providers(min_completion_rate=75)
+        assert [row['provider_id'] for row in filtered] == [provider_id]
+
+        with pytest.raises(ValueError):
+            ProviderStatsService.list_providers(sort_by='inexistente')
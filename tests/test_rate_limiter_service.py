@@ -0,0 +1,204 @@
+#!/usr/bin/env python3.11
+# -*- coding: utf-8 -*-
+
+"""
+Testes para o rate limiting unificado (RateLimiterService)
+
+Testa:
+- Janela deslizante por contadores (peso da janela anterior)
+- Armazenamento local limitado e remoção de chaves expiradas
+- Armazenamento em banco compartilhado entre workers
+- SecurityValidator.check_rate_limit e Flask-Limiter sobre a mesma API
+"""
+
+import time
+import pytest
+from flask import Flask
+from flask_limiter import Limiter
+from limits import parse
+from limits.storage import storage_from_string
+from limits.strategies import SlidingWindowCounterRateLimiter
+
+from models import RateLimitCounter
+from services.rate_limiter_service import (
+    RateLimiterService, LocalRateLimitStorage, DatabaseRateLimitStorage
+)
+from services.security_validator import SecurityValidator
+
+
+PER_MINUTE_10 = parse('10/minute')
+PER_MINUTE_3 = parse('3/minute')
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Relógio controlado (time.time) para avançar as janelas"""
+    now = [1_000_040.0]  # 20s após o início de uma janela de 60s
+    monkeypatch.setattr(time, 'time', lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def local_limiter():
+    RateLimiterService.clear_local()
+    yield
+    RateLimiterService.clear_local()
+
+
+class TestSlidingWindow:
+    """Estratégia de janela deslizante por contadores"""
+
+    def test_previous_window_is_weighted(self, clock):
+        """Hits da janela anterior contam proporcionalmente ao tempo restante"""
+        strategy = SlidingWindowCounterRateLimiter(LocalRateLimitStorage())
+
+        for _ in range(10):
+            assert strategy.hit(PER_MINUTE_10, 'chave')
+        assert not strategy.hit(PER_MINUTE_10, 'chave')
+
+        clock[0] += 60  # nova janela: anterior pesa 40/60 -> 6,67
+        for _ in range(4):
+            assert strategy.hit(PER_MINUTE_10, 'chave')
+        assert not strategy.hit(PER_MINUTE_10, 'chave')
+
+        clock[0] += 30  # anterior pesa 10/60 -> 1,67; atual tem 4
+        for _ in range(5):
+            assert strategy.hit(PER_MINUTE_10, 'chave')
+        assert not strategy.hit(PER_MINUTE_10, 'chave')
+
+    def test_retry_after(self, app, clock, local_limiter):
+        """Tempo de espera informado quando o limite é atingido"""
+        with app.app_context():
+            assert RateLimiterService.get_retry_after('k', '1/minute') == 0
+            assert RateLimiterService.hit('k', '1/minute')
+            assert not RateLimiterService.test('k', '1/minute')
+            assert 0 < RateLimiterService.get_retry_after('k', '1/minute') <= 120
+
+            RateLimiterService.reset('k', '1/minute')
+            assert RateLimiterService.hit('k', '1/minute')
+
+
+class TestLocalStorage:
+    """Armazenamento local com memória limitada"""
+
+    def test_max_keys_bound(self):
+        """Com o limite atingido, chaves novas são recusadas e as existentes mantidas"""
+        storage = LocalRateLimitStorage(max_keys=3)
+
+        for index in range(5):
+            storage.incr(f'chave{index}', 60)
+
+        assert storage.size == 3
+        assert storage.get('chave0') == 1
+        assert storage.get('chave4') == 0
+        assert storage.incr('chave0', 60) == 2
+
+    def test_full_storage_fails_closed(self, clock):
+        """Chave nova em armazenamento cheio conta como acima do limite"""
+        storage = LocalRateLimitStorage(max_keys=2)
+        strategy = SlidingWindowCounterRateLimiter(storage)
+
+        assert strategy.hit(PER_MINUTE_10, 'vitima')
+        assert strategy.hit(PER_MINUTE_10, 'outra')
+        assert not strategy.hit(PER_MINUTE_10, 'invasor')
+        assert strategy.hit(PER_MINUTE_10, 'vitima')
+
+    def test_full_storage_sweeps_expired_first(self, clock):
+        """Contadores expirados abrem espaço antes de recusar chaves novas"""
+        storage = LocalRateLimitStorage(max_keys=2)
+        storage.incr('curta', 5)
+        storage.incr('longa', 600)
+
+        clock[0] += 10
+        assert storage.incr('nova', 60) == 1
+        assert storage.get('longa') == 1
+        assert storage.size == 2
+
+    def test_periodic_sweep(self, clock):
+        """Contadores expirados são removidos na varredura periódica"""
+        storage = LocalRateLimitStorage()
+        for index in range(10):
+            storage.incr(f'chave{index}', 5)
+
+        clock[0] += LocalRateLimitStorage.SWEEP_INTERVAL + 1
+        storage.incr('nova', 60)
+
+        assert storage.size == 1
+
+    def test_two_counters_per_key(self, clock):
+        """Memória O(1) por chave: no máximo duas janelas vivas"""
+        storage = LocalRateLimitStorage()
+        strategy = SlidingWindowCounterRateLimiter(storage)
+
+        for _ in range(5):
+            for _ in range(3):
+                strategy.hit(parse('100/minute'), 'chave')
+            clock[0] += 60
+
+        storage.sweep()
+        assert storage.size <= 2
+
+
+class TestDatabaseStorage:
+    """Armazenamento compartilhado em rate_limit_counters"""
+
+    @pytest.fixture
+    def workers(self, app, db_session):
+        """Dois armazenamentos independentes simulando workers"""
+        yield (SlidingWindowCounterRateLimiter(DatabaseRateLimitStorage()),
+               SlidingWindowCounterRateLimiter(DatabaseRateLimitStorage()))
+        RateLimitCounter.query.delete()
+        db_session.commit()
+
+    def test_limit_is_shared(self, workers):
+        """Hits de um worker contam no limite do outro"""
+        first, second = workers
+
+        assert first.hit(PER_MINUTE_3, 'usuario')
+        assert second.hit(PER_MINUTE_3, 'usuario')
+        assert first.hit(PER_MINUTE_3, 'usuario')
+        assert not second.hit(PER_MINUTE_3, 'usuario')
+        assert RateLimitCounter.query.count() == 1
+
+    def test_expired_counter_restarts(self, workers, clock):
+        """Contador expirado recomeça e é removido na varredura"""
+        storage = DatabaseRateLimitStorage()
+
+        assert storage.incr('chave', 10) == 1
+        assert storage.incr('chave', 10) == 2
+        clock[0] += 11
+        assert storage.get('chave') == 0
+        assert storage.incr('chave', 10) == 1
+
+        clock[0] += DatabaseRateLimitStorage.SWEEP_INTERVAL + 1
+        storage.incr('outra', 10)
+        assert RateLimitCounter.query.count() == 1
+
+
+class TestUnifiedApi:
+    """SecurityValidator e Flask-Limiter sobre o mesmo limiter"""
+
+    def test_check_rate_limit(self, app, local_limiter):
+        """Limite por usuário e ação, com a mensagem existente"""
+        with app.app_context():
+            for _ in range(2):
+                assert SecurityValidator.check_rate_limit(1, 'cancel_order', 2, 60) == (True, "")
+
+            allowed, message = SecurityValidator.check_rate_limit(1, 'cancel_order', 2, 60)
+            assert not allowed
+            assert '60 segundos' in message
+
+            assert SecurityValidator.check_rate_limit(1, 'open_dispute', 2, 60)[0]
+            assert SecurityValidator.check_rate_limit(2, 'cancel_order', 2, 60)[0]
+
+    def test_flask_limiter_uses_configured_storage(self, local_limiter):
+        """Flask-Limiter é configurado pela URI e estratégia da aplicação"""
+        flask_app = Flask(__name__)
+        flask_app.config.update(RATELIMIT_STORAGE_URI='local://',
+                                RATELIMIT_STRATEGY='sliding-window-counter')
+        route_limiter = Limiter(key_func=lambda: 'cliente')
+        route_limiter.init_app(flask_app)
+
+        assert isinstance(route_limiter.storage, LocalRateLimitStorage)
+        assert isinstance(route_limiter.limiter, SlidingWindowCounterRateLimiter)
+        assert isinstance(storage_from_string('database://'), DatabaseRateLimitStorage)
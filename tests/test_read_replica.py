@@ -0,0 +1,139 @@
+#!/usr/bin/env python3.11
+# -*- coding: utf-8 -*-
+
+"""
+Testes para o roteamento de leituras para a réplica (ReadReplicaRouter)
+
+Usa dois bancos SQLite em arquivo: o primário e a "réplica", com dados
+diferentes para identificar de onde cada leitura veio.
+
+Testa:
+- Métodos marcados com @replica_read leem da réplica; o resto do primário
+- Escritas e leituras após flush na mesma transação ficam no primário
+- Objetos lidos da réplica não entram no mapa de identidade do primário
+- Fixação no primário após escritas confirmadas pelo usuário
+- Geradores marcados apenas enquanto executam
+"""
+
+import pytest
+from flask import Flask
+
+from config import TestConfig
+from models import db, User
+from services.read_replica import ReadReplicaRouter, replica_read
+from services.report_service import ReportService
+
+
+@pytest.fixture
+def replica_app(tmp_path):
+    """Aplicação com primário e réplica; 1 usuário no primário e 3 na réplica"""
+    app = Flask(__name__)
+    app.config.from_object(TestConfig)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'primary.db'}"
+    app.config['SQLALCHEMY_BINDS'] = {'replica': f"sqlite:///{tmp_path / 'replica.db'}"}
+    db.init_app(app)
+
+    with app.app_context():
+        db.create_all()
+        db.metadata.create_all(db.engines['replica'])
+        db.session.add(make_user(0))
+        db.session.commit()
+        with db.engines['replica'].begin() as connection:
+            connection.execute(User.__table__.insert(), [vars_of(make_user(index)) for index in range(1, 4)])
+
+        yield app
+
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+    # init_app registra um metadata vazio por bind; sem ele o drop_all da aplicação de testes falharia
+    db.metadatas.pop('replica', None)
+
+
+def make_user(index):
+    return User(email=f'replica{index}@example.com', nome=f'Usuário {index}', cpf=f'{index:011d}',
+                phone='11999999999', roles='cliente', password_hash='-')
+
+
+def vars_of(user):
+    return {column.name: getattr(user, column.key) for column in User.__table__.columns
+            if getattr(user, column.key) is not None}
+
+
+@replica_read
+def count_users():
+    return User.query.count()
+
+
+class TestRouting:
+    """Escolha do banco por consulta"""
+
+    def test_marked_reads_use_replica(self, replica_app):
+        assert count_users() == 3
+        assert ReportService.get_users_report_data()['total_usuarios'] == 3
+        assert User.query.count() == 1  # Não marcado: primário
+
+    def test_writes_pin_transaction_to_primary(self, replica_app):
+        @replica_read
+        def create_and_count():
+            db.session.add(make_user(9))
+            db.session.flush()
+            return User.query.count()
+
+        assert create_and_count() == 2  # Flush no primário e leitura da mesma transação
+        db.session.commit()
+        assert count_users() == 3  # Fora de requisição não há fixação
+
+    def test_replica_objects_stay_out_of_primary_session(self, replica_app):
+        @replica_read
+        def load_user(user_id):
+            return User.query.get(user_id)
+
+        replica_user = load_user(1)
+
+        assert replica_user.email == 'replica1@example.com'
+        assert replica_user not in db.session
+        assert User.query.get(1).email == 'replica0@example.com'
+        assert db.session.get(User, 1) is not replica_user
+
+    def test_without_replica_everything_uses_primary(self, app, db_session, test_user):
+        assert count_users() == User.query.count() == 1
+
+
+class TestReadYourWrites:
+    """Fixação do usuário no primário"""
+
+    def test_commit_pins_user_in_request(self, replica_app):
+        with replica_app.test_request_context('/'):
+            assert count_users() == 3
+            db.session.add(make_user(5))
+            db.session.commit()
+
+            assert ReadReplicaRouter.is_pinned()
+            assert count_users() == 2
+
+        with replica_app.test_request_context('/'):
+            assert not ReadReplicaRouter.is_pinned()  # Outra sessão (outro usuário)
+            assert count_users() == 3
+
+    def test_pin_expires(self, replica_app):
+        replica_app.config['REPLICA_PIN_SECONDS'] = 0
+        with replica_app.test_request_context('/'):
+            db.session.add(make_user(6))
+            db.session.commit()
+
+            assert count_users() == 3
+
+
+class TestGenerators:
+    """Exportações em fluxo"""
+
+    def test_flag_only_while_generator_runs(self, replica_app):
+        seen = []
+
+        for chunk in ReportService.stream_csv('usuarios', batch_size=1):
+            seen.append((chunk, ReadReplicaRouter.is_reading()))
+
+        body = b''.join(chunk for chunk, _ in seen).decode('utf-8-sig')
+        assert body.count('replica') == 3 and 'replica0@' not in body
+        assert not any(reading for _, reading in seen)
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3.11
+# -*- coding: utf-8 -*-
+
+"""
+Testes para a exportação de relatórios em fluxo (ReportService)
+
+Testa:
+- CSV gerado em blocos, com progresso por número de linhas
+- XLSX escrito em arquivo no modo constant_memory
+- Teto de memória independente do número de linhas exportadas
+"""
+
+import pytest
+import tracemalloc
+import zipfile
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from models import db, Transaction
+from services.report_service import ReportService
+
+MEMORY_CEILING = 4 * 1024 * 1024  # bytes
+
+
+@pytest.fixture
+def transactions(app, db_session, test_user):
+    """Insere n transações do test_user (uma por minuto a partir de 2026-01-01)"""
+    def insert(count):
+        start = datetime(2026, 1, 1)
+        db_session.execute(Transaction.__table__.insert(), [{
+            'transaction_id': f'TX{index:08d}',
+            'user_id': test_user.id,
+            'type': 'deposito' if index % 2 else 'taxa_sistema',
+            'amount': Decimal('10.50'),
+            'description': f'Transação {index}',
+            'created_at': start + timedelta(minutes=index),
+        } for index in range(count)])
+        db_session.commit()
+
+    yield insert
+    Transaction.query.delete()
+    db_session.commit()
+
+
+def peak_memory(consume) -> int:
+    tracemalloc.start()
+    try:
+        consume()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+class TestCsvExport:
+    """Blocos de CSV"""
+
+    def test_chunks_and_progress(self, transactions):
+        """Cabeçalho + um bloco a cada batch_size linhas; progresso por bloco"""
+        transactions(2500)
+        progress = []
+
+        chunks = list(ReportService.stream_csv('financeiro', batch_size=1000, progress=progress.append))
+        lines = b''.join(chunks).decode('utf-8-sig').splitlines()
+
+        assert len(chunks) == 4
+        assert progress == [1000, 2000, 2500]
+        assert len(lines) == 2501
+        assert lines[0].startswith('ID;Código;Tipo;Valor')
+        assert 'TX00002499' in lines[1]  # Mais recentes primeiro
+
+    def test_filters_by_period(self, transactions):
+        """Mesmos filtros dos relatórios (datas com o dia final incluído)"""
+        transactions(3000)
+        day = datetime(2026, 1, 2).date()
+
+        rows = list(ReportService.iter_export_rows('financeiro', {'start_date': day, 'end_date': day}))
+
+        assert len(rows) == 1440
+
+
+class TestXlsxExport:
+    """Planilha em arquivo"""
+
+    def test_constant_memory_file(self, transactions, tmp_path):
+        """Todas as linhas gravadas no arquivo informado"""
+        transactions(1500)
+
+        path, rows = ReportService.export_to_xlsx_file('financeiro', path=str(tmp_path / 'financeiro.xlsx'),
+                                                       batch_size=500)
+
+        with zipfile.ZipFile(path) as workbook:
+            sheet = workbook.read('xl/worksheets/sheet1.xml').decode('utf-8')
+        assert rows == 1500
+        assert sheet.count('<row ') == 1501
+        assert 'TX00001499' in sheet  # Texto em linha (sem tabela de strings compartilhadas)
+
+
+class TestMemoryCeiling:
+    """Memória não cresce com o tamanho do relatório"""
+
+    def test_csv_and_xlsx_stay_under_ceiling(self, transactions, tmp_path):
+        transactions(20000)
+
+        csv_peak = peak_memory(lambda: sum(len(chunk) for chunk in
+                                           ReportService.stream_csv('financeiro', batch_size=500)))
+        xlsx_peak = peak_memory(lambda: ReportService.export_to_xlsx_file(
+            'financeiro', path=str(tmp_path / 'grande.xlsx'), batch_size=500))
+
+        assert csv_peak < MEMORY_CEILING
+        assert xlsx_peak < MEMORY_CEILING
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3.11
+# -*- coding: utf-8 -*-
+
+"""
+Testes para a geração de relatórios em segundo plano (ReportJobService)
+
+Testa:
+- Geração do arquivo e reaproveitamento por hash dos parâmetros
+- Expiração do arquivo (TTL) e nova geração
+- Enfileiramento no pool de workers sem gerar na requisição
+- Jobs órfãos (worker encerrado) despachados de novo ou marcados como falha
+- Falha registrada no job sem deixar arquivo parcial
+"""
+
+import os
+import pytest
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from models import db, ReportJob, Transaction
+from services.report_job_service import ReportJobService
+from services.report_service import ReportService
+
+
+@pytest.fixture
+def jobs(app, db_session, test_user, tmp_path):
+    """Diretório de arquivos temporário e 30 transações do test_user"""
+    app.config['REPORT_ARTIFACT_DIR'] = str(tmp_path)
+    db_session.execute(Transaction.__table__.insert(), [{
+        'transaction_id': f'TXJ{index:06d}',
+        'user_id': test_user.id,
+        'type': 'deposito',
+        'amount': Decimal('25.00'),
+        'description': f'Depósito {index}',
+        'created_at': datetime(2026, 2, 1) + timedelta(hours=index),
+    } for index in range(30)])
+    db_session.commit()
+
+    yield ReportJobService
+
+    app.config.pop('REPORT_ARTIFACT_DIR', None)
+    ReportJob.query.delete()
+    Transaction.query.delete()
+    db_session.commit()
+
+
+class TestGeneration:
+    """Arquivos gerados e reaproveitados"""
+
+    def test_generates_and_reuses_by_params(self, jobs, tmp_path):
+        """Mesmos filtros (em qualquer forma) reaproveitam o arquivo; outros geram novo job"""
+        job = jobs.enqueue('financeiro', 'csv', {'start_date': '2026-02-01', 'status_filter': 'todos'})
+
+        assert job.status == 'done'
+        assert job.row_count == 30
+        assert os.path.dirname(job.artifact_path) == str(tmp_path)
+        assert open(job.artifact_path, 'rb').read().decode('utf-8-sig').count('\n') == 31
+
+        same = jobs.enqueue('financeiro', 'csv', {'start_date': datetime(2026, 2, 1).date(), 'user_type': ''})
+        other = jobs.enqueue('financeiro', 'xlsx', {'start_date': '2026-02-01'})
+
+        assert same.id == job.id
+        assert other.id != job.id and other.status == 'done'
+        assert ReportJob.query.count() == 2
+
+    def test_expired_artifact_is_regenerated(self, jobs):
+        """Depois do TTL o job antigo expira e um novo arquivo é gerado"""
+        job = jobs.enqueue('usuarios', 'pdf')
+        job.expires_at = datetime.utcnow() - timedelta(seconds=1)
+        db.session.commit()
+
+        fresh = jobs.enqueue('usuarios', 'pdf')
+
+        assert fresh.id != job.id
+        assert db.session.get(ReportJob, job.id).status == 'expired'
+        assert jobs.get_artifact(job.id) is None
+        assert os.path.exists(jobs.get_artifact(fresh.id).artifact_path)
+
+    def test_invalid_request(self, jobs):
+        with pytest.raises(ValueError):
+            jobs.enqueue('financeiro', 'pdf')
+        with pytest.raises(ValueError):
+            jobs.enqueue('inexistente', 'csv')
+
+
+class TestDispatch:
+    """Execução fora da requisição"""
+
+    def test_async_enqueue_only_submits(self, jobs, app):
+        """Com o pool ativo, o pedido apenas cria o job; o worker gera depois"""
+        class RecordingPool:
+            def __init__(self):
+                self.submitted = []
+
+            def submit(self, fn, *args):
+                self.submitted.append(args)
+
+        pool = RecordingPool()
+        app.config['REPORT_JOB_ASYNC'] = True
+        ReportJobService._executor = pool
+        try:
+            job = jobs.enqueue('convites', 'csv')
+            duplicate = jobs.enqueue('convites', 'csv')
+        finally:
+            ReportJobService._executor = None
+            app.config['REPORT_JOB_ASYNC'] = False
+
+        assert (job.status, duplicate.id) == ('queued', job.id)
+        assert pool.submitted == [(job.id,)]
+
+        assert jobs.run_job(job.id).status == 'done'
+
+    def test_failure_is_recorded(self, jobs, tmp_path, monkeypatch):
+        def broken(*args, **kwargs):
+            yield b'ID\n'
+            raise RuntimeError('banco indisponível')
+
+        monkeypatch.setattr(ReportService, 'stream_csv', broken)
+
+        job = jobs.enqueue('financeiro', 'csv')
+
+        assert job.status == 'failed'
+        assert 'banco indisponível' in job.error
+        assert os.listdir(tmp_path) == []
+
+
+class TestOrphans:
+    """Jobs de workers que pararam de dar sinal de vida"""
+
+    @staticmethod
+    def add_job(report_type, fmt, status, heartbeat_age):
+        job = ReportJob(
+            param_hash=ReportJobService.param_hash(report_type, fmt, {}), report_type=report_type,
+            format=fmt, params='{}', status=status, worker_id='outro-host:1:abcd1234',
+            heartbeat_at=datetime.utcnow() - heartbeat_age
+        )
+        db.session.add(job)
+        db.session.commit()
+        return job
+
+    def test_orphaned_queued_job_is_redispatched(self, jobs):
+        """Job enfileirado por um worker encerrado é assumido e gerado"""
+        orphan = self.add_job('financeiro', 'csv', 'queued', timedelta(minutes=10))
+
+        job = jobs.enqueue('financeiro', 'csv')
+
+        assert job.id == orphan.id
+        assert job.status == 'done' and job.row_count == 30
+        assert job.worker_id == jobs.worker_id()
+
+    def test_orphaned_running_job_fails_and_is_not_reused(self, jobs):
+        """Job em execução sem sinal de vida vira falha; o pedido gera um novo"""
+        orphan = self.add_job('convites', 'csv', 'running', timedelta(minutes=10))
+
+        job = jobs.enqueue('convites', 'csv')
+
+        assert job.id != orphan.id and job.status == 'done'
+        db.session.refresh(orphan)
+        assert orphan.status == 'failed'
+        assert 'worker encerrado' in orphan.error
+
+    def test_live_job_is_reused_after_heartbeat(self, jobs, app):
+        """Heartbeat mantém reaproveitáveis os jobs deste worker ainda na fila"""
+        class RecordingPool:
+            def submit(self, fn, *args):
+                pass
+
+        app.config['REPORT_JOB_ASYNC'] = True
+        ReportJobService._executor = RecordingPool()
+        try:
+            job = jobs.enqueue('usuarios', 'csv')
+            job.heartbeat_at = datetime.utcnow() - timedelta(minutes=1, seconds=50)
+            db.session.commit()
+
+            assert jobs.heartbeat() == 1
+            assert jobs.enqueue('usuarios', 'csv').id == job.id
+        finally:
+            ReportJobService._executor = None
+            app.config['REPORT_JOB_ASYNC'] = False
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3.11
+# -*- coding: utf-8 -*-
+
+"""
+Testes para o PDF paginado em fluxo (ReportService.export_to_pdf_file)
+
+Testa:
+- Todas as linhas no PDF (sem o limite antigo de 50), cabeçalho em cada página
+- Estrutura do arquivo (xref com offsets válidos)
+- Teto de memória independente do número de linhas
+- Arquivo removido quando a geração falha
+"""
+
+import pytest
+import re
+import tracemalloc
+import zlib
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from models import Order
+from services.report_service import ReportService
+
+MEMORY_CEILING = 4 * 1024 * 1024  # bytes
+
+
+@pytest.fixture
+def orders(app, db_session, test_user):
+    """Insere n ordens do test_user (uma por minuto a partir de 2026-01-01)"""
+    def insert(count):
+        db_session.execute(Order.__table__.insert(), [{
+            'client_id': test_user.id,
+            'title': f'Serviço {index}',
+            'description': 'Descrição',
+            'value': Decimal('10.00'),
+            'status': 'concluida',
+            'created_at': datetime(2026, 1, 1) + timedelta(minutes=index),
+            'service_deadline': datetime(2026, 4, 1),
+        } for index in range(count)])
+        db_session.commit()
+
+    yield insert
+    Order.query.delete()
+    db_session.commit()
+
+
+def page_texts(content):
+    """Conteúdo descompactado de cada página, na ordem do arquivo"""
+    return [zlib.decompress(stream).decode('cp1252')
+            for stream in re.findall(rb'stream\n(.*?)\nendstream', content, re.S)]
+
+
+class TestPdfContent:
+    """Linhas e páginas"""
+
+    def test_all_rows_across_pages(self, orders, tmp_path):
+        orders(300)
+        progress = []
+
+        path, rows = ReportService.export_to_pdf_file('contratos', path=str(tmp_path / 'contratos.pdf'),
+                                                      batch_size=100, progress=progress.append)
+        pages = page_texts(open(path, 'rb').read())
+        body = ''.join(pages)
+
+        assert rows == 300
+        assert progress == [100, 200, 300, 300]
+        assert len(pages) > 1
+        assert all('(Título)' in page for page in pages)  # Cabeçalho repetido
+        assert '(Total de Contratos:)' in pages[0] and '(300)' in pages[0]
+        assert body.count('(R$ 10.00)') == 300
+        assert f'(Página {len(pages)})' in pages[-1]
+
+    def test_xref_offsets(self, orders, tmp_path):
+        orders(60)
+
+        path, _ = ReportService.export_to_pdf_file('usuarios', path=str(tmp_path / 'usuarios.pdf'))
+        content = open(path, 'rb').read()
+        xref = content[int(re.search(rb'startxref\n(\d+)', content).group(1)):]
+        offsets = [int(offset) for offset in re.findall(rb'(\d{10}) 00000 n', xref)]
+
+        assert content.startswith(b'%PDF-1.4') and content.rstrip().endswith(b'%%EOF')
+        assert all(re.match(rb'\d+ 0 obj', content[offset:offset + 12]) for offset in offsets)
+
+    def test_legacy_export_has_every_row(self, orders):
+        """export_contracts_to_pdf não corta mais em 50 contratos"""
+        orders(120)
+        data = ReportService.get_contracts_report_data()
+
+        body = ''.join(page_texts(ReportService.export_contracts_to_pdf(data)))
+
+        assert body.count('(R$ 10.00)') == 120
+        assert 'Mostrando apenas' not in body
+
+
+class TestPdfResources:
+    """Memória e falhas"""
+
+    def test_memory_ceiling(self, orders, tmp_path):
+        orders(6000)
+
+        tracemalloc.start()
+        try:
+            _, rows = ReportService.export_to_pdf_file('contratos', path=str(tmp_path / 'grande.pdf'),
+                                                       batch_size=500)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        assert rows == 6000
+        assert peak < MEMORY_CEILING
+
+    def test_failure_removes_file(self, orders, tmp_path, monkeypatch):
+        orders(10)
+        path = tmp_path / 'falha.pdf'
+        monkeypatch.setattr(ReportService, '_pdf_cells', lambda report_type, row: 1 / 0)
+
+        with pytest.raises(ZeroDivisionError):
+            ReportService.export_to_pdf_file('contratos', path=str(path))
+
+        assert not path.exists()
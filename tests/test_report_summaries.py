@@ -0,0 +1,109 @@
+#!/usr/bin/env python3.11
+# -*- coding: utf-8 -*-
+
+"""
+Testes para os resumos de relatórios agregados no banco (ReportService)
+
+Testa:
+- Totais, estatísticas por status/tipo e por mês calculados com GROUP BY
+- Linhas de detalhe limitadas a uma página
+- Consultas de agregação sem carregar todas as linhas
+"""
+
+import pytest
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from models import db, Order, Transaction
+from services.report_service import ReportService
+
+
+@pytest.fixture
+def report_rows(app, db_session, test_user, test_provider):
+    """120 ordens e 90 transações distribuídas entre janeiro e março de 2026"""
+    db_session.execute(Order.__table__.insert(), [{
+        'client_id': test_user.id,
+        'provider_id': test_provider.id if index % 2 else None,
+        'title': f'Serviço {index}',
+        'description': 'Descrição',
+        'value': Decimal('100.00') if index % 3 else Decimal('40.00'),
+        'status': 'concluida' if index % 3 else 'disputada',
+        'created_at': datetime(2026, 1, 1) + timedelta(hours=12 * index),
+        'service_deadline': datetime(2026, 4, 1),
+    } for index in range(120)])
+    db_session.execute(Transaction.__table__.insert(), [{
+        'transaction_id': f'TXS{index:06d}',
+        'user_id': test_provider.id if index % 2 else test_user.id,
+        'type': 'taxa_sistema' if index % 3 == 0 else 'deposito',
+        'amount': Decimal('-5.00') if index % 3 == 0 else Decimal('20.00'),
+        'description': f'Transação {index}',
+        'created_at': datetime(2026, 1, 1) + timedelta(hours=12 * index),
+    } for index in range(90)])
+    db_session.commit()
+
+    yield
+
+    Transaction.query.delete()
+    Order.query.delete()
+    db_session.commit()
+
+
+class TestContractsSummary:
+    """Relatório de contratos"""
+
+    def test_summary_covers_all_rows_detail_is_one_page(self, report_rows, sql_statements):
+        sql_statements.clear()
+        data = ReportService.get_contracts_report_data()
+        order_selects = [s for s in sql_statements if 'FROM orders' in s]
+
+        assert data['total_contratos'] == 120
+        assert data['valor_total'] == Decimal('100.00') * 80 + Decimal('40.00') * 40
+        assert data['status_stats']['disputada']['count'] == 40
+        assert data['status_stats']['concluida']['value'] == Decimal('8000.00')
+        assert list(data['monthly_stats']) == ['2026-03', '2026-02', '2026-01']
+        assert data['monthly_stats']['2026-01']['count'] == 62
+
+        assert len(data['orders']) == ReportService.REPORT_PAGE_SIZE
+        assert data['pagination'] == {'page': 1, 'per_page': 50, 'total': 120, 'pages': 3}
+        assert all('GROUP BY' in s or 'LIMIT' in s for s in order_selects)
+
+    def test_filters_and_last_page(self, report_rows):
+        data = ReportService.get_contracts_report_data(status_filter='disputada', page=2, per_page=30)
+
+        assert data['total_contratos'] == 40
+        assert len(data['orders']) == 10
+        assert {order.status for order in data['orders']} == {'disputada'}
+
+
+class TestUsersSummary:
+    """Relatório de usuários"""
+
+    def test_counts_balances_and_volume(self, report_rows):
+        data = ReportService.get_users_report_data()
+
+        assert (data['total_usuarios'], data['usuarios_ativos'], data['usuarios_inativos']) == (2, 2, 0)
+        assert (data['clientes'], data['prestadores'], data['usuarios_dual']) == (1, 1, 0)
+        assert data['saldo_total'] == Decimal('150.00')
+        assert data['volume_transacoes_total'] == Decimal('5.00') * 30 + Decimal('20.00') * 60
+
+        only_providers = ReportService.get_users_report_data(user_type='prestador')
+        assert only_providers['total_usuarios'] == 1
+        assert [user.nome for user in only_providers['users']] == ['Test Provider']
+
+
+class TestFinancialSummary:
+    """Relatório financeiro"""
+
+    def test_fees_and_monthly_revenue(self, report_rows):
+        data = ReportService.get_financial_report_data(per_page=10)
+
+        assert data['total_transacoes'] == 90
+        assert data['transaction_stats']['taxa_sistema'] == {'count': 30, 'total_amount': Decimal('150.00')}
+        assert data['receita_taxas'] == Decimal('150.00')
+        assert data['volume_total'] == Decimal('1350.00')
+        january = data['monthly_stats']['2026-01']
+        assert (january['count'], january['receita']) == (62, Decimal('105.00'))
+        assert data['top_users'][0].transaction_count == 45
+
+        assert len(data['transactions']) == 10
+        assert data['transactions'][0].transaction_id == 'TXS000089'
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3.11
+# -*- coding: utf-8 -*-
+
+"""
+Testes para os intervalos semiabertos de consultas (services/time_window.py)
+
+Testa:
+- Datas como dias inteiros e datetimes com fim exclusivo
+- Filtros de alertas e métricas atendidos pelos índices compostos de
+  proposal_audit_logs (EXPLAIN QUERY PLAN no SQLite)
+"""
+
+import pytest
+from datetime import datetime, date, timedelta
+from sqlalchemy import func
+
+from models import db, ProposalAuditLog
+from services.time_window import in_period, on_day, to_end
+
+DAY = date(2026, 3, 10)
+
+
+def query_plan(query) -> str:
+    """Plano do SQLite para uma consulta do ORM"""
+    compiled = query.statement.compile(dialect=db.engine.dialect)
+    params = tuple(compiled.params[name] for name in compiled.positiontup)
+    rows = db.session.connection().exec_driver_sql('EXPLAIN QUERY PLAN ' + str(compiled), params).all()
+    return ' | '.join(str(row[-1]) for row in rows)
+
+
+@pytest.fixture
+def audit_rows(app, db_session):
+    """Ações em volta de DAY (véspera 23:59, dia 00:00 e 23:59, dia seguinte 00:00)"""
+    moments = [
+        datetime(2026, 3, 9, 23, 59), datetime(2026, 3, 10, 0, 0),
+        datetime(2026, 3, 10, 23, 59, 59), datetime(2026, 3, 11, 0, 0),
+    ]
+    for index, moment in enumerate(moments):
+        db_session.add(ProposalAuditLog(
+            proposal_id=1, invite_id=1, action_type='created', actor_user_id=index,
+            actor_role='prestador', created_at=moment
+        ))
+    db_session.commit()
+    yield
+    ProposalAuditLog.query.delete()
+    db_session.commit()
+
+
+class TestPeriods:
+    """Semântica dos limites"""
+
+    def test_date_and_datetime_bounds(self, audit_rows):
+        """Data inclui o dia inteiro; datetime final é exclusivo; vazio não filtra"""
+        def count(*bounds):
+            return ProposalAuditLog.query.filter(in_period(ProposalAuditLog.created_at, *bounds)).count()
+
+        assert ProposalAuditLog.query.filter(on_day(ProposalAuditLog.created_at, DAY)).count() == 2
+        assert count(DAY, DAY + timedelta(days=1)) == 3
+        assert count(datetime(2026, 3, 10), datetime(2026, 3, 11)) == 2
+        assert count(None, DAY) == 3
+        assert count(None, None) == 4
+        assert to_end(DAY) == datetime(2026, 3, 11)
+
+
+class TestIndexUsage:
+    """Filtros atendidos pelos índices compostos"""
+
+    def test_action_period_uses_index(self, app, db_session):
+        """Ação + dia: busca por intervalo em (action_type, created_at)"""
+        query = ProposalAuditLog.query.filter(
+            ProposalAuditLog.action_type == 'created',
+            on_day(ProposalAuditLog.created_at, DAY)
+        )
+
+        plan = query_plan(query)
+
+        assert 'idx_proposal_audit_logs_action_created' in plan
+        assert 'created_at>' in plan and 'created_at<' in plan
+
+    def test_actor_period_uses_index(self, app, db_session):
+        """Usuário + período: busca por intervalo em (actor_user_id, created_at)"""
+        query = ProposalAuditLog.query.filter(
+            ProposalAuditLog.actor_user_id == 7,
+            in_period(ProposalAuditLog.created_at, DAY - timedelta(days=30), DAY)
+        )
+
+        plan = query_plan(query)
+
+        assert 'idx_proposal_audit_logs_actor_created' in plan
+        assert 'created_at>' in plan
+
+    def test_date_function_cannot_range_scan(self, app, db_session):
+        """Comparação com func.date só usa a primeira coluna do índice"""
+        query = ProposalAuditLog.query.filter(
+            ProposalAuditLog.action_type == 'created',
+            func.date(ProposalAuditLog.created_at) == DAY
+        )
+
+        assert 'created_at>' not in query_plan(query)
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3.11
+# -*- coding: utf-8 -*-
+
+"""
+Testes para os rollups de volume de transações (TransactionVolumeRollupService)
+
+Testa:
+- Consolidação incremental por marca d'água e janela de acomodação
+- Totais e séries iguais aos da tabela bruta para qualquer intervalo
+  (dias e horas completos, frações de hora e transações não consolidadas)
+- Lote descartado quando outro processo avança a marca d'água
+- Dashboard administrativa lendo os rollups
+"""
+
+import pytest
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from models import db, Transaction, TransactionVolumeHourly, TransactionVolumeDaily, RollupWatermark
+from services.admin_service import AdminService
+from services.transaction_volume_rollup_service import TransactionVolumeRollupService
+
+TYPES = ('taxa_sistema', 'deposito', 'saque', 'escrow_bloqueio')
+
+
+@pytest.fixture
+def ledger(db_session, test_user):
+    """Insere transações a cada 37 minutos a partir de 2026-01-30 22:10; devolve as linhas inseridas"""
+    rows = []
+
+    def insert(count, start=datetime(2026, 1, 30, 22, 10)):
+        first = len(rows)
+        batch = [{
+            'transaction_id': f'TXV{index:06d}',
+            'user_id': test_user.id,
+            'type': TYPES[index % 4],
+            'amount': Decimal('-7.30') if index % 4 == 2 else Decimal('3.15') + index,
+            'description': f'Transação {index}',
+            'created_at': start + timedelta(minutes=37 * (index - first)),
+        } for index in range(first, first + count)]
+        db_session.execute(Transaction.__table__.insert(), batch)
+        db_session.commit()
+        rows.extend(batch)
+        return batch
+
+    yield insert, rows
+
+    for model in (Transaction, TransactionVolumeHourly, TransactionVolumeDaily, RollupWatermark):
+        model.query.delete()
+    db_session.commit()
+
+
+def expected_totals(rows, start=None, end=None, key=lambda moment: None):
+    """Totais calculados em Python sobre as linhas inseridas ([start, end), datetimes)"""
+    totals = defaultdict(dict)
+    for row in rows:
+        if (start and row['created_at'] < start) or (end and row['created_at'] >= end):
+            continue
+        stats = totals[key(row['created_at'])].setdefault(
+            row['type'], {'count': 0, 'amount': Decimal('0'), 'volume': Decimal('0')})
+        stats['count'] += 1
+        stats['amount'] += row['amount']
+        stats['volume'] += abs(row['amount'])
+    return dict(totals)
+
+
+RANGES = (
+    (None, None),
+    (datetime(2026, 1, 31, 5, 20), datetime(2026, 2, 2, 14, 45)),  # Frações de hora nas pontas
+    (datetime(2026, 1, 31), datetime(2026, 2, 2)),  # Dias completos
+    (datetime(2026, 1, 31, 3), datetime(2026, 1, 31, 9)),  # Horas completas no mesmo dia
+    (datetime(2026, 2, 1, 10, 5), datetime(2026, 2, 1, 10, 50)),  # Menos de uma hora
+    (datetime(2026, 2, 1, 8, 30), None),
+)
+
+
+class TestRollUp:
+    """Consolidação incremental"""
+
+    def test_watermark_and_buckets(self, ledger):
+        insert, rows = ledger
+        insert(120)
+
+        assert TransactionVolumeRollupService.roll_up(batch_size=50) == 120
+        assert TransactionVolumeRollupService.get_watermark() == Transaction.query.order_by(
+            Transaction.id.desc()).first().id
+        assert sum(row.transaction_count for row in TransactionVolumeHourly.query) == 120
+        assert sum(row.transaction_count for row in TransactionVolumeDaily.query) == 120
+
+        day = TransactionVolumeDaily.query.filter_by(day=date(2026, 1, 31), type='saque').one()
+        assert day.total_amount == Decimal('-7.30') * day.transaction_count
+        assert day.total_volume == -day.total_amount
+
+        assert TransactionVolumeRollupService.roll_up() == 0
+
+        insert(10)
+        assert TransactionVolumeRollupService.roll_up() == 10
+        assert sum(row.transaction_count for row in TransactionVolumeDaily.query) == 130
+
+    def test_recent_rows_wait_for_settle_window(self, ledger, app):
+        insert, _ = ledger
+        insert(3, start=datetime.utcnow() - timedelta(minutes=10))
+
+        app.config['TRANSACTION_ROLLUP_SETTLE_SECONDS'] = 3600
+        try:
+            assert TransactionVolumeRollupService.roll_up() == 0
+        finally:
+            app.config.pop('TRANSACTION_ROLLUP_SETTLE_SECONDS')
+
+        assert TransactionVolumeRollupService.roll_up(now=datetime.utcnow() + timedelta(days=1)) == 3
+
+    def test_batch_discarded_when_watermark_moved(self, ledger, monkeypatch):
+        insert, _ = ledger
+        insert(10)
+        original = TransactionVolumeRollupService.get_watermark
+        monkeypatch.setattr(TransactionVolumeRollupService, 'get_watermark', staticmethod(lambda: 0))
+        db.session.add(RollupWatermark(name='transaction_volume', last_id=1))
+        db.session.commit()
+
+        assert TransactionVolumeRollupService.roll_up() == 0
+        assert TransactionVolumeHourly.query.count() == 0
+        assert original() == 1
+
+    def test_rebuild(self, ledger):
+        insert, _ = ledger
+        insert(30)
+        TransactionVolumeRollupService.roll_up()
+        TransactionVolumeHourly.query.update({'transaction_count': 999})
+        db.session.commit()
+
+        assert TransactionVolumeRollupService.rebuild() == 30
+        assert sum(row.transaction_count for row in TransactionVolumeHourly.query) == 30
+
+
+class TestReads:
+    """Totais e séries iguais aos da tabela bruta"""
+
+    @pytest.mark.parametrize('rolled', [0, 70, 150])
+    def test_totals_match_raw(self, ledger, rolled):
+        """Nenhuma, parte (marca d'água no meio) ou todas as transações consolidadas"""
+        insert, rows = ledger
+        insert(150)
+        if rolled:
+            TransactionVolumeRollupService.roll_up(batch_size=32, now=rows[rolled - 1]['created_at'] + timedelta(minutes=2))
+        assert TransactionVolumeRollupService.get_watermark() == (rolled and Transaction.query.filter_by(
+            transaction_id=rows[rolled - 1]['transaction_id']).one().id)
+
+        for start, end in RANGES:
+            expected = expected_totals(rows, start, end).get(None, {})
+            assert TransactionVolumeRollupService.get_totals(start, end) == expected, (start, end)
+
+    def test_dates_include_whole_days(self, ledger):
+        insert, rows = ledger
+        insert(150)
+        TransactionVolumeRollupService.roll_up()
+
+        expected = expected_totals(rows, datetime(2026, 1, 31), datetime(2026, 2, 2))[None]
+        assert TransactionVolumeRollupService.get_totals(date(2026, 1, 31), date(2026, 2, 1)) == expected
+        assert TransactionVolumeRollupService.get_totals(types=['saque']) == {
+            'saque': expected_totals(rows)[None]['saque']
+        }
+
+    @pytest.mark.parametrize('granularity, key', [
+        ('hour', lambda moment: moment.strftime('%Y-%m-%d %H:00')),
+        ('day', lambda moment: moment.strftime('%Y-%m-%d')),
+        ('month', lambda moment: moment.strftime('%Y-%m')),
+    ])
+    def test_series_match_raw(self, ledger, granularity, key):
+        insert, rows = ledger
+        insert(100)
+        TransactionVolumeRollupService.roll_up()
+        insert(20, start=datetime(2026, 2, 2, 6, 3))  # Ainda não consolidadas
+
+        start, end = RANGES[1]
+        series = TransactionVolumeRollupService.get_series(start, end, granularity)
+
+        assert series == expected_totals(rows, start, end, key)
+        assert list(series) == sorted(series)
+
+    def test_invalid_granularity(self):
+        with pytest.raises(ValueError):
+            TransactionVolumeRollupService.get_series(granularity='week')
+
+
+class TestDashboard:
+    """AdminService.get_dashboard_stats"""
+
+    def test_month_volumes(self, ledger):
+        insert, _ = ledger
+        now = datetime.utcnow()
+        insert(40, start=now.replace(day=1, hour=0, minute=5, second=0, microsecond=0))
+        TransactionVolumeRollupService.roll_up(now=now + timedelta(days=40))
+        insert(4, start=now - timedelta(minutes=5))
+
+        stats = AdminService.get_dashboard_stats()
+        rows = [{'type': row.type, 'amount': row.amount, 'created_at': row.created_at}
+                for row in Transaction.query]  # Inclui a criação da carteira do admin
+        month = expected_totals(rows, now.replace(day=1, hour=0, minute=0, second=0, microsecond=0))[None]
+
+        assert stats['transacoes_mes'] == sum(stats_type['count'] for stats_type in month.values())
+        assert stats['receita_mes'] == month['taxa_sistema']['amount']
+        assert stats['transacoes_com_taxa_mes'] == month['taxa_sistema']['count']
+        assert stats['taxas_totais'] == expected_totals(rows)[None]['taxa_sistema']['amount']
+        assert stats['volume_transacoes_mes'] == sum(stats_type['volume'] for stats_type in month.values())
+        assert stats['volume_mes_por_categoria']['saques']['count'] == month['saque']['count']
+        assert stats['volume_mes_por_categoria']['escrow']['volume'] == month['escrow_bloqueio']['volume']
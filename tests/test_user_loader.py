@@ -0,0 +1,102 @@
+#!/usr/bin/env python3.11
+# -*- coding: utf-8 -*-
+
+"""
+Testes para o UserLoader (mapa de identidade de usuários por requisição)
+
+Testa:
+- Carregamento em lote com uma única consulta
+- Reuso dentro da mesma requisição
+- Cache de papéis e descarte com forget() (via RoleService)
+"""
+
+import pytest
+
+from models import db, User
+from services.user_loader import UserLoader
+from services.role_service import RoleService
+
+
+@pytest.fixture
+def users(db_session):
+    """Cria cinco usuários e retorna seus ids"""
+    created = []
+    for i in range(5):
+        user = User(
+            email=f'loader{i}@example.com',
+            nome=f'Usuário {i}',
+            cpf=f'5550000000{i}',
+            phone=f'1190000000{i}',
+            roles='cliente,prestador' if i == 0 else 'cliente'
+        )
+        user.set_password('senha123')
+        db_session.add(user)
+        created.append(user)
+    db_session.commit()
+    return [user.id for user in created]
+
+
+class TestUserLoader:
+    """Testes do carregamento em lote"""
+
+    def test_get_many_uses_single_query(self, app, users, sql_statements):
+        """Vários ids são carregados com um único SELECT"""
+        with app.test_request_context():
+            db.session.expire_all()
+            sql_statements.clear()
+
+            loaded = UserLoader.get_many(users + [None, users[0]])
+
+            assert sorted(loaded) == sorted(users)
+            assert len(sql_statements) == 1
+
+    def test_get_reuses_loaded_users(self, app, users, sql_statements):
+        """Usuário já carregado na requisição não gera nova consulta"""
+        with app.test_request_context():
+            UserLoader.prime(users)
+            sql_statements.clear()
+
+            for user_id in users:
+                assert UserLoader.get(user_id).id == user_id
+
+            assert sql_statements == []
+
+    def test_missing_user_is_remembered(self, app, users, sql_statements):
+        """Id inexistente não é consultado de novo na mesma requisição"""
+        with app.test_request_context():
+            assert UserLoader.get(999999) is None
+            sql_statements.clear()
+
+            assert UserLoader.get(999999) is None
+            assert sql_statements == []
+
+    def test_roles_are_cached_and_forgotten(self, app, users):
+        """Papéis são lembrados até forget() ser chamado"""
+        with app.test_request_context():
+            assert RoleService.get_user_roles(users[0]) == ['cliente', 'prestador']
+
+            user = db.session.get(User, users[0])
+            user.roles = 'cliente'
+            db.session.commit()
+            assert RoleService.get_user_roles(users[0]) == ['cliente', 'prestador']
+
+            UserLoader.forget(users[0])
+            assert RoleService.get_user_roles(users[0]) == ['cliente']
+
+    def test_requests_do_not_share_users(self, app, users):
+        """Cada requisição tem seu próprio mapa"""
+        with app.test_request_context():
+            UserLoader.get(users[0])
+            first_store = UserLoader._store(UserLoader._USERS_ATTR)
+
+        with app.test_request_context():
+            assert UserLoader._store(UserLoader._USERS_ATTR) == {}
+            assert first_store
+
+    def test_outside_request_falls_back_to_query(self, app, users):
+        """Fora de requisição funciona sem mapa persistente"""
+        with app.app_context():
+            assert UserLoader.get(users[1]).nome == 'Usuário 1'
+            assert UserLoader.get_roles(users[1]) == ['cliente']
+            assert UserLoader._store(UserLoader._USERS_ATTR) is None
+
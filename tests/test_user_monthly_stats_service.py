@@ -0,0 +1,167 @@
+#!/usr/bin/env python3.11
+# -*- coding: utf-8 -*-
+
+"""
+Testes para a consolidação mensal por usuário (UserMonthlyStatsService)
+
+Testa:
+- Manutenção incremental a partir de ordens e transações
+- Transições de status em objetos expirados (após commit)
+- Reconstrução completa
+- Leitura para a dashboard com uma consulta
+"""
+
+import pytest
+from decimal import Decimal
+from datetime import datetime, timedelta
+
+from models import db, Order, Transaction, UserMonthlyStats
+from services.user_monthly_stats_service import UserMonthlyStatsService, month_start
+
+
+@pytest.fixture
+def parties(app, db_session, test_user, test_provider):
+    """IDs de cliente e prestador; limpa ordens e transações ao final"""
+    client_id, provider_id = test_user.id, test_provider.id
+    yield client_id, provider_id
+    Transaction.query.delete()
+    Order.query.delete()
+    UserMonthlyStats.query.delete()
+    db_session.commit()
+
+
+def create_order(session, client_id, provider_id, **kwargs):
+    values = dict(
+        client_id=client_id,
+        provider_id=provider_id,
+        title='Ordem',
+        description='Desc',
+        value=Decimal('100.00'),
+        status='aceita',
+        service_deadline=datetime.utcnow() + timedelta(days=7),
+    )
+    values.update(kwargs)
+    order = Order(**values)
+    session.add(order)
+    session.commit()
+    return order
+
+
+def stats_row(user_id, moment=None):
+    table = UserMonthlyStats.__table__
+    return db.session.execute(
+        db.select(table).where(
+            table.c.user_id == user_id,
+            table.c.month == month_start(moment or datetime.utcnow())
+        )
+    ).first()
+
+
+class TestIncrementalMaintenance:
+    """Rollup atualizado a cada flush"""
+
+    def test_new_order_counts_as_created(self, db_session, parties):
+        """Ordem nova conta como criada pelo cliente"""
+        client_id, provider_id = parties
+        create_order(db_session, client_id, provider_id)
+        create_order(db_session, client_id, provider_id)
+
+        assert stats_row(client_id).client_orders_created == 2
+
+    def test_completion_after_commit(self, db_session, parties):
+        """Conclusão de ordem já gravada (atributos expirados) atualiza ambos os lados"""
+        client_id, provider_id = parties
+        order = create_order(db_session, client_id, provider_id, accepted_at=datetime.utcnow())
+
+        order.status = 'concluida'
+        order.completed_at = datetime.utcnow()
+        db_session.commit()
+
+        client_row = stats_row(client_id)
+        provider_row = stats_row(provider_id)
+        assert client_row.client_orders_completed == 1
+        assert client_row.client_total_spent == Decimal('100.00')
+        assert provider_row.provider_orders_completed == 1
+        assert provider_row.provider_orders_accepted == 1
+
+    def test_reassigning_same_status_does_not_double_count(self, db_session, parties):
+        """Reatribuir o mesmo status não incrementa de novo"""
+        client_id, provider_id = parties
+        order = create_order(db_session, client_id, provider_id,
+                             status='concluida', completed_at=datetime.utcnow())
+
+        order.status = 'concluida'
+        db_session.commit()
+
+        assert stats_row(client_id).client_orders_completed == 1
+
+    def test_leaving_completed_status_decrements(self, db_session, parties):
+        """Ordem que deixa de estar concluída sai das estatísticas"""
+        client_id, provider_id = parties
+        order = create_order(db_session, client_id, provider_id,
+                             status='concluida', completed_at=datetime.utcnow())
+
+        order.status = 'disputada'
+        db_session.commit()
+
+        row = stats_row(client_id)
+        assert row.client_orders_completed == 0
+        assert row.client_total_spent == Decimal('0')
+
+    def test_receipt_transaction(self, db_session, parties):
+        """Recebimentos somam no total recebido; outros tipos não"""
+        _, provider_id = parties
+        db_session.add(Transaction(user_id=provider_id, type='recebimento',
+                                   amount=Decimal('80.00'), description='Pagamento'))
+        db_session.add(Transaction(user_id=provider_id, type='deposito',
+                                   amount=Decimal('500.00'), description='Depósito'))
+        db_session.commit()
+
+        assert stats_row(provider_id).provider_total_received == Decimal('80.00')
+
+
+class TestRebuildAndRead:
+    """Reconstrução e leitura para a dashboard"""
+
+    def test_rebuild_matches_incremental(self, db_session, parties):
+        """Reconstrução recupera os mesmos valores da manutenção incremental"""
+        client_id, provider_id = parties
+        create_order(db_session, client_id, provider_id,
+                     status='concluida', completed_at=datetime.utcnow(), accepted_at=datetime.utcnow())
+        create_order(db_session, client_id, provider_id)
+        expected = UserMonthlyStatsService.get_month_stats(client_id, 'cliente')
+
+        UserMonthlyStats.query.delete()
+        db_session.commit()
+        assert UserMonthlyStatsService.get_month_stats(client_id, 'cliente')['orders_created'] == 0
+
+        UserMonthlyStatsService.rebuild()
+
+        assert UserMonthlyStatsService.get_month_stats(client_id, 'cliente') == expected
+        assert UserMonthlyStatsService.get_month_stats(provider_id, 'prestador') == {
+            'orders_accepted': 1,
+            'orders_completed': 1,
+            'total_received': 0.0
+        }
+
+    def test_month_stats_is_single_query(self, db_session, parties, sql_statements):
+        """Leitura das estatísticas do mês é uma única consulta"""
+        client_id, provider_id = parties
+        create_order(db_session, client_id, provider_id)
+        sql_statements.clear()
+
+        stats = UserMonthlyStatsService.get_month_stats(client_id, 'cliente')
+
+        assert stats == {'orders_created': 1, 'orders_completed': 0, 'total_spent': 0.0}
+        assert len(sql_statements) == 1
+
+    def test_previous_month_is_separate(self, db_session, parties):
+        """Ordens de outro mês não entram no mês atual"""
+        client_id, provider_id = parties
+        last_month = datetime.utcnow().replace(day=1) - timedelta(days=1)
+        create_order(db_session, client_id, provider_id, created_at=last_month)
+
+        assert UserMonthlyStatsService.get_month_stats(client_id, 'cliente')['orders_created'] == 0
+        assert UserMonthlyStatsService.get_month_stats(
+            client_id, 'cliente', moment=last_month
+        )['orders_created'] == 1
@@ -11,6 +11,8 @@ import sys
 from datetime import datetime
 from typing import List, Dict, Optional
 
+from services.log_reader import tail
+
 def read_audit_logs(log_file: str = 'logs/audit.log') -> List[Dict]:
     """Lê e parseia os logs de auditoria"""
     logs = []
@@ -31,6 +33,16 @@ def read_audit_logs(log_file: str = 'logs/audit.log') -> List[Dict]:
     
     return logs
 
+def read_recent_audit_logs(limit: int, log_file: str = 'logs/audit.log') -> List[Dict]:
+    """Lê apenas as últimas `limit` entradas, a partir do final do arquivo"""
+    logs = []
+    for line in tail(log_file, limit, predicate=lambda l: ' - AUDIT - ' in l):
+        try:
+            logs.append(json.loads(line.split(' - AUDIT - ', 1)[1].strip()))
+        except json.JSONDecodeError:
+            continue
+    return logs
+
 def filter_logs(
     logs: List[Dict],
     operation: Optional[str] = None,
@@ -170,6 +182,13 @@ def main():
     if len(sys.argv) > 1:
         command = sys.argv[1]
         
+        if command == 'recent':
+            limit = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+            print(f"\n🕐 Últimos {limit} registros:")
+            for log in read_recent_audit_logs(limit):
+                display_log(log)
+            return
+        
         # Ler logs
         logs = read_audit_logs()
         
@@ -194,13 +213,6 @@ def main():
             for log in filtered[:10]:  # Mostrar primeiros 10
                 display_log(log)
         
-        elif command == 'recent':
-            limit = int(sys.argv[2]) if len(sys.argv) > 2 else 10
-            recent = sorted(logs, key=lambda x: x.get('timestamp', ''), reverse=True)[:limit]
-            print(f"\n🕐 Últimos {limit} registros:")
-            for log in recent:
-                display_log(log)
-        
         else:
             print("❌ Comando inválido")
             show_help()